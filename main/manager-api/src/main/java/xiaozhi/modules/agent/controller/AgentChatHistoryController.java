@@ -66,6 +66,21 @@ public class AgentChatHistoryController {
         return new Result<Boolean>().ok(result);
     }
 
+    /**
+     * 小智服务聊天批量上报请求
+     * <p>
+     * 小智服务将多条聊天记录合并为一次请求上报，减少HTTP往返次数。
+     *
+     * @param requests 聊天上报请求列表
+     * @return 上报成功的条数
+     */
+    @Operation(summary = "小智服务聊天批量上报请求")
+    @PostMapping("/report/batch")
+    public Result<Integer> uploadBatch(@RequestBody List<AgentChatHistoryReportDTO> requests) {
+        Integer result = agentChatHistoryBizService.reportBatch(requests);
+        return new Result<Integer>().ok(result);
+    }
+
     /**
      * 获取聊天记录下载链接
      * 
@@ -1,5 +1,7 @@
 package xiaozhi.modules.agent.service.biz;
 
+import java.util.List;
+
 import xiaozhi.modules.agent.dto.AgentChatHistoryReportDTO;
 
 /**
@@ -19,4 +21,12 @@ public interface AgentChatHistoryBizService {
      * @return 上传结果，true表示成功，false表示失败
      */
     Boolean report(AgentChatHistoryReportDTO agentChatHistoryReportDTO);
+
+    /**
+     * 聊天批量上报方法，单条失败不影响其他记录
+     *
+     * @param reports 聊天上报请求列表
+     * @return 上报成功的条数
+     */
+    Integer reportBatch(List<AgentChatHistoryReportDTO> reports);
 }
@@ -2,8 +2,11 @@ package xiaozhi.modules.agent.service.biz.impl;
 
 import java.util.Base64;
 import java.util.Date;
+import java.util.List;
 import java.util.Objects;
 
+import org.apache.commons.lang3.StringUtils;
+import org.springframework.aop.framework.AopContext;
 import org.springframework.stereotype.Service;
 import org.springframework.transaction.annotation.Transactional;
 
@@ -86,6 +89,36 @@ public class AgentChatHistoryBizServiceImpl implements AgentChatHistoryBizServic
         return Boolean.TRUE;
     }
 
+    /**
+     * 批量处理聊天记录上报，逐条保存，单条失败只记录日志
+     *
+     * @param reports 聊天上报请求列表
+     * @return 上报成功的条数
+     */
+    @Override
+    public Integer reportBatch(List<AgentChatHistoryReportDTO> reports) {
+        int success = 0;
+        if (reports == null) {
+            return success;
+        }
+        // 通过Spring代理调用，保证每条记录的 report 事务生效
+        AgentChatHistoryBizService self = (AgentChatHistoryBizService) AopContext.currentProxy();
+        for (AgentChatHistoryReportDTO report : reports) {
+            if (report == null || StringUtils.isAnyBlank(report.getMacAddress(), report.getSessionId(),
+                    report.getContent()) || report.getChatType() == null) {
+                continue;
+            }
+            try {
+                if (Boolean.TRUE.equals(self.report(report))) {
+                    success++;
+                }
+            } catch (Exception e) {
+                log.error("聊天记录批量上报失败: macAddress={}", report.getMacAddress(), e);
+            }
+        }
+        return success;
+    }
+
     /**
      * base64解码report.getOpusDataBase64(),存入ai_agent_chat_audio表
      */
@@ -10,6 +10,13 @@ from core.http_server import SimpleHttpServer
 from core.websocket_server import WebSocketServer
 from core.utils.util import check_ffmpeg_installed
 from core.utils.gc_manager import get_gc_manager
+from core.providers.tools.server_mcp import get_server_mcp_pool
+from core.utils.report_pipeline import get_report_pipeline
+from core.utils.provider_pool import get_provider_pool
+from core.utils.tts_http import close_tts_http_runtime
+from core.utils.llm_http import close_llm_http_runtime
+from core.utils.asr_session_pool import get_asr_session_pool
+from core.utils.audio_assets import get_audio_asset_bundle
 
 TAG = __name__
 logger = setup_logging()
@@ -68,6 +75,18 @@ async def main():
     gc_manager = get_gc_manager(interval_seconds=300)
     await gc_manager.start()
 
+    # 加载预编码的提示音资源包，源文件有变化的资源重新编码
+    bundle = get_audio_asset_bundle()
+    if bundle.enabled:
+        try:
+            bundle_result = await asyncio.to_thread(bundle.build)
+            logger.bind(tag=TAG).info(
+                f"音频资源包加载完成: {bundle_result['total']} 个资源，"
+                f"重新编码 {bundle_result['encoded']} 个，耗时 {bundle_result['elapsed_ms']}ms"
+            )
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"加载音频资源包失败: {e}")
+
     # 启动 WebSocket 服务器
     ws_server = WebSocketServer(config)
     ws_task = asyncio.create_task(ws_server.start())
@@ -88,6 +107,12 @@ async def main():
         get_local_ip(),
         port,
     )
+    if config.get("metrics", {}).get("enable", False):
+        logger.bind(tag=TAG).info(
+            "运行指标接口是\thttp://{}:{}/metrics",
+            get_local_ip(),
+            port,
+        )
     mcp_endpoint = config.get("mcp_endpoint", None)
     if mcp_endpoint is not None and "你" not in mcp_endpoint:
         # 校验MCP接入点格式
@@ -130,6 +155,30 @@ async def main():
         # 停止全局GC管理器
         await gc_manager.stop()
 
+        # 关闭共享MCP服务
+        try:
+            await asyncio.wait_for(get_server_mcp_pool().close(), timeout=5.0)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"关闭共享MCP服务失败: {e}")
+
+        # 关闭预热的流式ASR连接
+        try:
+            await asyncio.wait_for(get_asr_session_pool().close(), timeout=5.0)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"关闭流式ASR会话池失败: {e}")
+
+        # 发送剩余的聊天记录，未发送完的写入磁盘队列
+        await asyncio.to_thread(get_report_pipeline().close)
+
+        # 释放组件实例池中的实例
+        get_provider_pool().clear()
+
+        # 关闭TTS事件循环及共享HTTP连接
+        await asyncio.to_thread(close_tts_http_runtime)
+
+        # 关闭LLM事件循环及共享HTTP连接
+        await asyncio.to_thread(close_llm_http_runtime)
+
         # 取消所有任务（关键修复点）
         stdin_task.cancel()
         ws_task.cancel()
@@ -1,6 +1,6 @@
 import os
 import base64
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 import httpx
 
@@ -17,10 +17,30 @@ class DeviceBindException(Exception):
         super().__init__(f"设备绑定异常，绑定码: {bind_code}")
 
 
+class ManageApiBusinessException(Exception):
+    """智控台返回的业务错误，code 为响应中的业务码"""
+
+    def __init__(self, code, msg):
+        self.code = code
+        super().__init__(f"API返回错误: {msg or '未知错误'}")
+
+
+class PartialReportError(Exception):
+    """逐条上报时部分记录失败，failures 为 (记录下标, 异常) 列表，其余记录已上报成功"""
+
+    def __init__(self, failures, total):
+        self.failures = failures
+        self.total = total
+        super().__init__(
+            f"{len(failures)}/{total}条聊天记录上报失败: {failures[0][1]}"
+        )
+
+
 class ManageApiClient:
     _instance = None
     _async_clients = {}  # 为每个事件循环存储独立的客户端
     _secret = None
+    _batch_report_supported = True  # 智控台是否支持批量上报接口
 
     def __new__(cls, config):
         """单例模式确保全局唯一实例，并支持传入配置参数"""
@@ -98,7 +118,7 @@ class ManageApiClient:
             elif result.get("code") == 10042:
                 raise DeviceBindException(result.get("msg"))
             elif result.get("code") != 0:
-                raise Exception(f"API返回错误: {result.get('msg', '未知错误')}")
+                raise ManageApiBusinessException(result.get("code"), result.get("msg"))
 
             # 返回成功数据
             return result.get("data") if result.get("code") == 0 else None
@@ -221,6 +241,81 @@ async def report(
         return None
 
 
+async def report_batch(reports: List[Dict]) -> Optional[Dict]:
+    """批量聊天记录上报，单次请求不重试，由调用方决定重试策略
+
+    Args:
+        reports: 上报记录列表，字段与 report 相同，audio 为WAV字节或None
+
+    Raises:
+        PartialReportError: 逐条上报时部分记录失败，只有其中列出的记录需要重新上报
+    """
+    import asyncio
+
+    client = ManageApiClient._instance
+    if not reports or not client:
+        return None
+    items = [
+        {
+            "macAddress": item["macAddress"],
+            "sessionId": item["sessionId"],
+            "chatType": item["chatType"],
+            "content": item["content"],
+            "reportTime": item["reportTime"],
+            "audioBase64": (
+                base64.b64encode(item["audio"]).decode("utf-8")
+                if item.get("audio")
+                else None
+            ),
+        }
+        for item in reports
+    ]
+    if ManageApiClient._batch_report_supported:
+        try:
+            return await client._async_request(
+                "POST", "/agent/chat-history/report/batch", json=items
+            )
+        except Exception as e:
+            if client._should_retry(e):
+                raise
+            if _batch_report_unsupported(e):
+                # 旧版本智控台没有批量接口，之后都逐条上报
+                ManageApiClient._batch_report_supported = False
+                print(f"智控台不支持批量上报接口，改为逐条上报: {e}")
+            else:
+                # 其他错误也先用逐条接口再试，不在批量接口失败时直接丢弃整批记录
+                print(f"批量上报失败，改为逐条上报: {e}")
+    results = await asyncio.gather(
+        *(
+            client._async_request("POST", "/agent/chat-history/report", json=item)
+            for item in items
+        ),
+        return_exceptions=True,
+    )
+    failures = [
+        (index, result)
+        for index, result in enumerate(results)
+        if isinstance(result, Exception)
+    ]
+    if failures:
+        # 只把失败的记录交给调用方，已成功的记录不能再次上报
+        raise PartialReportError(failures, len(items))
+    return None
+
+
+def _batch_report_unsupported(exception: Exception) -> bool:
+    """判断是否为不支持批量接口的智控台的响应
+
+    旧版本智控台对未知路径返回HTTP 404，或经 Oauth2Filter 返回HTTP 200、业务码401，
+    也可能返回非JSON的错误页面
+    """
+    if isinstance(exception, httpx.HTTPStatusError):
+        return exception.response.status_code == 404
+    if isinstance(exception, ManageApiBusinessException):
+        return exception.code in (401, 404)
+    return isinstance(exception, ValueError)
+
+
 def init_service(config):
     ManageApiClient(config)
 
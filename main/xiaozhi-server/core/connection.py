@@ -24,11 +24,11 @@ from core.utils.modules_initialize import (
     initialize_tts,
     initialize_asr,
 )
-from core.handle.reportHandle import report
 from core.providers.tts.default import DefaultTTS
 from concurrent.futures import ThreadPoolExecutor
 from core.utils.dialogue import Message, Dialogue
 from core.providers.asr.dto.dto import InterfaceType
+from core.providers.asr.speculative import SpeculativeASR
 from core.handle.textHandle import handleTextMessage
 from core.providers.tools.unified_tool_handler import UnifiedToolHandler
 from plugins_func.loadplugins import auto_import_modules
@@ -40,6 +40,17 @@ from config.logger import setup_logging, build_module_string, create_connection_
 from config.manage_api_client import DeviceNotFoundException, DeviceBindException
 from core.utils.prompt_manager import PromptManager
 from core.utils.voiceprint_provider import VoiceprintProvider
+from core.utils.offload import get_offload_pool
+from core.utils.provider_pool import get_provider_pool
+from core.utils.metrics import (
+    TurnTrace,
+    track_connection,
+    record_provider_error,
+    STAGE_LLM_FIRST_TOKEN,
+)
+from core.utils.hybrid_queue import HybridQueue
+from core.utils.jitter_buffer import JitterBuffer
+from core.utils.audio_ingest import AudioIngest
 from core.utils import textUtils
 
 TAG = __name__
@@ -89,16 +100,23 @@ class ConnectionHandler:
         # 客户端状态相关
         self.client_abort = False
         self.client_is_speaking = False
+        # 当前正在读取的LLM流，打断时关闭上游连接
+        self.llm_stream = None
         self.client_listen_mode = "auto"
 
         # 线程任务相关
         self.loop = None  # 在 handle_connection 中获取运行中的事件循环
         self.stop_event = threading.Event()
-        self.executor = ThreadPoolExecutor(max_workers=5)
+        # 执行模式：thread 每个连接独立的线程与线程池；async 协程流水线 + 全局共享卸载线程池
+        self.async_mode = self.config.get("connection_mode", "thread") == "async"
+        if self.async_mode:
+            self.executor = get_offload_pool()
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=5)
+        # async 模式下连接持有的协程任务，关闭连接时统一取消
+        self.pipeline_tasks = []
 
-        # 添加上报线程池
-        self.report_queue = queue.Queue()
-        self.report_thread = None
+        # 聊天记录由全局上报管道批量发送，连接不再持有上报线程
         # 未来可以通过修改此处，调节asr的上报和tts的上报，目前默认都开启
         self.report_asr_enable = self.read_config_from_api
         self.report_tts_enable = self.read_config_from_api
@@ -112,12 +130,18 @@ class ConnectionHandler:
         self.llm = _llm
         self.memory = _memory
         self.intent = _intent
+        # 从组件实例池获取的实例，关闭连接时归还
+        self.pooled_instances = []
+        # 单轮对话耗时追踪
+        self.turn_trace = TurnTrace()
+        track_connection(self)
 
         # 为每个连接单独管理声纹识别
         self.voiceprint_provider = None
 
         # vad相关变量
-        self.client_audio_buffer = bytearray()
+        # 上行音频只解码一次，PCM同时供VAD分帧和ASR使用
+        self.audio_ingest = AudioIngest(self.config.get("audio_ingest"))
         self.client_have_voice = False
         self.client_voice_window = deque(maxlen=5)
         self.first_activity_time = 0.0  # 记录首次活动的时间（毫秒）
@@ -128,14 +152,20 @@ class ConnectionHandler:
         # asr相关变量
         # 因为实际部署时可能会用到公共的本地ASR，不能把变量暴露给公共ASR
         # 所以涉及到ASR的变量，需要在这里定义，属于connection的私有变量
-        self.asr_audio = []
-        self.asr_audio_queue = queue.Queue()
+        self.asr_audio = self.audio_ingest.create_packet_buffer()
+        # 流式ASR缓存整句音频用于声纹识别
+        self.asr_audio_for_voiceprint = self.audio_ingest.create_packet_buffer()
+        self.asr_audio_queue = HybridQueue() if self.async_mode else queue.Queue()
+        # 本地ASR流式模式下说话过程中的中间识别结果
+        self.asr_partial_text = ""
+        # 推测式提前断句：静音较短时提前开始识别
+        self.speculative_asr = SpeculativeASR(self.config.get("speculative_asr"))
         self.current_speaker = None  # 存储当前说话人
         self.current_language_tag = None  # 存储当前ASR识别的语言标签
 
         # llm相关变量
         self.llm_finish_task = True
-        self.dialogue = Dialogue()
+        self.dialogue = Dialogue(self.config.get("dialogue_window"))
 
         # tts相关变量
         self.sentence_id = None
@@ -163,6 +193,8 @@ class ConnectionHandler:
 
         # 标记连接是否来自MQTT
         self.conn_from_mqtt_gateway = False
+        # MQTT网关音频的抖动缓冲区，收到第一个音频包时创建
+        self.jitter_buffer = None
 
         # 初始化提示词管理器
         self.prompt_manager = PromptManager(self.config, self.logger)
@@ -237,8 +269,16 @@ class ConnectionHandler:
 
     async def _save_and_close(self, ws):
         """保存记忆并关闭连接"""
+        # 从实例池获取的记忆实例，保存线程启动后由其归还，否则在 finally 中归还
+        memory_lease = None
         try:
             if self.memory:
+                # 回收的记忆实例需要在保存完成后再归还实例池
+                if self.memory in self.pooled_instances:
+                    self.pooled_instances.remove(self.memory)
+                    memory_lease = self.memory
+                memory = memory_lease
+
                 # 使用线程池异步保存记忆
                 def save_memory_task():
                     try:
@@ -257,12 +297,17 @@ class ConnectionHandler:
                             loop.close()
                         except Exception:
                             pass
+                        if memory is not None:
+                            get_provider_pool().release(memory)
 
                 # 启动线程保存记忆，不等待完成
                 threading.Thread(target=save_memory_task, daemon=True).start()
+                memory_lease = None
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"保存记忆失败: {e}")
         finally:
+            if memory_lease is not None:
+                get_provider_pool().release(memory_lease)
             # 立即关闭连接，不等待记忆保存完成
             try:
                 await self.close(ws)
@@ -351,35 +396,14 @@ class ConnectionHandler:
         return False
 
     def _process_websocket_audio(self, audio_data, timestamp):
-        """处理WebSocket格式的音频包"""
-        # 初始化时间戳序列管理
-        if not hasattr(self, "audio_timestamp_buffer"):
-            self.audio_timestamp_buffer = {}
-            self.last_processed_timestamp = 0
-            self.max_timestamp_buffer_size = 20
-
-        # 如果时间戳是递增的，直接处理
-        if timestamp >= self.last_processed_timestamp:
-            self.asr_audio_queue.put(audio_data)
-            self.last_processed_timestamp = timestamp
-
-            # 处理缓冲区中的后续包
-            processed_any = True
-            while processed_any:
-                processed_any = False
-                for ts in sorted(self.audio_timestamp_buffer.keys()):
-                    if ts > self.last_processed_timestamp:
-                        buffered_audio = self.audio_timestamp_buffer.pop(ts)
-                        self.asr_audio_queue.put(buffered_audio)
-                        self.last_processed_timestamp = ts
-                        processed_any = True
-                        break
-        else:
-            # 乱序包，暂存
-            if len(self.audio_timestamp_buffer) < self.max_timestamp_buffer_size:
-                self.audio_timestamp_buffer[timestamp] = audio_data
-            else:
-                self.asr_audio_queue.put(audio_data)
+        """处理WebSocket格式的音频包，经抖动缓冲区排序和丢包补偿后送入ASR队列"""
+        if self.jitter_buffer is None:
+            self.jitter_buffer = JitterBuffer(
+                self.asr_audio_queue.put,
+                self.config.get("mqtt_jitter_buffer"),
+                conceal=self.audio_format != "pcm",
+            )
+        self.jitter_buffer.push(audio_data, timestamp)
 
     async def handle_restart(self, message):
         """处理服务器重启请求"""
@@ -472,8 +496,6 @@ class ConnectionHandler:
             self._initialize_memory()
             """加载意图识别"""
             self._initialize_intent()
-            """初始化上报线程"""
-            self._init_report_threads()
             """更新系统提示词"""
             self._init_prompt_enhancement()
 
@@ -491,19 +513,6 @@ class ConnectionHandler:
             self.change_system_prompt(enhanced_prompt)
             self.logger.bind(tag=TAG).debug("系统提示词已增强更新")
 
-    def _init_report_threads(self):
-        """初始化ASR和TTS上报线程"""
-        if not self.read_config_from_api or self.need_bind:
-            return
-        if self.chat_history_conf == 0:
-            return
-        if self.report_thread is None or not self.report_thread.is_alive():
-            self.report_thread = threading.Thread(
-                target=self._report_worker, daemon=True
-            )
-            self.report_thread.start()
-            self.logger.bind(tag=TAG).info("TTS上报线程已启动")
-
     def _initialize_tts(self):
         """初始化TTS"""
         tts = None
@@ -662,11 +671,18 @@ class ConnectionHandler:
         if private_config.get("context_providers", None) is not None:
             self.config["context_providers"] = private_config["context_providers"]
 
+        # 相同配置的组件从实例池获取，避免每个连接重复创建客户端、加载模型
+        provider_pool = get_provider_pool()
+        init_func = (
+            provider_pool.initialize_modules
+            if provider_pool.enabled
+            else initialize_modules
+        )
         # 使用 run_in_executor 在线程池中执行 initialize_modules，避免阻塞主循环
         try:
             modules = await self.loop.run_in_executor(
                 None,  # 使用默认线程池
-                initialize_modules,
+                init_func,
                 self.logger,
                 private_config,
                 init_vad,
@@ -679,6 +695,16 @@ class ConnectionHandler:
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"初始化组件失败: {e}")
             modules = {}
+        if provider_pool.enabled:
+            if self.stop_event.is_set():
+                # 初始化完成前连接已关闭，直接归还实例
+                for name, instance in modules.items():
+                    if name != "tts":
+                        provider_pool.release(instance)
+                return
+            self.pooled_instances.extend(
+                instance for name, instance in modules.items() if name != "tts"
+            )
         if modules.get("tts", None) is not None:
             self.tts = modules["tts"]
         if modules.get("vad", None) is not None:
@@ -718,13 +744,10 @@ class ConnectionHandler:
             ]
             if memory_llm_name and memory_llm_name in self.config["LLM"]:
                 # 如果配置了专用LLM，则创建独立的LLM实例
-                from core.utils import llm as llm_utils
-
-                memory_llm_config = self.config["LLM"][memory_llm_name]
-                memory_llm_type = memory_llm_config.get("type", memory_llm_name)
-                memory_llm = llm_utils.create_instance(
-                    memory_llm_type, memory_llm_config
+                memory_llm_type = self.config["LLM"][memory_llm_name].get(
+                    "type", memory_llm_name
                 )
+                memory_llm = self._create_dedicated_llm(memory_llm_name)
                 self.logger.bind(tag=TAG).info(
                     f"为记忆总结创建了专用LLM: {memory_llm_name}, 类型: {memory_llm_type}"
                 )
@@ -734,6 +757,19 @@ class ConnectionHandler:
                 self.memory.set_llm(self.llm)
                 self.logger.bind(tag=TAG).info("使用主LLM作为意图识别模型")
 
+    def _create_dedicated_llm(self, llm_name):
+        """创建记忆、意图识别专用的LLM，启用实例池时相同配置的连接共享同一个实例"""
+        provider_pool = get_provider_pool()
+        if provider_pool.enabled:
+            instance = provider_pool.acquire_llm(self.config, llm_name)
+            self.pooled_instances.append(instance)
+            return instance
+
+        from core.utils import llm as llm_utils
+
+        llm_config = self.config["LLM"][llm_name]
+        return llm_utils.create_instance(llm_config.get("type", llm_name), llm_config)
+
     def _initialize_intent(self):
         if self.intent is None:
             return
@@ -760,13 +796,10 @@ class ConnectionHandler:
 
             if intent_llm_name and intent_llm_name in self.config["LLM"]:
                 # 如果配置了专用LLM，则创建独立的LLM实例
-                from core.utils import llm as llm_utils
-
-                intent_llm_config = self.config["LLM"][intent_llm_name]
-                intent_llm_type = intent_llm_config.get("type", intent_llm_name)
-                intent_llm = llm_utils.create_instance(
-                    intent_llm_type, intent_llm_config
+                intent_llm_type = self.config["LLM"][intent_llm_name].get(
+                    "type", intent_llm_name
                 )
+                intent_llm = self._create_dedicated_llm(intent_llm_name)
                 self.logger.bind(tag=TAG).info(
                     f"为意图识别创建了专用LLM: {intent_llm_name}, 类型: {intent_llm_type}"
                 )
@@ -859,6 +892,7 @@ class ConnectionHandler:
                     ),
                 )
         except Exception as e:
+            record_provider_error("llm")
             self.logger.bind(tag=TAG).error(f"LLM 处理出错 {query}: {e}")
             return None
 
@@ -869,46 +903,56 @@ class ConnectionHandler:
         content_arguments = ""
         self.client_abort = False
         emotion_flag = True
-        for response in llm_responses:
-            if self.client_abort:
-                break
-            if self.intent_type == "function_call" and functions is not None:
-                content, tools_call = response
-                if "content" in response:
-                    content = response["content"]
-                    tools_call = None
-                if content is not None and len(content) > 0:
-                    content_arguments += content
-
-                if not tool_call_flag and content_arguments.startswith("<tool_call>"):
-                    # print("content_arguments", content_arguments)
-                    tool_call_flag = True
+        self.llm_stream = llm_responses
+        try:
+            for response in llm_responses:
+                if self.client_abort:
+                    break
+                if self.intent_type == "function_call" and functions is not None:
+                    content, tools_call = response
+                    if "content" in response:
+                        content = response["content"]
+                        tools_call = None
+                    if content is not None and len(content) > 0:
+                        content_arguments += content
+
+                    if not tool_call_flag and content_arguments.startswith("<tool_call>"):
+                        # print("content_arguments", content_arguments)
+                        tool_call_flag = True
+
+                    if tools_call is not None and len(tools_call) > 0:
+                        tool_call_flag = True
+                        self._merge_tool_calls(tool_calls_list, tools_call)
+                else:
+                    content = response
 
-                if tools_call is not None and len(tools_call) > 0:
-                    tool_call_flag = True
-                    self._merge_tool_calls(tool_calls_list, tools_call)
-            else:
-                content = response
+                # 在llm回复中获取情绪表情，一轮对话只在开头获取一次
+                if emotion_flag and content is not None and content.strip():
+                    asyncio.run_coroutine_threadsafe(
+                        textUtils.get_emotion(self, content),
+                        self.loop,
+                    )
+                    emotion_flag = False
 
-            # 在llm回复中获取情绪表情，一轮对话只在开头获取一次
-            if emotion_flag and content is not None and content.strip():
-                asyncio.run_coroutine_threadsafe(
-                    textUtils.get_emotion(self, content),
-                    self.loop,
-                )
-                emotion_flag = False
-
-            if content is not None and len(content) > 0:
-                if not tool_call_flag:
-                    response_message.append(content)
-                    self.tts.tts_text_queue.put(
-                        TTSMessageDTO(
-                            sentence_id=self.sentence_id,
-                            sentence_type=SentenceType.MIDDLE,
-                            content_type=ContentType.TEXT,
-                            content_detail=content,
+                if content is not None and len(content) > 0:
+                    if not tool_call_flag:
+                        self.turn_trace.mark(STAGE_LLM_FIRST_TOKEN)
+                        response_message.append(content)
+                        self.tts.tts_text_queue.put(
+                            TTSMessageDTO(
+                                sentence_id=self.sentence_id,
+                                sentence_type=SentenceType.MIDDLE,
+                                content_type=ContentType.TEXT,
+                                content_detail=content,
+                            )
                         )
-                    )
+        finally:
+            # 打断或异常退出时关闭LLM流，停止上游继续生成
+            close = getattr(llm_responses, "close", None)
+            if close is not None:
+                close()
+            if self.llm_stream is llm_responses:
+                self.llm_stream = None
         # 处理function call
         if tool_call_flag:
             bHasError = False
@@ -990,6 +1034,9 @@ class ConnectionHandler:
                 )
             )
             self.llm_finish_task = True
+            # 一轮对话结束后在后台把移出上下文的对话合并为摘要，不占用下一轮的响应时间
+            if self.dialogue.needs_summary():
+                self.executor.submit(self.dialogue.summarize, self.llm)
             # 使用lambda延迟计算，只有在DEBUG级别时才执行get_llm_dialogue()
             self.logger.bind(tag=TAG).debug(
                 lambda: json.dumps(
@@ -1053,39 +1100,18 @@ class ConnectionHandler:
 
             self.chat(None, depth=depth + 1)
 
-    def _report_worker(self):
-        """聊天记录上报工作线程"""
-        while not self.stop_event.is_set():
-            try:
-                # 从队列获取数据，设置超时以便定期检查停止事件
-                item = self.report_queue.get(timeout=1)
-                if item is None:  # 检测毒丸对象
-                    break
-                try:
-                    # 检查线程池状态
-                    if self.executor is None:
-                        continue
-                    # 提交任务到线程池
-                    self.executor.submit(self._process_report, *item)
-                except Exception as e:
-                    self.logger.bind(tag=TAG).error(f"聊天记录上报线程异常: {e}")
-            except queue.Empty:
-                continue
-            except Exception as e:
-                self.logger.bind(tag=TAG).error(f"聊天记录上报工作线程异常: {e}")
-
-        self.logger.bind(tag=TAG).info("聊天记录上报线程已退出")
-
-    def _process_report(self, type, text, audio_data, report_time):
-        """处理上报任务"""
-        try:
-            # 执行异步上报（在事件循环中运行）
-            asyncio.run(report(self, type, text, audio_data, report_time))
-        except Exception as e:
-            self.logger.bind(tag=TAG).error(f"上报处理异常: {e}")
-        finally:
-            # 标记任务完成
-            self.report_queue.task_done()
+    def create_pipeline_task(self, coro) -> asyncio.Task:
+        """创建随连接生命周期管理的协程任务，必须在事件循环线程中调用"""
+        task = asyncio.create_task(coro)
+        self.pipeline_tasks.append(task)
+        task.add_done_callback(self._on_pipeline_task_done)
+        return task
+
+    def _on_pipeline_task_done(self, task: asyncio.Task):
+        if task in self.pipeline_tasks:
+            self.pipeline_tasks.remove(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.bind(tag=TAG).error(f"连接协程任务异常退出: {task.exception()}")
 
     def clearSpeakStatus(self):
         self.client_is_speaking = False
@@ -1097,6 +1123,8 @@ class ConnectionHandler:
             # 清理音频缓冲区
             if hasattr(self, "audio_buffer"):
                 self.audio_buffer.clear()
+            if self.jitter_buffer is not None:
+                self.jitter_buffer.close()
 
             # 取消超时任务
             if self.timeout_task and not self.timeout_task.done():
@@ -1116,6 +1144,10 @@ class ConnectionHandler:
                         f"清理工具处理器时出错: {cleanup_error}"
                     )
 
+            # 关闭正在进行的LLM请求及推测识别
+            self.cancel_llm_stream()
+            self.speculative_asr.cancel()
+
             # 触发停止事件
             if self.stop_event:
                 self.stop_event.set()
@@ -1123,6 +1155,11 @@ class ConnectionHandler:
             # 清空任务队列
             self.clear_queues()
 
+            # 取消协程流水线任务（async 模式）
+            for task in list(self.pipeline_tasks):
+                task.cancel()
+            self.pipeline_tasks.clear()
+
             # 关闭WebSocket连接
             try:
                 if ws:
@@ -1162,8 +1199,14 @@ class ConnectionHandler:
             if self.tts:
                 await self.tts.close()
 
-            # 最后关闭线程池（避免阻塞）
-            if self.executor:
+            # 归还从实例池获取的组件；保存记忆时记忆实例已移出列表，由保存线程归还
+            provider_pool = get_provider_pool()
+            pooled_instances, self.pooled_instances = self.pooled_instances, []
+            for instance in pooled_instances:
+                provider_pool.release(instance)
+
+            # 最后关闭线程池（避免阻塞），共享卸载线程池不随连接关闭
+            if self.executor and not self.async_mode:
                 try:
                     self.executor.shutdown(wait=False)
                 except Exception as executor_error:
@@ -1179,6 +1222,15 @@ class ConnectionHandler:
             if self.stop_event:
                 self.stop_event.set()
 
+    def cancel_llm_stream(self):
+        """关闭正在读取的LLM流，可在事件循环线程中调用，上游连接立即关闭"""
+        llm_stream = self.llm_stream
+        if llm_stream is None:
+            return
+        cancel = getattr(llm_stream, "cancel", None)
+        if cancel is not None:
+            cancel()
+
     def clear_queues(self):
         """清空所有任务队列"""
         if self.tts:
@@ -1190,7 +1242,6 @@ class ConnectionHandler:
             for q in [
                 self.tts.tts_text_queue,
                 self.tts.tts_audio_queue,
-                self.report_queue,
             ]:
                 if not q:
                     continue
@@ -1200,7 +1251,7 @@ class ConnectionHandler:
                     except queue.Empty:
                         break
 
-            # 重置音频流控器（取消后台任务并清空队列）
+            # 重置音频流控器（停止发送并清空队列）
             if hasattr(self, "audio_rate_controller") and self.audio_rate_controller:
                 self.audio_rate_controller.reset()
                 self.logger.bind(tag=TAG).debug("已重置音频流控器")
@@ -1210,7 +1261,7 @@ class ConnectionHandler:
             )
 
     def reset_vad_states(self):
-        self.client_audio_buffer = bytearray()
+        self.audio_ingest.reset_vad()
         self.client_have_voice = False
         self.client_voice_stop = False
         self.logger.bind(tag=TAG).debug("VAD states reset.")
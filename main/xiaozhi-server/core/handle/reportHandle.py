@@ -1,55 +1,26 @@
 """
-TTS上报功能已集成到ConnectionHandler类中。
+聊天记录上报
 
 上报功能包括：
-1. 每个连接对象拥有自己的上报队列和处理线程
-2. 上报线程的生命周期与连接对象绑定
-3. 使用ConnectionHandler.enqueue_tts_report方法进行上报
-
-具体实现请参考core/connection.py中的相关代码。
+1. 所有连接共享一个批量上报管道（core/utils/report_pipeline.py），连接不再持有上报线程
+2. 上报数据以opus帧缓存，按条数、大小或时间合批发送，发送时才转换为WAV
+3. 使用 enqueue_asr_report / enqueue_tts_report 加入上报管道，调用不会阻塞
 """
 
 import time
 import opuslib_next
 
-from config.manage_api_client import report as manage_report
+from config.logger import setup_logging
+from core.utils.report_pipeline import get_report_pipeline
 
 TAG = __name__
+logger = setup_logging()
 
 
-async def report(conn, type, text, opus_data, report_time):
-    """执行聊天记录上报操作
-
-    Args:
-        conn: 连接对象
-        type: 上报类型，1为用户，2为智能体
-        text: 合成文本
-        opus_data: opus音频数据
-        report_time: 上报时间
-    """
-    try:
-        if opus_data:
-            audio_data = opus_to_wav(conn, opus_data)
-        else:
-            audio_data = None
-        # 执行异步上报
-        await manage_report(
-            mac_address=conn.device_id,
-            session_id=conn.session_id,
-            chat_type=type,
-            content=text,
-            audio=audio_data,
-            report_time=report_time,
-        )
-    except Exception as e:
-        conn.logger.bind(tag=TAG).error(f"聊天记录上报失败: {e}")
-
-
-def opus_to_wav(conn, opus_data):
+def opus_to_wav(opus_data):
     """将Opus数据转换为WAV格式的字节流
 
     Args:
-        output_dir: 输出目录（保留参数以保持接口兼容）
         opus_data: opus音频数据
 
     Returns:
@@ -65,7 +36,7 @@ def opus_to_wav(conn, opus_data):
                 pcm_frame = decoder.decode(opus_packet, 960)  # 960 samples = 60ms
                 pcm_data.append(pcm_frame)
             except opuslib_next.OpusError as e:
-                conn.logger.bind(tag=TAG).error(f"Opus解码错误: {e}", exc_info=True)
+                logger.bind(tag=TAG).error(f"Opus解码错误: {e}", exc_info=True)
 
         if not pcm_data:
             raise ValueError("没有有效的PCM数据")
@@ -97,7 +68,7 @@ def opus_to_wav(conn, opus_data):
             try:
                 del decoder
             except Exception as e:
-                conn.logger.bind(tag=TAG).debug(f"释放decoder资源时出错: {e}")
+                logger.bind(tag=TAG).debug(f"释放decoder资源时出错: {e}")
 
 
 def enqueue_tts_report(conn, text, opus_data):
@@ -105,7 +76,7 @@ def enqueue_tts_report(conn, text, opus_data):
         return
     if conn.chat_history_conf == 0:
         return
-    """将TTS数据加入上报队列
+    """将TTS数据加入上报管道
 
     Args:
         conn: 连接对象
@@ -113,19 +84,23 @@ def enqueue_tts_report(conn, text, opus_data):
         opus_data: opus音频数据
     """
     try:
-        # 使用连接对象的队列，传入文本和二进制数据而非文件路径
+        # 加入全局上报管道，音频保持为opus帧，发送时再转换
         if conn.chat_history_conf == 2:
-            conn.report_queue.put((2, text, opus_data, int(time.time())))
+            get_report_pipeline().submit(
+                conn.device_id, conn.session_id, 2, text, opus_data, int(time.time())
+            )
             conn.logger.bind(tag=TAG).debug(
-                f"TTS数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
+                f"TTS数据已加入上报管道: {conn.device_id}, 音频大小: {len(opus_data)} "
             )
         else:
-            conn.report_queue.put((2, text, None, int(time.time())))
+            get_report_pipeline().submit(
+                conn.device_id, conn.session_id, 2, text, None, int(time.time())
+            )
             conn.logger.bind(tag=TAG).debug(
-                f"TTS数据已加入上报队列: {conn.device_id}, 不上报音频"
+                f"TTS数据已加入上报管道: {conn.device_id}, 不上报音频"
             )
     except Exception as e:
-        conn.logger.bind(tag=TAG).error(f"加入TTS上报队列失败: {text}, {e}")
+        conn.logger.bind(tag=TAG).error(f"加入TTS上报管道失败: {text}, {e}")
 
 
 def enqueue_asr_report(conn, text, opus_data):
@@ -133,7 +108,7 @@ def enqueue_asr_report(conn, text, opus_data):
         return
     if conn.chat_history_conf == 0:
         return
-    """将ASR数据加入上报队列
+    """将ASR数据加入上报管道
 
     Args:
         conn: 连接对象
@@ -141,16 +116,20 @@ def enqueue_asr_report(conn, text, opus_data):
         opus_data: opus音频数据
     """
     try:
-        # 使用连接对象的队列，传入文本和二进制数据而非文件路径
+        # 加入全局上报管道，音频保持为opus帧，发送时再转换
         if conn.chat_history_conf == 2:
-            conn.report_queue.put((1, text, opus_data, int(time.time())))
+            get_report_pipeline().submit(
+                conn.device_id, conn.session_id, 1, text, opus_data, int(time.time())
+            )
             conn.logger.bind(tag=TAG).debug(
-                f"ASR数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
+                f"ASR数据已加入上报管道: {conn.device_id}, 音频大小: {len(opus_data)} "
             )
         else:
-            conn.report_queue.put((1, text, None, int(time.time())))
+            get_report_pipeline().submit(
+                conn.device_id, conn.session_id, 1, text, None, int(time.time())
+            )
             conn.logger.bind(tag=TAG).debug(
-                f"ASR数据已加入上报队列: {conn.device_id}, 不上报音频"
+                f"ASR数据已加入上报管道: {conn.device_id}, 不上报音频"
             )
     except Exception as e:
-        conn.logger.bind(tag=TAG).debug(f"加入ASR上报队列失败: {text}, {e}")
+        conn.logger.bind(tag=TAG).debug(f"加入ASR上报管道失败: {text}, {e}")
@@ -5,6 +5,7 @@ from core.utils import textUtils
 from core.utils.util import audio_to_data
 from core.providers.tts.dto.dto import SentenceType
 from core.utils.audioRateController import AudioRateController
+from core.utils.metrics import STAGE_FIRST_AUDIO
 
 TAG = __name__
 # 音频帧时长（毫秒）
@@ -142,11 +143,8 @@ def _get_or_create_rate_controller(conn, frame_duration, is_single_packet):
     else:
         rate_controller = conn.audio_rate_controller
 
-        # 后台发送任务已停止, 则需要重置
-        if (
-            not rate_controller.pending_send_task
-            or rate_controller.pending_send_task.done()
-        ):
+        # 发送已停止（出错或被中止）, 则需要重置
+        if not rate_controller.is_sending():
             need_reset = True
         # 当sentence_id 变化，需要重置
         elif (
@@ -169,7 +167,7 @@ def _get_or_create_rate_controller(conn, frame_duration, is_single_packet):
             "sentence_id": conn.sentence_id,
         }
 
-        # 启动后台发送循环
+        # 注册到全局发送调度器
         _start_background_sender(
             conn, conn.audio_rate_controller, conn.audio_flow_control
         )
@@ -179,7 +177,7 @@ def _get_or_create_rate_controller(conn, frame_duration, is_single_packet):
 
 def _start_background_sender(conn, rate_controller, flow_control):
     """
-    启动后台发送循环任务
+    启动发送，到期的音频包由全局音频发送调度器统一发出
 
     Args:
         conn: 连接对象
@@ -196,7 +194,6 @@ def _start_background_sender(conn, rate_controller, flow_control):
         await _do_send_audio(conn, packet, flow_control)
         conn.client_is_speaking = True
 
-    # 使用 start_sending 启动后台循环
     rate_controller.start_sending(send_callback)
 
 
@@ -229,7 +226,7 @@ async def _send_audio_with_rate_control(
             await _do_send_audio(conn, packet, flow_control)
             conn.client_is_speaking = True
         else:
-            # 动态流控模式：仅添加到队列，由后台循环负责发送
+            # 动态流控模式：仅添加到队列，由全局调度器按时发送
             rate_controller.add_audio(packet)
 
 
@@ -249,6 +246,9 @@ async def _do_send_audio(conn, opus_packet, flow_control):
         # 直接发送opus数据包
         await conn.websocket.send(opus_packet)
 
+    if packet_index == 0:
+        conn.turn_trace.mark(STAGE_FIRST_AUDIO)
+
     # 更新流控状态
     flow_control["packet_count"] = packet_index + 1
     flow_control["sequence"] = sequence + 1
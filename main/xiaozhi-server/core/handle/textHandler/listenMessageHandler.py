@@ -31,14 +31,14 @@ class ListenTextMessageHandler(TextMessageHandler):
         elif msg_json["state"] == "stop":
             conn.client_have_voice = True
             conn.client_voice_stop = True
+            conn.turn_trace.start()
             if conn.asr.interface_type == InterfaceType.STREAM:
                 # 流式模式下，发送结束请求
                 asyncio.create_task(conn.asr._send_stop_request())
             else:
                 # 非流式模式：直接触发ASR识别
                 if len(conn.asr_audio) > 0:
-                    asr_audio_task = conn.asr_audio.copy()
-                    conn.asr_audio.clear()
+                    asr_audio_task = conn.asr_audio.take()
                     conn.reset_vad_states()
 
                     if len(asr_audio_task) > 0:
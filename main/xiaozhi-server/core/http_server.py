@@ -1,8 +1,10 @@
+import hmac
 import asyncio
 from aiohttp import web
 from config.logger import setup_logging
 from core.api.ota_handler import OTAHandler
 from core.api.vision_handler import VisionHandler
+from core.utils import metrics
 
 TAG = __name__
 
@@ -13,6 +15,21 @@ class SimpleHttpServer:
         self.logger = setup_logging()
         self.ota_handler = OTAHandler(config)
         self.vision_handler = VisionHandler(config)
+        self.metrics_enabled = config.get("metrics", {}).get("enable", False)
+        metrics.set_enabled(self.metrics_enabled)
+
+    async def handle_metrics(self, request):
+        """Prometheus 指标接口，需在请求头携带 Authorization: Bearer <server.auth_key>"""
+        auth_header = request.headers.get("Authorization", "")
+        auth_key = self.config["server"].get("auth_key", "")
+        if not auth_key or not hmac.compare_digest(
+            auth_header.encode("utf-8"), f"Bearer {auth_key}".encode("utf-8")
+        ):
+            return web.Response(status=401, text="Unauthorized")
+        return web.Response(
+            text=metrics.REGISTRY.render(),
+            content_type="text/plain",
+        )
 
     def _get_websocket_url(self, local_ip: str, port: int) -> str:
         """获取websocket地址
@@ -75,6 +92,9 @@ class SimpleHttpServer:
                     ]
                 )
 
+                if self.metrics_enabled:
+                    app.add_routes([web.get("/metrics", self.handle_metrics)])
+
                 # 运行服务
                 runner = web.AppRunner(app)
                 await runner.setup()
@@ -124,18 +124,33 @@ class ASRProvider(ASRProviderBase):
 
     async def open_audio_channels(self, conn):
         await super().open_audio_channels(conn)
+        self.prewarm_stream_session()
+
+    def stream_session_key(self):
+        return self._session_key(
+            __name__, self.ws_url, self.appkey, self.access_key_id or self.token
+        )
+
+    async def connect_stream_session(self):
+        if self._is_token_expired():
+            self._refresh_token()
+        headers = {"X-NLS-Token": self.token}
+        return await websockets.connect(
+            self.ws_url,
+            additional_headers=headers,
+            max_size=1000000000,
+            ping_interval=None,
+            ping_timeout=None,
+            close_timeout=5,
+        )
 
     async def receive_audio(self, conn, audio, audio_have_voice):
-        # 初始化音频缓存
-        if not hasattr(conn, 'asr_audio_for_voiceprint'):
-            conn.asr_audio_for_voiceprint = []
-        
         # 存储音频数据
         if audio:
-            conn.asr_audio_for_voiceprint.append(audio)
+            conn.asr_audio_for_voiceprint.append(audio, conn.audio_ingest.pcm_for(audio))
         
         conn.asr_audio.append(audio)
-        conn.asr_audio = conn.asr_audio[-10:]
+        conn.asr_audio.keep_preroll()
 
         # 只在有声音且没有连接时建立连接（排除正在停止的情况）
         if audio_have_voice and not self.is_processing and not self.asr_ws:
@@ -148,7 +163,8 @@ class ASRProvider(ASRProviderBase):
 
         if self.asr_ws and self.is_processing and self.server_ready:
             try:
-                pcm_frame = self.decoder.decode(audio, 960)
+                # 复用VAD已解码的PCM，手动模式下未经VAD解码时再自行解码
+                pcm_frame = conn.audio_ingest.pcm_for(audio) or self.decoder.decode(audio, 960)
                 await self.asr_ws.send(pcm_frame)
             except Exception as e:
                 logger.bind(tag=TAG).warning(f"发送音频失败: {str(e)}")
@@ -156,19 +172,8 @@ class ASRProvider(ASRProviderBase):
 
     async def _start_recognition(self, conn):
         """开始识别会话"""
-        if self._is_token_expired():
-            self._refresh_token()
-        
-        # 建立连接
-        headers = {"X-NLS-Token": self.token}
-        self.asr_ws = await websockets.connect(
-            self.ws_url,
-            additional_headers=headers,
-            max_size=1000000000,
-            ping_interval=None,
-            ping_timeout=None,
-            close_timeout=5,
-        )
+        # 获取连接（优先使用会话池中预热好的连接）
+        self.asr_ws = await self.acquire_stream_session()
 
         self.task_id = uuid.uuid4().hex
 
@@ -257,7 +262,7 @@ class ASRProvider(ASRProviderBase):
 
                                 # 手动模式下，只有在收到stop信号后才触发处理（仅处理一次）
                                 if conn.client_voice_stop:
-                                    audio_data = getattr(conn, 'asr_audio_for_voiceprint', [])
+                                    audio_data = conn.asr_audio_for_voiceprint.copy()
                                     if len(audio_data) > 0:
                                         logger.bind(tag=TAG).debug("收到最终识别结果，触发处理")
                                         await self.handle_voice_stop(conn, audio_data)
@@ -269,7 +274,7 @@ class ASRProvider(ASRProviderBase):
                                 # 自动模式下直接覆盖
                                 self.text = text
                                 conn.reset_vad_states()
-                                audio_data = getattr(conn, 'asr_audio_for_voiceprint', [])
+                                audio_data = conn.asr_audio_for_voiceprint.copy()
                                 await self.handle_voice_stop(conn, audio_data)
                                 break
 
@@ -291,9 +296,9 @@ class ASRProvider(ASRProviderBase):
             await self._cleanup()
             if conn:
                 if hasattr(conn, 'asr_audio_for_voiceprint'):
-                    conn.asr_audio_for_voiceprint = []
+                    conn.asr_audio_for_voiceprint.clear()
                 if hasattr(conn, 'asr_audio'):
-                    conn.asr_audio = []
+                    conn.asr_audio.clear()
 
     async def _send_stop_request(self):
         """发送停止识别请求（不关闭连接）"""
@@ -50,18 +50,29 @@ class ASRProvider(ASRProviderBase):
 
     async def open_audio_channels(self, conn):
         await super().open_audio_channels(conn)
+        self.prewarm_stream_session()
+
+    def stream_session_key(self):
+        return self._session_key(__name__, self.ws_url, self.api_key)
+
+    async def connect_stream_session(self):
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        return await websockets.connect(
+            self.ws_url,
+            additional_headers=headers,
+            max_size=1000000000,
+            ping_interval=None,
+            ping_timeout=None,
+            close_timeout=5,
+        )
 
     async def receive_audio(self, conn, audio, audio_have_voice):
-        # 初始化音频缓存
-        if not hasattr(conn, 'asr_audio_for_voiceprint'):
-            conn.asr_audio_for_voiceprint = []
-
         # 存储音频数据
         if audio:
-            conn.asr_audio_for_voiceprint.append(audio)
+            conn.asr_audio_for_voiceprint.append(audio, conn.audio_ingest.pcm_for(audio))
 
         conn.asr_audio.append(audio)
-        conn.asr_audio = conn.asr_audio[-10:]
+        conn.asr_audio.keep_preroll()
 
         # 只在有声音且没有连接时建立连接
         if audio_have_voice and not self.is_processing and not self.asr_ws:
@@ -75,7 +86,8 @@ class ASRProvider(ASRProviderBase):
         # 发送音频数据
         if self.asr_ws and self.is_processing and self.server_ready:
             try:
-                pcm_frame = self.decoder.decode(audio, 960)
+                # 复用VAD已解码的PCM，手动模式下未经VAD解码时再自行解码
+                pcm_frame = conn.audio_ingest.pcm_for(audio) or self.decoder.decode(audio, 960)
                 # 直接发送PCM音频数据(二进制)
                 await self.asr_ws.send(pcm_frame)
             except Exception as e:
@@ -92,21 +104,10 @@ class ASRProvider(ASRProviderBase):
             self.is_processing = True
             self.task_id = uuid.uuid4().hex
 
-            # 建立WebSocket连接
-            headers = {
-                "Authorization": f"Bearer {self.api_key}"
-            }
-
+            # 获取WebSocket连接（优先使用会话池中预热好的连接）
             logger.bind(tag=TAG).debug(f"正在连接阿里百炼ASR服务, task_id: {self.task_id}")
 
-            self.asr_ws = await websockets.connect(
-                self.ws_url,
-                additional_headers=headers,
-                max_size=1000000000,
-                ping_interval=None,
-                ping_timeout=None,
-                close_timeout=5,
-            )
+            self.asr_ws = await self.acquire_stream_session()
 
             logger.bind(tag=TAG).debug("WebSocket连接建立成功")
 
@@ -214,7 +215,7 @@ class ASRProvider(ASRProviderBase):
 
                                 # 手动模式下,只有在收到stop信号后才触发处理
                                 if conn.client_voice_stop:
-                                    audio_data = getattr(conn, 'asr_audio_for_voiceprint', [])
+                                    audio_data = conn.asr_audio_for_voiceprint.copy()
                                     if len(audio_data) > 0:
                                         logger.bind(tag=TAG).debug("收到最终识别结果，触发处理")
                                         await self.handle_voice_stop(conn, audio_data)
@@ -226,7 +227,7 @@ class ASRProvider(ASRProviderBase):
                                 # 自动模式下直接覆盖
                                 self.text = text
                                 conn.reset_vad_states()
-                                audio_data = getattr(conn, 'asr_audio_for_voiceprint', [])
+                                audio_data = conn.asr_audio_for_voiceprint.copy()
                                 await self.handle_voice_stop(conn, audio_data)
                                 break
 
@@ -259,9 +260,9 @@ class ASRProvider(ASRProviderBase):
             await self._cleanup()
             if conn:
                 if hasattr(conn, 'asr_audio_for_voiceprint'):
-                    conn.asr_audio_for_voiceprint = []
+                    conn.asr_audio_for_voiceprint.clear()
                 if hasattr(conn, 'asr_audio'):
-                    conn.asr_audio = []
+                    conn.asr_audio.clear()
 
     async def _send_stop_request(self):
         """发送停止请求(用于手动模式停止录音)"""
@@ -1,5 +1,6 @@
 import os
 import io
+import hashlib
 import wave
 import uuid
 import json
@@ -9,12 +10,15 @@ import asyncio
 import traceback
 import threading
 import opuslib_next
+import numpy as np
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
 from typing import Optional, Tuple, List
 from core.handle.receiveAudioHandle import startToChat
 from core.handle.reportHandle import enqueue_asr_report
+from core.utils.metrics import record_provider_error, STAGE_ASR
 from core.utils.util import remove_punctuation_and_length
+from core.utils.asr_session_pool import get_asr_session_pool
 from core.handle.receiveAudioHandle import handleAudioMessage
 
 TAG = __name__
@@ -22,16 +26,60 @@ logger = setup_logging()
 
 
 class ASRProviderBase(ABC):
+    # 识别结果只取决于音频时可以推测式提前识别（见 speculative.py）
+    speculative_asr_supported = True
+
     def __init__(self):
         pass
 
     # 打开音频通道
     async def open_audio_channels(self, conn):
+        if getattr(conn, "async_mode", False):
+            conn.asr_priority_thread = conn.create_pipeline_task(
+                self.asr_text_priority_task(conn)
+            )
+            return
         conn.asr_priority_thread = threading.Thread(
             target=self.asr_text_priority_thread, args=(conn,), daemon=True
         )
         conn.asr_priority_thread.start()
 
+    # 流式ASR上游会话：会话池按 stream_session_key 共享预热会话
+    # 返回None表示没有上游会话（默认）；返回键的提供方需实现 async connect_stream_session()，建立一个新的上游websocket会话
+    def stream_session_key(self) -> Optional[str]:
+        return None
+
+    @staticmethod
+    def _session_key(*parts) -> str:
+        """凭证只以摘要形式出现在会话池的键中，避免写入日志"""
+        digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    # 设备连接时开始预热上游会话
+    def prewarm_stream_session(self):
+        key = self.stream_session_key()
+        if key is None:
+            return
+        get_asr_session_pool().prewarm(key, self.connect_stream_session)
+
+    # 语音开始时获取上游会话：优先使用预热好的会话，没有时直接连接；没有上游会话的提供方返回None
+    async def acquire_stream_session(self):
+        key = self.stream_session_key()
+        if key is None:
+            return None
+        return await get_asr_session_pool().acquire(key, self.connect_stream_session)
+
+    # 有序处理ASR音频（async 模式）
+    async def asr_text_priority_task(self, conn):
+        while not conn.stop_event.is_set():
+            message = await conn.asr_audio_queue.async_get()
+            try:
+                await handleAudioMessage(conn, message)
+            except Exception as e:
+                logger.bind(tag=TAG).error(
+                    f"处理ASR文本失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
+                )
+
     # 有序处理ASR音频
     def asr_text_priority_thread(self, conn):
         while not conn.stop_event.is_set():
@@ -59,15 +107,23 @@ class ASRProviderBase(ABC):
             # 自动/实时模式：使用VAD检测
             have_voice = audio_have_voice
 
-            conn.asr_audio.append(audio)
+            # 同时缓存VAD已解码的PCM，识别时不再重新解码
+            conn.asr_audio.append(audio, conn.audio_ingest.pcm_for(audio))
             if not have_voice and not conn.client_have_voice:
-                conn.asr_audio = conn.asr_audio[-10:]
+                conn.asr_audio.keep_preroll()
                 return
 
+            # 推测式提前断句：继续说话时取消推测，静音达到推测阈值时提前开始识别
+            speculative = getattr(conn, "speculative_asr", None)
+            if speculative is not None:
+                if have_voice:
+                    speculative.cancel()
+                elif not conn.client_voice_stop:
+                    speculative.maybe_start(self, conn)
+
             # 自动模式下通过VAD检测到语音停止时触发识别
             if conn.client_voice_stop:
-                asr_audio_task = conn.asr_audio.copy()
-                conn.asr_audio.clear()
+                asr_audio_task = conn.asr_audio.take()
                 conn.reset_vad_states()
 
                 if len(asr_audio_task) > 15:
@@ -93,7 +149,7 @@ class ASRProviderBase(ABC):
                 wav_data = self._pcm_to_wav(combined_pcm_data)
 
             # 定义ASR任务
-            asr_task = self.speech_to_text(asr_audio_task, conn.session_id, conn.audio_format)
+            asr_task = self.create_asr_task(conn, asr_audio_task)
 
             if conn.voiceprint_provider and wav_data:
                 voiceprint_task = conn.voiceprint_provider.identify_speaker(wav_data, conn.session_id)
@@ -105,8 +161,11 @@ class ASRProviderBase(ABC):
                 asr_result = await asr_task
                 voiceprint_result = None
 
+            conn.turn_trace.mark(STAGE_ASR)
+
             # 记录识别结果 - 检查是否为异常
             if isinstance(asr_result, Exception):
+                record_provider_error("asr")
                 logger.bind(tag=TAG).error(f"ASR识别失败: {asr_result}")
                 raw_text = ""
             else:
@@ -162,10 +221,19 @@ class ASRProviderBase(ABC):
                 enqueue_asr_report(conn, enhanced_text, asr_audio_task)
                 
         except Exception as e:
+            record_provider_error("asr")
             logger.bind(tag=TAG).error(f"处理语音停止失败: {e}")
             import traceback
             logger.bind(tag=TAG).debug(f"异常详情: {traceback.format_exc()}")
 
+    def create_asr_task(self, conn, asr_audio_task: List[bytes]):
+        """返回本句的识别任务，已推测识别时直接使用推测的任务"""
+        speculative = getattr(conn, "speculative_asr", None)
+        asr_task = speculative.commit() if speculative is not None else None
+        if asr_task is None:
+            asr_task = self.speech_to_text(asr_audio_task, conn.session_id, conn.audio_format)
+        return asr_task
+
     def _build_enhanced_text(self, text: str, speaker_name: Optional[str]) -> str:
         """构建包含说话人信息的文本（仅用于纯文本ASR）"""
         if speaker_name and speaker_name.strip():
@@ -206,6 +274,17 @@ class ASRProviderBase(ABC):
     def stop_ws_connection(self):
         pass
 
+    def save_audio_if_enabled(self, pcm_data: List[bytes], session_id: str) -> Optional[str]:
+        """仅在开启音频保存（delete_audio_file 为 False）时写入WAV文件，识别本身不依赖该文件"""
+        if getattr(self, "delete_audio_file", True):
+            return None
+        return self.save_audio_to_file(pcm_data, session_id)
+
+    @staticmethod
+    def pcm_to_float32(pcm_data: bytes) -> np.ndarray:
+        """16位PCM转换为[-1, 1]的float32采样，供本地推理引擎直接使用"""
+        return np.frombuffer(pcm_data, dtype=np.int16).astype(np.float32) / 32768
+
     def save_audio_to_file(self, pcm_data: List[bytes], session_id: str) -> str:
         """PCM数据保存为WAV文件"""
         module_name = __name__.split(".")[-1]
@@ -230,6 +309,15 @@ class ASRProviderBase(ABC):
     @staticmethod
     def decode_opus(opus_data: List[bytes]) -> List[bytes]:
         """将Opus音频数据解码为PCM数据"""
+        # conn.asr_audio 取出的包列表附带VAD已解码的PCM，直接复用
+        pcm_data = getattr(opus_data, "pcm", None)
+        if pcm_data is not None:
+            return [
+                pcm_frame
+                for opus_packet, pcm_frame in zip(opus_data, pcm_data)
+                if opus_packet and pcm_frame
+            ]
+
         decoder = None
         try:
             decoder = opuslib_next.Decoder(16000, 1)
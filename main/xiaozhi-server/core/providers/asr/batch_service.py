@@ -0,0 +1,414 @@
+"""
+本地ASR微批处理推理服务
+
+所有连接共享同一组推理工作进程：
+1. 识别请求进入有界队列，队列满时调用方等待（背压），不会无限堆积
+2. 调度器按 max_batch_size / max_wait_ms 动态合批，工作进程忙时批次自然变大
+3. 每个工作进程只加载一次模型，使用模型的批量接口一次推理整批音频
+4. 结果通过 asyncio.Future 返回给 speech_to_text，再交给 handle_voice_stop
+"""
+
+import time
+import queue
+import asyncio
+import threading
+import itertools
+import multiprocessing
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 工作进程启动（加载模型）超时时间（秒）
+WORKER_START_TIMEOUT = 300
+# 结果读取线程检查工作进程存活的间隔（秒）
+WORKER_CHECK_INTERVAL = 1.0
+
+
+def _pcm_to_float32(pcm: bytes) -> np.ndarray:
+    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768
+
+
+class SherpaOnnxBatchEngine:
+    """sherpa-onnx 离线识别，使用 decode_streams 批量解码"""
+
+    def __init__(self, config: Dict[str, Any]):
+        import sherpa_onnx
+
+        kwargs = dict(
+            tokens=config["tokens_path"],
+            num_threads=int(config.get("num_threads", 2)),
+            sample_rate=16000,
+            feature_dim=80,
+            decoding_method="greedy_search",
+            debug=False,
+        )
+        if config.get("model_type") == "paraformer":
+            self.model = sherpa_onnx.OfflineRecognizer.from_paraformer(
+                paraformer=config["model_path"], **kwargs
+            )
+        else:
+            self.model = sherpa_onnx.OfflineRecognizer.from_sense_voice(
+                model=config["model_path"], use_itn=True, **kwargs
+            )
+
+    def transcribe(self, batch: List[bytes]) -> List[str]:
+        streams = []
+        for pcm in batch:
+            stream = self.model.create_stream()
+            stream.accept_waveform(16000, _pcm_to_float32(pcm))
+            streams.append(stream)
+        self.model.decode_streams(streams)
+        return [stream.result.text for stream in streams]
+
+
+class FunASRBatchEngine:
+    """FunASR AutoModel，列表输入一次推理整批音频"""
+
+    def __init__(self, config: Dict[str, Any]):
+        from funasr import AutoModel
+
+        self.model = AutoModel(
+            model=config["model_dir"],
+            vad_kwargs={"max_single_segment_time": 30000},
+            disable_update=True,
+            hub="hf",
+        )
+
+    def transcribe(self, batch: List[bytes]) -> List[str]:
+        result = self.model.generate(
+            input=[_pcm_to_float32(pcm) for pcm in batch],
+            cache={},
+            language="auto",
+            use_itn=True,
+            batch_size=len(batch),
+        )
+        return [item["text"] for item in result]
+
+
+class SimulatedBatchEngine:
+    """不加载模型的模拟引擎，每批固定开销 + 每条增量耗时，用于性能测试调度逻辑"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.batch_cost = float(config.get("batch_cost", 0.08))
+        self.item_cost = float(config.get("item_cost", 0.01))
+        self.text = config.get("text", "")
+
+    def transcribe(self, batch: List[bytes]) -> List[str]:
+        time.sleep(self.batch_cost + self.item_cost * len(batch))
+        return [self.text] * len(batch)
+
+
+BATCH_ENGINES = {
+    "sherpa_onnx_local": SherpaOnnxBatchEngine,
+    "fun_local": FunASRBatchEngine,
+    "simulated": SimulatedBatchEngine,
+}
+
+
+def _worker_main(engine_name, engine_config, task_queue, result_queue):
+    """工作进程入口：加载一次模型，循环处理批次"""
+    try:
+        engine = BATCH_ENGINES[engine_name](engine_config)
+    except Exception as e:
+        result_queue.put(("error", None, f"模型加载失败: {e}"))
+        return
+    result_queue.put(("ready", None, None))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        batch_id, batch = task
+        try:
+            result_queue.put(("done", batch_id, engine.transcribe(batch)))
+        except Exception as e:
+            result_queue.put(("error", batch_id, str(e)))
+
+
+class _Worker:
+    __slots__ = ("index", "process", "task_queue", "batch_id", "batches")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.task_queue = None
+        # 正在处理的批次ID，None表示空闲
+        self.batch_id = None
+        self.batches = 0
+
+
+class ASRBatchService:
+    """跨连接共享的本地ASR微批处理服务"""
+
+    def __init__(
+        self,
+        engine_name: str,
+        engine_config: Dict[str, Any],
+        num_workers: int = 1,
+        max_batch_size: int = 8,
+        max_wait_ms: int = 20,
+        max_queue_size: int = 256,
+    ):
+        self.engine_name = engine_name
+        self.engine_config = engine_config
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0, int(max_wait_ms)) / 1000
+        self.max_queue_size = max(1, int(max_queue_size))
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._result_queue = self._ctx.Queue()
+        self._workers = [_Worker(i) for i in range(max(1, int(num_workers)))]
+        self._batch_ids = itertools.count()
+        # batch_id -> (worker, [future])
+        self._inflight: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # 以下对象绑定到首次调用 transcribe 的事件循环
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Optional[asyncio.Queue] = None
+        self._idle: Optional[asyncio.Condition] = None
+        self._dispatch_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "utterances": 0,
+            "batches": 0,
+            "errors": 0,
+            "worker_restarts": 0,
+            "max_batch": 0,
+            "queue_time": 0.0,
+        }
+
+        for worker in self._workers:
+            self._start_worker(worker)
+        self._wait_ready(len(self._workers))
+        self._reader = threading.Thread(target=self._read_results, daemon=True)
+        self._reader.start()
+        logger.bind(tag=TAG).info(
+            f"ASR批处理服务已启动: engine={engine_name}, workers={len(self._workers)}, "
+            f"max_batch_size={self.max_batch_size}, max_wait_ms={max_wait_ms}"
+        )
+
+    def _start_worker(self, worker: _Worker):
+        worker.task_queue = self._ctx.Queue()
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                self.engine_name,
+                self.engine_config,
+                worker.task_queue,
+                self._result_queue,
+            ),
+            name=f"asr-batch-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+
+    def _wait_ready(self, count: int):
+        """等待工作进程加载模型完成"""
+        deadline = time.monotonic() + WORKER_START_TIMEOUT
+        while count > 0:
+            error = None
+            try:
+                status, _, error = self._result_queue.get(timeout=WORKER_CHECK_INTERVAL)
+                if status == "ready":
+                    count -= 1
+                    continue
+            except queue.Empty:
+                if any(not w.process.is_alive() for w in self._workers):
+                    error = "工作进程意外退出"
+                elif time.monotonic() > deadline:
+                    error = "模型加载超时"
+            if error is not None:
+                self.close()
+                raise RuntimeError(f"ASR批处理工作进程启动失败: {error}")
+
+    def _ensure_dispatcher(self):
+        if self._dispatch_task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._pending = asyncio.Queue(maxsize=self.max_queue_size)
+        self._idle = asyncio.Condition()
+        self._dispatch_task = self._loop.create_task(self._dispatch_loop())
+
+    async def transcribe(self, pcm: bytes) -> str:
+        """提交一段16k单声道PCM，返回原始识别文本"""
+        if self._closed:
+            raise RuntimeError("ASR批处理服务已关闭")
+        self._ensure_dispatcher()
+        future = self._loop.create_future()
+        # 队列满时在此等待，形成背压
+        await self._pending.put((pcm, future, time.monotonic()))
+        return await future
+
+    def _idle_worker(self) -> Optional[_Worker]:
+        for worker in self._workers:
+            if worker.batch_id is None:
+                return worker
+        return None
+
+    async def _dispatch_loop(self):
+        while True:
+            # 先等待空闲的工作进程，期间到达的请求会合并成更大的批次
+            async with self._idle:
+                await self._idle.wait_for(lambda: self._idle_worker() is not None)
+            worker = self._idle_worker()
+
+            first = await self._pending.get()
+            batch = [first]
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._pending.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # 已取消的请求（如连接断开）不再送去推理
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+            self._submit(worker, batch)
+
+    def _submit(self, worker: _Worker, batch: List[tuple]):
+        batch_id = next(self._batch_ids)
+        now = time.monotonic()
+        with self._lock:
+            worker.batch_id = batch_id
+            self._inflight[batch_id] = (worker, [item[1] for item in batch])
+        self.stats["batches"] += 1
+        self.stats["utterances"] += len(batch)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        self.stats["queue_time"] += sum(now - item[2] for item in batch)
+        worker.batches += 1
+        worker.task_queue.put((batch_id, [item[0] for item in batch]))
+
+    def _read_results(self):
+        """结果读取线程：把工作进程的结果回填到对应的Future"""
+        while not self._closed:
+            try:
+                status, batch_id, payload = self._result_queue.get(
+                    timeout=WORKER_CHECK_INTERVAL
+                )
+            except queue.Empty:
+                self._check_workers()
+                continue
+            except (EOFError, OSError):
+                break
+            if status == "ready":
+                continue
+            with self._lock:
+                entry = self._inflight.pop(batch_id, None)
+            if entry is None:
+                continue
+            worker, futures = entry
+            if status == "done":
+                self._finish(worker, batch_id, futures, results=payload)
+            else:
+                self._finish(worker, batch_id, futures, error=RuntimeError(payload))
+
+    def _check_workers(self):
+        """工作进程异常退出时让其批次失败并重新拉起"""
+        for worker in self._workers:
+            if self._closed or worker.process.is_alive():
+                continue
+            logger.bind(tag=TAG).error(
+                f"ASR批处理工作进程 {worker.index} 异常退出，正在重启"
+            )
+            batch_id = worker.batch_id
+            with self._lock:
+                entry = self._inflight.pop(batch_id, None)
+            self._start_worker(worker)
+            self.stats["worker_restarts"] += 1
+            if entry is not None:
+                self._finish(
+                    worker, batch_id, entry[1], error=RuntimeError("ASR工作进程异常退出")
+                )
+
+    def _finish(self, worker: _Worker, batch_id: int, futures, results=None, error=None):
+        if error is not None:
+            self.stats["errors"] += 1
+        if self._loop is None or self._loop.is_closed():
+            return
+
+        def resolve():
+            for i, future in enumerate(futures):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(results[i])
+            self._loop.create_task(self._release(worker, batch_id))
+
+        self._loop.call_soon_threadsafe(resolve)
+
+    async def _release(self, worker: _Worker, batch_id: int):
+        async with self._idle:
+            if worker.batch_id == batch_id:
+                worker.batch_id = None
+            self._idle.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["workers"] = len(self._workers)
+        stats["busy_workers"] = sum(1 for w in self._workers if w.batch_id is not None)
+        stats["queued"] = self._pending.qsize() if self._pending is not None else 0
+        stats["avg_batch"] = (
+            stats["utterances"] / stats["batches"] if stats["batches"] else 0.0
+        )
+        stats["avg_queue_time"] = (
+            stats["queue_time"] / stats["utterances"] if stats["utterances"] else 0.0
+        )
+        return stats
+
+    def close(self):
+        """停止调度与所有工作进程"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._dispatch_task is not None:
+            self._loop.call_soon_threadsafe(self._dispatch_task.cancel)
+        for worker in self._workers:
+            if worker.process is None:
+                continue
+            try:
+                worker.task_queue.put(None)
+            except Exception:
+                pass
+            worker.process.join(timeout=3)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+
+# 按引擎与配置复用服务，同一模型只启动一组工作进程
+_services: Dict[tuple, ASRBatchService] = {}
+_services_lock = threading.Lock()
+
+
+def get_asr_batch_service(
+    engine_name: str, engine_config: Dict[str, Any], **options
+) -> ASRBatchService:
+    key = (
+        engine_name,
+        tuple(sorted(engine_config.items())),
+        tuple(sorted(options.items())),
+    )
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = ASRBatchService(engine_name, engine_config, **options)
+            _services[key] = service
+        return service
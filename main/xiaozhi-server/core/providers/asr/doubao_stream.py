@@ -58,36 +58,40 @@ class ASRProvider(ASRProviderBase):
 
     async def open_audio_channels(self, conn):
         await super().open_audio_channels(conn)
+        self.prewarm_stream_session()
+
+    def stream_session_key(self):
+        return self._session_key(
+            __name__, self.ws_url, self.auth_method, self.appid, self.access_token
+        )
+
+    async def connect_stream_session(self):
+        headers = self.token_auth() if self.auth_method == "token" else None
+        return await websockets.connect(
+            self.ws_url,
+            additional_headers=headers,
+            max_size=1000000000,
+            ping_interval=None,
+            ping_timeout=None,
+            close_timeout=10,
+        )
 
     async def receive_audio(self, conn, audio, audio_have_voice):
         conn.asr_audio.append(audio)
-        conn.asr_audio = conn.asr_audio[-10:]
-        # 存储音频数据
-        if not hasattr(conn, 'asr_audio_for_voiceprint'):
-            conn.asr_audio_for_voiceprint = []
-        conn.asr_audio_for_voiceprint.append(audio)
+        conn.asr_audio.keep_preroll()
+        conn.asr_audio_for_voiceprint.append(audio, conn.audio_ingest.pcm_for(audio))
 
         # 当没有音频数据时处理完整语音片段
         if conn.client_listen_mode != "manual" and not audio and len(conn.asr_audio_for_voiceprint) > 0:
-            await self.handle_voice_stop(conn, conn.asr_audio_for_voiceprint)
-            conn.asr_audio_for_voiceprint = []
+            await self.handle_voice_stop(conn, conn.asr_audio_for_voiceprint.take())
 
         # 如果本次有声音，且之前没有建立连接
         if audio_have_voice and self.asr_ws is None and not self.is_processing:
             try:
                 self.is_processing = True
-                # 建立新的WebSocket连接
-                headers = self.token_auth() if self.auth_method == "token" else None
-                logger.bind(tag=TAG).info(f"正在连接ASR服务，headers: {headers}")
-
-                self.asr_ws = await websockets.connect(
-                    self.ws_url,
-                    additional_headers=headers,
-                    max_size=1000000000,
-                    ping_interval=None,
-                    ping_timeout=None,
-                    close_timeout=10,
-                )
+                # 获取WebSocket连接（优先使用会话池中预热好的连接）
+                logger.bind(tag=TAG).info("正在连接ASR服务")
+                self.asr_ws = await self.acquire_stream_session()
 
                 # 发送初始化请求
                 request_params = self.construct_request(str(uuid.uuid4()))
@@ -151,7 +155,8 @@ class ASRProvider(ASRProviderBase):
         # 发送当前音频数据
         if self.asr_ws and self.is_processing:
             try:
-                pcm_frame = self.decoder.decode(audio, 960)
+                # 复用VAD已解码的PCM，手动模式下未经VAD解码时再自行解码
+                pcm_frame = conn.audio_ingest.pcm_for(audio) or self.decoder.decode(audio, 960)
                 payload = gzip.compress(pcm_frame)
                 audio_request = bytearray(self.generate_audio_default_header())
                 audio_request.extend(len(payload).to_bytes(4, "big"))
@@ -164,7 +169,7 @@ class ASRProvider(ASRProviderBase):
         try:
             while self.asr_ws and not conn.stop_event.is_set():
                 # 获取当前连接的音频数据
-                audio_data = getattr(conn, 'asr_audio_for_voiceprint', [])
+                audio_data = conn.asr_audio_for_voiceprint
                 try:
                     response = await self.asr_ws.recv()
                     result = self.parse_response(response)
@@ -191,7 +196,7 @@ class ASRProvider(ASRProviderBase):
                                 self.text = ""
                                 conn.reset_vad_states()
                                 if len(audio_data) > 15:  # 确保有足够音频数据
-                                    await self.handle_voice_stop(conn, audio_data)
+                                    await self.handle_voice_stop(conn, audio_data.copy())
                                 break
 
                             # 专门处理没有文本的识别结果（手动模式下可能已经识别完成但是没松按键）
@@ -202,7 +207,7 @@ class ASRProvider(ASRProviderBase):
 
                                 if conn.client_listen_mode == "manual" and conn.client_voice_stop and len(audio_data) > 0:
                                     logger.bind(tag=TAG).debug("消息结束收到停止信号，触发处理")
-                                    await self.handle_voice_stop(conn, audio_data)
+                                    await self.handle_voice_stop(conn, audio_data.copy())
                                     # 清理音频缓存
                                     conn.asr_audio.clear()
                                     conn.reset_vad_states()
@@ -225,7 +230,7 @@ class ASRProvider(ASRProviderBase):
                                         # 在接收消息中途时收到停止信号
                                         if conn.client_voice_stop and len(audio_data) > 0:
                                             logger.bind(tag=TAG).debug("消息中途收到停止信号，触发处理")
-                                            await self.handle_voice_stop(conn, audio_data)
+                                            await self.handle_voice_stop(conn, audio_data.copy())
                                             # 清理音频缓存
                                             conn.asr_audio.clear()
                                             conn.reset_vad_states()
@@ -235,7 +240,7 @@ class ASRProvider(ASRProviderBase):
                                         self.text = current_text
                                         conn.reset_vad_states()
                                         if len(audio_data) > 15:  # 确保有足够音频数据
-                                            await self.handle_voice_stop(conn, audio_data)
+                                            await self.handle_voice_stop(conn, audio_data.copy())
                                     break
                         elif "error" in payload:
                             error_msg = payload.get("error", "未知错误")
@@ -264,9 +269,9 @@ class ASRProvider(ASRProviderBase):
             self.is_processing = False
             if conn:
                 if hasattr(conn, 'asr_audio_for_voiceprint'):
-                    conn.asr_audio_for_voiceprint = []
+                    conn.asr_audio_for_voiceprint.clear()
                 if hasattr(conn, 'asr_audio'):
-                    conn.asr_audio = []
+                    conn.asr_audio.clear()
 
     def stop_ws_connection(self):
         if self.asr_ws:
@@ -440,6 +445,6 @@ class ASRProvider(ASRProviderBase):
         if hasattr(self, '_connections'):
             for conn in self._connections.values():
                 if hasattr(conn, 'asr_audio_for_voiceprint'):
-                    conn.asr_audio_for_voiceprint = []
+                    conn.asr_audio_for_voiceprint.clear()
                 if hasattr(conn, 'asr_audio'):
-                    conn.asr_audio = []
+                    conn.asr_audio.clear()
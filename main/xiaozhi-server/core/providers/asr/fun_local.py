@@ -11,6 +11,7 @@ from config.logger import setup_logging
 from typing import Optional, Tuple, List
 from core.providers.asr.utils import lang_tag_filter
 from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.batch_service import get_asr_batch_service
 from core.providers.asr.dto.dto import InterfaceType
 
 TAG = __name__
@@ -54,6 +55,21 @@ class ASRProvider(ASRProviderBase):
 
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
+
+        # batch_workers 大于0时由共享的批处理工作进程推理，本进程不加载模型
+        self.batch_service = None
+        batch_workers = int(config.get("batch_workers") or 0)
+        if batch_workers > 0:
+            self.batch_service = get_asr_batch_service(
+                "fun_local",
+                {"model_dir": self.model_dir},
+                num_workers=batch_workers,
+                max_batch_size=int(config.get("max_batch_size") or 8),
+                max_wait_ms=int(config.get("max_batch_wait_ms") or 20),
+                max_queue_size=int(config.get("max_queue_size") or 256),
+            )
+            return
+
         with CaptureOutput():
             self.model = AutoModel(
                 model=self.model_dir,
@@ -94,15 +110,19 @@ class ASRProvider(ASRProviderBase):
 
                 # 语音识别 - 使用线程池避免阻塞事件循环
                 start_time = time.time()
-                result = await asyncio.to_thread(
-                    self.model.generate,
-                    input=combined_pcm_data,
-                    cache={},
-                    language="auto",
-                    use_itn=True,
-                    batch_size_s=60,
-                )
-                text = lang_tag_filter(result[0]["text"])
+                if self.batch_service is not None:
+                    raw_text = await self.batch_service.transcribe(combined_pcm_data)
+                else:
+                    result = await asyncio.to_thread(
+                        self.model.generate,
+                        input=combined_pcm_data,
+                        cache={},
+                        language="auto",
+                        use_itn=True,
+                        batch_size_s=60,
+                    )
+                    raw_text = result[0]["text"]
+                text = lang_tag_filter(raw_text)
                 logger.bind(tag=TAG).debug(
                     f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text['content']}"
                 )
@@ -0,0 +1,149 @@
+"""
+本地ASR同步推理执行器
+
+sherpa-onnx、vosk 的解码是同步调用，直接在 speech_to_text 中执行会阻塞事件循环，
+所有连接的音频发送和websocket读取都会停顿。执行器把推理放到独立线程中：
+1. 每个引擎（按模型区分）一个执行器，max_concurrency 限制同时推理的数量，其余请求排队
+2. 识别器等有状态的对象由 factory 创建并放入对象池，每次推理独占一个，用完归还复用
+3. 记录排队等待和推理耗时，通过 /metrics 暴露
+"""
+
+import time
+import asyncio
+import threading
+import concurrent.futures
+from typing import Any, Callable, Dict, List, Optional
+
+from config.logger import setup_logging
+from core.utils.metrics import REGISTRY, GaugeFunc, Histogram
+
+TAG = __name__
+logger = setup_logging()
+
+ASR_INFERENCE_QUEUE_SECONDS = REGISTRY.register(
+    Histogram(
+        "xiaozhi_asr_inference_queue_seconds",
+        "本地ASR推理请求的排队等待时间",
+        ["engine"],
+    )
+)
+ASR_INFERENCE_RUN_SECONDS = REGISTRY.register(
+    Histogram(
+        "xiaozhi_asr_inference_run_seconds",
+        "本地ASR单次推理耗时",
+        ["engine"],
+    )
+)
+
+
+class InferenceExecutor:
+    def __init__(
+        self,
+        engine: str,
+        max_concurrency: int = 2,
+        factory: Optional[Callable[[], Any]] = None,
+    ):
+        self.engine = engine
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.factory = factory
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix=f"asr-{engine}"
+        )
+        # 空闲的识别器对象，数量不超过 max_concurrency
+        self._idle: List[Any] = []
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+
+    def _acquire_resource(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self.factory()
+
+    def _release_resource(self, resource):
+        with self._lock:
+            self._idle.append(resource)
+
+    def _call(self, submitted_at: float, func: Callable, args: tuple):
+        started_at = time.monotonic()
+        ASR_INFERENCE_QUEUE_SECONDS.labels(self.engine).observe(started_at - submitted_at)
+        with self._lock:
+            self.pending -= 1
+            self.running += 1
+        resource = None
+        try:
+            if self.factory is None:
+                return func(*args)
+            resource = self._acquire_resource()
+            result = func(resource, *args)
+            # 推理出错的识别器状态不确定，不放回对象池
+            self._release_resource(resource)
+            return result
+        finally:
+            ASR_INFERENCE_RUN_SECONDS.labels(self.engine).observe(
+                time.monotonic() - started_at
+            )
+            with self._lock:
+                self.running -= 1
+
+    async def run(self, func: Callable, *args):
+        """在推理线程中执行 func；配置了 factory 时第一个参数为对象池中的识别器"""
+        with self._lock:
+            self.pending += 1
+        try:
+            future = self._executor.submit(self._call, time.monotonic(), func, args)
+        except Exception:
+            with self._lock:
+                self.pending -= 1
+            raise
+        # 排队中被取消（等待方被取消或执行器关闭）时 _call 不会执行，在这里减去排队计数
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, future: concurrent.futures.Future):
+        if future.cancelled():
+            with self._lock:
+                self.pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_executors: Dict[str, InferenceExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_inference_executor(
+    engine: str,
+    max_concurrency: int = 2,
+    factory: Optional[Callable[[], Any]] = None,
+) -> InferenceExecutor:
+    """按引擎（含模型路径）获取共享的推理执行器，相同模型的ASR实例共用并发限制"""
+    with _executors_lock:
+        executor = _executors.get(engine)
+        if executor is None:
+            executor = InferenceExecutor(engine, max_concurrency, factory)
+            _executors[engine] = executor
+            logger.bind(tag=TAG).info(
+                f"本地ASR推理执行器已创建: {engine}，最大并发: {executor.max_concurrency}"
+            )
+        return executor
+
+
+def _queue_state():
+    state = {}
+    for executor in list(_executors.values()):
+        state[(executor.engine, "pending")] = executor.pending
+        state[(executor.engine, "running")] = executor.running
+    return state
+
+
+REGISTRY.register(
+    GaugeFunc(
+        "xiaozhi_asr_inference_requests",
+        "本地ASR推理执行器中排队（pending）和执行中（running）的请求数",
+        _queue_state,
+        ["engine", "state"],
+    )
+)
@@ -1,5 +1,5 @@
 import os
-import tempfile
+import base64
 from typing import Optional, Tuple, List
 import dashscope
 from config.logger import setup_logging
@@ -35,33 +35,17 @@ class ASRProvider(ASRProviderBase):
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def _prepare_audio_file(self, pcm_data: bytes) -> str:
-        """将PCM数据转换为WAV文件并返回文件路径"""
-        try:
-            import wave
-            
-            # 创建临时WAV文件
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_path = temp_file.name
-                
-            # 写入WAV格式
-            with wave.open(temp_path, 'wb') as wav_file:
-                wav_file.setnchannels(1)      # 单声道
-                wav_file.setsampwidth(2)      # 16位
-                wav_file.setframerate(16000)  # 16kHz采样率
-                wav_file.writeframes(pcm_data)
-                
-            return temp_path
-            
-        except Exception as e:
-            logger.bind(tag=tag).error(f"音频文件准备失败: {e}")
+    def _prepare_audio_data(self, pcm_data: bytes) -> str:
+        """将PCM数据转换为WAV并编码为data URI，直接随请求上传，不写临时文件"""
+        wav_data = self._pcm_to_wav(pcm_data)
+        if not wav_data:
             return None
+        return "data:audio/wav;base64," + base64.b64encode(wav_data).decode("ascii")
 
     async def speech_to_text(
         self, opus_data: List[bytes], session_id: str, audio_format="opus"
     ) -> Tuple[Optional[str], Optional[str]]:
         """将语音数据转换为文本"""
-        temp_file_path = None
         file_path = None
         
         try:
@@ -76,21 +60,20 @@ class ASRProvider(ASRProviderBase):
                 logger.bind(tag=tag).warning("音频数据为空")
                 return "", None
             
-            # 准备音频文件
-            temp_file_path = self._prepare_audio_file(combined_pcm_data)
-            if not temp_file_path:
+            # 准备音频数据
+            audio_data = self._prepare_audio_data(combined_pcm_data)
+            if not audio_data:
                 return "", None
             
             # 保存音频文件（如果需要）
-            if not self.delete_audio_file:
-                file_path = self.save_audio_to_file(pcm_data, session_id)
+            file_path = self.save_audio_if_enabled(pcm_data, session_id)
             
             # 构造请求消息
             messages = [
                 {
                     "role": "user",
                     "content": [
-                        {"audio": temp_file_path}
+                        {"audio": audio_data}
                     ]
                 }
             ]
@@ -141,11 +124,3 @@ class ASRProvider(ASRProviderBase):
         except Exception as e:
             logger.bind(tag=tag).error(f"语音识别失败: {e}")
             return "", file_path
-            
-        finally:
-            # 清理临时文件
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.unlink(temp_file_path)
-                except Exception as e:
-                    logger.bind(tag=tag).warning(f"清理临时文件失败: {e}")
\ No newline at end of file
@@ -1,5 +1,4 @@
 import time
-import wave
 import os
 import sys
 import io
@@ -7,8 +6,10 @@ from config.logger import setup_logging
 from typing import Optional, Tuple, List
 from core.providers.asr.dto.dto import InterfaceType
 from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.batch_service import get_asr_batch_service
+from core.providers.asr.inference_executor import get_inference_executor
+from core.providers.asr.streaming_local import StreamingLocalDecoder
 
-import numpy as np
 import sherpa_onnx
 
 from modelscope.hub.file_download import model_file_download
@@ -16,6 +17,9 @@ from modelscope.hub.file_download import model_file_download
 TAG = __name__
 logger = setup_logging()
 
+# 结束在线识别时补在末尾的静音（秒），让模型输出最后几个字
+ONLINE_TAIL_PADDING_SECONDS = 0.66
+
 
 # 捕获标准输出
 class CaptureOutput:
@@ -46,6 +50,15 @@ class ASRProvider(ASRProviderBase):
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
 
+        # 流式模式：说话过程中使用在线识别模型增量解码，需要流式模型（zipformer/paraformer 流式版）
+        self.streaming = bool(config.get("streaming", False))
+        self.streaming_decoder = None
+        if self.streaming:
+            # 说话期间已在增量解码，结束识别流只能执行一次，不做推测识别
+            self.speculative_asr_supported = False
+            self._init_online_model(config)
+            return
+
         # 初始化模型文件路径
         model_files = {
             "model.int8.onnx": os.path.join(self.model_dir, "model.int8.onnx"),
@@ -73,6 +86,30 @@ class ASRProvider(ASRProviderBase):
             logger.bind(tag=TAG).error(f"模型文件处理失败: {str(e)}")
             raise
 
+        # batch_workers 大于0时由共享的批处理工作进程推理，本进程不加载模型
+        self.batch_service = None
+        batch_workers = int(config.get("batch_workers") or 0)
+        if batch_workers > 0:
+            self.batch_service = get_asr_batch_service(
+                "sherpa_onnx_local",
+                {
+                    "model_type": self.model_type,
+                    "model_path": self.model_path,
+                    "tokens_path": self.tokens_path,
+                },
+                num_workers=batch_workers,
+                max_batch_size=int(config.get("max_batch_size") or 8),
+                max_wait_ms=int(config.get("max_batch_wait_ms") or 20),
+                max_queue_size=int(config.get("max_queue_size") or 256),
+            )
+            return
+
+        # 同步解码在独立线程中执行，同一模型的实例共用并发限制
+        self.executor = get_inference_executor(
+            f"sherpa_onnx_local:{self.model_path}",
+            max_concurrency=int(config.get("max_concurrency") or 2),
+        )
+
         with CaptureOutput():
             if self.model_type == "paraformer":
                 self.model = sherpa_onnx.OfflineRecognizer.from_paraformer(
@@ -96,29 +133,87 @@ class ASRProvider(ASRProviderBase):
                     use_itn=True,
                 )
 
-    def read_wave(self, wave_filename: str) -> Tuple[np.ndarray, int]:
-        """
-        Args:
-        wave_filename:
-            Path to a wave file. It should be single channel and each sample should
-            be 16-bit. Its sample rate does not need to be 16kHz.
-        Returns:
-        Return a tuple containing:
-        - A 1-D array of dtype np.float32 containing the samples, which are
-        normalized to the range [-1, 1].
-        - sample rate of the wave file
-        """
-
-        with wave.open(wave_filename) as f:
-            assert f.getnchannels() == 1, f.getnchannels()
-            assert f.getsampwidth() == 2, f.getsampwidth()  # it is in bytes
-            num_samples = f.getnframes()
-            samples = f.readframes(num_samples)
-            samples_int16 = np.frombuffer(samples, dtype=np.int16)
-            samples_float32 = samples_int16.astype(np.float32)
-
-            samples_float32 = samples_float32 / 32768
-            return samples_float32, f.getframerate()
+    def _init_online_model(self, config: dict):
+        """加载在线（流式）识别模型，模型文件需手动下载到 model_dir"""
+        online_model_type = config.get("online_model_type", "zipformer")
+        model_files = {
+            name: os.path.join(self.model_dir, name)
+            for name in ("tokens.txt", "encoder.int8.onnx", "decoder.int8.onnx")
+        }
+        if online_model_type == "zipformer":
+            model_files["joiner.int8.onnx"] = os.path.join(self.model_dir, "joiner.int8.onnx")
+        for file_path in model_files.values():
+            if not os.path.isfile(file_path):
+                raise FileNotFoundError(f"流式模型文件不存在: {file_path}")
+        self.model_path = model_files["encoder.int8.onnx"]
+        self.tokens_path = model_files["tokens.txt"]
+
+        with CaptureOutput():
+            if online_model_type == "paraformer":
+                self.model = sherpa_onnx.OnlineRecognizer.from_paraformer(
+                    tokens=self.tokens_path,
+                    encoder=model_files["encoder.int8.onnx"],
+                    decoder=model_files["decoder.int8.onnx"],
+                    num_threads=1,
+                    sample_rate=16000,
+                    feature_dim=80,
+                    decoding_method="greedy_search",
+                )
+            else:
+                self.model = sherpa_onnx.OnlineRecognizer.from_transducer(
+                    tokens=self.tokens_path,
+                    encoder=model_files["encoder.int8.onnx"],
+                    decoder=model_files["decoder.int8.onnx"],
+                    joiner=model_files["joiner.int8.onnx"],
+                    num_threads=1,
+                    sample_rate=16000,
+                    feature_dim=80,
+                    decoding_method="greedy_search",
+                )
+
+        # 增量解码频繁且每次很短，并发数按同时说话的设备数配置
+        self.executor = get_inference_executor(
+            f"sherpa_onnx_local:{self.model_path}",
+            max_concurrency=int(config.get("max_concurrency") or 2),
+        )
+        self.streaming_decoder = StreamingLocalDecoder(
+            self.executor,
+            self.model.create_stream,
+            self._online_feed,
+            self._online_finish,
+        )
+        self.batch_service = None
+
+    def _online_feed(self, stream, pcm_data: bytes) -> str:
+        stream.accept_waveform(16000, self.pcm_to_float32(pcm_data))
+        while self.model.is_ready(stream):
+            self.model.decode_stream(stream)
+        return self.model.get_result(stream)
+
+    def _online_finish(self, stream) -> str:
+        padding = b"\x00\x00" * int(16000 * ONLINE_TAIL_PADDING_SECONDS)
+        stream.accept_waveform(16000, self.pcm_to_float32(padding))
+        stream.input_finished()
+        while self.model.is_ready(stream):
+            self.model.decode_stream(stream)
+        return self.model.get_result(stream)
+
+    def _online_decode(self, pcm_data: bytes) -> str:
+        """整句送入在线识别流（手动模式或增量解码失败时）"""
+        stream = self.model.create_stream()
+        self._online_feed(stream, pcm_data)
+        return self._online_finish(stream)
+
+    async def receive_audio(self, conn, audio, audio_have_voice):
+        if self.streaming_decoder is not None:
+            self.streaming_decoder.update(conn, audio, audio_have_voice)
+        await super().receive_audio(conn, audio, audio_have_voice)
+
+    def _decode(self, pcm_data: bytes) -> str:
+        s = self.model.create_stream()
+        s.accept_waveform(16000, self.pcm_to_float32(pcm_data))
+        self.model.decode_stream(s)
+        return s.result.text
 
     async def speech_to_text(
         self, opus_data: List[bytes], session_id: str, audio_format="opus"
@@ -126,24 +221,31 @@ class ASRProvider(ASRProviderBase):
         """语音转文本主处理逻辑"""
         file_path = None
         try:
-            # 保存音频文件
             start_time = time.time()
             if audio_format == "pcm":
                 pcm_data = opus_data
             else:
                 pcm_data = self.decode_opus(opus_data)
-            file_path = self.save_audio_to_file(pcm_data, session_id)
-            logger.bind(tag=TAG).debug(
-                f"音频文件保存耗时: {time.time() - start_time:.3f}s | 路径: {file_path}"
-            )
+            combined_pcm_data = b"".join(pcm_data)
 
-            # 语音识别
-            start_time = time.time()
-            s = self.model.create_stream()
-            samples, sample_rate = self.read_wave(file_path)
-            s.accept_waveform(sample_rate, samples)
-            self.model.decode_stream(s)
-            text = s.result.text
+            # 仅在开启音频保存时写入文件，识别直接使用内存中的PCM
+            file_path = self.save_audio_if_enabled(pcm_data, session_id)
+
+            if self.batch_service is not None:
+                text = await self.batch_service.transcribe(combined_pcm_data)
+                logger.bind(tag=TAG).debug(
+                    f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
+                )
+                return text, file_path
+
+            # 语音识别，在推理线程中执行，不阻塞事件循环
+            if self.streaming_decoder is not None:
+                # 说话期间已增量解码，只需解码剩余部分
+                text = await self.streaming_decoder.finish(session_id)
+                if text is None:
+                    text = await self.executor.run(self._online_decode, combined_pcm_data)
+            else:
+                text = await self.executor.run(self._decode, combined_pcm_data)
             logger.bind(tag=TAG).debug(
                 f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
             )
@@ -153,11 +255,3 @@ class ASRProvider(ASRProviderBase):
         except Exception as e:
             logger.bind(tag=TAG).error(f"语音识别失败: {e}", exc_info=True)
             return "", file_path
-        finally:
-            # 文件清理逻辑
-            if self.delete_audio_file and file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.bind(tag=TAG).debug(f"已删除临时音频文件: {file_path}")
-                except Exception as e:
-                    logger.bind(tag=TAG).error(f"文件删除失败: {file_path} | 错误: {e}")
@@ -0,0 +1,91 @@
+"""
+推测式提前断句
+
+VAD要等满 min_silence_duration_ms 的静音才判定说话结束，之后ASR才开始识别。推测模式下：
+1. 静音达到较短的 provisional_silence_ms 时，先用已有的音频在后台开始识别
+2. 静音期间用户继续说话，则取消这次识别并丢弃结果，再次停顿时重新推测
+3. VAD确认说话结束时直接使用推测的识别任务（未完成时等待其完成），不再重新识别
+
+推测开始后直到确认结束只会追加静音帧（有声音时推测已取消），推测结果与完整识别一致。
+流式ASR的 speech_to_text 取的是说话过程中累积的识别结果，不能提前取，不做推测。
+推测只针对识别本身：意图识别和LLM会修改对话状态，仍在确认说话结束后执行。
+
+每个连接一个实例，只在事件循环线程中使用
+"""
+
+import time
+import asyncio
+from typing import Any, Dict, Optional
+
+from config.logger import setup_logging
+from core.providers.asr.dto.dto import InterfaceType
+from core.utils.metrics import REGISTRY, Counter
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_OPTIONS = {
+    "enabled": False,
+    # 静音达到该时长（毫秒）时开始推测识别，应小于VAD的 min_silence_duration_ms
+    "provisional_silence_ms": 100,
+}
+
+ASR_SPECULATIONS = REGISTRY.register(
+    Counter(
+        "xiaozhi_asr_speculative_total",
+        "推测式识别的次数，committed为被采用，cancelled为用户继续说话或连接关闭而取消",
+        ["result"],
+    )
+)
+
+
+class SpeculativeASR:
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        options = {**DEFAULT_OPTIONS, **{k: v for k, v in (options or {}).items() if v is not None}}
+        self.enabled = bool(options["enabled"])
+        self.provisional_silence_ms = float(options["provisional_silence_ms"])
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {"started": 0, "committed": 0, "cancelled": 0}
+
+    def maybe_start(self, asr, conn):
+        """静音达到推测阈值且尚未推测时，用当前缓存的音频开始识别"""
+        if not self.enabled or self.task is not None:
+            return
+        if conn.client_listen_mode == "manual" or not self.supports(asr):
+            return
+        silence_ms = time.time() * 1000 - conn.last_activity_time
+        if silence_ms < self.provisional_silence_ms:
+            return
+        asr_audio_task = conn.asr_audio.copy()
+        if len(asr_audio_task) <= 15:
+            return
+        self.task = asyncio.create_task(
+            asr.speech_to_text(asr_audio_task, conn.session_id, conn.audio_format)
+        )
+        self.stats["started"] += 1
+        logger.bind(tag=TAG).debug(f"静音 {silence_ms:.0f}ms，开始推测识别")
+
+    @staticmethod
+    def supports(asr) -> bool:
+        """流式ASR在说话过程中累积识别结果，提前调用 speech_to_text 会把结果截断"""
+        if getattr(asr, "interface_type", None) == InterfaceType.STREAM:
+            return False
+        return asr.speculative_asr_supported
+
+    def cancel(self):
+        """用户继续说话，丢弃推测的识别"""
+        if self.task is None:
+            return
+        self.task.cancel()
+        self.task = None
+        self.stats["cancelled"] += 1
+        ASR_SPECULATIONS.labels("cancelled").inc()
+        logger.bind(tag=TAG).debug("用户继续说话，取消推测识别")
+
+    def commit(self) -> Optional[asyncio.Task]:
+        """确认说话结束，返回推测的识别任务；没有推测时返回None"""
+        task, self.task = self.task, None
+        if task is not None:
+            self.stats["committed"] += 1
+            ASR_SPECULATIONS.labels("committed").inc()
+        return task
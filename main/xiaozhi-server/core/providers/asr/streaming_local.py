@@ -0,0 +1,131 @@
+"""
+本地ASR边说边识别
+
+本地ASR原本在VAD判定说话结束后才开始识别，识别耗时全部叠加在响应延迟上。流式模式下：
+1. receive_audio 收到有声音的包时，把PCM交给在线识别流增量解码（语音开始时先补上预录的包）
+2. 每个连接的解码按顺序在推理执行器中进行，执行器繁忙时积压的音频合并为一次送入
+3. 说话结束时只需解码剩余的少量音频并结束识别流，speech_to_text 直接取最终结果
+4. 解码过程中的中间结果写入 conn.asr_partial_text，可用于提前预测意图
+
+引擎相关的操作由提供方传入（都在推理线程中调用）：
+- create_stream()：创建识别流
+- feed(stream, pcm)：送入PCM并解码已就绪的部分，返回当前的中间结果
+- finish(stream)：结束输入，解码剩余部分，返回最终结果
+"""
+
+import time
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 超过该时间（秒）没有新音频的识别流视为已废弃（如连接断开），创建新流时清理
+STALE_SESSION_SECONDS = 60
+
+
+class _OnlineSession:
+    def __init__(self, stream):
+        self.stream = stream
+        self.pending: List[bytes] = []
+        self.task: Optional[asyncio.Task] = None
+        self.failed = False
+        self.partial = ""
+        self.updated_at = time.monotonic()
+
+
+class StreamingLocalDecoder:
+    def __init__(
+        self,
+        executor,
+        create_stream: Callable[[], Any],
+        feed: Callable[[Any, bytes], str],
+        finish: Callable[[Any], str],
+    ):
+        self.executor = executor
+        self.create_stream = create_stream
+        self.feed = feed
+        self.finish_stream = finish
+        # 按 session_id 保存正在识别的语音，只在事件循环线程中访问
+        self.sessions: Dict[str, _OnlineSession] = {}
+
+    def update(self, conn, audio: bytes, have_voice: bool):
+        """在 receive_audio 追加音频之前调用，说话期间把音频送入识别流"""
+        if conn.client_listen_mode == "manual":
+            return
+        session = self.sessions.get(conn.session_id)
+        if not have_voice and not conn.client_have_voice:
+            # 静音：未被 speech_to_text 取走的识别流（语音过短等）直接丢弃
+            if session is not None:
+                self.discard(conn)
+            return
+
+        if session is None:
+            session = self._open(conn)
+            if session is None:
+                return
+            # 补上预录的包，与离线识别使用的音频保持一致
+            pcm = conn.asr_audio.copy().pcm
+            if pcm:
+                session.pending.extend(pcm)
+        pcm_frame = conn.audio_ingest.pcm_for(audio)
+        if pcm_frame:
+            session.pending.append(pcm_frame)
+        session.updated_at = time.monotonic()
+        if session.task is None or session.task.done():
+            session.task = asyncio.create_task(self._drain(conn, session))
+
+    def _open(self, conn) -> Optional[_OnlineSession]:
+        now = time.monotonic()
+        for session_id, stale in list(self.sessions.items()):
+            if now - stale.updated_at > STALE_SESSION_SECONDS:
+                del self.sessions[session_id]
+        try:
+            session = _OnlineSession(self.create_stream())
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"创建在线识别流失败: {e}")
+            return None
+        self.sessions[conn.session_id] = session
+        conn.asr_partial_text = ""
+        return session
+
+    async def _drain(self, conn, session: _OnlineSession):
+        while session.pending and not session.failed:
+            pcm = b"".join(session.pending)
+            session.pending.clear()
+            try:
+                partial = await self.executor.run(self.feed, session.stream, pcm)
+            except Exception as e:
+                session.failed = True
+                logger.bind(tag=TAG).error(f"增量解码失败: {e}")
+                return
+            if partial and partial != session.partial:
+                session.partial = partial
+                # 识别流已被取走或丢弃时不再更新中间结果
+                if self.sessions.get(conn.session_id) is session:
+                    conn.asr_partial_text = partial
+                    logger.bind(tag=TAG).debug(f"中间识别结果: {partial}")
+
+    def discard(self, conn):
+        self.sessions.pop(conn.session_id, None)
+        conn.asr_partial_text = ""
+
+    async def finish(self, session_id: str) -> Optional[str]:
+        """取走该连接的识别流并返回最终结果；没有识别流或解码失败时返回None，由调用方整句识别"""
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return None
+        if session.task is not None:
+            await session.task
+        if session.failed:
+            return None
+        try:
+            if session.pending:
+                await self.executor.run(self.feed, session.stream, b"".join(session.pending))
+                session.pending.clear()
+            return await self.executor.run(self.finish_stream, session.stream)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"结束在线识别失败: {e}")
+            return None
@@ -5,6 +5,7 @@ from typing import Optional, Tuple, List
 from .base import ASRProviderBase
 from config.logger import setup_logging
 from core.providers.asr.dto.dto import InterfaceType
+from core.providers.asr.inference_executor import get_inference_executor
 import vosk
 
 TAG = __name__
@@ -17,10 +18,11 @@ class ASRProvider(ASRProviderBase):
         self.model_path = config.get("model_path")
         self.output_dir = config.get("output_dir", "tmp/")
         self.delete_audio_file = delete_audio_file
+        self.max_concurrency = int(config.get("max_concurrency") or 2)
         
         # 初始化VOSK模型
         self.model = None
-        self.recognizer = None
+        self.executor = None
         self._load_model()
         
         # 确保输出目录存在
@@ -35,14 +37,40 @@ class ASRProvider(ASRProviderBase):
             logger.bind(tag=TAG).info(f"正在加载VOSK模型: {self.model_path}")
             self.model = vosk.Model(self.model_path)
 
-            # 初始化VOSK识别器（采样率必须为16kHz）
-            self.recognizer = vosk.KaldiRecognizer(self.model, 16000)
+            # 识别器有状态，不能在连接间同时使用：由推理执行器的对象池按并发数创建（采样率必须为16kHz）
+            model = self.model
+            self.executor = get_inference_executor(
+                f"vosk:{self.model_path}",
+                max_concurrency=self.max_concurrency,
+                factory=lambda: vosk.KaldiRecognizer(model, 16000),
+            )
 
             logger.bind(tag=TAG).info("VOSK模型加载成功")
         except Exception as e:
             logger.bind(tag=TAG).error(f"加载VOSK模型失败: {e}")
             raise
 
+    @staticmethod
+    def _recognize(recognizer, pcm_data: bytes) -> str:
+        # 进行识别（VOSK推荐每次送入2000字节的数据）
+        chunk_size = 2000
+        text_result = ""
+        
+        for i in range(0, len(pcm_data), chunk_size):
+            chunk = pcm_data[i:i+chunk_size]
+            if recognizer.AcceptWaveform(chunk):
+                result = json.loads(recognizer.Result())
+                text = result.get('text', '')
+                if text:
+                    text_result += text + " "
+        
+        # 获取最终结果，FinalResult 之后识别器重置，可以复用
+        final_result = json.loads(recognizer.FinalResult())
+        final_text = final_result.get('text', '')
+        if final_text:
+            text_result += final_text
+        return text_result
+
     async def speech_to_text(
         self, audio_data: List[bytes], session_id: str, audio_format: str = "opus"
     ) -> Tuple[Optional[str], Optional[str]]:
@@ -75,26 +103,9 @@ class ASRProvider(ASRProviderBase):
                 file_path = self.save_audio_to_file(pcm_data, session_id)
 
             start_time = time.time()
-            
-            
-            # 进行识别（VOSK推荐每次送入2000字节的数据）
-            chunk_size = 2000
-            text_result = ""
-            
-            for i in range(0, len(combined_pcm_data), chunk_size):
-                chunk = combined_pcm_data[i:i+chunk_size]
-                if self.recognizer.AcceptWaveform(chunk):
-                    result = json.loads(self.recognizer.Result())
-                    text = result.get('text', '')
-                    if text:
-                        text_result += text + " "
-            
-            # 获取最终结果
-            final_result = json.loads(self.recognizer.FinalResult())
-            final_text = final_result.get('text', '')
-            if final_text:
-                text_result += final_text
-            
+            # 在推理线程中识别，不阻塞事件循环
+            text_result = await self.executor.run(self._recognize, combined_pcm_data)
+
             logger.bind(tag=TAG).debug(
                 f"VOSK语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text_result.strip()}"
             )
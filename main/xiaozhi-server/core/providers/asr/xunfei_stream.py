@@ -96,15 +96,27 @@ class ASRProvider(ASRProviderBase):
 
     async def open_audio_channels(self, conn):
         await super().open_audio_channels(conn)
+        self.prewarm_stream_session()
+
+    def stream_session_key(self):
+        return self._session_key(__name__, self.app_id, self.api_key, self.api_secret)
+
+    async def connect_stream_session(self):
+        # 鉴权URL带有签名时间，每次连接重新生成
+        ws_url = self.create_url()
+        return await websockets.connect(
+            ws_url,
+            max_size=1000000000,
+            ping_interval=None,
+            ping_timeout=None,
+            close_timeout=10,
+        )
 
     async def receive_audio(self, conn, audio, audio_have_voice):
         # 先调用父类方法处理基础逻辑
         await super().receive_audio(conn, audio, audio_have_voice)
 
-        # 存储音频数据用于声纹识别
-        if not hasattr(conn, "asr_audio_for_voiceprint"):
-            conn.asr_audio_for_voiceprint = []
-        conn.asr_audio_for_voiceprint.append(audio)
+        conn.asr_audio_for_voiceprint.append(audio, conn.audio_ingest.pcm_for(audio))
 
         # 如果本次有声音，且之前没有建立连接
         if audio_have_voice and self.asr_ws is None and not self.is_processing:
@@ -118,7 +130,8 @@ class ASRProvider(ASRProviderBase):
         # 发送当前音频数据
         if self.asr_ws and self.is_processing and self.server_ready:
             try:
-                pcm_frame = self.decoder.decode(audio, 960)
+                # 复用VAD已解码的PCM，手动模式下未经VAD解码时再自行解码
+                pcm_frame = conn.audio_ingest.pcm_for(audio) or self.decoder.decode(audio, 960)
                 await self._send_audio_frame(pcm_frame, STATUS_CONTINUE_FRAME)
             except Exception as e:
                 logger.bind(tag=TAG).warning(f"发送音频数据时发生错误: {e}")
@@ -128,21 +141,13 @@ class ASRProvider(ASRProviderBase):
         """开始识别会话"""
         try:
             self.is_processing = True
-            # 建立WebSocket连接
-            ws_url = self.create_url()
-            logger.bind(tag=TAG).info(f"正在连接ASR服务: {ws_url[:50]}...")
-
             # 如果为手动模式,设置超时时长为一分钟
             if conn.client_listen_mode == "manual":
                 self.iat_params["eos"] = 60000
 
-            self.asr_ws = await websockets.connect(
-                ws_url,
-                max_size=1000000000,
-                ping_interval=None,
-                ping_timeout=None,
-                close_timeout=10,
-            )
+            # 获取WebSocket连接（优先使用会话池中预热好的连接）
+            logger.bind(tag=TAG).info("正在连接ASR服务")
+            self.asr_ws = await self.acquire_stream_session()
 
             logger.bind(tag=TAG).info("ASR WebSocket连接已建立")
             self.server_ready = False
@@ -232,7 +237,7 @@ class ASRProvider(ASRProviderBase):
 
                     if status == 2:
                         if conn.client_listen_mode == "manual":
-                            audio_data = getattr(conn, 'asr_audio_for_voiceprint', [])
+                            audio_data = conn.asr_audio_for_voiceprint.copy()
                             if len(audio_data) > 0:
                                 logger.bind(tag=TAG).debug("收到最终识别结果，触发处理")
                                 await self.handle_voice_stop(conn, audio_data)
@@ -266,9 +271,9 @@ class ASRProvider(ASRProviderBase):
             # 清理连接的音频缓存
             if conn:
                 if hasattr(conn, "asr_audio_for_voiceprint"):
-                    conn.asr_audio_for_voiceprint = []
+                    conn.asr_audio_for_voiceprint.clear()
                 if hasattr(conn, "asr_audio"):
-                    conn.asr_audio = []
+                    conn.asr_audio.clear()
 
     async def handle_voice_stop(self, conn, asr_audio_task: List[bytes]):
         """处理语音停止，发送最后一帧并处理识别结果"""
@@ -367,6 +372,6 @@ class ASRProvider(ASRProviderBase):
         if hasattr(self, "_connections"):
             for conn in self._connections.values():
                 if hasattr(conn, "asr_audio_for_voiceprint"):
-                    conn.asr_audio_for_voiceprint = []
+                    conn.asr_audio_for_voiceprint.clear()
                 if hasattr(conn, "asr_audio"):
-                    conn.asr_audio = []
+                    conn.asr_audio.clear()
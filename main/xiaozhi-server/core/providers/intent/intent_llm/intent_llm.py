@@ -1,21 +1,28 @@
 from typing import List, Dict
 from ..base import IntentProviderBase
+from ..local_classifier import LocalIntentClassifier
 from plugins_func.functions.play_music import initialize_music_handler
 from config.logger import setup_logging
 import re
 import json
+import asyncio
 import hashlib
+import threading
 import time
 
 TAG = __name__
 logger = setup_logging()
 
+# 最多缓存的系统提示词数量，超过后淘汰最早加入的
+MAX_CACHED_PROMPTS = 64
+
 
 class IntentProvider(IntentProviderBase):
     def __init__(self, config):
         super().__init__(config)
         self.llm = None
-        self.promot = ""
+        # 实例由实例池在连接间共享，系统提示词按可用函数定义分别缓存
+        self._prompts = {}
         # 导入全局缓存管理器
         from core.utils.cache.manager import cache_manager, CacheType
 
@@ -23,6 +30,104 @@ class IntentProvider(IntentProviderBase):
         self.CacheType = CacheType
         self.history_count = 4  # 默认使用最近4条对话记录
 
+        # 本地快速意图识别配置
+        self.local_fast_path = config.get("local_fast_path", True) is not False
+        threshold = config.get("local_similarity_threshold", 0.6)
+        self.local_similarity_threshold = float(threshold) if threshold else 0.6
+        self.local_keywords = config.get("local_keywords", {}) or {}
+        # 大模型意图识别超时时间（秒），超时按继续聊天处理
+        llm_timeout = config.get("llm_timeout", 5)
+        self.llm_timeout = float(llm_timeout) if llm_timeout else 5
+        # 按可用函数集合缓存本地分类器
+        self._classifiers = {}
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "turns": 0,
+            "keyword_hits": 0,
+            "vector_hits": 0,
+            "llm_calls": 0,
+            "llm_timeouts": 0,
+            "llm_time": 0.0,
+        }
+
+    def _get_classifier(self, functions) -> LocalIntentClassifier:
+        key = tuple(
+            sorted(f.get("function", {}).get("name", "") for f in functions or [])
+        )
+        classifier = self._classifiers.get(key)
+        if classifier is None:
+            classifier = LocalIntentClassifier(
+                functions,
+                similarity_threshold=self.local_similarity_threshold,
+                custom_keywords=self.local_keywords,
+            )
+            self._classifiers[key] = classifier
+        return classifier
+
+    def _get_system_prompt(self, functions) -> str:
+        # 不同智能体的插件、设备MCP工具、IoT工具不同，函数描述和参数也会不同，按完整定义区分
+        key = hashlib.sha1(
+            json.dumps(
+                functions, sort_keys=True, ensure_ascii=False, default=str
+            ).encode("utf-8")
+        ).hexdigest()
+        prompt = self._prompts.get(key)
+        if prompt is None:
+            prompt = self.get_intent_system_prompt(functions)
+            if len(self._prompts) >= MAX_CACHED_PROMPTS:
+                self._prompts.pop(next(iter(self._prompts)), None)
+            self._prompts[key] = prompt
+        return prompt
+
+    def _record(self, key: str, llm_time: float = 0.0):
+        with self._stats_lock:
+            self.stats["turns"] += 1
+            self.stats[key] += 1
+            self.stats["llm_time"] += llm_time
+            turns = self.stats["turns"]
+        if turns % 50 == 0:
+            stats = self.get_stats()
+            logger.bind(tag=TAG).info(
+                f"意图识别本地命中率: {stats['local_ratio']:.1%}, "
+                f"大模型平均耗时: {stats['avg_llm_time'] * 1000:.0f}ms, "
+                f"累计节省: {stats['saved_time']:.1f}秒"
+            )
+
+    def get_stats(self) -> dict:
+        """获取意图识别统计：本地命中占比与节省的大模型调用耗时"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        local_hits = stats["keyword_hits"] + stats["vector_hits"]
+        avg_llm_time = (
+            stats["llm_time"] / stats["llm_calls"] if stats["llm_calls"] else 0.0
+        )
+        stats["local_ratio"] = local_hits / stats["turns"] if stats["turns"] else 0.0
+        stats["avg_llm_time"] = avg_llm_time
+        stats["saved_time"] = local_hits * avg_llm_time
+        return stats
+
+    async def _llm_detect(self, conn, system_prompt: str, user_prompt: str):
+        """在线程池中调用同步的大模型接口，不阻塞事件循环；超时后放弃等待"""
+        executor = getattr(conn, "executor", None)
+        if executor is not None:
+            future = asyncio.wrap_future(
+                executor.submit(
+                    self.llm.response_no_stream,
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                )
+            )
+        else:
+            future = asyncio.get_running_loop().run_in_executor(
+                None,
+                lambda: self.llm.response_no_stream(
+                    system_prompt=system_prompt, user_prompt=user_prompt
+                ),
+            )
+        # 超时或外部取消时会一并取消尚未开始执行的线程池任务
+        return await asyncio.wait_for(future, timeout=self.llm_timeout)
+
     def get_intent_system_prompt(self, functions_list: str) -> str:
         """
         根据配置的意图选项和可用函数动态生成系统提示词
@@ -147,20 +252,31 @@ class IntentProvider(IntentProviderBase):
             )
             return cached_intent
 
-        if self.promot == "":
-            functions = conn.func_handler.get_functions()
-            if hasattr(conn, "mcp_client"):
-                mcp_tools = conn.mcp_client.get_available_tools()
-                if mcp_tools is not None and len(mcp_tools) > 0:
-                    if functions is None:
-                        functions = []
-                    functions.extend(mcp_tools)
-
-            self.promot = self.get_intent_system_prompt(functions)
+        # get_functions 返回的是工具管理器缓存的列表，复制后再追加MCP工具
+        functions = list(conn.func_handler.get_functions() or [])
+        if hasattr(conn, "mcp_client"):
+            mcp_tools = conn.mcp_client.get_available_tools()
+            if mcp_tools is not None and len(mcp_tools) > 0:
+                functions.extend(mcp_tools)
 
         music_config = initialize_music_handler(conn)
         music_file_names = music_config["music_file_names"]
-        prompt_music = f"{self.promot}\n<musicNames>{music_file_names}\n</musicNames>"
+
+        # 本地快速意图识别，高置信度时不再调用大模型
+        if self.local_fast_path:
+            local_intent, stage = self._get_classifier(functions).classify(
+                text, music_file_names
+            )
+            if local_intent is not None:
+                self._record(f"{stage}_hits")
+                logger.bind(tag=TAG).info(
+                    f"本地{stage}识别到意图: {local_intent}, "
+                    f"耗时: {(time.time() - total_start_time) * 1000:.2f}ms"
+                )
+                self.cache_manager.set(self.CacheType.INTENT, cache_key, local_intent)
+                return local_intent
+        system_prompt = self._get_system_prompt(functions)
+        prompt_music = f"{system_prompt}\n<musicNames>{music_file_names}\n</musicNames>"
 
         home_assistant_cfg = conn.config["plugins"].get("home_assistant")
         if home_assistant_cfg:
@@ -194,12 +310,18 @@ class IntentProvider(IntentProviderBase):
         llm_start_time = time.time()
         logger.bind(tag=TAG).debug(f"开始LLM意图识别调用, 模型: {model_info}")
 
-        intent = self.llm.response_no_stream(
-            system_prompt=prompt_music, user_prompt=user_prompt
-        )
+        try:
+            intent = await self._llm_detect(conn, prompt_music, user_prompt)
+        except asyncio.TimeoutError:
+            self._record("llm_timeouts")
+            logger.bind(tag=TAG).warning(
+                f"大模型意图识别超时({self.llm_timeout}秒)，按继续聊天处理"
+            )
+            return '{"function_call": {"name": "continue_chat"}}'
 
         # 记录LLM调用完成时间
         llm_time = time.time() - llm_start_time
+        self._record("llm_calls", llm_time)
         logger.bind(tag=TAG).debug(
             f"外挂的大模型意图识别完成, 模型: {model_info}, 调用耗时: {llm_time:.4f}秒"
         )
@@ -0,0 +1,278 @@
+"""
+本地快速意图识别
+
+在调用大模型意图识别之前，先用本地规则判断高置信度的意图：
+1. 关键词前缀树：退出、播放音乐、时间日期查询等固定说法
+2. 轻量向量相似度：用户文本与函数描述/示例的字符n-gram TF-IDF余弦相似度
+
+只有置信度足够高时才直接返回结果，否则返回None交给大模型处理
+"""
+
+import re
+import json
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+TAG = __name__
+
+_NON_WORD = re.compile(r"[^\w]+")
+# 含疑问词的句子（如“怎么退出了”）语义不明确，关键词不直接生效
+_QUESTION_WORDS = ("怎么", "为什么", "为啥", "如何", "是不是", "能不能", "可以吗")
+# 关键词命中后允许残留的语气词，不含“吗”“呢”等疑问语气词（“不想聊了吗”不是退出）
+_FILLER_CHARS = set("吧呀啊哦了嘛哈请帮我给你一下")
+_QUESTION_MARKS = ("?", "？")
+
+# 内置的关键词规则：(说法, 函数名, 匹配方式)
+#   exact: 去掉语气词后整句等于该说法
+#   prefix: 以该说法开头，其后的内容作为参数
+EXIT_PHRASES = ("退出系统", "结束对话", "我不想和你说话了", "不想聊了", "拜拜", "再见")
+CONTEXT_PHRASES = (
+    "现在几点",
+    "几点了",
+    "现在时间",
+    "今天几号",
+    "今天星期几",
+    "今天周几",
+    "今天农历",
+    "今天是几号",
+    "今天是星期几",
+    "今天是什么日子",
+)
+MUSIC_RANDOM_PHRASES = (
+    "播放音乐",
+    "放点音乐",
+    "放首歌",
+    "来首歌",
+    "唱首歌",
+    "唱歌",
+    "听歌",
+    "听音乐",
+    "随便放首歌",
+    "来点音乐",
+)
+MUSIC_PREFIX_PHRASES = ("播放", "我想听", "放一首", "来一首", "唱一首", "放首", "来首", "唱首")
+
+# 内置函数的示例说法，用于补充向量相似度的语料
+FUNCTION_EXAMPLES = {
+    "get_weather": ["今天天气怎么样", "明天会下雨吗", "外面冷不冷", "查一下天气预报"],
+    "get_news_from_newsnow": ["有什么新闻", "播报一下今天的新闻", "最近有什么热点"],
+    "get_news_from_chinanews": ["有什么新闻", "播报一下今天的新闻", "最近有什么热点"],
+    "get_time": ["现在几点了", "今天几号", "今天星期几"],
+}
+
+
+def normalize(text: str) -> str:
+    return _NON_WORD.sub("", text).lower()
+
+
+class KeywordTrie:
+    """字符前缀树，支持在文本任意位置查找最长匹配的关键词"""
+
+    __slots__ = ("root",)
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, phrase: str, payload):
+        node = self.root
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[None] = payload
+
+    def match_at(self, text: str, start: int) -> Optional[Tuple[int, object]]:
+        """返回从start开始的最长匹配 (结束位置, payload)"""
+        node = self.root
+        best = None
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if None in node:
+                best = (i + 1, node[None])
+        return best
+
+    def search(self, text: str) -> List[Tuple[int, int, object]]:
+        """查找文本中所有不重叠的最长匹配"""
+        matches = []
+        i = 0
+        while i < len(text):
+            found = self.match_at(text, i)
+            if found:
+                matches.append((i, found[0], found[1]))
+                i = found[0]
+            else:
+                i += 1
+        return matches
+
+
+def _ngrams(text: str) -> Counter:
+    grams = Counter(text)
+    grams.update(text[i : i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class NGramVectorIndex:
+    """基于字符一元/二元语法TF-IDF的轻量向量索引"""
+
+    def __init__(self, documents: Dict[str, List[str]]):
+        self.names = []
+        vectors = []
+        df = Counter()
+        for name, texts in documents.items():
+            grams = Counter()
+            for text in texts:
+                grams.update(_ngrams(normalize(text)))
+            if not grams:
+                continue
+            self.names.append(name)
+            vectors.append(grams)
+            df.update(grams.keys())
+
+        count = max(1, len(vectors))
+        self.idf = {gram: math.log((1 + count) / (1 + freq)) + 1 for gram, freq in df.items()}
+        self.vectors = [self._weight(grams) for grams in vectors]
+
+    def _weight(self, grams: Counter) -> Dict[str, float]:
+        vector = {g: tf * self.idf.get(g, 0.0) for g, tf in grams.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {g: v / norm for g, v in vector.items() if v > 0}
+
+    def query(self, text: str) -> List[Tuple[str, float]]:
+        """返回按相似度降序排列的 (函数名, 余弦相似度)"""
+        vector = self._weight(_ngrams(normalize(text)))
+        scores = []
+        for name, doc in zip(self.names, self.vectors):
+            score = sum(v * doc.get(g, 0.0) for g, v in vector.items())
+            scores.append((name, score))
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores
+
+
+class LocalIntentClassifier:
+    """关键词 + 向量相似度的本地意图分类器"""
+
+    def __init__(
+        self,
+        functions: List[Dict],
+        similarity_threshold: float = 0.6,
+        similarity_margin: float = 0.15,
+        custom_keywords: Optional[Dict[str, List[str]]] = None,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.similarity_margin = similarity_margin
+
+        self.function_names = set()
+        # 没有必填参数的函数才能由向量相似度直接触发
+        no_arg_functions = set()
+        documents = {}
+        for func in functions or []:
+            info = func.get("function", {})
+            name = info.get("name")
+            if not name:
+                continue
+            self.function_names.add(name)
+            if not info.get("parameters", {}).get("required"):
+                no_arg_functions.add(name)
+            documents[name] = [info.get("description", "")] + FUNCTION_EXAMPLES.get(
+                name, []
+            )
+        self.no_arg_functions = no_arg_functions
+        self.index = NGramVectorIndex(documents)
+
+        self.trie = KeywordTrie()
+        if "handle_exit_intent" in self.function_names:
+            for phrase in EXIT_PHRASES:
+                self.trie.insert(phrase, ("exact", "handle_exit_intent"))
+        for phrase in CONTEXT_PHRASES:
+            self.trie.insert(phrase, ("exact", "result_for_context"))
+        if "play_music" in self.function_names:
+            for phrase in MUSIC_RANDOM_PHRASES:
+                self.trie.insert(phrase, ("exact", "play_music"))
+            for phrase in MUSIC_PREFIX_PHRASES:
+                self.trie.insert(phrase, ("prefix", "play_music"))
+        for name, phrases in (custom_keywords or {}).items():
+            for phrase in phrases or []:
+                self.trie.insert(normalize(phrase), ("exact", name))
+
+    @staticmethod
+    def _is_filler(text: str) -> bool:
+        return all(char in _FILLER_CHARS for char in text)
+
+    @staticmethod
+    def _build(name: str, arguments: Optional[Dict] = None) -> str:
+        function_call = {"name": name}
+        if arguments:
+            function_call["arguments"] = arguments
+        return json.dumps({"function_call": function_call}, ensure_ascii=False)
+
+    def _match_music(self, remainder: str, music_names: List[str]) -> Optional[str]:
+        """前缀说法后的内容只有与本地曲库匹配时才认为是点歌"""
+        remainder = re.sub(r"(这首歌|的歌|歌曲|这首)$", "", remainder)
+        if not remainder:
+            return None
+        for music_name in music_names or []:
+            normalized = normalize(music_name.split("/")[-1])
+            if normalized and (remainder in normalized or normalized in remainder):
+                return remainder
+        return None
+
+    def classify_keywords(
+        self, text: str, music_names: List[str] = None, question: bool = False
+    ) -> Optional[str]:
+        if any(word in text for word in _QUESTION_WORDS):
+            return None
+        matches = self.trie.search(text)
+        if len(matches) != 1:
+            # 没有命中或命中多个意图时交给大模型判断
+            return None
+
+        start, end, (mode, name) = matches[0]
+        if question and name != "result_for_context":
+            # 以问号结尾的句子只有时间日期查询本身就是疑问句
+            return None
+        before, after = text[:start], text[end:]
+        if mode == "exact":
+            if not self._is_filler(before) or not self._is_filler(after):
+                return None
+            if name == "handle_exit_intent":
+                return self._build(name, {"say_goodbye": "再见，期待下次和你聊天！"})
+            if name == "play_music":
+                return self._build(name, {"song_name": "random"})
+            return self._build(name)
+
+        # prefix 模式：说法前只允许语气词，其后必须是曲库中的歌名
+        if not self._is_filler(before):
+            return None
+        song_name = self._match_music(after, music_names)
+        if song_name is None:
+            return None
+        return self._build(name, {"song_name": song_name})
+
+    def classify_vector(self, text: str) -> Optional[str]:
+        scores = self.index.query(text)
+        if not scores:
+            return None
+        best_name, best_score = scores[0]
+        second_score = scores[1][1] if len(scores) > 1 else 0.0
+        if best_name not in self.no_arg_functions:
+            return None
+        if best_score < self.similarity_threshold:
+            return None
+        if best_score - second_score < self.similarity_margin:
+            return None
+        return self._build(best_name)
+
+    def classify(self, text: str, music_names: List[str] = None) -> Tuple[Optional[str], str]:
+        """返回 (意图JSON或None, 命中阶段 keyword/vector/"")"""
+        question = text.rstrip().endswith(_QUESTION_MARKS)
+        text = normalize(text)
+        if not text:
+            return None, ""
+        intent = self.classify_keywords(text, music_names, question)
+        if intent is not None:
+            return intent, "keyword"
+        intent = self.classify_vector(text)
+        if intent is not None:
+            return intent, "vector"
+        return None, ""
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
+from core.utils.llm_http import iterate_in_thread, open_llm_stream
 
 TAG = __name__
 logger = setup_logging()
@@ -25,7 +26,7 @@ class LLMProviderBase(ABC):
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error in Ollama response generation: {e}")
             return "【LLM服务响应异常】"
-    
+
     def response_with_functions(self, session_id, dialogue, functions=None):
         """
         Default implementation for function calling (streaming)
@@ -37,3 +38,38 @@ class LLMProviderBase(ABC):
         for token in self.response(session_id, dialogue):
             yield token, None
 
+    async def aresponse(self, session_id, dialogue, **kwargs):
+        """异步流式响应，默认在线程池中驱动同步的 response"""
+        async for token in iterate_in_thread(self.response(session_id, dialogue, **kwargs)):
+            yield token
+
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None, **kwargs):
+        """异步流式响应（支持工具调用），默认在线程池中驱动同步的 response_with_functions"""
+        async for item in iterate_in_thread(
+            self.response_with_functions(session_id, dialogue, functions, **kwargs)
+        ):
+            yield item
+
+
+class AsyncLLMProviderBase(LLMProviderBase):
+    """原生异步的LLM提供方：实现 aresponse/aresponse_with_functions，HTTP请求使用进程内共享的连接池
+
+    同步接口返回 LLMStream，异步流在常驻的LLM事件循环中运行，调用 cancel/close 时立即关闭上游连接
+    """
+
+    @abstractmethod
+    async def aresponse(self, session_id, dialogue, **kwargs):
+        yield
+
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None, **kwargs):
+        # 不支持工具调用的提供方直接返回普通响应
+        async for token in self.aresponse(session_id, dialogue, **kwargs):
+            yield token, None
+
+    def response(self, session_id, dialogue, **kwargs):
+        return open_llm_stream(self.aresponse(session_id, dialogue, **kwargs))
+
+    def response_with_functions(self, session_id, dialogue, functions=None, **kwargs):
+        return open_llm_stream(
+            self.aresponse_with_functions(session_id, dialogue, functions, **kwargs)
+        )
@@ -1,23 +1,24 @@
 from config.logger import setup_logging
 import json
-from core.providers.llm.base import LLMProviderBase
+from core.providers.llm.base import AsyncLLMProviderBase
 
 # official coze sdk for Python [cozepy](https://github.com/coze-dev/coze-py)
 from cozepy import COZE_CN_BASE_URL
 from cozepy import (
-    Coze,
-    TokenAuth,
+    AsyncCoze,
+    AsyncTokenAuth,
     Message,
     ChatEventType,
 )  # noqa
 from core.providers.llm.system_prompt import get_system_prompt_for_function
 from core.utils.util import check_model_key
+from core.utils.llm_http import get_llm_http_client
 
 TAG = __name__
 logger = setup_logging()
 
 
-class LLMProvider(LLMProviderBase):
+class LLMProvider(AsyncLLMProviderBase):
     def __init__(self, config):
         self.personal_access_token = config.get("personal_access_token")
         self.bot_id = str(config.get("bot_id"))
@@ -27,34 +28,44 @@ class LLMProvider(LLMProviderBase):
         if model_key_msg:
             logger.bind(tag=TAG).error(model_key_msg)
 
-    def response(self, session_id, dialogue, **kwargs):
+    async def aresponse(self, session_id, dialogue, **kwargs):
         coze_api_token = self.personal_access_token
         coze_api_base = COZE_CN_BASE_URL
 
         last_msg = next(m for m in reversed(dialogue) if m["role"] == "user")
 
-        coze = Coze(auth=TokenAuth(token=coze_api_token), base_url=coze_api_base)
+        coze = AsyncCoze(
+            auth=AsyncTokenAuth(token=coze_api_token),
+            base_url=coze_api_base,
+            http_client=get_llm_http_client(coze_api_base),
+        )
         conversation_id = self.session_conversation_map.get(session_id)
 
         # 如果没有找到conversation_id，则创建新的对话
         if not conversation_id:
-            conversation = coze.conversations.create(messages=[])
+            conversation = await coze.conversations.create(messages=[])
             conversation_id = conversation.id
             self.session_conversation_map[session_id] = conversation_id  # 更新映射
 
-        for event in coze.chat.stream(
+        events = coze.chat.stream(
             bot_id=self.bot_id,
             user_id=self.user_id,
             additional_messages=[
                 Message.build_user_question_text(last_msg["content"]),
             ],
             conversation_id=conversation_id,
-        ):
-            if event.event == ChatEventType.CONVERSATION_MESSAGE_DELTA:
-                print(event.message.content, end="", flush=True)
-                yield event.message.content
+        )
+        try:
+            async for event in events:
+                if event.event == ChatEventType.CONVERSATION_MESSAGE_DELTA:
+                    yield event.message.content
+        finally:
+            # 打断时关闭事件流，SDK内部的HTTP响应随之关闭
+            await events.aclose()
 
-    def response_with_functions(self, session_id, dialogue, functions=None):
+    async def aresponse_with_functions(
+        self, session_id, dialogue, functions=None, **kwargs
+    ):
         if len(dialogue) == 2 and functions is not None and len(functions) > 0:
             # 第一次调用llm， 取最后一条用户消息，附加tool提示词
             last_msg = dialogue[-1]["content"]
@@ -71,5 +82,5 @@ class LLMProvider(LLMProviderBase):
                     break
                 dialogue.pop()
 
-        for token in self.response(session_id, dialogue):
+        async for token in self.aresponse(session_id, dialogue):
             yield token, None
@@ -1,15 +1,15 @@
 import json
 from config.logger import setup_logging
-import requests
-from core.providers.llm.base import LLMProviderBase
+from core.providers.llm.base import AsyncLLMProviderBase
 from core.providers.llm.system_prompt import get_system_prompt_for_function
 from core.utils.util import check_model_key
+from core.utils.llm_http import get_llm_http_client
 
 TAG = __name__
 logger = setup_logging()
 
 
-class LLMProvider(LLMProviderBase):
+class LLMProvider(AsyncLLMProviderBase):
     def __init__(self, config):
         self.api_key = config["api_key"]
         self.mode = config.get("mode", "chat-messages")
@@ -19,7 +19,7 @@ class LLMProvider(LLMProviderBase):
         if model_key_msg:
             logger.bind(tag=TAG).error(model_key_msg)
 
-    def response(self, session_id, dialogue, **kwargs):
+    async def aresponse(self, session_id, dialogue, **kwargs):
         try:
             # 取最后一条用户消息
             last_msg = next(m for m in reversed(dialogue) if m["role"] == "user")
@@ -47,15 +47,15 @@ class LLMProvider(LLMProviderBase):
                     "user": session_id,
                 }
 
-            with requests.post(
+            async with get_llm_http_client(self.base_url).stream(
+                "POST",
                 f"{self.base_url}/{self.mode}",
                 headers={"Authorization": f"Bearer {self.api_key}"},
                 json=request_json,
-                stream=True,
             ) as r:
                 if self.mode == "chat-messages":
-                    for line in r.iter_lines():
-                        if line.startswith(b"data: "):
+                    async for line in r.aiter_lines():
+                        if line.startswith("data: "):
                             event = json.loads(line[6:])
                             # 如果没有找到conversation_id，则获取此次conversation_id
                             if not conversation_id:
@@ -69,8 +69,8 @@ class LLMProvider(LLMProviderBase):
                             ):
                                 yield event["answer"]
                 elif self.mode == "workflows/run":
-                    for line in r.iter_lines():
-                        if line.startswith(b"data: "):
+                    async for line in r.aiter_lines():
+                        if line.startswith("data: "):
                             event = json.loads(line[6:])
                             if event.get("event") == "workflow_finished":
                                 if event["data"]["status"] == "succeeded":
@@ -78,8 +78,8 @@ class LLMProvider(LLMProviderBase):
                                 else:
                                     yield "【服务响应异常】"
                 elif self.mode == "completion-messages":
-                    for line in r.iter_lines():
-                        if line.startswith(b"data: "):
+                    async for line in r.aiter_lines():
+                        if line.startswith("data: "):
                             event = json.loads(line[6:])
                             # 过滤 message_replace 事件，此事件会全量推一次
                             if event.get("event") != "message_replace" and event.get(
@@ -91,7 +91,9 @@ class LLMProvider(LLMProviderBase):
             logger.bind(tag=TAG).error(f"Error in response generation: {e}")
             yield "【服务响应异常】"
 
-    def response_with_functions(self, session_id, dialogue, functions=None):
+    async def aresponse_with_functions(
+        self, session_id, dialogue, functions=None, **kwargs
+    ):
         if len(dialogue) == 2 and functions is not None and len(functions) > 0:
             # 第一次调用llm， 取最后一条用户消息，附加tool提示词
             last_msg = dialogue[-1]["content"]
@@ -108,5 +110,5 @@ class LLMProvider(LLMProviderBase):
                     break
                 dialogue.pop()
 
-        for token in self.response(session_id, dialogue):
+        async for token in self.aresponse(session_id, dialogue):
             yield token, None
@@ -1,14 +1,14 @@
 import json
 from config.logger import setup_logging
-import requests
-from core.providers.llm.base import LLMProviderBase
+from core.providers.llm.base import AsyncLLMProviderBase
 from core.utils.util import check_model_key
+from core.utils.llm_http import get_llm_http_client
 
 TAG = __name__
 logger = setup_logging()
 
 
-class LLMProvider(LLMProviderBase):
+class LLMProvider(AsyncLLMProviderBase):
     def __init__(self, config):
         self.api_key = config["api_key"]
         self.base_url = config.get("base_url")
@@ -18,13 +18,14 @@ class LLMProvider(LLMProviderBase):
         if model_key_msg:
             logger.bind(tag=TAG).error(model_key_msg)
 
-    def response(self, session_id, dialogue, **kwargs):
+    async def aresponse(self, session_id, dialogue, **kwargs):
         try:
             # 取最后一条用户消息
             last_msg = next(m for m in reversed(dialogue) if m["role"] == "user")
 
             # 发起流式请求
-            with requests.post(
+            async with get_llm_http_client(self.base_url).stream(
+                "POST",
                 f"{self.base_url}/chat/completions",
                 headers={"Authorization": f"Bearer {self.api_key}"},
                 json={
@@ -34,13 +35,12 @@ class LLMProvider(LLMProviderBase):
                     "variables": self.variables,
                     "messages": [{"role": "user", "content": last_msg["content"]}],
                 },
-                stream=True,
             ) as r:
-                for line in r.iter_lines():
+                async for line in r.aiter_lines():
                     if line:
                         try:
-                            if line.startswith(b"data: "):
-                                if line[6:].decode("utf-8") == "[DONE]":
+                            if line.startswith("data: "):
+                                if line[6:] == "[DONE]":
                                     break
 
                                 data = json.loads(line[6:])
@@ -67,7 +67,11 @@ class LLMProvider(LLMProviderBase):
             logger.bind(tag=TAG).error(f"Error in response generation: {e}")
             yield "【服务响应异常】"
 
-    def response_with_functions(self, session_id, dialogue, functions=None):
+    async def aresponse_with_functions(
+        self, session_id, dialogue, functions=None, **kwargs
+    ):
         logger.bind(tag=TAG).error(
             f"fastgpt暂未实现完整的工具调用（function call），建议使用其他意图识别"
         )
+        return
+        yield
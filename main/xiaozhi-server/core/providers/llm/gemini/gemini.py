@@ -6,10 +6,10 @@ import requests
 from google import generativeai as genai
 from google.generativeai import types, GenerationConfig
 
-from core.providers.llm.base import LLMProviderBase
+from core.providers.llm.base import AsyncLLMProviderBase
 from core.utils.util import check_model_key
 from config.logger import setup_logging
-from google.generativeai.types import GenerateContentResponse
+from google.generativeai.types import AsyncGenerateContentResponse
 from requests import RequestException
 
 log = setup_logging()
@@ -66,7 +66,7 @@ def setup_proxy_env(http_proxy: str | None, https_proxy: str | None):
         raise RuntimeError("HTTP 和 HTTPS 代理都不可用，请检查配置")
 
 
-class LLMProvider(LLMProviderBase):
+class LLMProvider(AsyncLLMProviderBase):
     def __init__(self, cfg: Dict[str, Any]):
         self.model_name = cfg.get("model_name", "gemini-2.0-flash")
         self.api_key = cfg["api_key"]
@@ -119,13 +119,17 @@ class LLMProvider(LLMProviderBase):
         ]
 
     # Gemini文档提到，无需维护session-id，直接用dialogue拼接而成
-    def response(self, session_id, dialogue, **kwargs):
-        yield from self._generate(dialogue, None)
+    async def aresponse(self, session_id, dialogue, **kwargs):
+        async for token in self._generate(dialogue, None):
+            yield token
 
-    def response_with_functions(self, session_id, dialogue, functions=None):
-        yield from self._generate(dialogue, self._build_tools(functions))
+    async def aresponse_with_functions(
+        self, session_id, dialogue, functions=None, **kwargs
+    ):
+        async for item in self._generate(dialogue, self._build_tools(functions)):
+            yield item
 
-    def _generate(self, dialogue, tools):
+    async def _generate(self, dialogue, tools):
         role_map = {"assistant": "model", "user": "user"}
         contents: list = []
         # 拼接对话
@@ -165,49 +169,38 @@ class LLMProvider(LLMProviderBase):
                 }
             )
 
-        stream: GenerateContentResponse = self.model.generate_content(
+        stream: AsyncGenerateContentResponse = await self.model.generate_content_async(
             contents=contents,
             generation_config=self.gen_cfg,
             tools=tools,
             stream=True,
-            timeout=self.timeout,
+            request_options={"timeout": self.timeout},
         )
 
-        try:
-            for chunk in stream:
-                cand = chunk.candidates[0]
-                for part in cand.content.parts:
-                    # a) 函数调用-通常是最后一段话才是函数调用
-                    if getattr(part, "function_call", None):
-                        fc = part.function_call
-                        yield None, [
-                            SimpleNamespace(
-                                id=uuid.uuid4().hex,
-                                type="function",
-                                function=SimpleNamespace(
-                                    name=fc.name,
-                                    arguments=json.dumps(
-                                        dict(fc.args), ensure_ascii=False
-                                    ),
+        # 打断时LLM事件循环中的任务被取消，gRPC流随之取消，不再需要手动关闭上一个流
+        async for chunk in stream:
+            cand = chunk.candidates[0]
+            for part in cand.content.parts:
+                # a) 函数调用-通常是最后一段话才是函数调用
+                if getattr(part, "function_call", None):
+                    fc = part.function_call
+                    yield None, [
+                        SimpleNamespace(
+                            id=uuid.uuid4().hex,
+                            type="function",
+                            function=SimpleNamespace(
+                                name=fc.name,
+                                arguments=json.dumps(
+                                    dict(fc.args), ensure_ascii=False
                                 ),
-                            )
-                        ]
-                        return
-                    # b) 普通文本
-                    if getattr(part, "text", None):
-                        yield part.text if tools is None else (part.text, None)
-
-        finally:
-            if tools is not None:
-                yield None, None  # function‑mode 结束，返回哑包
-
-    # 关闭stream，预留后续打断对话功能的功能方法，官方文档推荐打断对话要关闭上一个流，可以有效减少配额计费和资源占用
-    @staticmethod
-    def _safe_finish_stream(stream: GenerateContentResponse):
-        if hasattr(stream, "resolve"):
-            stream.resolve()  # Gemini SDK version ≥ 0.5.0
-        elif hasattr(stream, "close"):
-            stream.close()  # Gemini SDK version < 0.5.0
-        else:
-            for _ in stream:  # 兜底耗尽
-                pass
+                            ),
+                        )
+                    ]
+                    yield None, None  # function‑mode 结束，返回哑包
+                    return
+                # b) 普通文本
+                if getattr(part, "text", None):
+                    yield part.text if tools is None else (part.text, None)
+
+        if tools is not None:
+            yield None, None  # function‑mode 结束，返回哑包
@@ -1,15 +1,15 @@
 import httpx
-import openai
 from openai.types import CompletionUsage
 from config.logger import setup_logging
 from core.utils.util import check_model_key
-from core.providers.llm.base import LLMProviderBase
+from core.utils.llm_http import get_llm_http_runtime
+from core.providers.llm.base import AsyncLLMProviderBase
 
 TAG = __name__
 logger = setup_logging()
 
 
-class LLMProvider(LLMProviderBase):
+class LLMProvider(AsyncLLMProviderBase):
     def __init__(self, config):
         self.model_name = config.get("model_name")
         self.api_key = config.get("api_key")
@@ -45,7 +45,12 @@ class LLMProvider(LLMProviderBase):
         model_key_msg = check_model_key("LLM", self.api_key)
         if model_key_msg:
             logger.bind(tag=TAG).error(model_key_msg)
-        self.client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url, timeout=httpx.Timeout(self.timeout))
+        self.request_timeout = httpx.Timeout(self.timeout)
+
+    @property
+    def client(self):
+        """当前事件循环中共享连接池的 AsyncOpenAI 客户端"""
+        return get_llm_http_runtime().get_openai_client(self.base_url, self.api_key)
 
     @staticmethod
     def normalize_dialogue(dialogue):
@@ -55,7 +60,7 @@ class LLMProvider(LLMProviderBase):
                 msg["content"] = ""
         return dialogue
 
-    def response(self, session_id, dialogue, **kwargs):
+    async def aresponse(self, session_id, dialogue, **kwargs):
         try:
             dialogue = self.normalize_dialogue(dialogue)
 
@@ -77,29 +82,32 @@ class LLMProvider(LLMProviderBase):
                 if value is not None:
                     request_params[key] = value
 
-            responses = self.client.chat.completions.create(**request_params)
+            responses = await self.client.chat.completions.create(
+                **request_params, timeout=self.request_timeout
+            )
 
             is_active = True
-            for chunk in responses:
-                try:
-                    delta = chunk.choices[0].delta if getattr(chunk, "choices", None) else None
-                    content = getattr(delta, "content", "") if delta else ""
-                except IndexError:
-                    content = ""
-                if content:
-                    if "<think>" in content:
-                        is_active = False
-                        content = content.split("<think>")[0]
-                    if "</think>" in content:
-                        is_active = True
-                        content = content.split("</think>")[-1]
-                    if is_active:
-                        yield content
+            async with responses:
+                async for chunk in responses:
+                    try:
+                        delta = chunk.choices[0].delta if getattr(chunk, "choices", None) else None
+                        content = getattr(delta, "content", "") if delta else ""
+                    except IndexError:
+                        content = ""
+                    if content:
+                        if "<think>" in content:
+                            is_active = False
+                            content = content.split("<think>")[0]
+                        if "</think>" in content:
+                            is_active = True
+                            content = content.split("</think>")[-1]
+                        if is_active:
+                            yield content
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error in response generation: {e}")
 
-    def response_with_functions(self, session_id, dialogue, functions=None, **kwargs):
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None, **kwargs):
         try:
             dialogue = self.normalize_dialogue(dialogue)
 
@@ -121,21 +129,24 @@ class LLMProvider(LLMProviderBase):
                 if value is not None:
                     request_params[key] = value
 
-            stream = self.client.chat.completions.create(**request_params)
-
-            for chunk in stream:
-                if getattr(chunk, "choices", None):
-                    delta = chunk.choices[0].delta
-                    content = getattr(delta, "content", "")
-                    tool_calls = getattr(delta, "tool_calls", None)
-                    yield content, tool_calls
-                elif isinstance(getattr(chunk, "usage", None), CompletionUsage):
-                    usage_info = getattr(chunk, "usage", None)
-                    logger.bind(tag=TAG).info(
-                        f"Token 消耗：输入 {getattr(usage_info, 'prompt_tokens', '未知')}，"
-                        f"输出 {getattr(usage_info, 'completion_tokens', '未知')}，"
-                        f"共计 {getattr(usage_info, 'total_tokens', '未知')}"
-                    )
+            stream = await self.client.chat.completions.create(
+                **request_params, timeout=self.request_timeout
+            )
+
+            async with stream:
+                async for chunk in stream:
+                    if getattr(chunk, "choices", None):
+                        delta = chunk.choices[0].delta
+                        content = getattr(delta, "content", "")
+                        tool_calls = getattr(delta, "tool_calls", None)
+                        yield content, tool_calls
+                    elif isinstance(getattr(chunk, "usage", None), CompletionUsage):
+                        usage_info = getattr(chunk, "usage", None)
+                        logger.bind(tag=TAG).info(
+                            f"Token 消耗：输入 {getattr(usage_info, 'prompt_tokens', '未知')}，"
+                            f"输出 {getattr(usage_info, 'completion_tokens', '未知')}，"
+                            f"共计 {getattr(usage_info, 'total_tokens', '未知')}"
+                        )
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error in function call streaming: {e}")
@@ -26,3 +26,8 @@ class MemoryProviderBase(ABC):
     def init_memory(self, role_id, llm, **kwargs):
         self.role_id = role_id
         self.llm = llm
+
+    def reset(self):
+        """连接结束后清除角色相关状态，实例池回收后交给下一个连接重新 init_memory"""
+        self.role_id = None
+        self.llm = None
@@ -110,6 +110,11 @@ class MemoryProvider(MemoryProviderBase):
         self.save_to_file = save_to_file
         self.load_memory(summary_memory)
 
+    def reset(self):
+        super().reset()
+        self.short_memory = ""
+        self.save_to_file = True
+
     def load_memory(self, summary_memory):
         # api获取到总结记忆后直接返回
         if summary_memory or not self.save_to_file:
@@ -141,6 +141,30 @@ class ServerMCPClient:
         fut: concurrent.futures.Future = asyncio.run_coroutine_threadsafe(coro, loop)
         return await asyncio.wrap_future(fut)
 
+    async def ping(self, timeout: float = 5) -> bool:
+        """探测MCP服务是否仍可响应
+
+        Args:
+            timeout: 超时时间（秒）
+
+        Returns:
+            bool: 服务在超时时间内响应返回True，否则返回False
+        """
+        if not self.is_connected():
+            return False
+
+        loop = self._worker_task.get_loop()
+        coro = asyncio.wait_for(self.session.send_ping(), timeout=timeout)
+        try:
+            if loop is asyncio.get_running_loop():
+                await coro
+            else:
+                fut = asyncio.run_coroutine_threadsafe(coro, loop)
+                await asyncio.wrap_future(fut)
+            return True
+        except Exception:
+            return False
+
     def is_connected(self) -> bool:
         """检查MCP客户端是否连接正常
 
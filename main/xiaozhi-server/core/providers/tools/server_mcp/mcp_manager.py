@@ -2,7 +2,6 @@
 
 import asyncio
 import os
-import json
 from typing import Dict, Any, List
 
 from mcp.types import LoggingMessageNotificationParams
@@ -10,6 +9,7 @@ from mcp.types import LoggingMessageNotificationParams
 from config.config_loader import get_project_dir
 from config.logger import setup_logging
 from .mcp_client import ServerMCPClient
+from .mcp_pool import get_server_mcp_pool, is_shared_server, load_mcp_server_config
 
 TAG = __name__
 logger = setup_logging()
@@ -27,24 +27,15 @@ class ServerMCPManager:
             logger.bind(tag=TAG).warning(
                 f"请检查mcp服务配置文件：data/.mcp_server_settings.json"
             )
+        # 仅保存配置了 "shared": false 的连接独占MCP客户端，其余服务使用全局共享池
         self.clients: Dict[str, ServerMCPClient] = {}
         self.tools = []
+        self.pool = get_server_mcp_pool()
         self._init_lock = asyncio.Lock()
 
     def load_config(self) -> Dict[str, Any]:
         """加载MCP服务配置"""
-        if len(self.config_path) == 0:
-            return {}
-
-        try:
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                config = json.load(f)
-            return config.get("mcpServers", {})
-        except Exception as e:
-            logger.bind(tag=TAG).error(
-                f"Error loading MCP config from {self.config_path}: {e}"
-            )
-            return {}
+        return load_mcp_server_config(self.config_path)
 
     async def _init_server(self, name: str, srv_config: Dict[str, Any]):
         """初始化单个MCP服务"""
@@ -85,11 +76,14 @@ class ServerMCPManager:
                     f"Skipping server {name}: neither command nor url specified"
                 )
                 continue
-            
+            if is_shared_server(srv_config):
+                continue
+
             tasks.append(self._init_server(name, srv_config))
-        
-        if tasks:
-            await asyncio.gather(*tasks)
+
+        # 共享服务只在首个连接时启动，之后的连接直接复用缓存的工具定义
+        tasks.append(self.pool.ensure_started())
+        await asyncio.gather(*tasks)
 
         # 输出当前支持的服务端MCP工具列表
         if hasattr(self.conn, "func_handler") and self.conn.func_handler:
@@ -100,11 +94,11 @@ class ServerMCPManager:
 
     def get_all_tools(self) -> List[Dict[str, Any]]:
         """获取所有服务的工具function定义"""
-        return self.tools
+        return self.tools + self.pool.get_all_tools()
 
     def is_mcp_tool(self, tool_name: str) -> bool:
         """检查是否是MCP工具"""
-        for tool in self.tools:
+        for tool in self.get_all_tools():
             if (
                 tool.get("function") is not None
                 and tool["function"].get("name") == tool_name
@@ -129,7 +123,12 @@ class ServerMCPManager:
                 break
 
         if not target_client:
-            raise ValueError(f"工具 {tool_name} 在任意MCP服务中未找到")
+            pool_server = self.pool.find_server(tool_name)
+            if pool_server is None:
+                raise ValueError(f"工具 {tool_name} 在任意MCP服务中未找到")
+            return await self._execute_pool_tool(
+                pool_server, tool_name, arguments, max_retries, retry_interval
+            )
 
         # 带重试机制的工具调用
         for attempt in range(max_retries):
@@ -174,8 +173,33 @@ class ServerMCPManager:
                 # 等待一段时间再重试
                 await asyncio.sleep(retry_interval)
 
+    async def _execute_pool_tool(
+        self,
+        server_name: str,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        max_retries: int,
+        retry_interval: float,
+    ) -> Any:
+        """在共享MCP服务上执行工具调用，服务重启由共享池负责"""
+        for attempt in range(max_retries):
+            try:
+                return await self.pool.call_tool(
+                    server_name,
+                    tool_name,
+                    arguments,
+                    progress_callback=self.progress_callback,
+                )
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    raise
+                logger.bind(tag=TAG).warning(
+                    f"执行工具 {tool_name} 失败 (尝试 {attempt+1}/{max_retries}): {e}"
+                )
+                await asyncio.sleep(retry_interval)
+
     async def cleanup_all(self) -> None:
-        """关闭所有 MCP客户端"""
+        """关闭连接独占的 MCP客户端，共享服务随进程保留"""
         for name, client in list(self.clients.items()):
             try:
                 if hasattr(client, "cleanup"):
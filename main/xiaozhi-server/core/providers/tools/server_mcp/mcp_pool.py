@@ -0,0 +1,252 @@
+"""进程级共享的服务端MCP服务池"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Any, List, Optional
+
+from mcp.types import LoggingMessageNotificationParams
+
+from config.config_loader import get_project_dir
+from config.logger import setup_logging
+from .mcp_client import ServerMCPClient
+
+TAG = __name__
+logger = setup_logging()
+
+# 单个MCP服务初始化超时时间（秒）
+INIT_TIMEOUT = 10
+# 健康检查间隔（秒）
+HEALTH_CHECK_INTERVAL = 30
+# 重启失败后的退避时间上限（秒）
+MAX_RESTART_BACKOFF = 60
+
+
+def load_mcp_server_config(config_path: str) -> Dict[str, Any]:
+    """读取MCP服务配置文件中的 mcpServers 字段"""
+    if not config_path:
+        return {}
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        return config.get("mcpServers", {})
+    except Exception as e:
+        logger.bind(tag=TAG).error(f"Error loading MCP config from {config_path}: {e}")
+        return {}
+
+
+def is_shared_server(srv_config: Dict[str, Any]) -> bool:
+    """MCP服务默认在所有连接间共享，配置 "shared": false 时每个连接独立启动"""
+    return srv_config.get("shared", True) is not False
+
+
+class _Replica:
+    """MCP服务的一个副本"""
+
+    __slots__ = ("client", "in_flight", "restarting", "failures", "next_restart")
+
+    def __init__(self):
+        self.client: Optional[ServerMCPClient] = None
+        self.in_flight = 0
+        self.restarting = False
+        self.failures = 0
+        self.next_restart = 0.0
+
+
+class _PooledServer:
+    """一个共享MCP服务及其副本集"""
+
+    def __init__(self, name: str, config: Dict[str, Any]):
+        self.name = name
+        self.config = config
+        replicas = config.get("replicas", 1)
+        self.replicas = [_Replica() for _ in range(max(1, int(replicas or 1)))]
+        # 缓存的工具定义，副本重启后不变则无需刷新连接侧的工具列表
+        self.tools: List[Dict[str, Any]] = []
+        self.tool_names = set()
+        self.calls = 0
+        self.restarts = 0
+
+
+class ServerMCPPool:
+    """在所有连接间共享的MCP服务池
+
+    - 每个配置的MCP服务只启动一次（或按 replicas 启动多个副本）
+    - 并发的 call_tool 请求复用同一会话，多副本时选择进行中请求最少的副本
+    - 缓存工具定义，新连接无需重复握手与 list_tools
+    - 定期健康检查，崩溃或无响应的副本自动重启
+    """
+
+    def __init__(self, config_path: str = None):
+        if config_path is None:
+            config_path = get_project_dir() + "data/.mcp_server_settings.json"
+            if not os.path.exists(config_path):
+                config_path = ""
+        self.config_path = config_path
+        self.servers: Dict[str, _PooledServer] = {}
+        self._start_task: Optional[asyncio.Task] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    async def ensure_started(self):
+        """首次调用时启动所有共享MCP服务，并发调用者等待同一次启动"""
+        if self._start_task is None:
+            self._start_task = asyncio.create_task(self._start())
+        await asyncio.shield(self._start_task)
+
+    async def _start(self):
+        config = load_mcp_server_config(self.config_path)
+        tasks = []
+        for name, srv_config in config.items():
+            if not srv_config.get("command") and not srv_config.get("url"):
+                continue
+            if not is_shared_server(srv_config):
+                continue
+            server = _PooledServer(name, srv_config)
+            self.servers[name] = server
+            for replica in server.replicas:
+                tasks.append(self._start_replica(server, replica))
+        if tasks:
+            await asyncio.gather(*tasks)
+            self._health_task = asyncio.create_task(self._health_check_loop())
+            logger.bind(tag=TAG).info(
+                f"共享MCP服务池已启动: "
+                f"{ {name: len(s.replicas) for name, s in self.servers.items()} }"
+            )
+
+    async def _start_replica(self, server: _PooledServer, replica: _Replica) -> bool:
+        client = ServerMCPClient(server.config)
+        try:
+            await asyncio.wait_for(
+                client.initialize(logging_callback=self.logging_callback),
+                timeout=INIT_TIMEOUT,
+            )
+            if not client.is_connected():
+                raise RuntimeError("MCP客户端初始化失败")
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"启动共享MCP服务 {server.name} 失败: {e}")
+            await client.cleanup()
+            replica.failures += 1
+            replica.next_restart = time.monotonic() + min(
+                MAX_RESTART_BACKOFF, 2**replica.failures
+            )
+            return False
+
+        replica.client = client
+        replica.failures = 0
+        if not server.tools:
+            server.tools = client.get_available_tools()
+            server.tool_names = {t["function"]["name"] for t in server.tools}
+        return True
+
+    async def _restart_replica(self, server: _PooledServer, replica: _Replica):
+        if replica.restarting or time.monotonic() < replica.next_restart:
+            return
+        replica.restarting = True
+        try:
+            old_client, replica.client = replica.client, None
+            if old_client is not None:
+                await old_client.cleanup()
+            logger.bind(tag=TAG).warning(f"重启共享MCP服务: {server.name}")
+            if await self._start_replica(server, replica):
+                server.restarts += 1
+        finally:
+            replica.restarting = False
+
+    async def _health_check_loop(self):
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+            for server in list(self.servers.values()):
+                for replica in server.replicas:
+                    client = replica.client
+                    # 有请求在进行中说明会话仍在工作，跳过探测
+                    if client is not None and replica.in_flight > 0:
+                        continue
+                    if client is None or not await client.ping():
+                        await self._restart_replica(server, replica)
+
+    def _pick_replica(self, server: _PooledServer) -> Optional[_Replica]:
+        alive = [r for r in server.replicas if r.client is not None]
+        if not alive:
+            return None
+        return min(alive, key=lambda r: r.in_flight)
+
+    def get_all_tools(self) -> List[Dict[str, Any]]:
+        """获取所有共享MCP服务缓存的工具定义"""
+        tools = []
+        for server in self.servers.values():
+            tools.extend(server.tools)
+        return tools
+
+    def find_server(self, tool_name: str) -> Optional[str]:
+        for name, server in self.servers.items():
+            if tool_name in server.tool_names:
+                return name
+        return None
+
+    async def call_tool(
+        self, server_name: str, tool_name: str, arguments: Dict[str, Any], **kwargs
+    ) -> Any:
+        """在共享MCP服务上执行工具调用"""
+        server = self.servers[server_name]
+        replica = self._pick_replica(server)
+        if replica is None:
+            # 所有副本都不可用时立即尝试重启一次
+            for r in server.replicas:
+                await self._restart_replica(server, r)
+            replica = self._pick_replica(server)
+            if replica is None:
+                raise RuntimeError(f"共享MCP服务 {server_name} 不可用")
+
+        client = replica.client
+        replica.in_flight += 1
+        server.calls += 1
+        try:
+            return await client.call_tool(tool_name, arguments, **kwargs)
+        except Exception:
+            if not await client.ping():
+                await self._restart_replica(server, replica)
+            raise
+        finally:
+            replica.in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "replicas": len(server.replicas),
+                "alive": sum(1 for r in server.replicas if r.client is not None),
+                "in_flight": sum(r.in_flight for r in server.replicas),
+                "tools": len(server.tools),
+                "calls": server.calls,
+                "restarts": server.restarts,
+            }
+            for name, server in self.servers.items()
+        }
+
+    async def close(self):
+        """关闭所有共享MCP服务"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for server in self.servers.values():
+            for replica in server.replicas:
+                if replica.client is not None:
+                    await replica.client.cleanup()
+                    replica.client = None
+        self.servers.clear()
+        self._start_task = None
+
+    async def logging_callback(self, params: LoggingMessageNotificationParams):
+        logger.bind(tag=TAG).info(f"[Server Log - {params.level.upper()}] {params.data}")
+
+
+# 全局单例
+_server_mcp_pool: Optional[ServerMCPPool] = None
+
+
+def get_server_mcp_pool() -> ServerMCPPool:
+    """获取全局共享MCP服务池（单例，仅在事件循环线程中使用）"""
+    global _server_mcp_pool
+    if _server_mcp_pool is None:
+        _server_mcp_pool = ServerMCPPool()
+    return _server_mcp_pool
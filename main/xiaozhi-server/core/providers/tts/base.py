@@ -1,5 +1,6 @@
 import os
 import re
+import json
 import time
 import uuid
 import queue
@@ -9,14 +10,28 @@ import traceback
 from core.utils import p3
 from datetime import datetime
 from core.utils import textUtils
-from typing import Callable, Any
+from typing import Any, AsyncIterator, Callable
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
 from core.utils.tts import MarkdownCleaner
 from core.utils.output_counter import add_device_output
 from core.handle.reportHandle import enqueue_tts_report
 from core.handle.sendAudioHandle import sendAudioMessage
-from core.utils.util import audio_bytes_to_data_stream, audio_to_data_stream
+from core.utils.cache.tts_cache import get_tts_cache, build_fingerprint
+from core.utils.hybrid_queue import HybridQueue
+from core.utils.tts_http import get_tts_http_runtime
+from core.utils.sentence_segmenter import create_segmenter
+from core.utils.audio_stream import AudioStreamDecoder
+from core.utils.metrics import (
+    record_provider_error,
+    STAGE_FIRST_SENTENCE,
+    STAGE_TTS_FIRST_BYTE,
+)
+from core.utils.util import (
+    audio_bytes_to_data_stream,
+    audio_to_data_stream,
+    filter_sensitive_info,
+)
 from core.providers.tts.dto.dto import (
     TTSMessageDTO,
     SentenceType,
@@ -27,8 +42,31 @@ from core.providers.tts.dto.dto import (
 TAG = __name__
 logger = setup_logging()
 
+# 参与TTS音频缓存键计算的运行时合成参数（运行时可能被修改，如切换角色音色）
+TTS_CACHE_KEY_ATTRS = (
+    "voice",
+    "speed",
+    "speech_rate",
+    "pitch",
+    "volume",
+    "emotion",
+    "model",
+    "format",
+    "response_format",
+    "audio_file_type",
+    "sample_rate",
+)
+
 
 class TTSProviderBase(ABC):
+    # text_to_speak 内只使用异步IO（如 get_tts_http_client）的提供方设为True，
+    # 合成在常驻TTS事件循环上执行，复用HTTP长连接；否则每句话用独立的事件循环执行
+    use_shared_loop = False
+    # 实现了 text_to_speak_stream 的提供方设为True，音频边接收边解码编码，尽早输出首帧
+    supports_stream = False
+    # 流式返回pcm时的采样率
+    pcm_sample_rate = 16000
+
     def __init__(self, config, delete_audio_file):
         self.interface_type = InterfaceType.NON_STREAM
         self.conn = None
@@ -40,34 +78,16 @@ class TTSProviderBase(ABC):
         self.tts_audio_first_sentence = True
         self.before_stop_play_files = []
 
-        self.tts_text_buff = []
-        self.punctuations = (
-            "。",
-            "？",
-            "?",
-            "！",
-            "!",
-            "；",
-            ";",
-            "：",
-        )
-        self.first_sentence_punctuations = (
-            "，",
-            "~",
-            "、",
-            ",",
-            "。",
-            "？",
-            "?",
-            "！",
-            "!",
-            "；",
-            ";",
-            "：",
-        )
+        # LLM输出文本的增量断句
+        self.segmenter = create_segmenter()
         self.tts_stop_request = False
-        self.processed_chars = 0
-        self.is_first_sentence = True
+
+        # 句子级音频缓存，未启用时为None
+        self.tts_cache = get_tts_cache()
+        cache_config = {
+            k: v for k, v in filter_sensitive_info(config).items() if k != "output_dir"
+        }
+        self.tts_cache_config = json.dumps(cache_config, sort_keys=True, default=str)
 
     def generate_filename(self, extension=".wav"):
         return os.path.join(
@@ -82,22 +102,77 @@ class TTSProviderBase(ABC):
     def handle_audio_file(self, file_audio: bytes, text):
         self.before_stop_play_files.append((file_audio, text))
 
+    def get_tts_cache_key(self, text):
+        """计算句子的缓存键，不可缓存时返回None"""
+        if self.tts_cache is None:
+            return None
+        # pcm 下行的连接不使用opus缓存
+        if self.conn is not None and self.conn.audio_format == "pcm":
+            return None
+        params = {
+            attr: getattr(self, attr)
+            for attr in TTS_CACHE_KEY_ATTRS
+            if hasattr(self, attr)
+        }
+        params["config"] = self.tts_cache_config
+        fingerprint = build_fingerprint(type(self).__module__, params)
+        return self.tts_cache.make_key(fingerprint, text)
+
+    def _play_cached_audio(self, cache_key, text, opus_handler):
+        """命中缓存时直接推送opus帧，跳过TTS请求和重新编码"""
+        cached_frames = self.tts_cache.get(cache_key)
+        if cached_frames is None:
+            return False
+        self.tts_audio_queue.put((SentenceType.FIRST, None, text))
+        for frame in cached_frames:
+            opus_handler(frame)
+        logger.bind(tag=TAG).info(f"语音缓存命中: {text}")
+        return True
+
     def to_tts_stream(self, text, opus_handler: Callable[[bytes], None] = None) -> None:
         text = MarkdownCleaner.clean_markdown(text)
+        cache_key = self.get_tts_cache_key(text)
+        cache_frames = []
+        if cache_key is not None:
+            if self._play_cached_audio(cache_key, text, opus_handler):
+                return None
+            # 未命中时边推送边收集opus帧，合成成功后写入缓存
+            output_handler = opus_handler
+
+            def opus_handler(frame):
+                cache_frames.append(frame)
+                output_handler(frame)
+
+        if self.delete_audio_file and self.supports_stream:
+            # 边接收边解码，不等待完整音频
+            if self._speak_to_frames(
+                text,
+                opus_handler,
+                before_first_frame=lambda: self.tts_audio_queue.put(
+                    (SentenceType.FIRST, None, text)
+                ),
+            ):
+                if cache_key is not None:
+                    self.tts_cache.put(cache_key, cache_frames)
+            return None
+
         max_repeat_time = 5
         if self.delete_audio_file:
             # 需要删除文件的直接转为音频数据
             while max_repeat_time > 0:
                 try:
-                    audio_bytes = asyncio.run(self.text_to_speak(text, None))
+                    audio_bytes = self._run_text_to_speak(text, None)
                     if audio_bytes:
                         self.tts_audio_queue.put((SentenceType.FIRST, None, text))
+                        cache_frames.clear()
                         audio_bytes_to_data_stream(
                             audio_bytes,
                             file_type=self.audio_file_type,
                             is_opus=True,
                             callback=opus_handler,
                         )
+                        if cache_key is not None:
+                            self.tts_cache.put(cache_key, cache_frames)
                         break
                     else:
                         max_repeat_time -= 1
@@ -111,6 +186,7 @@ class TTSProviderBase(ABC):
                     f"语音生成成功: {text}，重试{5 - max_repeat_time}次"
                 )
             else:
+                record_provider_error("tts")
                 logger.bind(tag=TAG).error(
                     f"语音生成失败: {text}，请检查网络或服务是否正常"
                 )
@@ -120,7 +196,7 @@ class TTSProviderBase(ABC):
             try:
                 while not os.path.exists(tmp_file) and max_repeat_time > 0:
                     try:
-                        asyncio.run(self.text_to_speak(text, tmp_file))
+                        self._run_text_to_speak(text, tmp_file)
                     except Exception as e:
                         logger.bind(tag=TAG).warning(
                             f"语音生成失败{5 - max_repeat_time + 1}次: {text}，错误: {e}"
@@ -135,23 +211,38 @@ class TTSProviderBase(ABC):
                         f"语音生成成功: {text}:{tmp_file}，重试{5 - max_repeat_time}次"
                     )
                 else:
+                    record_provider_error("tts")
                     logger.bind(tag=TAG).error(
                         f"语音生成失败: {text}，请检查网络或服务是否正常"
                     )
                     self.tts_audio_queue.put((SentenceType.FIRST, None, text))
                 self._process_audio_file_stream(tmp_file, callback=opus_handler)
+                if cache_key is not None and max_repeat_time > 0:
+                    self.tts_cache.put(cache_key, cache_frames)
             except Exception as e:
                 logger.bind(tag=TAG).error(f"Failed to generate TTS file: {e}")
                 return None
     
     def to_tts(self, text):
         text = MarkdownCleaner.clean_markdown(text)
+        cache_key = self.get_tts_cache_key(text) if self.delete_audio_file else None
+        if cache_key is not None:
+            cached_frames = self.tts_cache.get(cache_key)
+            if cached_frames is not None:
+                return list(cached_frames)
+        if self.delete_audio_file and self.supports_stream:
+            audio_datas = []
+            if not self._speak_to_frames(text, audio_datas.append):
+                return None
+            if cache_key is not None:
+                self.tts_cache.put(cache_key, audio_datas)
+            return audio_datas
         max_repeat_time = 5
         if self.delete_audio_file:
             # 需要删除文件的直接转为音频数据
             while max_repeat_time > 0:
                 try:
-                    audio_bytes = asyncio.run(self.text_to_speak(text, None))
+                    audio_bytes = self._run_text_to_speak(text, None)
                     if audio_bytes:
                         audio_datas = []
                         audio_bytes_to_data_stream(
@@ -160,6 +251,8 @@ class TTSProviderBase(ABC):
                             is_opus=True,
                             callback=lambda data: audio_datas.append(data)
                         )
+                        if cache_key is not None:
+                            self.tts_cache.put(cache_key, audio_datas)
                         return audio_datas
                     else:
                         max_repeat_time -= 1
@@ -173,6 +266,7 @@ class TTSProviderBase(ABC):
                     f"语音生成成功: {text}，重试{5 - max_repeat_time}次"
                 )
             else:
+                record_provider_error("tts")
                 logger.bind(tag=TAG).error(
                     f"语音生成失败: {text}，请检查网络或服务是否正常"
                 )
@@ -182,7 +276,7 @@ class TTSProviderBase(ABC):
             try:
                 while not os.path.exists(tmp_file) and max_repeat_time > 0:
                     try:
-                        asyncio.run(self.text_to_speak(text, tmp_file))
+                        self._run_text_to_speak(text, tmp_file)
                     except Exception as e:
                         logger.bind(tag=TAG).warning(
                             f"语音生成失败{5 - max_repeat_time + 1}次: {text}，错误: {e}"
@@ -197,6 +291,7 @@ class TTSProviderBase(ABC):
                         f"语音生成成功: {text}:{tmp_file}，重试{5 - max_repeat_time}次"
                     )
                 else:
+                    record_provider_error("tts")
                     logger.bind(tag=TAG).error(
                         f"语音生成失败: {text}，请检查网络或服务是否正常"
                     )
@@ -210,6 +305,98 @@ class TTSProviderBase(ABC):
     async def text_to_speak(self, text, output_file):
         pass
 
+    async def text_to_speak_stream(self, text) -> AsyncIterator[bytes]:
+        """可选能力：流式返回音频数据块，格式为 audio_file_type
+
+        提供方实现该方法并设置 supports_stream = True 后，调用方才会使用流式合成；
+        默认实现不返回任何数据
+        """
+        for chunk in ():
+            yield chunk
+
+    def _stream_audio_chunks(self, text, on_chunk: Callable[[bytes], None]):
+        """拉取音频流，on_chunk 在当前合成线程中逐块调用"""
+        if not self.use_shared_loop:
+
+            async def pump():
+                async for chunk in self.text_to_speak_stream(text):
+                    on_chunk(chunk)
+
+            asyncio.run(pump())
+            return
+
+        # 常驻事件循环只负责网络IO，解码编码在合成线程中进行，不阻塞其他连接的请求
+        chunks = queue.Queue()
+
+        async def pump():
+            try:
+                async for chunk in self.text_to_speak_stream(text):
+                    chunks.put(chunk)
+            finally:
+                chunks.put(None)
+
+        future = get_tts_http_runtime().submit(pump())
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    break
+                on_chunk(chunk)
+            future.result()
+        finally:
+            future.cancel()
+
+    def _speak_to_frames(
+        self,
+        text,
+        frame_handler: Callable[[bytes], None],
+        before_first_frame: Callable[[], None] = None,
+    ) -> bool:
+        """流式合成一句话，收到的音频增量解码为opus帧，返回是否成功"""
+        max_repeat_time = 5
+
+        def on_frame(frame):
+            # 首帧时通知开始播放本句
+            if decoder.frame_count == 1 and before_first_frame is not None:
+                before_first_frame()
+            frame_handler(frame)
+
+        while max_repeat_time > 0:
+            decoder = AudioStreamDecoder(
+                self.audio_file_type,
+                is_opus=True,
+                callback=on_frame,
+                sample_rate=self.pcm_sample_rate,
+            )
+            try:
+                self._stream_audio_chunks(text, decoder.feed)
+                decoder.finish()
+                if decoder.frame_count:
+                    logger.bind(tag=TAG).info(
+                        f"语音生成成功: {text}，重试{5 - max_repeat_time}次"
+                    )
+                    return True
+                max_repeat_time -= 1
+            except Exception as e:
+                if decoder.frame_count:
+                    # 已经输出了部分音频，重试会重复播放
+                    record_provider_error("tts")
+                    logger.bind(tag=TAG).error(f"语音流中断: {text}，错误: {e}")
+                    return False
+                logger.bind(tag=TAG).warning(
+                    f"语音生成失败{5 - max_repeat_time + 1}次: {text}，错误: {e}"
+                )
+                max_repeat_time -= 1
+        record_provider_error("tts")
+        logger.bind(tag=TAG).error(f"语音生成失败: {text}，请检查网络或服务是否正常")
+        return False
+
+    def _run_text_to_speak(self, text, output_file):
+        """在合成线程中同步执行 text_to_speak"""
+        if self.use_shared_loop:
+            return get_tts_http_runtime().run(self.text_to_speak(text, output_file))
+        return asyncio.run(self.text_to_speak(text, output_file))
+
     def audio_to_pcm_data_stream(
         self, audio_file_path, callback: Callable[[Any], Any] = None
     ):
@@ -252,6 +439,9 @@ class TTSProviderBase(ABC):
 
     async def open_audio_channels(self, conn):
         self.conn = conn
+        if getattr(conn, "async_mode", False):
+            self._open_audio_tasks(conn)
+            return
         # tts 消化线程
         self.tts_priority_thread = threading.Thread(
             target=self.tts_text_priority_thread, daemon=True
@@ -264,42 +454,34 @@ class TTSProviderBase(ABC):
         )
         self.audio_play_priority_thread.start()
 
+    def _open_audio_tasks(self, conn):
+        """async 模式：以协程任务代替文本处理线程和音频播放线程"""
+        # 线程与协程共用的队列，子类的流式文本线程仍可按 queue.Queue 的方式读取
+        self.tts_text_queue = HybridQueue()
+        self.tts_audio_queue = HybridQueue()
+
+        if type(self).tts_text_priority_thread is TTSProviderBase.tts_text_priority_thread:
+            self.tts_priority_thread = conn.create_pipeline_task(
+                self.tts_text_priority_task()
+            )
+        else:
+            # 流式TTS的文本处理依赖各自的同步实现，保留独立线程
+            self.tts_priority_thread = threading.Thread(
+                target=self.tts_text_priority_thread, daemon=True
+            )
+            self.tts_priority_thread.start()
+
+        self.audio_play_priority_thread = conn.create_pipeline_task(
+            self._audio_play_priority_task()
+        )
+
     # 这里默认是非流式的处理方式
     # 流式处理方式请在子类中重写
     def tts_text_priority_thread(self):
         while not self.conn.stop_event.is_set():
             try:
                 message = self.tts_text_queue.get(timeout=1)
-                if message.sentence_type == SentenceType.FIRST:
-                    self.conn.client_abort = False
-                if self.conn.client_abort:
-                    logger.bind(tag=TAG).info("收到打断信息，终止TTS文本处理线程")
-                    continue
-                if message.sentence_type == SentenceType.FIRST:
-                    # 初始化参数
-                    self.tts_stop_request = False
-                    self.processed_chars = 0
-                    self.tts_text_buff = []
-                    self.is_first_sentence = True
-                    self.tts_audio_first_sentence = True
-                elif ContentType.TEXT == message.content_type:
-                    self.tts_text_buff.append(message.content_detail)
-                    segment_text = self._get_segment_text()
-                    if segment_text:
-                        self.to_tts_stream(segment_text, opus_handler=self.handle_opus)
-                elif ContentType.FILE == message.content_type:
-                    self._process_remaining_text_stream(opus_handler=self.handle_opus)
-                    tts_file = message.content_file
-                    if tts_file and os.path.exists(tts_file):
-                        self._process_audio_file_stream(
-                            tts_file, callback=self.handle_opus
-                        )
-                if message.sentence_type == SentenceType.LAST:
-                    self._process_remaining_text_stream(opus_handler=self.handle_opus)
-                    self.tts_audio_queue.put(
-                        (message.sentence_type, [], message.content_detail)
-                    )
-
+                self._process_tts_text_message(message)
             except queue.Empty:
                 continue
             except Exception as e:
@@ -308,10 +490,43 @@ class TTSProviderBase(ABC):
                 )
                 continue
 
+    async def tts_text_priority_task(self):
+        """非流式TTS的文本处理协程（async 模式），合成调用交给共享卸载线程池"""
+        while not self.conn.stop_event.is_set():
+            message = await self.tts_text_queue.async_get()
+            try:
+                await self.conn.executor.run(self._process_tts_text_message, message)
+            except Exception as e:
+                logger.bind(tag=TAG).error(
+                    f"处理TTS文本失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
+                )
+
+    def _process_tts_text_message(self, message: TTSMessageDTO):
+        if message.sentence_type == SentenceType.FIRST:
+            self.conn.client_abort = False
+        if self.conn.client_abort:
+            logger.bind(tag=TAG).info("收到打断信息，终止TTS文本处理线程")
+            return
+        if message.sentence_type == SentenceType.FIRST:
+            # 初始化参数
+            self.tts_stop_request = False
+            self.segmenter.reset()
+            self.tts_audio_first_sentence = True
+        elif ContentType.TEXT == message.content_type:
+            for segment_text in self._get_segment_texts(message.content_detail):
+                self.to_tts_stream(segment_text, opus_handler=self.handle_opus)
+        elif ContentType.FILE == message.content_type:
+            self._process_remaining_text_stream(opus_handler=self.handle_opus)
+            tts_file = message.content_file
+            if tts_file and os.path.exists(tts_file):
+                self._process_audio_file_stream(tts_file, callback=self.handle_opus)
+        if message.sentence_type == SentenceType.LAST:
+            self._process_remaining_text_stream(opus_handler=self.handle_opus)
+            self.tts_audio_queue.put((message.sentence_type, [], message.content_detail))
+
     def _audio_play_priority_thread(self):
         # 需要上报的文本和音频列表
-        enqueue_text = None
-        enqueue_audio = None
+        self._enqueue_text, self._enqueue_audio = None, None
         while not self.conn.stop_event.is_set():
             text = None
             try:
@@ -324,23 +539,9 @@ class TTSProviderBase(ABC):
                         break
                     continue
 
-                if self.conn.client_abort:
-                    logger.bind(tag=TAG).debug("收到打断信号，跳过当前音频数据")
-                    enqueue_text, enqueue_audio = None, []
+                if not self._before_play_audio(sentence_type, audio_datas, text):
                     continue
 
-                # 收到下一个文本开始或会话结束时进行上报
-                if sentence_type is not SentenceType.MIDDLE:
-                    # 上报TTS数据
-                    if enqueue_text is not None and enqueue_audio is not None:
-                        enqueue_tts_report(self.conn, enqueue_text, enqueue_audio)
-                    enqueue_audio = []
-                    enqueue_text = text
-
-                # 收集上报音频数据
-                if isinstance(audio_datas, bytes) and enqueue_audio is not None:
-                    enqueue_audio.append(audio_datas)
-
                 # 发送音频
                 future = asyncio.run_coroutine_threadsafe(
                     sendAudioMessage(self.conn, sentence_type, audio_datas, text),
@@ -348,13 +549,52 @@ class TTSProviderBase(ABC):
                 )
                 future.result()
 
-                # 记录输出和报告
-                if self.conn.max_output_size > 0 and text:
-                    add_device_output(self.conn.headers.get("device-id"), len(text))
+                self._after_play_audio(text)
 
             except Exception as e:
                 logger.bind(tag=TAG).error(f"audio_play_priority_thread: {text} {e}")
 
+    async def _audio_play_priority_task(self):
+        """音频播放协程（async 模式），直接在事件循环中发送音频"""
+        self._enqueue_text, self._enqueue_audio = None, None
+        while not self.conn.stop_event.is_set():
+            sentence_type, audio_datas, text = await self.tts_audio_queue.async_get()
+            try:
+                if not self._before_play_audio(sentence_type, audio_datas, text):
+                    continue
+                await sendAudioMessage(self.conn, sentence_type, audio_datas, text)
+                self._after_play_audio(text)
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"audio_play_priority_task: {text} {e}")
+
+    def _before_play_audio(self, sentence_type, audio_datas, text) -> bool:
+        """播放前处理打断与上报数据收集，返回False表示跳过该音频"""
+        if self.conn.client_abort:
+            logger.bind(tag=TAG).debug("收到打断信号，跳过当前音频数据")
+            self._enqueue_text, self._enqueue_audio = None, []
+            return False
+
+        # 收到下一个文本开始或会话结束时进行上报
+        if sentence_type is not SentenceType.MIDDLE:
+            # 上报TTS数据
+            if self._enqueue_text is not None and self._enqueue_audio is not None:
+                enqueue_tts_report(self.conn, self._enqueue_text, self._enqueue_audio)
+            self._enqueue_audio = []
+            self._enqueue_text = text
+
+        if audio_datas:
+            self.conn.turn_trace.mark(STAGE_TTS_FIRST_BYTE)
+
+        # 收集上报音频数据
+        if isinstance(audio_datas, bytes) and self._enqueue_audio is not None:
+            self._enqueue_audio.append(audio_datas)
+        return True
+
+    def _after_play_audio(self, text):
+        # 记录输出和报告
+        if self.conn.max_output_size > 0 and text:
+            add_device_output(self.conn.headers.get("device-id"), len(text))
+
     async def start_session(self, session_id):
         pass
 
@@ -366,44 +606,22 @@ class TTSProviderBase(ABC):
         if hasattr(self, "ws") and self.ws:
             await self.ws.close()
 
-    def _get_segment_text(self):
-        # 合并当前全部文本并处理未分割部分
-        full_text = "".join(self.tts_text_buff)
-        current_text = full_text[self.processed_chars :]  # 从未处理的位置开始
-        last_punct_pos = -1
-
-        # 根据是否是第一句话选择不同的标点符号集合
-        punctuations_to_use = (
-            self.first_sentence_punctuations
-            if self.is_first_sentence
-            else self.punctuations
-        )
-
-        for punct in punctuations_to_use:
-            pos = current_text.rfind(punct)
-            if (pos != -1 and last_punct_pos == -1) or (
-                pos != -1 and pos < last_punct_pos
-            ):
-                last_punct_pos = pos
-
-        if last_punct_pos != -1:
-            segment_text_raw = current_text[: last_punct_pos + 1]
+    def _get_segment_texts(self, text):
+        """追加LLM输出的文本，返回已切分完成的句子（已去除首尾标点和表情）"""
+        segments = []
+        for segment_text_raw in self.segmenter.feed(text):
             segment_text = textUtils.get_string_no_punctuation_or_emoji(
                 segment_text_raw
             )
-            self.processed_chars += len(segment_text_raw)  # 更新已处理字符位置
-
-            # 如果是第一句话，在找到第一个逗号后，将标志设置为False
-            if self.is_first_sentence:
-                self.is_first_sentence = False
-
-            return segment_text
-        elif self.tts_stop_request and current_text:
-            segment_text = current_text
-            self.is_first_sentence = True  # 重置标志
-            return segment_text
-        else:
-            return None
+            if segment_text:
+                segments.append(segment_text)
+        if self.tts_stop_request:
+            remaining_text = self.segmenter.flush()
+            if remaining_text:
+                segments.append(remaining_text)
+        if segments and self.conn is not None:
+            self.conn.turn_trace.mark(STAGE_FIRST_SENTENCE)
+        return segments
 
     def _process_audio_file_stream(
         self, tts_file, callback: Callable[[Any], Any]
@@ -443,12 +661,10 @@ class TTSProviderBase(ABC):
         Returns:
             bool: 是否成功处理了文本
         """
-        full_text = "".join(self.tts_text_buff)
-        remaining_text = full_text[self.processed_chars :]
+        remaining_text = self.segmenter.flush()
         if remaining_text:
             segment_text = textUtils.get_string_no_punctuation_or_emoji(remaining_text)
             if segment_text:
                 self.to_tts_stream(segment_text, opus_handler=opus_handler)
-                self.processed_chars += len(full_text)
                 return True
         return False
@@ -1,8 +1,10 @@
-import requests
 from core.providers.tts.base import TTSProviderBase
+from core.utils.tts_http import get_tts_http_client
 
 
 class TTSProvider(TTSProviderBase):
+    use_shared_loop = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.model = config.get("model")
@@ -29,8 +31,8 @@ class TTSProvider(TTSProviderBase):
         }
 
         try:
-            response = requests.request(
-                "POST", self.api_url, json=request_json, headers=headers
+            response = await get_tts_http_client(self.api_url).post(
+                self.api_url, json=request_json, headers=headers
             )
             data = response.content
             if output_file:
@@ -1,15 +1,17 @@
 import os
 import json
 import uuid
-import requests
 from config.logger import setup_logging
 from datetime import datetime
 from core.providers.tts.base import TTSProviderBase
+from core.utils.tts_http import get_tts_http_client, legacy_query_params
 
 TAG = __name__
 logger = setup_logging()
 
 class TTSProvider(TTSProviderBase):
+    use_shared_loop = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.url = config.get("url")
@@ -38,10 +40,15 @@ class TTSProvider(TTSProviderBase):
                 v = v.replace("{prompt_text}", text)
             request_params[k] = v
 
+        client = get_tts_http_client(self.url)
         if self.method.upper() == "POST":
-            resp = requests.post(self.url, json=request_params, headers=self.headers)
+            resp = await client.post(self.url, json=request_params, headers=self.headers)
         else:
-            resp = requests.get(self.url, params=request_params, headers=self.headers)
+            resp = await client.get(
+                self.url,
+                params=legacy_query_params(request_params),
+                headers=self.headers,
+            )
         if resp.status_code == 200:
             if output_file:
                 with open(output_file, "wb") as file:
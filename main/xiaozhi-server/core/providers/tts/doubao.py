@@ -1,9 +1,9 @@
 import uuid
 import json
 import base64
-import requests
 from core.utils.util import check_model_key
 from core.providers.tts.base import TTSProviderBase
+from core.utils.tts_http import get_tts_http_client
 from config.logger import setup_logging
 
 TAG = __name__
@@ -11,6 +11,8 @@ logger = setup_logging()
 
 
 class TTSProvider(TTSProviderBase):
+    use_shared_loop = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         if config.get("appid"):
@@ -67,8 +69,8 @@ class TTSProvider(TTSProviderBase):
         }
 
         try:
-            resp = requests.post(
-                self.api_url, json.dumps(request_json), headers=self.header
+            resp = await get_tts_http_client(self.api_url).post(
+                self.api_url, content=json.dumps(request_json), headers=self.header
             )
             if "data" in resp.json():
                 data = resp.json()["data"]
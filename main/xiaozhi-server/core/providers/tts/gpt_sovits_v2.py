@@ -1,6 +1,6 @@
-import requests
 from config.logger import setup_logging
 from core.providers.tts.base import TTSProviderBase
+from core.utils.tts_http import get_tts_http_client
 from core.utils.util import parse_string_to_list
 
 TAG = __name__
@@ -8,6 +8,8 @@ logger = setup_logging()
 
 
 class TTSProvider(TTSProviderBase):
+    use_shared_loop = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.url = config.get("url")
@@ -90,7 +92,7 @@ class TTSProvider(TTSProviderBase):
             "repetition_penalty": self.repetition_penalty,
         }
 
-        resp = requests.post(self.url, json=request_json)
+        resp = await get_tts_http_client(self.url).post(self.url, json=request_json)
         if resp.status_code == 200:
             if output_file:
                 with open(output_file, "wb") as file:
@@ -1,6 +1,6 @@
-import requests
 from config.logger import setup_logging
 from core.providers.tts.base import TTSProviderBase
+from core.utils.tts_http import get_tts_http_client, legacy_query_params
 from core.utils.util import parse_string_to_list
 
 TAG = __name__
@@ -8,6 +8,8 @@ logger = setup_logging()
 
 
 class TTSProvider(TTSProviderBase):
+    use_shared_loop = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.url = config.get("url")
@@ -51,7 +53,9 @@ class TTSProvider(TTSProviderBase):
             "if_sr": self.if_sr,
         }
 
-        resp = requests.get(self.url, params=request_params)
+        resp = await get_tts_http_client(self.url).get(
+            self.url, params=legacy_query_params(request_params)
+        )
         if resp.status_code == 200:
             if output_file:
                 with open(output_file, "wb") as file:
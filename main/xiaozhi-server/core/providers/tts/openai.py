@@ -1,6 +1,6 @@
-import requests
 from core.utils.util import check_model_key
 from core.providers.tts.base import TTSProviderBase
+from core.utils.tts_http import get_tts_http_client
 from config.logger import setup_logging
 
 TAG = __name__
@@ -8,6 +8,9 @@ logger = setup_logging()
 
 
 class TTSProvider(TTSProviderBase):
+    use_shared_loop = True
+    supports_stream = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.api_key = config.get("api_key")
@@ -29,7 +32,7 @@ class TTSProvider(TTSProviderBase):
         if model_key_msg:
             logger.bind(tag=TAG).error(model_key_msg)
 
-    async def text_to_speak(self, text, output_file):
+    def _build_request(self, text):
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -41,7 +44,13 @@ class TTSProvider(TTSProviderBase):
             "response_format": "wav",
             "speed": self.speed,
         }
-        response = requests.post(self.api_url, json=data, headers=headers)
+        return headers, data
+
+    async def text_to_speak(self, text, output_file):
+        headers, data = self._build_request(text)
+        response = await get_tts_http_client(self.api_url).post(
+            self.api_url, json=data, headers=headers
+        )
         if response.status_code == 200:
             if output_file:
                 with open(output_file, "wb") as audio_file:
@@ -52,3 +61,16 @@ class TTSProvider(TTSProviderBase):
             raise Exception(
                 f"OpenAI TTS请求失败: {response.status_code} - {response.text}"
             )
+
+    async def text_to_speak_stream(self, text):
+        headers, data = self._build_request(text)
+        async with get_tts_http_client(self.api_url).stream(
+            "POST", self.api_url, json=data, headers=headers
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise Exception(
+                    f"OpenAI TTS请求失败: {response.status_code} - {response.text}"
+                )
+            async for chunk in response.aiter_bytes():
+                yield chunk
@@ -1,8 +1,11 @@
-import requests
 from core.providers.tts.base import TTSProviderBase
+from core.utils.tts_http import get_tts_http_client
 
 
 class TTSProvider(TTSProviderBase):
+    use_shared_loop = True
+    supports_stream = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.model = config.get("model")
@@ -20,7 +23,7 @@ class TTSProvider(TTSProviderBase):
         self.host = "api.siliconflow.cn"
         self.api_url = f"https://{self.host}/v1/audio/speech"
 
-    async def text_to_speak(self, text, output_file):
+    def _build_request(self, text):
         request_json = {
             "model": self.model,
             "input": text,
@@ -31,9 +34,13 @@ class TTSProvider(TTSProviderBase):
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json",
         }
+        return headers, request_json
+
+    async def text_to_speak(self, text, output_file):
+        headers, request_json = self._build_request(text)
         try:
-            response = requests.request(
-                "POST", self.api_url, json=request_json, headers=headers
+            response = await get_tts_http_client(self.api_url).post(
+                self.api_url, json=request_json, headers=headers
             )
             data = response.content
             if output_file:
@@ -43,3 +50,16 @@ class TTSProvider(TTSProviderBase):
                 return data
         except Exception as e:
             raise Exception(f"{__name__} error: {e}")
+
+    async def text_to_speak_stream(self, text):
+        headers, request_json = self._build_request(text)
+        async with get_tts_http_client(self.api_url).stream(
+            "POST", self.api_url, json=request_json, headers=headers
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise Exception(
+                    f"{__name__} error: {response.status_code} - {response.text}"
+                )
+            async for chunk in response.aiter_bytes():
+                yield chunk
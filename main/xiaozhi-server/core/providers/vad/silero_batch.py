@@ -0,0 +1,235 @@
+"""
+Silero VAD 跨连接批量推理实现
+
+- 每个连接独立持有模型隐状态和上下文，互不串扰；opus 解码与分帧由连接的 audio_ingest 负责
+- 所有连接在短时间窗口内提交的 512 采样点分片合并为一次批量推理
+- 推理在单独的推理线程中执行，不阻塞事件循环
+"""
+
+import os
+import time
+import asyncio
+import numpy as np
+import opuslib_next
+from concurrent.futures import ThreadPoolExecutor
+from config.logger import setup_logging
+from core.providers.vad.base import VADProviderBase
+
+TAG = __name__
+logger = setup_logging()
+
+# 16kHz 下模型固定的输入分片大小与上下文长度
+CHUNK_SAMPLES = 512
+CONTEXT_SAMPLES = 64
+STATE_SHAPE = (2, 128)
+
+
+class SileroStreamState:
+    """单个连接的VAD推理状态"""
+
+    __slots__ = ("state", "context")
+
+    def __init__(self):
+        self.state = np.zeros(STATE_SHAPE, dtype=np.float32)
+        self.context = np.zeros(CONTEXT_SAMPLES, dtype=np.float32)
+
+
+class SileroBatchEngine:
+    """跨连接的 Silero VAD 批量推理引擎"""
+
+    def __init__(
+        self,
+        model_path: str,
+        max_batch_size: int = 64,
+        batch_window_ms: float = 4,
+        intra_op_threads: int = 1,
+    ):
+        import onnxruntime
+
+        opts = onnxruntime.SessionOptions()
+        opts.inter_op_num_threads = 1
+        opts.intra_op_num_threads = intra_op_threads
+        self.session = onnxruntime.InferenceSession(
+            model_path, providers=["CPUExecutionProvider"], sess_options=opts
+        )
+        self.sample_rate = np.array(16000, dtype=np.int64)
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.batch_window = max(0.0, float(batch_window_ms)) / 1000
+        # 推理串行执行，批内并行由 onnxruntime 负责
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="silero-batch"
+        )
+
+        self._pending = []
+        self._flush_handle = None
+
+        self.stats = {"frames": 0, "batches": 0, "max_batch": 0, "infer_time": 0.0}
+
+    def run_batch(self, items):
+        """同步执行一次批量推理
+
+        Args:
+            items: [(SileroStreamState, float32分片)]
+
+        Returns:
+            np.ndarray: 每个分片的语音概率
+        """
+        batch_size = len(items)
+        x = np.empty((batch_size, CONTEXT_SAMPLES + CHUNK_SAMPLES), dtype=np.float32)
+        state = np.empty((2, batch_size, 128), dtype=np.float32)
+        for i, (stream, chunk) in enumerate(items):
+            x[i, :CONTEXT_SAMPLES] = stream.context
+            x[i, CONTEXT_SAMPLES:] = chunk
+            state[:, i, :] = stream.state
+
+        start = time.perf_counter()
+        out, new_state = self.session.run(
+            None, {"input": x, "state": state, "sr": self.sample_rate}
+        )
+        self.stats["infer_time"] += time.perf_counter() - start
+
+        for i, (stream, _) in enumerate(items):
+            stream.state[:] = new_state[:, i, :]
+            stream.context[:] = x[i, -CONTEXT_SAMPLES:]
+
+        self.stats["frames"] += batch_size
+        self.stats["batches"] += 1
+        if batch_size > self.stats["max_batch"]:
+            self.stats["max_batch"] = batch_size
+        return out.reshape(batch_size)
+
+    async def infer(self, stream: SileroStreamState, chunk: np.ndarray) -> float:
+        """提交一个分片，等待所在批次推理完成后返回语音概率"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((stream, chunk, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush, loop)
+
+        return await future
+
+    def _flush(self, loop):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        items = [(stream, chunk) for stream, chunk, _ in batch]
+        task = loop.run_in_executor(self.executor, self.run_batch, items)
+        task.add_done_callback(lambda done: self._resolve(done, batch))
+
+    @staticmethod
+    def _resolve(done, batch):
+        error = done.exception()
+        if error is not None:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        probs = done.result()
+        for i, (_, _, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(float(probs[i]))
+
+    def get_stats(self) -> dict:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "avg_batch": self.stats["frames"] / batches if batches else 0,
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+class VADProvider(VADProviderBase):
+    def __init__(self, config):
+        logger.bind(tag=TAG).info("SileroBatchVAD", config)
+        model_path = config.get("model_path") or os.path.join(
+            config["model_dir"], "src", "silero_vad", "data", "silero_vad.onnx"
+        )
+
+        max_batch_size = config.get("max_batch_size", 64)
+        batch_window_ms = config.get("batch_window_ms", 4)
+        intra_op_threads = config.get("intra_op_threads", 1)
+        self.engine = SileroBatchEngine(
+            model_path,
+            max_batch_size=int(max_batch_size) if max_batch_size else 64,
+            batch_window_ms=(
+                float(batch_window_ms) if batch_window_ms not in (None, "") else 4
+            ),
+            intra_op_threads=int(intra_op_threads) if intra_op_threads else 1,
+        )
+
+        self._load_threshold_config(config)
+
+    def __del__(self):
+        if hasattr(self, "engine") and self.engine is not None:
+            try:
+                self.engine.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _get_stream(conn) -> SileroStreamState:
+        """获取连接私有的推理状态，首次使用时创建"""
+        stream = getattr(conn, "vad_stream", None)
+        if stream is None:
+            stream = SileroStreamState()
+            conn.vad_stream = stream
+        return stream
+
+    @staticmethod
+    def _to_model_input(frame) -> np.ndarray:
+        # 512个采样点（1024字节）的环形缓冲区视图转换为模型输入
+        audio_int16 = np.frombuffer(frame, dtype=np.int16)
+        return audio_int16.astype(np.float32) / 32768.0
+
+    def is_vad(self, conn, opus_packet):
+        """同步接口：不参与批处理，逐帧直接推理"""
+        if conn.client_listen_mode == "manual":
+            return True
+
+        stream = self._get_stream(conn)
+        try:
+            conn.audio_ingest.feed_vad(opus_packet, conn.audio_format)
+
+            client_have_voice = False
+            for frame in conn.audio_ingest.vad_frames():
+                chunk = self._to_model_input(frame)
+                speech_prob = float(self.engine.run_batch([(stream, chunk)])[0])
+                client_have_voice = self._update_voice_state(conn, speech_prob)
+            return client_have_voice
+        except opuslib_next.OpusError as e:
+            logger.bind(tag=TAG).info(f"解码错误: {e}")
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
+
+    async def is_vad_async(self, conn, opus_packet):
+        # 手动模式：直接返回True，不进行实时VAD检测，所有音频都缓存
+        if conn.client_listen_mode == "manual":
+            return True
+
+        stream = self._get_stream(conn)
+        try:
+            conn.audio_ingest.feed_vad(opus_packet, conn.audio_format)
+
+            # 同一连接的分片依赖上一分片的隐状态，只能依次提交；不同连接的分片在引擎内合批
+            client_have_voice = False
+            for frame in conn.audio_ingest.vad_frames():
+                # 转换后的分片是独立数组，等待推理期间不引用环形缓冲区
+                chunk = self._to_model_input(frame)
+                speech_prob = await self.engine.infer(stream, chunk)
+                client_have_voice = self._update_voice_state(conn, speech_prob)
+            return client_have_voice
+        except opuslib_next.OpusError as e:
+            logger.bind(tag=TAG).info(f"解码错误: {e}")
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
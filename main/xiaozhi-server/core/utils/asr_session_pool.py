@@ -0,0 +1,264 @@
+"""
+流式ASR的上游websocket会话池
+
+流式ASR在检测到说话开始时才连接上游（TCP、TLS、websocket握手及鉴权），首个识别结果
+要多等几百毫秒。会话池按提供方和凭证预先建立好连接：
+- 语音开始时直接取出一个预热好的会话，交给提供方发送识别任务，用完后由提供方关闭
+- 取出后在后台补充新的会话，保持每个凭证 warm_sessions 个空闲会话
+- 定期健康检查：已关闭、ping 无响应或空闲超过 idle_timeout 的会话被关闭并重新建立，
+  避免拿到被服务端关闭的空闲连接
+- 超过 keep_warm_seconds 没有使用的凭证不再预热，释放连接
+- 连接失败时指数退避，取不到预热会话时直接连接，与不使用会话池时相同
+
+预热会话占用提供方的并发连接配额：每个凭证常驻 warm_sessions 个空闲连接，且每 idle_timeout
+秒左右重建一次，直到 keep_warm_seconds 内没有使用。并发配额较低的套餐（如阿里云NLS试用版）
+开启前需确认配额足够，因此默认关闭
+
+会话池只在事件循环线程中使用
+"""
+
+import time
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from websockets.protocol import State
+
+from config.logger import setup_logging
+from core.utils.metrics import REGISTRY, Counter, GaugeFunc
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_OPTIONS = {
+    "enabled": False,
+    # 每个凭证保持的空闲预热会话数，占用提供方的并发连接配额
+    "warm_sessions": 1,
+    # 预热会话的最长空闲时间（秒），应小于服务端关闭空闲连接的时间（讯飞、阿里云约10秒）
+    "idle_timeout": 8,
+    # 健康检查间隔（秒）
+    "health_check_interval": 2,
+    # ping 的超时时间（秒）
+    "ping_timeout": 3,
+    # 超过该时间（秒）没有使用的凭证停止预热
+    "keep_warm_seconds": 600,
+    # 建立连接的超时时间（秒）
+    "connect_timeout": 10,
+}
+
+MAX_RETRY_BACKOFF = 60
+
+ASR_SESSION_ACQUIRE = REGISTRY.register(
+    Counter(
+        "xiaozhi_asr_session_pool_acquire_total",
+        "流式ASR获取上游会话的次数，warm为使用预热会话，cold为直接连接",
+        ["result"],
+    )
+)
+
+
+class _PooledKey:
+    """一个提供方凭证对应的预热会话"""
+
+    def __init__(self, key: str, connect: Callable[[], Awaitable[Any]]):
+        self.key = key
+        self.connect = connect
+        self.idle: Deque[Tuple[Any, float]] = deque()
+        self.opening = 0
+        self.last_used = time.monotonic()
+        self.failures = 0
+        self.next_retry = 0.0
+        self.refill_task: Optional[asyncio.Task] = None
+        self.warm = 0
+        self.cold = 0
+
+
+class ASRSessionPool:
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update({k: v for k, v in (options or {}).items() if v is not None})
+        self.enabled = bool(self.options["enabled"])
+        self.warm_sessions = max(0, int(self.options["warm_sessions"]))
+        self.idle_timeout = float(self.options["idle_timeout"])
+        self.health_check_interval = float(self.options["health_check_interval"])
+        self.ping_timeout = float(self.options["ping_timeout"])
+        self.keep_warm_seconds = float(self.options["keep_warm_seconds"])
+        self.connect_timeout = float(self.options["connect_timeout"])
+        self.keys: Dict[str, _PooledKey] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    def _usable_here(self) -> bool:
+        if not self.enabled or self.warm_sessions == 0:
+            return False
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+        # 预热的会话绑定创建它的事件循环
+        return loop is self._loop
+
+    def _get_key(self, key: str, connect: Callable[[], Awaitable[Any]]) -> _PooledKey:
+        pooled = self.keys.get(key)
+        if pooled is None:
+            pooled = _PooledKey(key, connect)
+            self.keys[key] = pooled
+        else:
+            # 使用最新的连接方法（如刷新后的token）
+            pooled.connect = connect
+        pooled.last_used = time.monotonic()
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_check_loop())
+        return pooled
+
+    def prewarm(self, key: str, connect: Callable[[], Awaitable[Any]]):
+        """设备连接时开始为该凭证预热会话，不等待连接完成"""
+        if not key or not self._usable_here():
+            return
+        self._schedule_refill(self._get_key(key, connect))
+
+    async def acquire(self, key: str, connect: Callable[[], Awaitable[Any]]):
+        """取出一个预热好的会话，没有可用会话时直接连接；取出的会话由调用方负责关闭"""
+        if not key or not self._usable_here():
+            return await connect()
+        pooled = self._get_key(key, connect)
+        now = time.monotonic()
+        while pooled.idle:
+            ws, opened_at = pooled.idle.popleft()
+            if self._is_alive(ws, opened_at, now):
+                pooled.warm += 1
+                ASR_SESSION_ACQUIRE.labels("warm").inc()
+                self._schedule_refill(pooled)
+                return ws
+            self._discard(ws)
+        pooled.cold += 1
+        ASR_SESSION_ACQUIRE.labels("cold").inc()
+        self._schedule_refill(pooled)
+        return await connect()
+
+    def _is_alive(self, ws, opened_at: float, now: float) -> bool:
+        return ws.state is State.OPEN and now - opened_at < self.idle_timeout
+
+    @staticmethod
+    def _discard(ws):
+        async def close():
+            try:
+                await asyncio.wait_for(ws.close(), timeout=2)
+            except Exception:
+                pass
+
+        asyncio.create_task(close())
+
+    def _schedule_refill(self, pooled: _PooledKey):
+        if pooled.refill_task is None or pooled.refill_task.done():
+            pooled.refill_task = asyncio.create_task(self._refill(pooled))
+
+    async def _refill(self, pooled: _PooledKey):
+        while (
+            len(pooled.idle) + pooled.opening < self.warm_sessions
+            and self.keys.get(pooled.key) is pooled
+        ):
+            if time.monotonic() < pooled.next_retry:
+                return
+            pooled.opening += 1
+            try:
+                ws = await asyncio.wait_for(pooled.connect(), timeout=self.connect_timeout)
+            except Exception as e:
+                pooled.failures += 1
+                pooled.next_retry = time.monotonic() + min(
+                    MAX_RETRY_BACKOFF, 2**pooled.failures
+                )
+                logger.bind(tag=TAG).warning(f"预热ASR会话失败 {pooled.key}: {e}")
+                return
+            finally:
+                pooled.opening -= 1
+            pooled.failures = 0
+            if self.keys.get(pooled.key) is not pooled:
+                self._discard(ws)
+                return
+            pooled.idle.append((ws, time.monotonic()))
+
+    async def _ping(self, ws) -> bool:
+        try:
+            pong_waiter = await ws.ping()
+            await asyncio.wait_for(pong_waiter, timeout=self.ping_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def _health_check_loop(self):
+        while self.keys:
+            await asyncio.sleep(self.health_check_interval)
+            now = time.monotonic()
+            for key, pooled in list(self.keys.items()):
+                if now - pooled.last_used > self.keep_warm_seconds:
+                    # 长时间没有使用，不再预热
+                    del self.keys[key]
+                    while pooled.idle:
+                        self._discard(pooled.idle.popleft()[0])
+                    continue
+                alive = deque()
+                while pooled.idle:
+                    ws, opened_at = pooled.idle.popleft()
+                    if self._is_alive(ws, opened_at, now) and await self._ping(ws):
+                        alive.append((ws, opened_at))
+                    else:
+                        self._discard(ws)
+                # 检查期间可能已被取走或新增了会话
+                alive.extend(pooled.idle)
+                pooled.idle = alive
+                self._schedule_refill(pooled)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            key: {
+                "idle": len(pooled.idle),
+                "opening": pooled.opening,
+                "warm": pooled.warm,
+                "cold": pooled.cold,
+                "failures": pooled.failures,
+            }
+            for key, pooled in self.keys.items()
+        }
+
+    async def close(self):
+        """关闭所有预热会话"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        keys, self.keys = self.keys, {}
+        for pooled in keys.values():
+            if pooled.refill_task is not None:
+                pooled.refill_task.cancel()
+            while pooled.idle:
+                ws = pooled.idle.popleft()[0]
+                try:
+                    await asyncio.wait_for(ws.close(), timeout=2)
+                except Exception:
+                    pass
+        # 关闭后可在新的事件循环中重新使用
+        self._loop = None
+
+
+# 全局单例
+_asr_session_pool: Optional[ASRSessionPool] = None
+
+
+def get_asr_session_pool() -> ASRSessionPool:
+    """获取全局流式ASR会话池（单例，仅在事件循环线程中使用）"""
+    global _asr_session_pool
+    if _asr_session_pool is None:
+        from config.config_loader import load_config
+
+        _asr_session_pool = ASRSessionPool(load_config().get("asr_session_pool"))
+    return _asr_session_pool
+
+
+REGISTRY.register(
+    GaugeFunc(
+        "xiaozhi_asr_session_pool_idle",
+        "流式ASR会话池中空闲的预热会话数",
+        lambda: sum(len(p.idle) for p in _asr_session_pool.keys.values())
+        if _asr_session_pool is not None
+        else 0,
+    )
+)
@@ -2,6 +2,7 @@ import time
 import asyncio
 from collections import deque
 from config.logger import setup_logging
+from core.utils.audio_pacing import TIME_EPSILON, get_audio_pacing_scheduler
 
 TAG = __name__
 logger = setup_logging()
@@ -11,6 +12,9 @@ class AudioRateController:
     """
     音频速率控制器 - 按照60ms帧时长精确控制音频发送
     解决高并发下的时间累积误差问题
+
+    发送时机由全局音频发送调度器统一驱动，控制器本身不再持有发送任务：
+    队列头部的音频帧未到播放时间时，把控制器挂到调度器的时间轮上，到期后再发送
     """
 
     def __init__(self, frame_duration=60):
@@ -22,17 +26,25 @@ class AudioRateController:
         self.queue = deque()
         self.play_position = 0  # 虚拟播放位置（毫秒）
         self.start_timestamp = None  # 开始时间戳（只读，不修改）
-        self.pending_send_task = None
         self.logger = logger
         self.queue_empty_event = asyncio.Event()  # 队列清空事件
         self.queue_empty_event.set()  # 初始为空状态
         self.queue_has_data_event = asyncio.Event()  # 队列数据事件
 
+        self.scheduler = get_audio_pacing_scheduler()
+        # 每次重置后递增，调度器据此丢弃重置前挂载的到期条目
+        self.generation = 0
+        self._send_audio_callback = None
+        # 已挂载到调度器或正在发送时为True，避免重复挂载
+        self._scheduled = False
+        # 本次挂载的计划发送时间，用于统计发送延迟
+        self._scheduled_due = None
+        # 调度器为本次到期数据创建的发送任务
+        self._send_task = None
+
     def reset(self):
         """重置控制器状态"""
-        if self.pending_send_task and not self.pending_send_task.done():
-            self.pending_send_task.cancel()
-            # 取消任务后，任务会在下次事件循环时清理，无需阻塞等待
+        self.stop_sending()
 
         self.queue.clear()
         self.play_position = 0
@@ -47,6 +59,7 @@ class AudioRateController:
         # 相关事件处理
         self.queue_empty_event.clear()
         self.queue_has_data_event.set()
+        self._schedule_head()
 
     def add_message(self, message_callback):
         """
@@ -59,6 +72,7 @@ class AudioRateController:
         # 相关事件处理
         self.queue_empty_event.clear()
         self.queue_has_data_event.set()
+        self._schedule_head()
 
     def _get_elapsed_ms(self):
         """获取已经过的时间（毫秒）"""
@@ -66,95 +80,116 @@ class AudioRateController:
             return 0
         return (time.monotonic() - self.start_timestamp) * 1000
 
-    async def check_queue(self, send_audio_callback):
+    def _schedule_head(self):
+        """按队列头部数据的发送时间挂载到调度器"""
+        if self._scheduled or self._send_audio_callback is None or not self.queue:
+            return
+        self._scheduled = True
+        now = time.monotonic()
+        due = now
+        if self.queue[0][0] == "audio" and self.start_timestamp is not None:
+            # 队列空闲一段时间后播放位置可能已落后，此时立即发送
+            due = max(now, self.start_timestamp + self.play_position / 1000)
+        self._scheduled_due = due
+        self.scheduler.schedule(self, due)
+
+    async def send_due(self, now):
         """
-        检查队列并按时发送音频/消息
+        发送队列中已到时间的消息和音频，由调度器在到期时调用
 
         Args:
-            send_audio_callback: 发送音频的回调函数 async def(opus_packet)
+            now: 本次调度的节拍时间（time.monotonic 时间轴）
         """
-        while self.queue:
-            item = self.queue[0]
-            item_type = item[0]
-
-            if item_type == "message":
-                # 消息类型：立即发送，不占用播放时间
-                _, message_callback = item
-                self.queue.popleft()
-                try:
-                    await message_callback()
-                except Exception as e:
-                    self.logger.bind(tag=TAG).error(f"发送消息失败: {e}")
-                    raise
+        generation = self.generation
+        send_audio_callback = self._send_audio_callback
+        try:
+            while self.queue and generation == self.generation:
+                item_type, payload = self.queue[0]
+
+                if item_type == "message":
+                    # 消息类型：立即发送，不占用播放时间
+                    self.queue.popleft()
+                    try:
+                        await payload()
+                    except Exception as e:
+                        self.logger.bind(tag=TAG).error(f"发送消息失败: {e}")
+                        raise
+                    continue
 
-            elif item_type == "audio":
                 if self.start_timestamp is None:
-                    self.start_timestamp = time.monotonic()
-
-                _, opus_packet = item
-
-                # 循环等待直到时间到达
-                while True:
-                    # 计算时间差
-                    elapsed_ms = self._get_elapsed_ms()
-                    output_ms = self.play_position
-
-                    if elapsed_ms < output_ms:
-                        # 还不到发送时间，计算等待时长
-                        wait_ms = output_ms - elapsed_ms
-
-                        # 等待后继续检查（允许被中断）
-                        try:
-                            await asyncio.sleep(wait_ms / 1000)
-                        except asyncio.CancelledError:
-                            self.logger.bind(tag=TAG).debug("音频发送任务被取消")
-                            raise
-                        # 等待结束后重新检查时间（循环回到 while True）
-                    else:
-                        # 时间已到，跳出等待循环
-                        break
+                    self.start_timestamp = now
+
+                due = self.start_timestamp + self.play_position / 1000
+                if due - now > TIME_EPSILON:
+                    # 还不到发送时间，挂载到调度器等待
+                    self._scheduled_due = due
+                    self.scheduler.schedule(self, due)
+                    return
+
+                if self._scheduled_due is not None:
+                    # 只统计按计划等待后发出的帧，积压后追赶发出的帧不计入
+                    self.scheduler.record_lag(
+                        max(0.0, time.monotonic() - self._scheduled_due)
+                    )
+                    self._scheduled_due = None
 
                 # 时间已到，从队列移除并发送
                 self.queue.popleft()
                 self.play_position += self.frame_duration
                 try:
-                    await send_audio_callback(opus_packet)
+                    await send_audio_callback(payload)
                 except Exception as e:
                     self.logger.bind(tag=TAG).error(f"发送音频失败: {e}")
                     raise
-
-        # 队列处理完后清除事件
-        self.queue_empty_event.set()
-        self.queue_has_data_event.clear()
+        except asyncio.CancelledError:
+            self.logger.bind(tag=TAG).debug("音频发送任务被取消")
+            self._stop(generation)
+            return
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"音频发送循环异常: {e}")
+            self._stop(generation)
+            return
+
+        if generation != self.generation:
+            return
+        self._scheduled = False
+        self._send_task = None
+        if not self.queue:
+            # 队列处理完后清除事件
+            self.queue_empty_event.set()
+            self.queue_has_data_event.clear()
+
+    def set_send_task(self, task):
+        """记录调度器创建的发送任务，停止发送时取消"""
+        self._send_task = task
+
+    def _stop(self, generation):
+        """发送出错后停止，下一次发送音频时由 sendAudioHandle 重新初始化"""
+        if generation == self.generation:
+            self.stop_sending()
 
     def start_sending(self, send_audio_callback):
         """
-        启动异步发送任务
+        启动发送，由全局调度器按时调用 send_audio_callback
 
         Args:
-            send_audio_callback: 发送音频的回调函数
-
-        Returns:
-            asyncio.Task: 发送任务
+            send_audio_callback: 发送音频的回调函数 async def(opus_packet)
         """
+        self._send_audio_callback = send_audio_callback
+        self._schedule_head()
 
-        async def _send_loop():
-            try:
-                while True:
-                    # 等待队列数据事件，不轮询等待占用CPU
-                    await self.queue_has_data_event.wait()
-
-                    await self.check_queue(send_audio_callback)
-            except asyncio.CancelledError:
-                self.logger.bind(tag=TAG).debug("音频发送循环已停止")
-            except Exception as e:
-                self.logger.bind(tag=TAG).error(f"音频发送循环异常: {e}")
-
-        self.pending_send_task = asyncio.create_task(_send_loop())
-        return self.pending_send_task
+    def is_sending(self):
+        """是否处于发送状态，发送出错或被取消后为False"""
+        return self._send_audio_callback is not None
 
     def stop_sending(self):
-        """停止发送任务"""
-        if self.pending_send_task and not self.pending_send_task.done():
-            self.pending_send_task.cancel()
+        """停止发送"""
+        self.generation += 1
+        self._send_audio_callback = None
+        self._scheduled = False
+        self._scheduled_due = None
+        task = self._send_task
+        self._send_task = None
+        if task and not task.done() and task is not asyncio.current_task():
+            task.cancel()
             self.logger.bind(tag=TAG).debug("已取消音频发送任务")
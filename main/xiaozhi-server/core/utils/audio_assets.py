@@ -0,0 +1,406 @@
+"""
+预编码的opus提示音资源包
+
+绑定码数字、唤醒词回复、超长提示、结束提示音等固定音频，启动时统一编码成
+60ms一帧的opus数据包，写入一个资源包文件，运行时通过内存映射读取：
+- 播放时直接返回已编码的数据包列表，不再解码、重采样和opus编码
+- 每个资源记录源文件的大小、修改时间和内容哈希，源文件变化后自动重新编码
+- 重启后只要源文件未变化，直接加载资源包，无需重新编码
+
+资源包格式：MAGIC | 索引长度(uint32) | 索引JSON | 各资源数据
+每个资源的数据为 包长度数组(uint16 * count) 后接连续存放的opus包
+"""
+
+import os
+import sys
+import glob
+import json
+import mmap
+import time
+import array
+import struct
+import hashlib
+import threading
+from typing import Dict, List, Optional
+from config.logger import setup_logging
+from core.utils.audio_stream import decode_audio_stream
+
+TAG = __name__
+logger = setup_logging()
+
+MAGIC = b"XZOPUSAB"
+# 编码参数或格式变化时递增，旧资源包整体失效
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<I")
+
+DEFAULT_OPTIONS = {
+    "enable": True,
+    "bundle_path": "data/audio_assets.bin",
+    "paths": [
+        "config/assets/*.wav",
+        "config/assets/*.mp3",
+        "config/assets/bind_code/*.wav",
+        "config/assets/wakeup_words/*.wav",
+    ],
+}
+
+
+def _normalize(path: str) -> str:
+    return os.path.normpath(path)
+
+
+def _file_sha1(path: str) -> str:
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def encode_asset(path: str) -> List[bytes]:
+    """把音频文件编码为16kHz单声道、60ms一帧的opus数据包，与 audio_to_data 的结果一致"""
+    file_type = os.path.splitext(path)[1].lstrip(".")
+    with open(path, "rb") as f:
+        data = f.read()
+    packets = []
+    decode_audio_stream([data], file_type, True, packets.append)
+    return packets
+
+
+class _BundleView:
+    """资源包的只读快照：内存映射和索引，更新资源包时整体替换，读取方无需加锁"""
+
+    __slots__ = ("file", "mmap", "index", "packets")
+
+    def __init__(self, file=None, mapped: Optional[mmap.mmap] = None, index=None, packets=None):
+        self.file = file
+        self.mmap = mapped
+        # 资源索引：路径 -> {size, mtime_ns, sha1, offset, count}
+        self.index: Dict[str, Dict] = index or {}
+        # 已从资源包中取出的数据包列表
+        self.packets: Dict[str, List[bytes]] = {} if packets is None else packets
+
+    def read_packets(self, entry: Dict) -> List[bytes]:
+        offset, count = entry["offset"], entry["count"]
+        lengths = array.array("H")
+        lengths.frombytes(self.mmap[offset : offset + count * 2])
+        if sys.byteorder != "little":
+            lengths.byteswap()
+        packets = []
+        position = offset + count * 2
+        for length in lengths:
+            packets.append(self.mmap[position : position + length])
+            position += length
+        return packets
+
+    def close(self):
+        if self.mmap is not None:
+            self.mmap.close()
+        if self.file is not None:
+            self.file.close()
+
+
+class AudioAssetBundle:
+    """内存映射的opus资源包，可在事件循环和线程池中并发使用
+
+    lookup 只读取当前快照，不加锁；重新编码和写入资源包在线程池中进行，
+    写入由 _lock 串行化，完成后替换快照
+    """
+
+    def __init__(self, options: Optional[Dict] = None):
+        options = {**DEFAULT_OPTIONS, **{k: v for k, v in (options or {}).items() if v is not None}}
+        self.enabled = bool(options["enable"])
+        self.bundle_path = options["bundle_path"]
+        self.patterns = list(options["paths"])
+        self.extra_paths: List[str] = []
+        self._lock = threading.RLock()
+        self._view = _BundleView()
+        self.stats = {"hits": 0, "misses": 0, "encoded": 0, "rebuilds": 0}
+
+    def asset_paths(self) -> List[str]:
+        paths = set()
+        for pattern in self.patterns:
+            paths.update(_normalize(p) for p in glob.glob(pattern))
+        paths.update(_normalize(p) for p in self.extra_paths if os.path.isfile(p))
+        return sorted(paths)
+
+    def build(self) -> Dict[str, int]:
+        """加载资源包并校验所有配置的资源，有变化的资源重新编码后写回资源包，需在线程池中调用
+
+        Returns:
+            {"total": 资源数, "encoded": 重新编码数, "elapsed_ms": 耗时}
+        """
+        start = time.monotonic()
+        encoded = 0
+        if not self.enabled:
+            return {"total": 0, "encoded": 0, "elapsed_ms": 0}
+        with self._lock:
+            old, self._view = self._view, self._load()
+            old.close()
+            index = self._view.index
+            paths = self.asset_paths()
+            fresh: Dict[str, List[bytes]] = {}
+            changed = set(index) - set(paths)
+            for path in paths:
+                state = self._check(path, index.get(path))
+                if state == "valid":
+                    continue
+                if state == "touched":
+                    # 只有修改时间变化，内容相同，写入时更新修改时间
+                    changed.add(path)
+                    continue
+                try:
+                    fresh[path] = encode_asset(path)
+                    encoded += 1
+                    changed.add(path)
+                except Exception as e:
+                    logger.bind(tag=TAG).error(f"预编码音频资源失败 {path}: {e}")
+            if changed:
+                self._write(paths, fresh)
+        self.stats["encoded"] += encoded
+        return {
+            "total": len(self._view.index),
+            "encoded": encoded,
+            "elapsed_ms": int((time.monotonic() - start) * 1000),
+        }
+
+    def lookup(self, path: str) -> Optional[List[bytes]]:
+        """从资源包中取出资源的opus数据包列表，只做一次文件状态检查，不加锁，可在事件循环中调用
+
+        Returns:
+            数据包列表；不在资源包中、源文件修改时间变化或资源包正在更新时返回None，
+            由调用方在线程池中调用 get
+        """
+        if not self.enabled:
+            return None
+        path = _normalize(path)
+        view = self._view
+        entry = view.index.get(path)
+        if self._check(path, entry, verify=False) != "valid":
+            return None
+        packets = view.packets.get(path)
+        if packets is None:
+            try:
+                packets = view.read_packets(entry)
+            except ValueError:
+                # 快照已被替换，内存映射已关闭
+                return None
+            view.packets[path] = packets
+        self.stats["hits"] += 1
+        return packets
+
+    def get(self, path: str) -> Optional[List[bytes]]:
+        """获取资源的opus数据包列表，源文件不在资源包中或已变化时重新编码，需在线程池中调用
+
+        Returns:
+            数据包列表；文件不存在或编码失败时返回None，由调用方按原流程处理
+        """
+        if not self.enabled:
+            return None
+        packets = self.lookup(path)
+        if packets is not None:
+            return packets
+        path = _normalize(path)
+        with self._lock:
+            # 等待正在进行的写入完成后再查一次
+            packets = self.lookup(path)
+            if packets is not None:
+                return packets
+            entry = self._view.index.get(path)
+            state = self._check(path, entry)
+            if state == "missing":
+                return None
+            if state == "touched":
+                self._touch(path, entry)
+                packets = self.lookup(path)
+                if packets is not None:
+                    return packets
+
+        # 编码不持有锁，其他资源的读取和写入不受影响
+        self.stats["misses"] += 1
+        try:
+            packets = encode_asset(path)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"预编码音频资源失败 {path}: {e}")
+            return None
+        self.stats["encoded"] += 1
+        # 运行中生成的新资源（如唤醒词回复）也写入资源包，重启后直接使用
+        with self._lock:
+            paths = sorted(set(self._view.index) | {path})
+            try:
+                self._write(paths, {path: packets})
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"写入音频资源包失败: {e}")
+        return packets
+
+    def _check(self, path: str, entry: Optional[Dict], verify: bool = True) -> str:
+        """valid: 未变化；touched: 仅修改时间变化；changed: 需要重新编码；missing: 文件不存在
+
+        verify 为False时不计算内容哈希，修改时间变化即返回changed
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return "missing"
+        if entry is None or entry["size"] != stat.st_size:
+            return "changed"
+        if entry["mtime_ns"] == stat.st_mtime_ns:
+            return "valid"
+        if not verify:
+            return "changed"
+        try:
+            if _file_sha1(path) != entry["sha1"]:
+                return "changed"
+        except OSError:
+            return "missing"
+        return "touched"
+
+    def _touch(self, path: str, entry: Dict):
+        """源文件内容未变只有修改时间变化，发布更新了修改时间的索引，调用方需持有 self._lock"""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        view = self._view
+        index = dict(view.index)
+        index[path] = {**entry, "mtime_ns": mtime_ns}
+        # 与原快照共用内存映射，原快照不关闭
+        self._view = _BundleView(view.file, view.mmap, index, view.packets)
+
+    def _load(self) -> _BundleView:
+        """读取资源包索引并建立内存映射，资源包不存在或格式不符时视为空"""
+        if not os.path.isfile(self.bundle_path):
+            return _BundleView()
+        try:
+            f = open(self.bundle_path, "rb")
+        except OSError as e:
+            logger.bind(tag=TAG).warning(f"打开音频资源包失败，将重新生成: {e}")
+            return _BundleView()
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            f.close()
+            logger.bind(tag=TAG).warning(f"打开音频资源包失败，将重新生成: {e}")
+            return _BundleView()
+        index = {}
+        try:
+            if mapped[: len(MAGIC)] != MAGIC:
+                raise ValueError("文件头不匹配")
+            start = len(MAGIC) + HEADER.size
+            (index_len,) = HEADER.unpack_from(mapped, len(MAGIC))
+            data = json.loads(mapped[start : start + index_len].decode("utf-8"))
+            if data.get("version") != FORMAT_VERSION:
+                raise ValueError("版本不匹配")
+            data_start = start + index_len
+            for path, entry in data["assets"].items():
+                entry["offset"] += data_start
+                index[path] = entry
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"音频资源包无效，将重新生成: {e}")
+            mapped.close()
+            f.close()
+            return _BundleView()
+        return _BundleView(f, mapped, index)
+
+    def _write(self, paths: List[str], fresh: Dict[str, List[bytes]]):
+        """把 paths 中的资源写入新的资源包并替换快照，fresh 为新编码的资源，调用方需持有 self._lock"""
+        view = self._view
+        assets = {}
+        chunks = []
+        offset = 0
+        for path in paths:
+            packets = fresh.get(path)
+            entry = view.index.get(path)
+            if packets is None:
+                if entry is None:
+                    continue
+                packets = view.packets.get(path) or view.read_packets(entry)
+            try:
+                stat = os.stat(path)
+                if (
+                    path not in fresh
+                    and entry["size"] == stat.st_size
+                    and entry["mtime_ns"] == stat.st_mtime_ns
+                ):
+                    # 未变化的资源沿用索引中的哈希
+                    sha1 = entry["sha1"]
+                else:
+                    sha1 = _file_sha1(path)
+            except OSError:
+                continue
+            lengths = array.array("H", (len(p) for p in packets))
+            if sys.byteorder != "little":
+                lengths.byteswap()
+            chunks.append(lengths.tobytes())
+            chunks.extend(packets)
+            assets[path] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha1": sha1,
+                "offset": offset,
+                "count": len(packets),
+            }
+            offset += len(packets) * 2 + sum(len(p) for p in packets)
+        index = json.dumps(
+            {"version": FORMAT_VERSION, "assets": assets}, ensure_ascii=False
+        ).encode("utf-8")
+
+        directory = os.path.dirname(self.bundle_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.bundle_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(HEADER.pack(len(index)))
+            f.write(index)
+            for chunk in chunks:
+                f.write(chunk)
+        # 已取出的数据包是独立的bytes，关闭映射不影响正在播放的音频
+        if os.name == "nt":
+            # Windows 下被映射的文件不能替换，先关闭原快照
+            view.close()
+        os.replace(tmp_path, self.bundle_path)
+        self._view = self._load()
+        view.close()
+        self.stats["rebuilds"] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = dict(self.stats)
+        stats["assets"] = len(self._view.index)
+        return stats
+
+    def close(self):
+        with self._lock:
+            view, self._view = self._view, _BundleView()
+            view.close()
+
+
+_bundle: Optional[AudioAssetBundle] = None
+_bundle_lock = threading.Lock()
+
+
+def get_audio_asset_bundle() -> AudioAssetBundle:
+    """获取全局音频资源包（单例模式）"""
+    global _bundle
+    if _bundle is not None:
+        return _bundle
+    with _bundle_lock:
+        if _bundle is None:
+            from config.config_loader import load_config
+
+            config = load_config()
+            bundle = AudioAssetBundle(config.get("audio_assets"))
+            stop_voice = config.get("stop_tts_notify_voice")
+            if stop_voice:
+                bundle.extra_paths.append(stop_voice)
+            _bundle = bundle
+    return _bundle
+
+
+if __name__ == "__main__":
+    # 构建资源包：python -m core.utils.audio_assets
+    result = get_audio_asset_bundle().build()
+    print(
+        f"音频资源包已生成: {result['total']} 个资源，重新编码 {result['encoded']} 个，"
+        f"耗时 {result['elapsed_ms']}ms"
+    )
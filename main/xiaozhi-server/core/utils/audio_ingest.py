@@ -0,0 +1,207 @@
+"""
+连接的上行音频接收缓冲
+
+设备上行的每个opus包只解码一次，解码得到的PCM同时供VAD和ASR使用：
+- VAD：PCM写入预分配的环形缓冲区，按512采样点分帧时直接返回 memoryview，
+  不再对 bytearray 切片（每取一帧都要复制剩余数据）
+- ASR：conn.asr_audio 为 AudioPacketBuffer，按顺序保存音频包及其PCM；静音期间只保留
+  最近的预录包，通过起始偏移丢弃旧包，不再每个包都复制列表
+- 语音结束时取出的包列表附带PCM，decode_opus 和声纹识别直接复用，不再重新解码
+"""
+
+import ctypes
+import itertools
+from typing import Dict, Iterator, List, Optional
+
+import opuslib_next
+from opuslib_next.api import c_int16_pointer
+from opuslib_next.api import decoder as opus_decoder_api
+
+from config.logger import setup_logging
+from core.utils.opus_encoder_utils import PcmRingBuffer
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+# opus 单包最长 120ms
+MAX_FRAME_SAMPLES = SAMPLE_RATE * 120 // 1000
+# VAD 模型每次输入512个采样点（1024字节）
+VAD_FRAME_BYTES = 512 * 2
+# 可容纳两个最长的包，正常情况下不会扩容
+VAD_RING_BYTES = MAX_FRAME_SAMPLES * 2 * 2
+# 丢弃的旧包积累到该数量后才整体前移列表
+COMPACT_THRESHOLD = 64
+
+DEFAULT_OPTIONS = {
+    # 静音期间保留的预录包数，语音开始时一并送入ASR，避免丢失句首
+    "preroll_packets": 10,
+    # 单句缓存的最长音频（秒），超过后丢弃最早的音频；0表示不限制
+    "max_utterance_seconds": 120,
+}
+
+
+class AudioPacketList(list):
+    """语音结束时取出的音频包列表，pcm 为对应的PCM列表，有包未解码时为None"""
+
+    __slots__ = ("pcm",)
+
+    def __init__(self, packets=(), pcm: Optional[List[bytes]] = None):
+        super().__init__(packets)
+        self.pcm = pcm
+
+
+class AudioPacketBuffer:
+    """单个连接的ASR音频缓存（conn.asr_audio），只在事件循环线程中使用
+
+    兼容原列表的用法：append、clear、copy、len、迭代和下标访问
+    """
+
+    def __init__(self, preroll_packets: int = 10, max_packets: int = 0):
+        self.preroll_packets = preroll_packets
+        self.max_packets = max_packets
+        self._packets: List[bytes] = []
+        self._pcm: List[Optional[bytes]] = []
+        self._start = 0
+        self._overflow_logged = False
+
+    def __len__(self) -> int:
+        return len(self._packets) - self._start
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        return itertools.islice(self._packets, self._start, None)
+
+    def __getitem__(self, index):
+        indices = range(self._start, len(self._packets))[index]
+        if isinstance(indices, range):
+            return [self._packets[i] for i in indices]
+        return self._packets[indices]
+
+    def append(self, packet: bytes, pcm: Optional[bytes] = None):
+        """追加一个音频包，pcm 为VAD已解码的PCM"""
+        self._packets.append(packet)
+        self._pcm.append(pcm)
+        if self.max_packets and len(self) > self.max_packets:
+            self._start += 1
+            if not self._overflow_logged:
+                self._overflow_logged = True
+                logger.bind(tag=TAG).warning(
+                    f"单句音频超过 {self.max_packets} 个包，丢弃最早的音频"
+                )
+            self._compact()
+
+    def keep_last(self, count: int):
+        """只保留最近的 count 个包"""
+        if len(self) > count:
+            self._start = len(self._packets) - count
+            self._compact()
+
+    def keep_preroll(self):
+        """静音期间只保留预录包"""
+        self.keep_last(self.preroll_packets)
+
+    def clear(self):
+        self._packets.clear()
+        self._pcm.clear()
+        self._start = 0
+        self._overflow_logged = False
+
+    def copy(self) -> AudioPacketList:
+        """返回当前缓存的快照，所有包都有PCM时附带PCM列表"""
+        pcm = self._pcm[self._start :]
+        if None in pcm:
+            pcm = None
+        return AudioPacketList(itertools.islice(self._packets, self._start, None), pcm)
+
+    def take(self) -> AudioPacketList:
+        """取出当前缓存并清空"""
+        snapshot = self.copy()
+        self.clear()
+        return snapshot
+
+    def _compact(self):
+        if self._start >= COMPACT_THRESHOLD:
+            del self._packets[: self._start]
+            del self._pcm[: self._start]
+            self._start = 0
+
+
+class AudioIngest:
+    """单个连接的上行音频解码与VAD分帧，只在事件循环线程中使用"""
+
+    def __init__(self, options: Optional[Dict] = None):
+        options = {**DEFAULT_OPTIONS, **{k: v for k, v in (options or {}).items() if v is not None}}
+        self.preroll_packets = int(options["preroll_packets"])
+        # 按60ms一帧估算包数
+        self.max_packets = int(float(options["max_utterance_seconds"]) * 1000 / 60)
+        self.vad_ring = PcmRingBuffer(VAD_RING_BYTES, VAD_FRAME_BYTES)
+        self._decoder: Optional[opuslib_next.Decoder] = None
+        self._pcm_out = None
+        self._last_packet = None
+        self._last_pcm: Optional[bytes] = None
+        self.stats = {"decoded": 0, "frames": 0}
+
+    def create_packet_buffer(self) -> AudioPacketBuffer:
+        return AudioPacketBuffer(self.preroll_packets, self.max_packets)
+
+    def decode(self, packet: bytes, audio_format: str = "opus") -> bytes:
+        """解码一个上行包，同一个包只解码一次
+
+        Raises:
+            opuslib_next.OpusError: 解码失败
+        """
+        if packet is self._last_packet:
+            return self._last_pcm
+        if audio_format == "pcm":
+            pcm = packet
+        else:
+            pcm = self._decode_opus(packet)
+            self.stats["decoded"] += 1
+        self._last_packet = packet
+        self._last_pcm = pcm
+        return pcm
+
+    def pcm_for(self, packet: bytes) -> Optional[bytes]:
+        """返回该包已解码的PCM，未经VAD解码时返回None"""
+        if packet is self._last_packet:
+            return self._last_pcm
+        return None
+
+    def feed_vad(self, packet: bytes, audio_format: str = "opus"):
+        """解码上行包并写入VAD环形缓冲区"""
+        self.vad_ring.write(self.decode(packet, audio_format))
+
+    def vad_frames(self) -> Iterator[memoryview]:
+        """依次返回缓冲区中完整的VAD帧，返回的视图在取下一帧前有效"""
+        ring = self.vad_ring
+        while len(ring) >= VAD_FRAME_BYTES:
+            frame = ring.peek_frame()
+            self.stats["frames"] += 1
+            yield frame
+            # 等待推理期间 reset_vad 可能已清空缓冲区
+            if len(ring) >= VAD_FRAME_BYTES:
+                ring.consume_frame()
+
+    def reset_vad(self):
+        """丢弃缓冲区中尚未检测的VAD数据（解码器状态保持不变）"""
+        self.vad_ring.clear()
+
+    def _decode_opus(self, packet: bytes) -> bytes:
+        if self._decoder is None:
+            self._decoder = opuslib_next.Decoder(SAMPLE_RATE, 1)
+            self._pcm_out = (ctypes.c_int16 * MAX_FRAME_SAMPLES)()
+        # 解码到预分配的缓冲区，只为结果分配一次bytes
+        result = opus_decoder_api.libopus_decode(
+            self._decoder.decoder_state,
+            packet,
+            len(packet),
+            ctypes.cast(self._pcm_out, c_int16_pointer),
+            MAX_FRAME_SAMPLES,
+            0,
+        )
+        if result < 0:
+            raise opuslib_next.OpusError(result)
+        return bytes(memoryview(self._pcm_out).cast("B")[: result * 2])
@@ -0,0 +1,237 @@
+"""
+全局音频发送节拍调度器
+
+所有连接的音频流控共用一个调度任务，不再每个连接每帧 asyncio.sleep 一次：
+- 待发送的连接按到期时间挂在分层时间轮上，调度任务按固定节拍推进时间轮，
+  每个节拍为到期的连接各创建一个发送任务，在同一轮事件循环中发出
+- 有连接在播放时每秒只有 1000/tick_ms 次定时唤醒，与连接数无关；没有待发送数据时不唤醒
+- 统计每帧实际发出时间相对计划播放时间的延迟，通过 /metrics 暴露
+"""
+
+import time
+import asyncio
+import threading
+from typing import Dict, List, Optional
+from config.logger import setup_logging
+from core.utils.metrics import REGISTRY, Histogram, GaugeFunc
+
+TAG = __name__
+logger = setup_logging()
+
+# 调度节拍（毫秒），帧按不早于计划时间、不晚于一个节拍的精度发出
+DEFAULT_TICK_MS = 5
+# 每层时间轮的槽数（2的幂）
+WHEEL_BITS = 6
+WHEEL_SIZE = 1 << WHEEL_BITS
+WHEEL_MASK = WHEEL_SIZE - 1
+WHEEL_LEVELS = 3
+# 浮点误差容限（秒），避免恰好落在节拍上的时间被算到下一个节拍
+TIME_EPSILON = 1e-6
+
+# 发送延迟分桶（秒）
+SEND_LAG_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+SEND_LAG_SECONDS = REGISTRY.register(
+    Histogram(
+        "xiaozhi_audio_send_lag_seconds",
+        "音频帧实际发出时间相对计划播放时间的延迟",
+        buckets=SEND_LAG_BUCKETS,
+    )
+)
+
+
+class TimerWheel:
+    """分层时间轮
+
+    以节拍数计时，第0层每槽1个节拍，上一层每槽是下一层一整圈；
+    第0层转满一圈时把上一层当前槽的条目按剩余时间重新分配到下层。
+    条目插入和到期都是 O(1)，适合大量周期很短、频繁重新挂载的定时任务
+    """
+
+    def __init__(self, levels: int = WHEEL_LEVELS):
+        self.levels = levels
+        self.current_tick = 0
+        self._slots: List[List[List]] = [
+            [[] for _ in range(WHEEL_SIZE)] for _ in range(levels)
+        ]
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def schedule(self, due_tick: int, item) -> None:
+        """挂载条目，到期节拍不晚于当前节拍时在下一次推进时到期"""
+        if due_tick <= self.current_tick:
+            due_tick = self.current_tick + 1
+        self._place(due_tick, (due_tick, item))
+        self._count += 1
+
+    def _place(self, due_tick: int, entry) -> None:
+        delta = due_tick - self.current_tick
+        for level in range(self.levels):
+            if delta < (1 << (WHEEL_BITS * (level + 1))) or level == self.levels - 1:
+                slot = (due_tick >> (WHEEL_BITS * level)) & WHEEL_MASK
+                self._slots[level][slot].append(entry)
+                return
+
+    def advance(self, target_tick: int, expired: List) -> None:
+        """推进到 target_tick，把到期条目追加到 expired"""
+        if self._count == 0:
+            # 没有条目时直接跳到目标节拍
+            self.current_tick = max(self.current_tick, target_tick)
+            return
+        while self.current_tick < target_tick:
+            self.current_tick += 1
+            tick = self.current_tick
+            # 低层转满一圈，从高层向低层逐级展开
+            for level in range(1, self.levels):
+                if tick & ((1 << (WHEEL_BITS * level)) - 1):
+                    break
+                slot = (tick >> (WHEEL_BITS * level)) & WHEEL_MASK
+                entries = self._slots[level][slot]
+                if entries:
+                    self._slots[level][slot] = []
+                    for entry in entries:
+                        if entry[0] <= tick:
+                            self._slots[0][tick & WHEEL_MASK].append(entry)
+                        else:
+                            self._place(entry[0], entry)
+            slot = tick & WHEEL_MASK
+            entries = self._slots[0][slot]
+            if entries:
+                self._slots[0][slot] = []
+                for entry in entries:
+                    if entry[0] <= tick:
+                        expired.append(entry[1])
+                        self._count -= 1
+                    else:
+                        # 最高层超出范围的条目，继续挂载
+                        self._place(entry[0], entry)
+            if self._count == 0:
+                self.current_tick = target_tick
+                return
+
+
+class AudioPacingScheduler:
+    """所有连接共用的音频发送调度器，必须在事件循环线程中使用"""
+
+    def __init__(self, tick_ms: int = DEFAULT_TICK_MS):
+        self.tick_ms = tick_ms
+        self.tick_seconds = tick_ms / 1000
+        self.wheel = TimerWheel()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._epoch = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats = {
+            "ticks": 0,
+            "frames": 0,
+            "lag_sum": 0.0,
+            "lag_max": 0.0,
+        }
+
+    def tick_of(self, timestamp: float) -> int:
+        """时间戳对应的节拍，向上取整保证帧不会提前发出"""
+        return -int((self._epoch - timestamp + TIME_EPSILON) // self.tick_seconds)
+
+    def schedule(self, controller, due_time: float) -> None:
+        """在 due_time（time.monotonic）之后处理该连接的发送队列"""
+        self._ensure_running()
+        if not len(self.wheel):
+            # 时间轮空闲期间没有推进，先对齐到当前节拍
+            self.wheel.advance(int((time.monotonic() - self._epoch) // self.tick_seconds), [])
+        self.wheel.schedule(self.tick_of(due_time), (controller, controller.generation))
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self.loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = self.loop.create_task(self._run())
+
+    async def _run(self):
+        expired = []
+        try:
+            while True:
+                if not len(self.wheel):
+                    # 没有待发送的连接，等待新的挂载
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                else:
+                    next_time = self._epoch + (self.wheel.current_tick + 1) * self.tick_seconds
+                    delay = next_time - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                # 推进到已经过去的最后一个节拍
+                self.wheel.advance(
+                    int((time.monotonic() - self._epoch) // self.tick_seconds), expired
+                )
+                self.stats["ticks"] += 1
+                if expired:
+                    # 以节拍时间作为发送时间，新开始播放的连接对齐到节拍上
+                    tick_time = self._epoch + self.wheel.current_tick * self.tick_seconds
+                    batch, expired = expired, []
+                    for controller, generation in batch:
+                        if controller.generation == generation:
+                            self._dispatch(controller, tick_time)
+        except asyncio.CancelledError:
+            logger.bind(tag=TAG).debug("音频发送调度任务已停止")
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"音频发送调度任务异常: {e}")
+
+    def _dispatch(self, controller, now: float):
+        """处理一个连接的到期数据
+
+        每个连接的发送在独立任务中执行：发送路径中依赖 asyncio.current_task() 的逻辑
+        （如 websockets 关闭连接时的超时）只会影响该连接，不会取消调度任务
+        """
+        controller.set_send_task(self.loop.create_task(controller.send_due(now)))
+
+    def record_lag(self, lag: float):
+        stats = self.stats
+        stats["frames"] += 1
+        stats["lag_sum"] += lag
+        if lag > stats["lag_max"]:
+            stats["lag_max"] = lag
+        SEND_LAG_SECONDS.observe(lag)
+
+    def get_stats(self) -> Dict[str, float]:
+        stats = dict(self.stats)
+        lag_sum = stats.pop("lag_sum")
+        stats["lag_avg"] = lag_sum / stats["frames"] if stats["frames"] else 0.0
+        stats["pending"] = len(self.wheel)
+        return stats
+
+    def close(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+
+_scheduler: Optional[AudioPacingScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_audio_pacing_scheduler() -> AudioPacingScheduler:
+    """获取全局音频发送调度器（单例模式）"""
+    global _scheduler
+    if _scheduler is not None:
+        return _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            from config.config_loader import load_config
+
+            options = load_config().get("audio_pacing") or {}
+            _scheduler = AudioPacingScheduler(
+                int(options.get("tick_ms") or DEFAULT_TICK_MS)
+            )
+    return _scheduler
+
+
+REGISTRY.register(
+    GaugeFunc(
+        "xiaozhi_audio_pacing_pending",
+        "等待发送音频的连接数",
+        lambda: len(_scheduler.wheel) if _scheduler else 0,
+    )
+)
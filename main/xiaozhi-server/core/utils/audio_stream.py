@@ -0,0 +1,388 @@
+"""
+TTS音频的增量解码
+
+旧实现等TTS返回完整音频后，再由 pydub 整段解码（mp3 需要启动 ffmpeg 子进程）、整段重采样，
+之后才能编码出第一个opus帧。这里改为边接收边处理：
+1. wav/pcm 在进程内解析，mp3 使用 PyAV（libavcodec）在进程内解码，不启动子进程
+2. 分块重采样为 16kHz 单声道，攒够 60ms 即编码输出一帧
+3. 其他格式或未安装 PyAV 时，收齐数据后回退到 pydub 解码
+"""
+
+import struct
+from io import BytesIO
+from typing import Callable, Optional
+
+import numpy as np
+
+from config.logger import setup_logging
+from core.utils.opus_encoder_utils import OpusEncoderUtils
+
+TAG = __name__
+logger = setup_logging()
+
+try:
+    import av
+except ImportError:
+    av = None
+
+TARGET_SAMPLE_RATE = 16000
+FRAME_DURATION = 60  # ms
+FRAME_SIZE = TARGET_SAMPLE_RATE * FRAME_DURATION // 1000  # 960 samples/frame
+FRAME_BYTES = FRAME_SIZE * 2
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+_fallback_warned = False
+
+
+class FrameWriter:
+    """把16kHz单声道16位PCM切成60ms帧，按需编码为opus后回调"""
+
+    def __init__(self, is_opus: bool, callback: Callable[[bytes], None]):
+        self.callback = callback
+        # 与旧实现一致，使用 libopus 默认的编码参数
+        self.encoder = (
+            OpusEncoderUtils(
+                TARGET_SAMPLE_RATE,
+                1,
+                FRAME_DURATION,
+                bitrate=None,
+                complexity=None,
+                signal=None,
+            )
+            if is_opus
+            else None
+        )
+        self._buffer = bytearray()
+        self.frame_count = 0
+
+    def write(self, pcm: bytes):
+        if self.encoder is not None:
+            self.encoder.encode_pcm_to_opus_stream(pcm, False, self._emit)
+            return
+        self._buffer.extend(pcm)
+        offset = 0
+        while len(self._buffer) - offset >= FRAME_BYTES:
+            self._emit(bytes(self._buffer[offset : offset + FRAME_BYTES]))
+            offset += FRAME_BYTES
+        if offset:
+            del self._buffer[:offset]
+
+    def flush(self):
+        """最后不足一帧的数据补零输出"""
+        if self.encoder is not None:
+            self.encoder.encode_pcm_to_opus_stream(b"", True, self._emit)
+            return
+        if self._buffer:
+            frame = bytes(self._buffer) + b"\x00" * (FRAME_BYTES - len(self._buffer))
+            self._buffer.clear()
+            self._emit(frame)
+
+    def _emit(self, frame: bytes):
+        self.frame_count += 1
+        self.callback(frame)
+
+
+class LinearResampler:
+    """分块线性插值重采样，块与块之间保持插值位置连续"""
+
+    def __init__(self, src_rate: int, dst_rate: int = TARGET_SAMPLE_RATE):
+        self.step = src_rate / dst_rate
+        self.passthrough = src_rate == dst_rate
+        # 下一个输出采样点相对当前块起点的位置
+        self._pos = 0.0
+        self._tail: Optional[np.ndarray] = None
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if self.passthrough or samples.size == 0:
+            return samples
+        if self._tail is not None:
+            samples = np.concatenate((self._tail, samples))
+        last = samples.size - 1
+        if last < 1 or self._pos > last:
+            self._tail = samples
+            return samples[:0]
+        positions = np.arange(self._pos, last, self.step)
+        output = np.interp(positions, np.arange(samples.size), samples)
+        next_pos = self._pos + positions.size * self.step
+        # 保留最后一个采样点，与下一块衔接
+        self._tail = samples[last:]
+        self._pos = next_pos - last
+        return output.astype(np.float32)
+
+
+class _PcmDecoder:
+    """原始PCM/WAV数据部分：按采样格式转换为浮点单声道"""
+
+    def __init__(self, sample_rate: int, channels: int, sample_width: int, is_float=False):
+        self.channels = max(1, channels)
+        self.sample_width = sample_width
+        self.is_float = is_float
+        self.block_align = self.sample_width * self.channels
+        self.resampler = LinearResampler(sample_rate)
+        self._remainder = b""
+        if sample_width not in (1, 2, 3, 4):
+            raise ValueError(f"不支持的采样位宽: {sample_width * 8}bit")
+
+    def decode(self, data: bytes) -> np.ndarray:
+        if self._remainder:
+            data = self._remainder + data
+        usable = len(data) - len(data) % self.block_align
+        self._remainder = data[usable:]
+        if not usable:
+            return np.zeros(0, dtype=np.float32)
+        raw = data[:usable]
+        if self.sample_width == 2 and self.channels == 1 and self.resampler.passthrough:
+            return np.frombuffer(raw, dtype="<i2")
+        if self.sample_width == 1:
+            samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+        elif self.sample_width == 2:
+            samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+        elif self.sample_width == 3:
+            bytes3 = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+            values = bytes3[:, 0] | (bytes3[:, 1] << 8) | (bytes3[:, 2] << 16)
+            values = np.where(values >= 1 << 23, values - (1 << 24), values)
+            samples = values.astype(np.float32) / (1 << 23)
+        elif self.is_float:
+            samples = np.frombuffer(raw, dtype="<f4").astype(np.float32)
+        else:
+            samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / (1 << 31)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+        return self.resampler.process(samples)
+
+
+class _WavParser:
+    """增量解析WAV头，找到data块后其余数据按PCM处理"""
+
+    def __init__(self):
+        self._header = bytearray()
+        self.pcm: Optional[_PcmDecoder] = None
+        # data块剩余字节数，None 表示流式wav未给出有效长度
+        self._data_left: Optional[int] = None
+
+    def buffered(self) -> bytes:
+        """尚未解析出data块时已接收的数据"""
+        return bytes(self._header)
+
+    def decode(self, data: bytes) -> np.ndarray:
+        if self.pcm is None:
+            self._header.extend(data)
+            data = self._parse_header()
+            if self.pcm is None:
+                return np.zeros(0, dtype=np.float32)
+        if self._data_left is not None:
+            data = data[: self._data_left]
+            self._data_left -= len(data)
+        return self.pcm.decode(data)
+
+    def _parse_header(self) -> bytes:
+        header = self._header
+        if len(header) < 12:
+            return b""
+        if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            raise ValueError("无效的WAV数据")
+        offset = 12
+        fmt = None
+        while len(header) >= offset + 8:
+            chunk_id = bytes(header[offset : offset + 4])
+            chunk_size = struct.unpack_from("<I", header, offset + 4)[0]
+            body = offset + 8
+            if chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError("WAV缺少fmt块")
+                self.pcm = _PcmDecoder(*fmt)
+                if 0 < chunk_size < 0xFFFFFFFF:
+                    self._data_left = chunk_size
+                remaining = bytes(header[body:])
+                self._header = bytearray()
+                return remaining
+            if len(header) < body + chunk_size:
+                return b""
+            if chunk_id == b"fmt ":
+                fmt = self._parse_fmt(bytes(header[body : body + chunk_size]))
+            # 块长度为奇数时有一个填充字节
+            offset = body + chunk_size + (chunk_size & 1)
+        return b""
+
+    @staticmethod
+    def _parse_fmt(fmt: bytes):
+        format_tag, channels, sample_rate = struct.unpack_from("<HHI", fmt, 0)
+        bits = struct.unpack_from("<H", fmt, 14)[0]
+        if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            format_tag = struct.unpack_from("<H", fmt, 24)[0]
+        if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+            raise ValueError(f"不支持的WAV编码: {format_tag}")
+        return sample_rate, channels, bits // 8, format_tag == WAVE_FORMAT_IEEE_FLOAT
+
+
+class _Mp3Decoder:
+    """使用 PyAV 在进程内增量解码mp3，并由 libswresample 重采样"""
+
+    def __init__(self, file_type: str):
+        self.codec = av.CodecContext.create(file_type, "r")
+        self.resampler = av.AudioResampler(
+            format="s16", layout="mono", rate=TARGET_SAMPLE_RATE
+        )
+        # 开头的 ID3 标签需要跳过，None 表示尚未判断
+        self._head: Optional[bytearray] = bytearray()
+        self._skip = 0
+
+    def _strip_id3(self, data: bytes) -> bytes:
+        if self._head is None:
+            return data
+        self._head.extend(data)
+        if len(self._head) < 10:
+            return b""
+        head = bytes(self._head)
+        self._head = None
+        if head[:3] == b"ID3":
+            size = 0
+            for byte in head[6:10]:
+                size = (size << 7) | (byte & 0x7F)
+            # 有 footer 时多10字节
+            self._skip = 10 + size + (10 if head[5] & 0x10 else 0)
+        return head
+
+    def _skip_tag(self, data: bytes) -> bytes:
+        if self._skip:
+            skipped = min(self._skip, len(data))
+            self._skip -= skipped
+            data = data[skipped:]
+        return data
+
+    def _resample(self, frames) -> np.ndarray:
+        outputs = []
+        for frame in frames:
+            for resampled in self.resampler.resample(frame):
+                outputs.append(resampled.to_ndarray().reshape(-1))
+        if not outputs:
+            return np.zeros(0, dtype=np.int16)
+        return np.concatenate(outputs)
+
+    def _decode_packet(self, packet):
+        try:
+            return self.codec.decode(packet)
+        except av.error.InvalidDataError:
+            # 与 ffmpeg 一致，跳过无法解码的数据
+            return []
+
+    def decode(self, data: Optional[bytes]) -> np.ndarray:
+        frames = []
+        if data is not None:
+            data = self._skip_tag(self._strip_id3(data))
+            if not data:
+                return np.zeros(0, dtype=np.int16)
+        for packet in self.codec.parse(data):
+            frames.extend(self._decode_packet(packet))
+        if data is None:
+            frames.extend(self._decode_packet(None))
+            frames.append(None)
+        return self._resample(frames)
+
+
+class AudioStreamDecoder:
+    """TTS音频流解码器：feed 接收的音频数据，攒够60ms即回调一帧opus/pcm
+
+    Args:
+        file_type: 音频格式，wav / pcm / mp3，其他格式回退到 pydub
+        is_opus: 是否编码为opus，否则输出16kHz单声道16位PCM帧
+        callback: 每帧的回调
+        sample_rate / channels: pcm 格式的采样率与声道数
+    """
+
+    def __init__(
+        self,
+        file_type: str,
+        is_opus: bool,
+        callback: Callable[[bytes], None],
+        sample_rate: int = TARGET_SAMPLE_RATE,
+        channels: int = 1,
+    ):
+        self.file_type = (file_type or "").lower()
+        self.is_opus = is_opus
+        self.writer = FrameWriter(is_opus, callback)
+        self._fallback_chunks = None
+        if self.file_type == "wav":
+            self._decoder = _WavParser()
+        elif self.file_type == "pcm":
+            self._decoder = _PcmDecoder(sample_rate, channels, 2)
+        elif self.file_type == "mp3" and av is not None:
+            self._decoder = _Mp3Decoder(self.file_type)
+        else:
+            self._decoder = None
+            self._fallback_chunks = []
+            _warn_fallback(self.file_type)
+
+    @property
+    def frame_count(self) -> int:
+        return self.writer.frame_count
+
+    def feed(self, data: bytes):
+        if not data:
+            return
+        if self._decoder is None:
+            self._fallback_chunks.append(data)
+            return
+        try:
+            samples = self._decoder.decode(data)
+        except ValueError as e:
+            # 压缩编码等无法直接解析的wav，收齐后交给 pydub
+            if not isinstance(self._decoder, _WavParser) or self._decoder.pcm is not None:
+                raise
+            logger.bind(tag=TAG).debug(f"WAV无法增量解析，回退到pydub: {e}")
+            self._fallback_chunks = [self._decoder.buffered()]
+            self._decoder = None
+            return
+        self._write(samples)
+
+    def finish(self):
+        """数据接收完毕，输出剩余的帧"""
+        if self._decoder is None:
+            self._decode_with_pydub(b"".join(self._fallback_chunks))
+            self._fallback_chunks = []
+        elif isinstance(self._decoder, _Mp3Decoder):
+            self._write(self._decoder.decode(None))
+        self.writer.flush()
+
+    def _write(self, samples: np.ndarray):
+        if samples.size == 0:
+            return
+        if samples.dtype != np.int16:
+            samples = np.clip(samples * 32768, -32768, 32767).astype("<i2")
+        self.writer.write(samples.tobytes())
+
+    def _decode_with_pydub(self, audio_bytes: bytes):
+        from pydub import AudioSegment
+
+        audio = AudioSegment.from_file(
+            BytesIO(audio_bytes), format=self.file_type, parameters=["-nostdin"]
+        )
+        audio = audio.set_channels(1).set_frame_rate(TARGET_SAMPLE_RATE).set_sample_width(2)
+        self.writer.write(audio.raw_data)
+
+
+def _warn_fallback(file_type: str):
+    global _fallback_warned
+    if _fallback_warned:
+        return
+    _fallback_warned = True
+    if file_type == "mp3":
+        logger.bind(tag=TAG).warning(
+            "未安装 PyAV，mp3 音频将在接收完整后使用 ffmpeg 解码，安装 av 包可降低首帧延迟"
+        )
+    else:
+        logger.bind(tag=TAG).info(f"{file_type} 格式不支持增量解码，将在接收完整后解码")
+
+
+def decode_audio_stream(
+    chunks, file_type: str, is_opus: bool, callback: Callable[[bytes], None], **kwargs
+) -> int:
+    """解码音频数据块序列，返回输出的帧数"""
+    decoder = AudioStreamDecoder(file_type, is_opus, callback, **kwargs)
+    for chunk in chunks:
+        decoder.feed(chunk)
+    decoder.finish()
+    return decoder.frame_count
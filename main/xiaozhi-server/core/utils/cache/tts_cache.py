@@ -0,0 +1,286 @@
+"""
+TTS句子级音频缓存
+
+以 TTS提供方参数 + 规范化文本 的哈希作为内容地址，缓存最终下发的60ms opus帧：
+- 内存层：按字节数限制的LRU
+- 磁盘层：跨重启保留，按字节数限制，超出时淘汰最久未使用的条目；默认关闭，
+  开启后合成的音频会落盘，与 delete_audio 配置无关
+"""
+
+import os
+import re
+import json
+import struct
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional
+
+TAG = __name__
+
+# 每帧长度前缀（2字节大端）
+_FRAME_HEADER = struct.Struct(">H")
+_FILE_SUFFIX = ".opus"
+_WHITESPACE = re.compile(r"\s+")
+
+
+class TTSAudioCache:
+    """内存LRU + 磁盘两级的TTS音频缓存"""
+
+    def __init__(
+        self,
+        memory_max_bytes: int,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 0,
+        max_text_length: int = 64,
+    ):
+        self._logger = None
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_dir = disk_dir if disk_dir and disk_max_bytes > 0 else None
+        self.disk_max_bytes = disk_max_bytes
+        self.max_text_length = max_text_length
+
+        self._lock = threading.RLock()
+        self._memory: "OrderedDict[str, List[bytes]]" = OrderedDict()
+        self._memory_sizes = {}
+        self._memory_bytes = 0
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+
+        self._stats = {
+            "lookups": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "bytes_served": 0,
+        }
+
+        if self.disk_dir:
+            self._load_disk_index()
+
+    @property
+    def logger(self):
+        """延迟初始化 logger 以避免循环导入"""
+        if self._logger is None:
+            from config.logger import setup_logging
+
+            self._logger = setup_logging()
+        return self._logger
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """规范化文本：统一全半角、合并空白"""
+        text = unicodedata.normalize("NFKC", text)
+        return _WHITESPACE.sub(" ", text).strip()
+
+    def make_key(self, fingerprint: str, text: str) -> Optional[str]:
+        """生成缓存键，文本为空或超过长度限制时返回None（不缓存）"""
+        text = self.normalize_text(text)
+        if not text:
+            return None
+        if self.max_text_length > 0 and len(text) > self.max_text_length:
+            return None
+        return hashlib.sha1(f"{fingerprint}\x00{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _pack(frames: List[bytes]) -> bytes:
+        return b"".join(_FRAME_HEADER.pack(len(frame)) + frame for frame in frames)
+
+    @staticmethod
+    def _unpack(data: bytes) -> List[bytes]:
+        frames = []
+        offset = 0
+        view = memoryview(data)
+        while offset + _FRAME_HEADER.size <= len(data):
+            (length,) = _FRAME_HEADER.unpack_from(data, offset)
+            offset += _FRAME_HEADER.size
+            frames.append(bytes(view[offset : offset + length]))
+            offset += length
+        return frames
+
+    @staticmethod
+    def _frames_size(frames: List[bytes]) -> int:
+        return sum(len(frame) + _FRAME_HEADER.size for frame in frames)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + _FILE_SUFFIX)
+
+    def _load_disk_index(self):
+        """启动时扫描磁盘缓存目录，按修改时间建立LRU索引"""
+        entries = []
+        os.makedirs(self.disk_dir, exist_ok=True)
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith(_FILE_SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name[: -len(_FILE_SUFFIX)], stat.st_size))
+        entries.sort()
+        for _, key, size in entries:
+            self._disk_index[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def get(self, key: str) -> Optional[List[bytes]]:
+        """读取缓存的opus帧列表，未命中返回None"""
+        with self._lock:
+            self._stats["lookups"] += 1
+            frames = self._memory.get(key)
+            if frames is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                self._stats["bytes_served"] += self._memory_sizes[key]
+                self._maybe_log_stats()
+                return frames
+
+            if self.disk_dir and key in self._disk_index:
+                try:
+                    with open(self._disk_path(key), "rb") as f:
+                        data = f.read()
+                    frames = self._unpack(data)
+                    self._disk_index.move_to_end(key)
+                    self._stats["disk_hits"] += 1
+                    self._stats["bytes_served"] += len(data)
+                    # 磁盘命中后提升到内存层
+                    self._put_memory(key, frames, len(data))
+                    self._maybe_log_stats()
+                    return frames
+                except OSError as e:
+                    self.logger.bind(tag=TAG).warning(f"读取TTS磁盘缓存失败: {e}")
+                    self._drop_disk(key)
+
+            self._stats["misses"] += 1
+            self._maybe_log_stats()
+            return None
+
+    def put(self, key: str, frames: List[bytes]):
+        """写入缓存"""
+        if not key or not frames:
+            return
+        data = self._pack(frames)
+        with self._lock:
+            self._stats["stores"] += 1
+            self._put_memory(key, list(frames), len(data))
+            if self.disk_dir and key not in self._disk_index:
+                self._put_disk(key, data)
+
+    def _put_memory(self, key: str, frames: List[bytes], size: int):
+        if size > self.memory_max_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= self._memory_sizes[key]
+            del self._memory[key]
+        self._memory[key] = frames
+        self._memory_sizes[key] = size
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_max_bytes and self._memory:
+            old_key, _ = self._memory.popitem(last=False)
+            self._memory_bytes -= self._memory_sizes.pop(old_key)
+            self._stats["evictions"] += 1
+
+    def _put_disk(self, key: str, data: bytes):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            # 原子替换，避免其他进程读到写了一半的文件
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.bind(tag=TAG).warning(f"写入TTS磁盘缓存失败: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._disk_index[key] = len(data)
+        self._disk_bytes += len(data)
+        self._evict_disk()
+
+    def _drop_disk(self, key: str):
+        size = self._disk_index.pop(key, None)
+        if size is None:
+            return
+        self._disk_bytes -= size
+        try:
+            os.remove(self._disk_path(key))
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.disk_max_bytes and self._disk_index:
+            old_key = next(iter(self._disk_index))
+            self._drop_disk(old_key)
+            self._stats["evictions"] += 1
+
+    def _maybe_log_stats(self):
+        if self._stats["lookups"] % 100 == 0:
+            stats = self.get_stats()
+            self.logger.bind(tag=TAG).info(
+                f"TTS缓存命中率: {stats['hit_ratio']:.1%}, "
+                f"累计命中字节: {stats['bytes_served']}, "
+                f"内存占用: {stats['memory_bytes']}, 磁盘占用: {stats['disk_bytes']}"
+            )
+
+    def get_stats(self) -> dict:
+        """获取缓存统计信息"""
+        with self._lock:
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            lookups = self._stats["lookups"]
+            return {
+                **self._stats,
+                "hits": hits,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk_index),
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+def build_fingerprint(provider: str, params: dict) -> str:
+    """根据TTS提供方名称与合成参数生成指纹"""
+    return provider + ":" + json.dumps(params, sort_keys=True, default=str)
+
+
+# 全局单例
+_tts_cache_instance = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> Optional[TTSAudioCache]:
+    """
+    获取全局TTS音频缓存实例（单例模式），未启用时返回None
+    """
+    global _tts_cache_instance
+    if _tts_cache_instance is not None:
+        return _tts_cache_instance or None
+
+    with _tts_cache_lock:
+        if _tts_cache_instance is None:
+            from config.config_loader import load_config
+
+            cache_config = load_config().get("tts_cache", {}) or {}
+            if not cache_config.get("enable", False):
+                # 用False标记“已检查但未启用”，避免重复读取配置
+                _tts_cache_instance = False
+            else:
+                _tts_cache_instance = TTSAudioCache(
+                    memory_max_bytes=int(cache_config.get("memory_max_mb", 64))
+                    * 1024
+                    * 1024,
+                    disk_dir=cache_config.get("disk_dir", "data/tts_cache"),
+                    disk_max_bytes=int(cache_config.get("disk_max_mb", 0))
+                    * 1024
+                    * 1024,
+                    max_text_length=int(cache_config.get("max_text_length", 64)),
+                )
+    return _tts_cache_instance or None
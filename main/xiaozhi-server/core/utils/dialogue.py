@@ -1,8 +1,42 @@
 import uuid
 import re
-from typing import List, Dict
+import threading
+from collections import deque
+from typing import List, Dict, Optional
 from datetime import datetime
 
+from config.logger import setup_logging
+from core.utils.token_budget import get_tokenizer, count_message_tokens
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_WINDOW_OPTIONS = {
+    # 是否按token预算截断上下文，默认关闭，每轮都发送完整的对话历史
+    "enabled": False,
+    # 发送给LLM的上下文（含系统提示词）的token上限
+    "max_prompt_tokens": 6000,
+    # 超出预算时移出早期对话，直到上下文降到预算的该比例；分批移出使上下文前缀
+    # 在多轮之间保持不变（利于服务端的前缀缓存），摘要也按批生成
+    "evict_to_ratio": 0.7,
+    # 无论预算多少，至少保留最近的对话轮数
+    "min_recent_turns": 4,
+    # 被移出上下文的对话是否在一轮对话结束后由LLM总结为摘要，会产生额外的LLM调用
+    "summary": False,
+    # 摘要的最大字数
+    "summary_max_chars": 300,
+    # 分词器配置，见 core/utils/token_budget.py
+    "tokenizer": {"type": "simple"},
+}
+
+SUMMARY_PROMPT = (
+    "你是对话摘要助手。请把已有摘要和新增的对话合并为一份新的摘要，"
+    "保留用户的身份、偏好、提到的事实和尚未完成的事项，省略寒暄。"
+    "只输出摘要正文，不超过{max_chars}字。"
+)
+
+SUMMARY_ROLE_NAMES = {"user": "用户", "assistant": "助手", "tool": "工具结果"}
+
 
 class Message:
     def __init__(
@@ -21,29 +55,181 @@ class Message:
 
 
 class Dialogue:
-    def __init__(self):
+    """对话历史
+
+    dialogue 保存完整的历史（记忆总结等使用）；发送给LLM的上下文由窗口维护：
+    - put 时只把新消息序列化并计数一次，追加到窗口末尾，不再每轮重建
+    - 构建上下文时若超出token预算，从最早的完整一轮（user消息开始）依次移出窗口，
+      至少保留 min_recent_turns 轮
+    - 移出的对话在一轮对话结束后由 summarize 在后台合并为滚动摘要，附加到系统提示词中，
+      摘要完成前只是被截断，不阻塞当前请求
+    """
+
+    def __init__(self, window_options: Optional[Dict] = None):
         self.dialogue: List[Message] = []
         # 获取当前时间
         self.current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+        options = dict(DEFAULT_WINDOW_OPTIONS)
+        options.update(
+            {k: v for k, v in (window_options or {}).items() if v is not None}
+        )
+        self.window_enabled = bool(options["enabled"])
+        self.max_prompt_tokens = int(options["max_prompt_tokens"])
+        self.evict_to_ratio = min(1.0, max(0.1, float(options["evict_to_ratio"])))
+        self.min_recent_turns = max(1, int(options["min_recent_turns"]))
+        self.summary_enabled = bool(options["summary"])
+        self.summary_max_chars = int(options["summary_max_chars"])
+        self.tokenizer = get_tokenizer(options["tokenizer"])
+
+        # 窗口：(消息id, 序列化后的消息, token数)
+        self._window: deque = deque()
+        self._window_tokens = 0
+        self._window_turns = 0
+        # 窗口对应的 dialogue 列表及已同步的消息数，列表被整体替换或删改时重建窗口
+        self._synced_list: Optional[List[Message]] = None
+        self._synced_count = 0
+        # 已移出窗口的消息id，重建窗口时跳过
+        self._evicted_ids = set()
+
+        # 滚动摘要及等待总结的消息
+        self.summary = ""
+        self._pending_summary: List[Dict] = []
+        self._pending_tokens = 0
+        self._summarizing = False
+        self._lock = threading.Lock()
+        # 系统提示词通常每轮相同，缓存其token数
+        self._system_tokens_cache = ("", 0)
+
     def put(self, message: Message):
         self.dialogue.append(message)
+        if self._synced_list is self.dialogue and self._synced_count == len(self.dialogue) - 1:
+            self._append_to_window(message)
+            self._synced_count += 1
 
-    def getMessages(self, m, dialogue):
+    @staticmethod
+    def serialize(m: Message) -> Dict:
         if m.tool_calls is not None:
-            dialogue.append({"role": m.role, "tool_calls": m.tool_calls})
-        elif m.role == "tool":
-            dialogue.append(
-                {
-                    "role": m.role,
-                    "tool_call_id": (
-                        str(uuid.uuid4()) if m.tool_call_id is None else m.tool_call_id
-                    ),
-                    "content": m.content,
-                }
+            return {"role": m.role, "tool_calls": m.tool_calls}
+        if m.role == "tool":
+            return {
+                "role": m.role,
+                "tool_call_id": (
+                    str(uuid.uuid4()) if m.tool_call_id is None else m.tool_call_id
+                ),
+                "content": m.content,
+            }
+        return {"role": m.role, "content": m.content}
+
+    def getMessages(self, m, dialogue):
+        dialogue.append(self.serialize(m))
+
+    def _append_to_window(self, m: Message):
+        if m.role == "system" or m.uniq_id in self._evicted_ids:
+            return
+        message = self.serialize(m)
+        tokens = count_message_tokens(self.tokenizer, message)
+        self._window.append((m.uniq_id, message, tokens))
+        self._window_tokens += tokens
+        if m.role == "user":
+            self._window_turns += 1
+
+    def _sync_window(self):
+        """dialogue 列表只通过 put 追加时窗口已是最新；被替换或删改时按当前列表重建"""
+        if self._synced_list is self.dialogue and self._synced_count == len(self.dialogue):
+            return
+        self._window.clear()
+        self._window_tokens = 0
+        self._window_turns = 0
+        for m in self.dialogue:
+            self._append_to_window(m)
+        self._synced_list = self.dialogue
+        self._synced_count = len(self.dialogue)
+
+    def _fit_window(self, budget: int):
+        """超出预算时从最早的一轮开始移出窗口，直到降到预算的 evict_to_ratio"""
+        if self._window_tokens <= budget:
+            return
+        target = int(budget * self.evict_to_ratio)
+        while self._window_tokens > target and self._window_turns > self.min_recent_turns:
+            # 移出一整轮：第一条消息及其后直到下一条 user 消息之前的所有消息
+            evicted = [self._window.popleft()]
+            while self._window and self._window[0][1]["role"] != "user":
+                evicted.append(self._window.popleft())
+            if evicted[0][1]["role"] == "user":
+                self._window_turns -= 1
+            for message_id, message, tokens in evicted:
+                self._window_tokens -= tokens
+                self._evicted_ids.add(message_id)
+            if self.summary_enabled:
+                self._queue_for_summary(evicted)
+
+    def _queue_for_summary(self, evicted):
+        with self._lock:
+            for _, message, tokens in evicted:
+                self._pending_summary.append(message)
+                self._pending_tokens += tokens
+            # 摘要持续失败时只保留最近的待总结内容
+            while self._pending_tokens > self.max_prompt_tokens and self._pending_summary:
+                dropped = self._pending_summary.pop(0)
+                self._pending_tokens -= count_message_tokens(self.tokenizer, dropped)
+
+    def _count_system_tokens(self, dialogue: List[Dict]) -> int:
+        if not dialogue:
+            return 0
+        content = dialogue[0]["content"]
+        cached_content, cached_tokens = self._system_tokens_cache
+        if content != cached_content:
+            cached_tokens = count_message_tokens(self.tokenizer, dialogue[0])
+            self._system_tokens_cache = (content, cached_tokens)
+        return cached_tokens
+
+    def needs_summary(self) -> bool:
+        return bool(self._pending_summary) and not self._summarizing
+
+    def summarize(self, llm):
+        """把移出窗口的对话合并到滚动摘要中，在一轮对话结束后于线程池中调用"""
+        with self._lock:
+            if self._summarizing or not self._pending_summary or llm is None:
+                return
+            pending = list(self._pending_summary)
+            previous = self.summary
+            self._summarizing = True
+        try:
+            lines = []
+            for message in pending:
+                if message.get("tool_calls"):
+                    names = ",".join(
+                        tool_call.get("function", {}).get("name", "")
+                        for tool_call in message["tool_calls"]
+                        if isinstance(tool_call, dict)
+                    )
+                    lines.append(f"助手调用工具: {names}")
+                elif message.get("content"):
+                    role = SUMMARY_ROLE_NAMES.get(message["role"], message["role"])
+                    lines.append(f"{role}: {message['content']}")
+            user_prompt = ""
+            if previous:
+                user_prompt += f"已有摘要：\n{previous}\n\n"
+            user_prompt += "新增对话：\n" + "\n".join(lines)
+            result = llm.response_no_stream(
+                SUMMARY_PROMPT.format(max_chars=self.summary_max_chars), user_prompt
             )
-        else:
-            dialogue.append({"role": m.role, "content": m.content})
+            # 提供方出错时返回【...异常】提示，不作为摘要
+            if not result or result.startswith("【"):
+                logger.bind(tag=TAG).warning(f"对话摘要失败: {result}")
+                return
+            with self._lock:
+                self.summary = result.strip()[: self.summary_max_chars]
+                del self._pending_summary[: len(pending)]
+                self._pending_tokens = sum(
+                    count_message_tokens(self.tokenizer, m) for m in self._pending_summary
+                )
+            logger.bind(tag=TAG).debug(f"对话摘要已更新，合并 {len(pending)} 条消息")
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"对话摘要失败: {e}")
+        finally:
+            self._summarizing = False
 
     def get_llm_dialogue(self) -> List[Dict[str, str]]:
         # 直接调用get_llm_dialogue_with_memory，传入None作为memory_str
@@ -108,11 +294,23 @@ class Dialogue:
                     enhanced_system_prompt,
                     flags=re.DOTALL,
                 )
+
+            # 附加更早对话的摘要
+            if self.window_enabled and self.summary:
+                enhanced_system_prompt += (
+                    f"\n\n<history_summary>\n{self.summary}\n</history_summary>"
+                )
             dialogue.append({"role": "system", "content": enhanced_system_prompt})
 
-        # 添加用户和助手的对话
-        for m in self.dialogue:
-            if m.role != "system":  # 跳过原始的系统消息
-                self.getMessages(m, dialogue)
+        if not self.window_enabled:
+            # 添加用户和助手的对话
+            for m in self.dialogue:
+                if m.role != "system":  # 跳过原始的系统消息
+                    self.getMessages(m, dialogue)
+            return dialogue
 
+        self._sync_window()
+        self._fit_window(self.max_prompt_tokens - self._count_system_tokens(dialogue))
+        # 部分提供方会修改传入的消息（如拼接工具提示词），返回副本以免改动窗口
+        dialogue.extend(dict(message) for _, message, _ in self._window)
         return dialogue
@@ -0,0 +1,110 @@
+"""
+线程与协程共用的FIFO队列
+
+接口与 queue.Queue 兼容（put/get/get_nowait/qsize/empty/task_done），
+线程侧可以阻塞读取；事件循环侧通过 await async_get() 读取，等待期间不占用线程，也无需轮询。
+生产者可以位于任意线程。
+"""
+
+import time
+import queue
+import asyncio
+import threading
+from collections import deque
+
+
+def _wake_waiter(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class HybridQueue:
+    """无界的线程/协程混合队列"""
+
+    def __init__(self):
+        self._items = deque()
+        self._cond = threading.Condition(threading.Lock())
+        # 等待中的协程，每个元素是所属事件循环上的 Future
+        self._waiters = deque()
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def put(self, item, block=True, timeout=None):
+        with self._cond:
+            self._items.append(item)
+            self._cond.notify()
+            waiter = self._pop_waiter()
+        if waiter is not None:
+            self._wake(waiter)
+
+    def put_nowait(self, item):
+        self.put(item)
+
+    def _pop_waiter(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                return waiter
+        return None
+
+    @staticmethod
+    def _wake(waiter: asyncio.Future):
+        loop = waiter.get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            _wake_waiter(waiter)
+            return
+        try:
+            loop.call_soon_threadsafe(_wake_waiter, waiter)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+
+    def get(self, block=True, timeout=None):
+        with self._cond:
+            if not block:
+                if not self._items:
+                    raise queue.Empty
+            elif timeout is None:
+                while not self._items:
+                    self._cond.wait()
+            else:
+                endtime = time.monotonic() + timeout
+                while not self._items:
+                    remaining = endtime - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty
+                    self._cond.wait(remaining)
+            return self._items.popleft()
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    async def async_get(self):
+        """协程方式读取，队列为空时挂起直到有新数据"""
+        while True:
+            with self._cond:
+                if self._items:
+                    return self._items.popleft()
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # 已被唤醒但被取消时，把唤醒机会转交给下一个等待者
+                with self._cond:
+                    next_waiter = self._pop_waiter() if self._items else None
+                if next_waiter is not None:
+                    self._wake(next_waiter)
+                raise
+
+    def task_done(self):
+        """兼容 queue.Queue 接口，本队列不跟踪未完成任务数"""
+        pass
@@ -0,0 +1,361 @@
+"""
+MQTT网关音频的抖动缓冲区
+
+MQTT网关转发的音频包带有设备时间戳（毫秒），经过网络后可能乱序、重复或丢失：
+- 按时间戳放入最小堆，按序连续的包立即送出，不增加延迟
+- 出现缺口时最多等待 target_delay，target_delay 按到达抖动（RFC 3550 算法）自适应调整
+- 迟到包（缺口已处理）和重复包直接丢弃并计数
+- 部分固件或网关的时间戳恒为0或不递增，无法据此排序：出现不递增的时间戳时改为按到达顺序直接输出，
+  时间戳重新连续递增后再恢复排序
+- 等待超时仍未到达的包视为丢失：短时丢包用 opus 的 FEC/PLC 生成补偿帧再编码为opus，
+  保证送给VAD和ASR的音频连续；长时间缺口视为设备停止发送，不做补偿
+"""
+
+import time
+import heapq
+import asyncio
+import ctypes
+from typing import Callable, Dict, List, Optional, Tuple
+
+import opuslib_next
+from opuslib_next.api import c_int16_pointer
+from opuslib_next.api import decoder as opus_decoder_api
+
+from config.logger import setup_logging
+from core.utils.metrics import REGISTRY, Counter
+from core.utils.opus_encoder_utils import OpusEncoderUtils
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+# 时间戳为32位毫秒计数，超过一半范围的差值视为回绕
+TIMESTAMP_MODULO = 1 << 32
+TIMESTAMP_HALF = 1 << 31
+# 时间戳连续递增的包数达到该值后才认为时间戳可靠：此后同时间戳同内容的包视为网络重复，
+# 直接输出模式下也需连续递增这么多包才恢复排序
+ADVANCING_PACKETS = 8
+
+DEFAULT_OPTIONS = {
+    # 缺口等待时间的下限和上限（毫秒）
+    "min_delay_ms": 20,
+    "max_delay_ms": 200,
+    # 等待时间 = 到达抖动估计 × jitter_factor
+    "jitter_factor": 3,
+    # 连续丢失不超过该帧数时生成补偿帧，更长的缺口视为停止发送
+    "max_conceal_frames": 3,
+    # 缓冲的包数上限，超过后不再等待缺失的包
+    "max_packets": 32,
+    # 时间戳跳变超过该值（毫秒）时视为设备重新开始计时，清空缓冲区
+    "resync_ms": 3000,
+}
+
+JITTER_BUFFER_PACKETS = REGISTRY.register(
+    Counter(
+        "xiaozhi_jitter_buffer_packets_total",
+        "MQTT网关音频抖动缓冲区的包处理结果",
+        ["result"],
+    )
+)
+
+
+class JitterBuffer:
+    """单个连接的抖动缓冲区，只在事件循环线程中使用
+
+    sink 接收按时间戳顺序输出的音频包（补偿帧同样是opus包）
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[bytes], None],
+        options: Optional[Dict] = None,
+        conceal: bool = True,
+    ):
+        options = {**DEFAULT_OPTIONS, **{k: v for k, v in (options or {}).items() if v is not None}}
+        self.sink = sink
+        self.conceal = conceal
+        self.min_delay = options["min_delay_ms"] / 1000
+        self.max_delay = options["max_delay_ms"] / 1000
+        self.jitter_factor = float(options["jitter_factor"])
+        self.max_conceal_frames = int(options["max_conceal_frames"])
+        self.max_packets = int(options["max_packets"])
+        self.resync_ms = int(options["resync_ms"])
+
+        # (展开后的时间戳, 包)，展开后的时间戳不再回绕
+        self._heap: List[Tuple[int, bytes]] = []
+        self._pending: Dict[int, bytes] = {}
+        self._base: Optional[int] = None  # 首包的原始时间戳
+        self._unwrapped_last = 0
+        self._expected: Optional[int] = None  # 下一个应输出的时间戳
+        self._frame_ms: Optional[int] = None
+        self._last_packet: Optional[bytes] = None
+        self._last_ts: Optional[int] = None
+        self._gap_since: Optional[float] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # 时间戳不递增时按到达顺序直接输出
+        self._passthrough = False
+        self._prev_ts: Optional[int] = None
+        self._advancing = 0
+
+        # 到达抖动估计（秒）
+        self.jitter = 0.0
+        self._last_arrival: Optional[Tuple[float, int]] = None
+
+        self._decoder: Optional[opuslib_next.Decoder] = None
+        self._encoder: Optional[OpusEncoderUtils] = None
+
+        self.stats = {
+            "received": 0,
+            "released": 0,
+            "reordered": 0,
+            "late": 0,
+            "duplicate": 0,
+            "lost": 0,
+            "concealed": 0,
+            "fec": 0,
+            "resync": 0,
+            "passthrough": 0,
+        }
+
+    def __len__(self) -> int:
+        """缓冲区中等待输出的包数"""
+        return len(self._heap)
+
+    @property
+    def target_delay(self) -> float:
+        """缺口的最长等待时间（秒）"""
+        return min(self.max_delay, max(self.min_delay, self.jitter * self.jitter_factor))
+
+    def push(self, packet: bytes, timestamp: int, now: Optional[float] = None):
+        """放入一个音频包
+
+        Args:
+            packet: 音频数据
+            timestamp: 设备时间戳（毫秒，32位回绕）
+            now: 到达时间，默认取事件循环时间
+        """
+        if now is None:
+            now = self._now()
+        self.stats["received"] += 1
+        if self._frame_ms is None:
+            self._frame_ms = self._packet_duration_ms(packet)
+
+        ts = self._unwrap(timestamp)
+        if self._expected is not None and abs(ts - self._expected) > self.resync_ms:
+            # 时间戳大幅跳变，设备重新开始计时
+            self._resync(ts)
+            ts = self._unwrap(timestamp)
+
+        self._update_jitter(now, ts)
+
+        if ts == self._last_ts or ts in self._pending:
+            stored = self._last_packet if ts == self._last_ts else self._pending[ts]
+            if not self._passthrough and self._advancing >= ADVANCING_PACKETS and packet == stored:
+                self._count("duplicate")
+                return
+            # 时间戳没有前进，无法用于排序
+            self._advancing = 0
+            if not self._passthrough:
+                self._passthrough = True
+                self.flush()
+                logger.bind(tag=TAG).debug("音频包时间戳不递增，改为按到达顺序输出")
+        elif self._prev_ts is not None and ts > self._prev_ts:
+            self._advancing += 1
+        if self._prev_ts is None or ts > self._prev_ts:
+            self._prev_ts = ts
+
+        if self._passthrough:
+            if self._advancing < ADVANCING_PACKETS:
+                self._count("passthrough")
+                self._emit(ts, packet)
+                return
+            self._passthrough = False
+            logger.bind(tag=TAG).debug("音频包时间戳恢复递增，重新按时间戳排序")
+        if self._expected is not None and ts < self._expected - self._frame_ms // 2:
+            # 对应位置已输出或已补偿
+            self._count("late")
+            return
+        if ts < self._unwrapped_last:
+            # 比已收到的最新包更早，乱序到达
+            self.stats["reordered"] += 1
+
+        heapq.heappush(self._heap, (ts, packet))
+        self._pending[ts] = packet
+        self._drain(now)
+
+    def poll(self, now: Optional[float] = None):
+        """检查等待超时的缺口，由定时器调用"""
+        self._timer = None
+        self._drain(self._now() if now is None else now)
+
+    def flush(self):
+        """输出缓冲区中的全部数据，缺口不做补偿"""
+        while self._heap:
+            ts, packet = heapq.heappop(self._heap)
+            self._pending.pop(ts, None)
+            self._emit(ts, packet)
+        self._gap_since = None
+        self._cancel_timer()
+
+    def close(self):
+        self._cancel_timer()
+        self._heap.clear()
+        self._pending.clear()
+        if self._encoder is not None:
+            self._encoder.close()
+            self._encoder = None
+        self._decoder = None
+
+    def _drain(self, now: float):
+        if not self._heap:
+            self._cancel_timer()
+            return
+        half_frame = self._frame_ms // 2
+        while self._heap:
+            ts, packet = self._heap[0]
+            if self._expected is None or ts <= self._expected + half_frame:
+                heapq.heappop(self._heap)
+                self._pending.pop(ts, None)
+                self._gap_since = None
+                self._emit(ts, packet)
+                continue
+
+            # 队首之前有缺口，等待缺失的包到达
+            if self._gap_since is None:
+                self._gap_since = now
+            waited = now - self._gap_since
+            if waited < self.target_delay and len(self._heap) <= self.max_packets:
+                self._schedule_timer(self.target_delay - waited)
+                return
+
+            # 等待超时，缺失的包视为丢失
+            missing = round((ts - self._expected) / self._frame_ms)
+            self._count("lost", missing)
+            if self.conceal and missing <= self.max_conceal_frames:
+                self._conceal(missing, packet)
+            self._expected = ts
+            self._gap_since = None
+        self._cancel_timer()
+
+    def _emit(self, ts: int, packet: bytes):
+        self._expected = ts + self._frame_ms
+        self._last_ts = ts
+        self._last_packet = packet
+        self.stats["released"] += 1
+        self.sink(packet)
+
+    def _conceal(self, missing: int, next_packet: bytes):
+        """生成 missing 个补偿帧：前面的帧用PLC，紧挨下一个包的帧优先用下一个包中的FEC数据"""
+        frame_size = SAMPLE_RATE * self._frame_ms // 1000
+        try:
+            if self._decoder is None:
+                self._decoder = opuslib_next.Decoder(SAMPLE_RATE, 1)
+                # 补偿帧按设备的帧长编码，只用于VAD和ASR，使用较低的编码复杂度
+                self._encoder = OpusEncoderUtils(
+                    SAMPLE_RATE, 1, self._frame_ms, bitrate=None, complexity=3, signal=None
+                )
+            decoder = self._decoder
+            if self._last_packet is not None:
+                # 只在丢包时解码上一个包，让解码器的PLC基于缺口前的音频
+                decoder.decode(self._last_packet, frame_size)
+            frames = []
+            for _ in range(missing - 1):
+                frames.append(self._plc(frame_size))
+            # 下一个包不含FEC数据时，libopus 按PLC处理
+            frames.append(decoder.decode(next_packet, frame_size, decode_fec=True))
+            self._count("fec")
+            for pcm in frames:
+                self._encoder.encode_pcm_to_opus_stream(pcm, True, self._emit_concealed)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"生成丢包补偿帧失败: {e}")
+
+    def _emit_concealed(self, packet: bytes):
+        self._count("concealed")
+        self.sink(packet)
+
+    def _plc(self, frame_size: int) -> bytes:
+        pcm = (ctypes.c_int16 * frame_size)()
+        result = opus_decoder_api.libopus_decode(
+            self._decoder.decoder_state,
+            None,
+            0,
+            ctypes.cast(pcm, c_int16_pointer),
+            frame_size,
+            0,
+        )
+        if result < 0:
+            raise opuslib_next.OpusError(result)
+        return bytes(pcm)[: result * 2]
+
+    def _packet_duration_ms(self, packet: bytes) -> int:
+        if self.conceal:
+            try:
+                samples = opus_decoder_api.packet_get_samples_per_frame(
+                    packet, SAMPLE_RATE
+                ) * opus_decoder_api.packet_get_nb_frames(packet, len(packet))
+                if samples > 0:
+                    return samples * 1000 // SAMPLE_RATE
+            except Exception:
+                pass
+            return 60
+        # PCM 16kHz 16bit 单声道
+        return max(1, len(packet) // 32)
+
+    def _unwrap(self, timestamp: int) -> int:
+        """把32位回绕的时间戳展开为相对首包的连续时间戳"""
+        if self._base is None:
+            self._base = timestamp
+            self._unwrapped_last = 0
+            return 0
+        raw_last = (self._base + self._unwrapped_last) % TIMESTAMP_MODULO
+        delta = (timestamp - raw_last) % TIMESTAMP_MODULO
+        if delta >= TIMESTAMP_HALF:
+            delta -= TIMESTAMP_MODULO
+        ts = self._unwrapped_last + delta
+        if ts > self._unwrapped_last:
+            self._unwrapped_last = ts
+        return ts
+
+    def _update_jitter(self, now: float, ts: int):
+        """RFC 3550 到达抖动估计：J += (|D| - J) / 16"""
+        last = self._last_arrival
+        self._last_arrival = (now, ts)
+        if last is None:
+            return
+        d = (now - last[0]) - (ts - last[1]) / 1000
+        self.jitter += (abs(d) - self.jitter) / 16
+
+    def _resync(self, ts: int):
+        self.flush()
+        self.stats["resync"] += 1
+        self._base = None
+        self._expected = None
+        self._last_ts = None
+        self._prev_ts = None
+        self._advancing = 0
+        self._last_arrival = None
+
+    def _count(self, result: str, amount: int = 1):
+        self.stats[result] += amount
+        JITTER_BUFFER_PACKETS.labels(result).inc(amount)
+
+    def _now(self) -> float:
+        try:
+            return asyncio.get_running_loop().time()
+        except RuntimeError:
+            return time.monotonic()
+
+    def _schedule_timer(self, delay: float):
+        if self._timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 没有事件循环（如离线测试）时由调用方调用 poll
+            return
+        self._timer = loop.call_later(delay, self.poll)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -0,0 +1,362 @@
+"""
+LLM流式请求的常驻事件循环、共享HTTP客户端与同步适配器
+
+旧实现中每个LLM实例持有自己的同步客户端，流式响应在连接的线程池线程中逐块读取，
+用户打断后只是停止读取，上游HTTP流仍在继续生成（并计费）。这里改为：
+1. 提供方实现异步接口 aresponse/aresponse_with_functions，进程内每个服务地址
+   （协议+主机+端口）一个共享的 httpx.AsyncClient，保持长连接
+2. 同步调用方（chat 线程、意图识别、记忆总结等）通过 LLMStream 迭代，异步流运行在
+   常驻的LLM事件循环中；cancel 可在任意线程调用，立即取消任务并关闭上游连接
+"""
+
+import queue
+import asyncio
+import threading
+import concurrent.futures
+import importlib.util
+from urllib.parse import urlsplit
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+import httpx
+
+from config.logger import setup_logging
+from core.utils.metrics import REGISTRY, Counter
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_OPTIONS = {
+    # 每个服务地址的最大并发连接数
+    "max_connections_per_host": 64,
+    # 空闲长连接保留时间（秒），应小于服务端的空闲超时
+    "keepalive_expiry": 30,
+    # 读取超时（秒），流式响应两个数据块之间的最长间隔
+    "timeout": 300,
+    "connect_timeout": 10,
+    # 服务端支持时使用 HTTP/2（需要安装 h2）
+    "http2": False,
+}
+
+LLM_STREAMS_CANCELLED = REGISTRY.register(
+    Counter(
+        "xiaozhi_llm_streams_cancelled_total",
+        "用户打断等原因提前关闭的LLM流式请求数",
+    )
+)
+
+_END = object()
+# 流式响应以 [DONE] 结束后，等待分块传输结束标记的最长时间（秒）
+DRAIN_TIMEOUT = 0.5
+
+
+class _StreamError:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class _KeepAliveStream(httpx.AsyncByteStream):
+    """SSE流以 [DONE] 结束时，关闭前读完分块传输的结束标记，使连接可以放回连接池
+
+    openai SDK 读到 [DONE] 后不再读取剩余数据就关闭响应，连接会被直接断开，
+    每轮对话都要重新建连；中途取消的流不在此列，仍然立即关闭
+    """
+
+    def __init__(self, stream: httpx.AsyncByteStream):
+        self._stream = stream
+        self._tail = b""
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._tail = (self._tail + chunk)[-16:]
+            yield chunk
+
+    async def _drain(self):
+        async for _ in self._stream:
+            pass
+
+    async def aclose(self):
+        if self._tail.rstrip().endswith(b"[DONE]"):
+            try:
+                await asyncio.wait_for(self._drain(), DRAIN_TIMEOUT)
+            except Exception:
+                pass
+        await self._stream.aclose()
+
+
+class _KeepAliveTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncHTTPTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._transport.handle_async_request(request)
+        response.stream = _KeepAliveStream(response.stream)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class LLMHttpRuntime:
+    """常驻LLM事件循环及其上的共享HTTP客户端"""
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update({k: v for k, v in (options or {}).items() if v is not None})
+        self.http2 = bool(self.options["http2"]) and (
+            importlib.util.find_spec("h2") is not None
+        )
+        self._clients: Dict[tuple, Any] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None:
+            return self._loop
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=loop.run_forever, name="llm-loop", daemon=True
+                )
+                self._thread.start()
+                self._loop = loop
+        return self._loop
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """把协程提交到常驻事件循环，不等待结果"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def open_stream(self, agen: AsyncIterator) -> "LLMStream":
+        """在常驻事件循环中运行异步流，返回可同步迭代的 LLMStream"""
+        self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("不能在LLM事件循环线程中同步迭代LLM流")
+        return LLMStream(self, agen)
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """获取服务地址对应的共享客户端
+
+        客户端的连接池绑定事件循环，按事件循环区分；同步调用都运行在常驻LLM事件循环上，
+        在其他事件循环中直接调用 aresponse 时会单独创建客户端
+        """
+        key = (id(asyncio.get_running_loop()), _host_key(url))
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    max_connections = int(self.options["max_connections_per_host"])
+                    limits = httpx.Limits(
+                        max_connections=max_connections,
+                        max_keepalive_connections=max_connections,
+                        keepalive_expiry=float(self.options["keepalive_expiry"]),
+                    )
+                    timeout = httpx.Timeout(
+                        float(self.options["timeout"]),
+                        connect=float(self.options["connect_timeout"]),
+                    )
+                    transport = httpx.AsyncHTTPTransport(
+                        limits=limits, http2=self.http2
+                    )
+                    client = httpx.AsyncClient(
+                        transport=_KeepAliveTransport(transport), timeout=timeout
+                    )
+                    self._clients[key] = client
+                    logger.bind(tag=TAG).debug(
+                        f"创建LLM共享HTTP客户端: {key[1]}, http2={self.http2}"
+                    )
+        return client
+
+    def get_openai_client(self, base_url: str, api_key: str):
+        """获取共享HTTP连接的 openai.AsyncOpenAI 客户端，相同服务地址和密钥的实例共用"""
+        key = (id(asyncio.get_running_loop()), "openai", base_url, api_key)
+        client = self._clients.get(key)
+        if client is None:
+            import openai
+
+            http_client = self.get_client(base_url)
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = openai.AsyncOpenAI(
+                        api_key=api_key, base_url=base_url, http_client=http_client
+                    )
+                    self._clients[key] = client
+        return client
+
+    async def _close_clients(self):
+        loop_id = id(asyncio.get_running_loop())
+        with self._lock:
+            keys = [key for key in self._clients if key[0] == loop_id]
+            clients = [self._clients.pop(key) for key in keys]
+        for client in clients:
+            # openai 客户端使用共享的 httpx 客户端，只关闭 httpx 客户端
+            if not isinstance(client, httpx.AsyncClient):
+                continue
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.bind(tag=TAG).warning(f"关闭LLM HTTP客户端失败: {e}")
+        # 被取消的流式响应中残留的异步生成器
+        await asyncio.get_running_loop().shutdown_asyncgens()
+
+    def close(self, timeout: float = 5.0):
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_clients(), loop).result(timeout)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"关闭LLM HTTP客户端超时: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._loop = None
+        self._thread = None
+
+
+class LLMStream:
+    """同步迭代运行在LLM事件循环中的异步流
+
+    兼容原有的同步生成器用法（for 循环、close）；cancel 可在任意线程调用，
+    迭代方立即结束，事件循环中的任务被取消，上游HTTP连接随之关闭
+    """
+
+    def __init__(self, runtime: LLMHttpRuntime, agen: AsyncIterator):
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._agen = agen
+        self._done = False
+        self.cancelled = False
+        self._future = runtime.submit(self._pump())
+
+    async def _pump(self):
+        try:
+            async for item in self._agen:
+                self._queue.put(item)
+        except Exception as e:
+            self._queue.put(_StreamError(e))
+        finally:
+            # 被取消时同样关闭异步生成器，提供方在 async with 中打开的HTTP流随之关闭
+            try:
+                await self._agen.aclose()
+            finally:
+                self._queue.put(_END)
+
+    def __iter__(self) -> Iterator:
+        return self
+
+    def __next__(self):
+        if self._done or self.cancelled:
+            raise StopIteration
+        item = self._queue.get()
+        if item is _END or self.cancelled:
+            self._done = True
+            raise StopIteration
+        if isinstance(item, _StreamError):
+            self._done = True
+            raise item.error
+        return item
+
+    def cancel(self):
+        """停止接收并关闭上游流，可在任意线程重复调用"""
+        if self.cancelled:
+            return
+        self.cancelled = True
+        if not self._future.done():
+            LLM_STREAMS_CANCELLED.inc()
+            self._future.cancel()
+        # 任务还未开始执行时不会进入 finally，直接通知迭代方结束
+        self._queue.put(_END)
+
+    def close(self):
+        """与生成器的 close 一致：迭代方提前退出时关闭上游流"""
+        self.cancel()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+async def iterate_in_thread(iterator: Iterator) -> AsyncIterator:
+    """在线程池中驱动同步生成器，供未实现异步接口的提供方使用
+
+    取消时无法中断正在阻塞读取的线程，只能在当前数据块返回后由该线程关闭生成器
+    """
+    loop = asyncio.get_running_loop()
+    items: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(items.put_nowait, item)
+        except RuntimeError:
+            # 事件循环已关闭
+            stop.set()
+
+    def worker():
+        try:
+            for item in iterator:
+                if stop.is_set():
+                    break
+                put(item)
+        except Exception as e:
+            put(_StreamError(e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            put(_END)
+
+    loop.run_in_executor(None, worker)
+    try:
+        while True:
+            item = await items.get()
+            if item is _END:
+                break
+            if isinstance(item, _StreamError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
+
+# 全局单例
+_runtime: Optional[LLMHttpRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_llm_http_runtime() -> LLMHttpRuntime:
+    """获取全局LLM事件循环与HTTP客户端（单例模式）"""
+    global _runtime
+    if _runtime is not None:
+        return _runtime
+
+    with _runtime_lock:
+        if _runtime is None:
+            from config.config_loader import load_config
+
+            _runtime = LLMHttpRuntime(load_config().get("llm_http"))
+    return _runtime
+
+
+def get_llm_http_client(url: str) -> httpx.AsyncClient:
+    return get_llm_http_runtime().get_client(url)
+
+
+def open_llm_stream(agen: AsyncIterator) -> LLMStream:
+    return get_llm_http_runtime().open_stream(agen)
+
+
+def close_llm_http_runtime():
+    if _runtime is not None:
+        _runtime.close()
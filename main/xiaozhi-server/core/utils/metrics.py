@@ -0,0 +1,319 @@
+"""
+运行指标与单轮对话耗时追踪
+
+- 指标以 Prometheus 文本格式通过 http 服务的 /metrics 接口暴露
+- 每轮对话从VAD检测到说话结束开始计时，依次记录各阶段完成时刻：
+  ASR完成、意图识别完成、LLM首字、首句切分、TTS首包、首个音频包发出
+- 记录开销只有一次时间读取和一次分桶计数，可在生产环境常开
+"""
+
+import time
+import bisect
+import threading
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 单轮对话阶段（按顺序）
+STAGE_ASR = "asr"
+STAGE_INTENT = "intent"
+STAGE_LLM_FIRST_TOKEN = "llm_first_token"
+STAGE_FIRST_SENTENCE = "first_sentence"
+STAGE_TTS_FIRST_BYTE = "tts_first_byte"
+STAGE_FIRST_AUDIO = "first_audio"
+
+# 耗时分桶（秒）
+LATENCY_BUCKETS = (
+    0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0
+)
+
+_enabled = True
+
+
+def set_enabled(enabled: bool):
+    """关闭后不再记录单轮对话耗时"""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        for key, child in list(self._children.items()):
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            )
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total_sum = child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, key, f'le="{_format_value(float(bound))}"'
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total_sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class GaugeFunc(_Metric):
+    """采集时才计算的指标，适合连接数、队列长度这类只在抓取时需要的值
+
+    func 返回数值，或 {标签值元组: 数值}
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, func: Callable, labelnames=()):
+        self.func = func
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return None
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        value = self.func()
+        if not isinstance(value, dict):
+            value = {(): value}
+        for key, item in value.items():
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(item)}"
+            )
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines.extend(metric.collect())
+            except Exception:
+                # 单个指标采集失败不影响其他指标
+                continue
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+TURN_STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "xiaozhi_turn_stage_seconds",
+        "单轮对话各阶段耗时（距上一阶段完成）",
+        ["stage"],
+    )
+)
+TURN_FIRST_AUDIO_SECONDS = REGISTRY.register(
+    Histogram(
+        "xiaozhi_turn_first_audio_seconds",
+        "单轮对话从VAD检测到说话结束到首个音频包发出的耗时",
+    )
+)
+TURNS_TOTAL = REGISTRY.register(
+    Counter("xiaozhi_turns_total", "完成首个音频包发送的对话轮数")
+)
+CONNECTIONS_TOTAL = REGISTRY.register(
+    Counter("xiaozhi_connections_total", "累计建立的连接数")
+)
+PROVIDER_ERRORS = REGISTRY.register(
+    Counter("xiaozhi_provider_errors_total", "各模块调用失败次数", ["module"])
+)
+
+# 活跃连接，仅用于采集时统计，不延长连接对象的生命周期
+_connections = weakref.WeakSet()
+
+
+def track_connection(conn):
+    _connections.add(conn)
+    CONNECTIONS_TOTAL.inc()
+
+
+def _active_connections() -> List:
+    return [
+        conn
+        for conn in list(_connections)
+        if not (conn.stop_event and conn.stop_event.is_set())
+    ]
+
+
+def _queue_depths() -> Dict[Tuple[str], int]:
+    depths = {("tts_text",): 0, ("tts_audio",): 0, ("asr_audio",): 0}
+    for conn in _active_connections():
+        tts = conn.tts
+        if tts is not None:
+            depths[("tts_text",)] += tts.tts_text_queue.qsize()
+            depths[("tts_audio",)] += tts.tts_audio_queue.qsize()
+        depths[("asr_audio",)] += conn.asr_audio_queue.qsize()
+    return depths
+
+
+REGISTRY.register(
+    GaugeFunc(
+        "xiaozhi_active_connections",
+        "当前活跃连接数",
+        lambda: len(_active_connections()),
+    )
+)
+REGISTRY.register(
+    GaugeFunc(
+        "xiaozhi_queue_depth",
+        "所有活跃连接的队列积压总数",
+        _queue_depths,
+        ["queue"],
+    )
+)
+
+
+def record_provider_error(module: str):
+    PROVIDER_ERRORS.labels(module).inc()
+
+
+class TurnTrace:
+    """单轮对话的耗时追踪，每个连接一个实例
+
+    每个阶段在一轮中只记录第一次，发出首个音频包后本轮结束
+    """
+
+    __slots__ = ("start_time", "last_time", "marked")
+
+    def __init__(self):
+        self.start_time: Optional[float] = None
+        self.last_time = 0.0
+        self.marked = set()
+
+    def start(self):
+        """VAD检测到说话结束（或设备上报停止拾音）时开始新的一轮"""
+        if not _enabled:
+            return
+        self.start_time = self.last_time = time.monotonic()
+        self.marked = set()
+
+    def mark(self, stage: str):
+        if self.start_time is None or stage in self.marked:
+            return
+        now = time.monotonic()
+        self.marked.add(stage)
+        TURN_STAGE_SECONDS.labels(stage).observe(now - self.last_time)
+        self.last_time = now
+        if stage == STAGE_FIRST_AUDIO:
+            TURN_FIRST_AUDIO_SECONDS.observe(now - self.start_time)
+            TURNS_TOTAL.inc()
+            self.start_time = None
@@ -0,0 +1,81 @@
+"""
+阻塞调用卸载线程池
+
+connection_mode 为 async 时，所有连接共享同一个有界线程池，用于执行阻塞的提供方调用
+（同步的LLM流式接口、非流式TTS合成、组件初始化、意图函数调用等），
+连接本身不再持有任何线程，空闲连接只占用几个挂起的协程
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+TAG = __name__
+
+DEFAULT_MAX_WORKERS = 64
+
+
+class OffloadPool:
+    """进程级共享的有界阻塞调用线程池"""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.max_workers = max(1, int(max_workers))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="offload"
+        )
+        self._lock = threading.Lock()
+        self._active = 0
+        self._submitted = 0
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self._active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """提交阻塞任务，接口与 ThreadPoolExecutor.submit 一致"""
+        with self._lock:
+            self._submitted += 1
+        return self._executor.submit(self._run, fn, args, kwargs)
+
+    async def run(self, fn, *args, **kwargs):
+        """在事件循环中等待阻塞任务完成，等待期间不阻塞事件循环"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "threads": len(self._executor._threads),
+                "active": self._active,
+                "submitted": self._submitted,
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
+
+
+# 全局单例
+_offload_pool = None
+_offload_pool_lock = threading.Lock()
+
+
+def get_offload_pool() -> OffloadPool:
+    """获取全局卸载线程池实例（单例模式）"""
+    global _offload_pool
+    if _offload_pool is not None:
+        return _offload_pool
+
+    with _offload_pool_lock:
+        if _offload_pool is None:
+            from config.config_loader import load_config
+
+            max_workers = load_config().get("offload_max_workers", DEFAULT_MAX_WORKERS)
+            _offload_pool = OffloadPool(
+                int(max_workers) if max_workers else DEFAULT_MAX_WORKERS
+            )
+    return _offload_pool
@@ -1,19 +1,193 @@
 """
 Opus编码工具类
 将PCM音频数据编码为Opus格式
+
+- 编码器从进程级编码器池借用，一段音频流结束后重置状态并归还，
+  连接空闲时不占用编码器
+- PCM数据写入预分配的环形缓冲区，按帧直接把缓冲区内存交给 libopus，
+  编码每一帧不再重新分配缓冲区
 """
 
+import ctypes
 import logging
+import threading
 import traceback
-import numpy as np
 from opuslib_next import Encoder
 from opuslib_next import constants
-from typing import Optional, Callable, Any
+from opuslib_next.api import c_int16_pointer
+from opuslib_next.api import encoder as opus_api
+from opuslib_next.exceptions import OpusError
+from typing import Dict, List, Optional, Callable, Any, Tuple
+
+
+class PcmRingBuffer:
+    """预分配的PCM环形缓冲区
+
+    数据写入时直接复制到缓冲区内，按帧读取时返回缓冲区的 memoryview；
+    只有一帧跨越缓冲区末尾时才拷贝到预分配的拼接区
+    """
+
+    def __init__(self, capacity: int, frame_bytes: int):
+        self.frame_bytes = frame_bytes
+        self._buffer = bytearray(max(capacity, frame_bytes))
+        self._view = memoryview(self._buffer)
+        self._scratch = bytearray(frame_bytes)
+        self._scratch_view = memoryview(self._scratch)
+        self._read = 0
+        self._size = 0
+        # 缓冲区扩容次数，正常情况下应为0
+        self.grow_count = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buffer)
+
+    def clear(self):
+        self._read = 0
+        self._size = 0
+
+    def write(self, data) -> None:
+        data = memoryview(data).cast("B")
+        length = len(data)
+        if self._size + length > self.capacity:
+            self._grow(self._size + length)
+        capacity = self.capacity
+        start = (self._read + self._size) % capacity
+        first = min(length, capacity - start)
+        self._view[start : start + first] = data[:first]
+        if first < length:
+            self._view[: length - first] = data[first:]
+        self._size += length
+
+    def write_zeros(self, length: int) -> None:
+        """写入静音数据，用于补齐最后一帧"""
+        if self._size + length > self.capacity:
+            self._grow(self._size + length)
+        capacity = self.capacity
+        start = (self._read + self._size) % capacity
+        first = min(length, capacity - start)
+        self._view[start : start + first] = bytes(first)
+        if first < length:
+            self._view[: length - first] = bytes(length - first)
+        self._size += length
+
+    def peek_frame(self) -> memoryview:
+        """返回下一帧数据的只读视图，调用 consume_frame 前有效"""
+        capacity = self.capacity
+        end = self._read + self.frame_bytes
+        if end <= capacity:
+            return self._view[self._read : end]
+        first = capacity - self._read
+        self._scratch_view[:first] = self._view[self._read :]
+        self._scratch_view[first:] = self._view[: self.frame_bytes - first]
+        return self._scratch_view
+
+    def consume_frame(self) -> None:
+        self._read = (self._read + self.frame_bytes) % self.capacity
+        self._size -= self.frame_bytes
+        if self._size == 0:
+            self._read = 0
+
+    def _grow(self, required: int):
+        capacity = self.capacity
+        while capacity < required:
+            capacity *= 2
+        buffer = bytearray(capacity)
+        old_capacity = self.capacity
+        first = min(self._size, old_capacity - self._read)
+        buffer[:first] = self._view[self._read : self._read + first]
+        buffer[first : self._size] = self._view[: self._size - first]
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self._read = 0
+        self.grow_count += 1
+
+
+# 编码器池的键：(采样率, 通道数, 比特率, 复杂度, 信号类型)，None 表示使用 libopus 默认值
+EncoderKey = Tuple[int, int, Optional[int], Optional[int], Optional[int]]
+
+
+class OpusEncoderPool:
+    """进程级Opus编码器池，相同参数的编码器重置状态后复用"""
+
+    def __init__(self, max_idle_per_key: int = 64):
+        self.max_idle_per_key = max_idle_per_key
+        self._idle: Dict[EncoderKey, List[Encoder]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "discarded": 0}
+
+    def acquire(self, key: EncoderKey) -> Encoder:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.stats["reused"] += 1
+                return idle.pop()
+            self.stats["created"] += 1
+        return self._create(key)
+
+    def release(self, key: EncoderKey, encoder: Encoder) -> None:
+        """归还编码器，重置状态后放回空闲列表"""
+        try:
+            encoder.reset_state()
+        except Exception as e:
+            logging.error(f"重置Opus编码器失败: {e}")
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) >= self.max_idle_per_key:
+                self.stats["discarded"] += 1
+                return
+            idle.append(encoder)
+
+    @staticmethod
+    def _create(key: EncoderKey) -> Encoder:
+        sample_rate, channels, bitrate, complexity, signal = key
+        encoder = Encoder(sample_rate, channels, constants.APPLICATION_AUDIO)  # 音频优化模式
+        if bitrate is not None:
+            encoder.bitrate = bitrate
+        if complexity is not None:
+            encoder.complexity = complexity
+        if signal is not None:
+            encoder.signal = signal
+        return encoder
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["idle"] = sum(len(v) for v in self._idle.values())
+        return stats
+
+
+_encoder_pool: Optional[OpusEncoderPool] = None
+_encoder_pool_lock = threading.Lock()
+
+
+def get_opus_encoder_pool() -> OpusEncoderPool:
+    """获取全局Opus编码器池（单例模式）"""
+    global _encoder_pool
+    if _encoder_pool is not None:
+        return _encoder_pool
+    with _encoder_pool_lock:
+        if _encoder_pool is None:
+            _encoder_pool = OpusEncoderPool()
+    return _encoder_pool
+
 
 class OpusEncoderUtils:
     """PCM到Opus的编码器"""
 
-    def __init__(self, sample_rate: int, channels: int, frame_size_ms: int):
+    def __init__(
+        self,
+        sample_rate: int,
+        channels: int,
+        frame_size_ms: int,
+        bitrate: Optional[int] = 24000,
+        complexity: Optional[int] = 10,
+        signal: Optional[int] = constants.SIGNAL_VOICE,
+    ):
         """
         初始化Opus编码器
 
@@ -21,6 +195,7 @@ class OpusEncoderUtils:
             sample_rate: 采样率 (Hz)
             channels: 通道数 (1=单声道, 2=立体声)
             frame_size_ms: 帧大小 (毫秒)
+            bitrate / complexity / signal: 编码参数，None 表示使用 libopus 默认值
         """
         self.sample_rate = sample_rate
         self.channels = channels
@@ -29,111 +204,98 @@ class OpusEncoderUtils:
         self.frame_size = (sample_rate * frame_size_ms) // 1000
         # 总帧大小 = 每帧样本数 * 通道数
         self.total_frame_size = self.frame_size * channels
+        self.frame_bytes = self.total_frame_size * 2
 
-        # 比特率和复杂度设置
-        self.bitrate = 24000  # bps
-        self.complexity = 10  # 最高质量
+        # 比特率和复杂度设置（默认最高质量）
+        self.bitrate = bitrate
+        self.complexity = complexity
+        self._key: EncoderKey = (sample_rate, channels, bitrate, complexity, signal)
 
-        # 缓冲区初始化为空
-        self.buffer = np.array([], dtype=np.int16)
+        # 预留8帧的缓冲区，TTS返回的单个数据块通常小于该值，超出时按倍数扩容并保留
+        self.buffer = PcmRingBuffer(self.frame_bytes * 8, self.frame_bytes)
+        # 编码输出缓冲区，opus单帧不会超过输入PCM的大小
+        self._output = (ctypes.c_char * self.frame_bytes)()
+        self._pool = get_opus_encoder_pool()
+        # 编码器在流开始时借用，流结束时归还
+        self.encoder: Optional[Encoder] = None
+        self._closed = False
 
         try:
-            # 创建Opus编码器
-            self.encoder = Encoder(
-                sample_rate, channels, constants.APPLICATION_AUDIO  # 音频优化模式
-            )
-            self.encoder.bitrate = self.bitrate
-            self.encoder.complexity = self.complexity
-            self.encoder.signal = constants.SIGNAL_VOICE  # 语音信号优化
+            # 预先创建一个编码器，参数错误时在初始化阶段报错
+            self._pool.release(self._key, self._pool.acquire(self._key))
         except Exception as e:
             logging.error(f"初始化Opus编码器失败: {e}")
             raise RuntimeError("初始化失败") from e
 
     def reset_state(self):
         """重置编码器状态"""
-        self.encoder.reset_state()
-        self.buffer = np.array([], dtype=np.int16)
+        self._release_encoder()
+        self.buffer.clear()
 
     def encode_pcm_to_opus_stream(self, pcm_data: bytes, end_of_stream: bool, callback: Callable[[Any], Any]):
         """
         将PCM数据编码为Opus格式，以流式方式进行处理
 
         Args:
-            pcm_data: PCM字节数据
+            pcm_data: PCM字节数据（小端16位）
             end_of_stream: 是否为流的结束,
             callback: opus处理方法
-
-        Returns:
-            Opus数据包列表
         """
-        # 将字节数据转换为short数组
-        new_samples = self._convert_bytes_to_shorts(pcm_data)
-
-        # 校验PCM数据
-        self._validate_pcm_data(new_samples)
-
-        # 将新数据追加到缓冲区
-        self.buffer = np.append(self.buffer, new_samples)
-
-        offset = 0
+        if pcm_data:
+            self.buffer.write(pcm_data)
 
         # 处理所有完整帧
-        while offset <= len(self.buffer) - self.total_frame_size:
-            frame = self.buffer[offset : offset + self.total_frame_size]
-            output = self._encode(frame)
+        while len(self.buffer) >= self.frame_bytes:
+            output = self._encode(self.buffer.peek_frame())
+            self.buffer.consume_frame()
             if output:
                 callback(output)
-            offset += self.total_frame_size
-
-        # 保留未处理的样本
-        self.buffer = self.buffer[offset:]
 
-        # 流结束时处理剩余数据
-        if end_of_stream and len(self.buffer) > 0:
-            # 创建最后一帧并用0填充
-            last_frame = np.zeros(self.total_frame_size, dtype=np.int16)
-            last_frame[: len(self.buffer)] = self.buffer
-
-            output = self._encode(last_frame)
-            if output:
-                callback(output)
-            self.buffer = np.array([], dtype=np.int16)
+        if end_of_stream:
+            # 流结束时处理剩余数据，最后一帧用0填充
+            if len(self.buffer) > 0:
+                self.buffer.write_zeros(self.frame_bytes - len(self.buffer))
+                output = self._encode(self.buffer.peek_frame())
+                self.buffer.consume_frame()
+                if output:
+                    callback(output)
+            self._release_encoder()
 
-    def _encode(self, frame: np.ndarray) -> Optional[bytes]:
-        """编码一帧音频数据"""
+    def _encode(self, frame: memoryview) -> Optional[bytes]:
+        """编码一帧音频数据，frame 直接作为 libopus 的输入，不做拷贝"""
         try:
             # 编码器已释放，跳过编码
-            if not hasattr(self, 'encoder') or self.encoder is None:
+            if self._closed:
                 return None
-            # 将numpy数组转换为bytes
-            frame_bytes = frame.tobytes()
-            # opuslib要求输入字节数必须是channels*2的倍数
-            encoded = self.encoder.encode(frame_bytes, self.frame_size)
-            return encoded
+            if self.encoder is None:
+                self.encoder = self._pool.acquire(self._key)
+            pcm = (ctypes.c_char * self.frame_bytes).from_buffer(frame)
+            result = opus_api.libopus_encode(
+                self.encoder.encoder_state,
+                ctypes.cast(pcm, c_int16_pointer),
+                self.frame_size,
+                self._output,
+                self.frame_bytes,
+            )
+            if result < 0:
+                raise OpusError(result)
+            return ctypes.string_at(self._output, result)
         except Exception as e:
             logging.error(f"Opus编码失败: {e}")
             traceback.print_exc()
             return None
 
-    def _convert_bytes_to_shorts(self, bytes_data: bytes) -> np.ndarray:
-        """将字节数组转换为short数组 (16位PCM)"""
-        # 假设输入是小端字节序的16位PCM
-        return np.frombuffer(bytes_data, dtype=np.int16)
-
-    def _validate_pcm_data(self, pcm_shorts: np.ndarray) -> None:
-        """验证PCM数据是否有效"""
-        # 16位PCM数据范围是 -32768 到 32767
-        if np.any((pcm_shorts < -32768) | (pcm_shorts > 32767)):
-            invalid_samples = pcm_shorts[(pcm_shorts < -32768) | (pcm_shorts > 32767)]
-            logging.warning(f"发现无效PCM样本: {invalid_samples[:5]}...")
-            # 在实际应用中可以选择裁剪而不是抛出异常
-            # np.clip(pcm_shorts, -32768, 32767, out=pcm_shorts)
+    def _release_encoder(self):
+        encoder = self.encoder
+        if encoder is not None:
+            self.encoder = None
+            self._pool.release(self._key, encoder)
 
     def close(self):
-        """关闭编码器并释放资源"""
-        if hasattr(self, 'encoder') and self.encoder:
-            try:
-                del self.encoder
-                self.encoder = None
-            except Exception as e:
-                logging.error(f"Error releasing Opus encoder: {e}")
\ No newline at end of file
+        """关闭编码器并归还到编码器池"""
+        try:
+            self._closed = True
+            self._release_encoder()
+            self.buffer.clear()
+        except Exception as e:
+            logging.error(f"Error releasing Opus encoder: {e}")
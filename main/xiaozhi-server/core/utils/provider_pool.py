@@ -0,0 +1,347 @@
+"""
+组件实例池（智控台模式）
+
+智控台模式下每个连接都会按差异化配置重新创建组件实例，而大量设备往往绑定同一个智能体，
+配置完全相同。实例池按“组件类型 + 生效配置”计算指纹，相同指纹的连接复用实例：
+1. 共享：无连接状态的实例（LLM、意图识别、VAD、本地/非流式ASR、nomem）由多个连接同时引用
+2. 回收：带连接状态但可重置的实例（记忆）在连接结束后重置并放回空闲列表，供下一个连接使用
+3. 独占：与连接强绑定的实例（TTS、流式ASR）不进入实例池，每个连接单独创建
+引用计数归零的实例空闲超过 idle_timeout 后被淘汰
+"""
+
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from config.logger import setup_logging
+from core.providers.asr.dto.dto import InterfaceType
+from core.utils import llm, intent, memory, vad
+from core.utils.modules_initialize import initialize_asr, initialize_tts
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_OPTIONS = {
+    "enable": True,
+    # 无连接引用的实例保留时间（秒）
+    "idle_timeout": 600,
+    # 每个指纹最多保留的空闲回收实例数
+    "max_idle_per_key": 8,
+}
+
+SHARED = "shared"
+RECYCLED = "recycled"
+EXCLUSIVE = "exclusive"
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset, type({}.keys()))):
+        return sorted(str(v) for v in value)
+    return str(value)
+
+
+def config_fingerprint(kind: str, *parts: Any) -> str:
+    """计算组件配置指纹，配置项顺序不影响结果"""
+    data = json.dumps(
+        [kind, *parts], sort_keys=True, ensure_ascii=False, default=_json_default
+    )
+    return f"{kind}:{hashlib.sha1(data.encode('utf-8')).hexdigest()}"
+
+
+def _module_type(config: Dict[str, Any], kind: str) -> str:
+    name = config["selected_module"][kind]
+    return config[kind][name].get("type", name)
+
+
+class _PoolEntry:
+    """一个指纹对应的实例集合"""
+
+    __slots__ = ("key", "policy", "shared", "refs", "idle", "last_used", "lock")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.policy: Optional[str] = None
+        self.shared: Any = None
+        self.refs = 0
+        # 回收策略下的空闲实例：[(实例, 放回时间)]
+        self.idle: List = []
+        self.last_used = time.monotonic()
+        # 创建实例可能很慢（加载模型、建立连接），只锁定当前指纹
+        self.lock = threading.Lock()
+
+
+class ProviderPool:
+    """进程级共享的组件实例池，线程安全"""
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update({k: v for k, v in (options or {}).items() if v is not None})
+        self._entries: Dict[str, _PoolEntry] = {}
+        # 已借出实例 id -> (指纹, 策略)
+        self._leases: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "shared_hits": 0, "recycled_hits": 0, "evicted": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.options.get("enable", True))
+
+    def acquire(
+        self,
+        key: str,
+        factory: Callable[[], Any],
+        policy: Callable[[Any], str],
+    ) -> Any:
+        """按指纹获取实例
+
+        Args:
+            key: 配置指纹
+            factory: 创建新实例
+            policy: 根据实例返回 SHARED / RECYCLED / EXCLUSIVE
+        """
+        self._evict_idle()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _PoolEntry(key)
+            # 刷新使用时间，避免在创建或复用期间被淘汰
+            entry.last_used = time.monotonic()
+
+        with entry.lock:
+            if entry.policy == SHARED and entry.shared is not None:
+                instance = entry.shared
+                hit = "shared_hits"
+            elif entry.policy == RECYCLED and entry.idle:
+                instance, _ = entry.idle.pop()
+                hit = "recycled_hits"
+            else:
+                instance = factory()
+                hit = "created"
+                if entry.policy is None:
+                    entry.policy = policy(instance)
+                if entry.policy == SHARED:
+                    entry.shared = instance
+
+            with self._lock:
+                self.stats[hit] += 1
+                if entry.policy == EXCLUSIVE:
+                    return instance
+                entry.refs += 1
+                entry.last_used = time.monotonic()
+                self._leases[id(instance)] = (key, entry.policy)
+        return instance
+
+    def release(self, instance: Any):
+        """连接结束时归还实例，共享实例减少引用，回收实例重置后放回空闲列表"""
+        if instance is None:
+            return
+        with self._lock:
+            lease = self._leases.get(id(instance))
+            if lease is None:
+                return
+            key, policy = lease
+            entry = self._entries.get(key)
+            if entry is None:
+                self._leases.pop(id(instance), None)
+                return
+            entry.refs -= 1
+            entry.last_used = time.monotonic()
+            if policy == SHARED:
+                return
+            self._leases.pop(id(instance), None)
+            dispose = len(entry.idle) >= self.options["max_idle_per_key"]
+
+        if dispose or not self._reset(instance):
+            self._dispose(instance)
+            return
+        with self._lock:
+            entry.idle.append((instance, time.monotonic()))
+
+    def _reset(self, instance: Any) -> bool:
+        try:
+            instance.reset()
+            return True
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"重置回收实例失败，直接丢弃: {e}")
+            return False
+
+    def _evict_idle(self):
+        """淘汰空闲超时的实例，在获取实例时顺带执行"""
+        now = time.monotonic()
+        idle_timeout = self.options["idle_timeout"]
+        expired = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.lock.locked():
+                    continue
+                keep = []
+                for instance, released_at in entry.idle:
+                    if now - released_at > idle_timeout:
+                        expired.append(instance)
+                    else:
+                        keep.append((instance, released_at))
+                entry.idle = keep
+                if entry.refs <= 0 and now - entry.last_used > idle_timeout:
+                    if entry.shared is not None:
+                        self._leases.pop(id(entry.shared), None)
+                        expired.append(entry.shared)
+                        entry.shared = None
+                    if not entry.idle:
+                        del self._entries[key]
+            self.stats["evicted"] += len(expired)
+        for instance in expired:
+            self._dispose(instance)
+
+    @staticmethod
+    def _dispose(instance: Any):
+        close = getattr(instance, "close", None)
+        if close is None:
+            return
+        try:
+            result = close()
+            if asyncio.iscoroutine(result):
+                try:
+                    asyncio.get_running_loop().create_task(result)
+                except RuntimeError:
+                    asyncio.run(result)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"关闭淘汰的组件实例失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["keys"] = len(self._entries)
+            stats["in_use"] = sum(entry.refs for entry in self._entries.values())
+            stats["idle"] = sum(len(entry.idle) for entry in self._entries.values())
+        return stats
+
+    def clear(self):
+        """关闭所有空闲实例，服务停止时调用"""
+        with self._lock:
+            instances = []
+            for entry in self._entries.values():
+                instances.extend(instance for instance, _ in entry.idle)
+                if entry.shared is not None:
+                    instances.append(entry.shared)
+            self._entries.clear()
+            self._leases.clear()
+        for instance in instances:
+            self._dispose(instance)
+
+    def initialize_modules(
+        self,
+        logger,
+        config: Dict[str, Any],
+        init_vad=False,
+        init_asr=False,
+        init_llm=False,
+        init_tts=False,
+        init_memory=False,
+        init_intent=False,
+    ) -> Dict[str, Any]:
+        """与 modules_initialize.initialize_modules 相同，但相同配置的组件从实例池获取"""
+        modules = {}
+        if init_tts:
+            # TTS 持有连接的音频队列与发送线程，每个连接独立创建
+            modules["tts"] = initialize_tts(config)
+            logger.bind(tag=TAG).info(
+                f"初始化组件: tts成功 {config['selected_module']['TTS']}"
+            )
+
+        if init_llm:
+            modules["llm"] = self.acquire_llm(config, config["selected_module"]["LLM"])
+            logger.bind(tag=TAG).info(
+                f"初始化组件: llm成功 {config['selected_module']['LLM']}"
+            )
+
+        if init_intent:
+            name = config["selected_module"]["Intent"]
+            intent_config = config["Intent"][name]
+            # 意图识别会绑定LLM，LLM配置不同的连接不能共享同一个实例
+            llm_name = intent_config.get("llm")
+            related_llm = [
+                config.get("LLM", {}).get(config["selected_module"].get("LLM")),
+                config.get("LLM", {}).get(llm_name) if llm_name else None,
+            ]
+            modules["intent"] = self.acquire(
+                config_fingerprint("intent", intent_config, related_llm),
+                lambda: intent.create_instance(
+                    _module_type(config, "Intent"), intent_config
+                ),
+                lambda _: SHARED,
+            )
+            logger.bind(tag=TAG).info(f"初始化组件: intent成功 {name}")
+
+        if init_memory:
+            name = config["selected_module"]["Memory"]
+            memory_config = config["Memory"][name]
+            memory_type = _module_type(config, "Memory")
+            modules["memory"] = self.acquire(
+                # 总结记忆按设备区分，在 init_memory 时传入，不参与指纹计算
+                config_fingerprint("memory", memory_config),
+                lambda: memory.create_instance(
+                    memory_type, memory_config, config.get("summaryMemory", None)
+                ),
+                lambda instance: SHARED
+                if memory_type == "nomem"
+                else RECYCLED
+                if hasattr(instance, "reset")
+                else EXCLUSIVE,
+            )
+            logger.bind(tag=TAG).info(f"初始化组件: memory成功 {name}")
+
+        if init_vad:
+            name = config["selected_module"]["VAD"]
+            vad_config = config["VAD"][name]
+            modules["vad"] = self.acquire(
+                config_fingerprint("vad", vad_config),
+                lambda: vad.create_instance(_module_type(config, "VAD"), vad_config),
+                lambda _: SHARED,
+            )
+            logger.bind(tag=TAG).info(f"初始化组件: vad成功 {name}")
+
+        if init_asr:
+            name = config["selected_module"]["ASR"]
+            modules["asr"] = self.acquire(
+                config_fingerprint(
+                    "asr", config["ASR"][name], config.get("delete_audio", True)
+                ),
+                lambda: initialize_asr(config),
+                # 流式ASR每个连接维护独立的识别会话，不能共享
+                lambda instance: EXCLUSIVE
+                if getattr(instance, "interface_type", None) == InterfaceType.STREAM
+                else SHARED,
+            )
+            logger.bind(tag=TAG).info(f"初始化组件: asr成功 {name}")
+        return modules
+
+    def acquire_llm(self, config: Dict[str, Any], llm_name: str) -> Any:
+        """获取指定名称的LLM实例，LLM按会话ID调用，可在连接间共享"""
+        llm_config = config["LLM"][llm_name]
+        return self.acquire(
+            config_fingerprint("llm", llm_config),
+            lambda: llm.create_instance(llm_config.get("type", llm_name), llm_config),
+            lambda _: SHARED,
+        )
+
+
+# 全局单例
+_provider_pool: Optional[ProviderPool] = None
+_provider_pool_lock = threading.Lock()
+
+
+def get_provider_pool() -> ProviderPool:
+    """获取全局组件实例池（单例模式）"""
+    global _provider_pool
+    if _provider_pool is not None:
+        return _provider_pool
+
+    with _provider_pool_lock:
+        if _provider_pool is None:
+            from config.config_loader import load_config
+
+            _provider_pool = ProviderPool(load_config().get("provider_pool"))
+    return _provider_pool
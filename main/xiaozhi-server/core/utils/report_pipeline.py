@@ -0,0 +1,433 @@
+"""
+聊天记录批量上报管道
+
+所有连接共享一个上报线程：
+1. 上报数据以原始opus帧缓存在内存中，发送前才转换为智控台需要的WAV
+2. 按条数、字节数或时间间隔合批，一次HTTP请求上报多条记录
+3. 内存缓冲超过上限时写入磁盘队列，缓冲消化后再读回发送
+4. 网络错误按指数退避加随机抖动重试，多次失败后写入磁盘稍后再试
+"""
+
+import os
+import json
+import time
+import random
+import struct
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from config.logger import setup_logging
+from config.manage_api_client import PartialReportError
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_OPTIONS = {
+    # 单批最多上报的记录数
+    "max_batch_size": 32,
+    # 单批缓存的opus音频字节数上限
+    "max_batch_bytes": 256 * 1024,
+    # 不满一批时的最长等待时间（秒）
+    "flush_interval": 1.0,
+    # 内存缓冲上限，超过后写入磁盘队列
+    "max_memory_bytes": 16 * 1024 * 1024,
+    # 磁盘队列目录与大小上限
+    "spool_dir": "tmp/report_spool",
+    "max_spool_bytes": 512 * 1024 * 1024,
+    # 重试次数与退避时间（秒）
+    "max_retries": 5,
+    "retry_base_delay": 0.5,
+    "retry_max_delay": 30,
+}
+
+# 每条记录除音频外的估算开销（字节）
+RECORD_OVERHEAD = 256
+
+
+class ReportRecord:
+    """一条待上报的聊天记录，音频保持为opus帧"""
+
+    __slots__ = (
+        "mac_address",
+        "session_id",
+        "chat_type",
+        "content",
+        "opus_frames",
+        "report_time",
+        "size",
+    )
+
+    def __init__(
+        self,
+        mac_address: str,
+        session_id: str,
+        chat_type: int,
+        content: str,
+        opus_frames: Optional[List[bytes]],
+        report_time: int,
+    ):
+        self.mac_address = mac_address
+        self.session_id = session_id
+        self.chat_type = chat_type
+        self.content = content
+        self.opus_frames = list(opus_frames) if opus_frames else []
+        self.report_time = report_time
+        self.size = RECORD_OVERHEAD + len(content.encode("utf-8")) + sum(
+            len(frame) for frame in self.opus_frames
+        )
+
+    def header(self) -> Dict[str, Any]:
+        return {
+            "macAddress": self.mac_address,
+            "sessionId": self.session_id,
+            "chatType": self.chat_type,
+            "content": self.content,
+            "reportTime": self.report_time,
+        }
+
+    def dump(self) -> bytes:
+        """序列化为 头部长度 + JSON头部 + 帧数 + (帧长度 + 帧)..."""
+        header = json.dumps(self.header(), ensure_ascii=False).encode("utf-8")
+        parts = [struct.pack(">I", len(header)), header]
+        parts.append(struct.pack(">I", len(self.opus_frames)))
+        for frame in self.opus_frames:
+            parts.append(struct.pack(">H", len(frame)))
+            parts.append(frame)
+        return b"".join(parts)
+
+    @classmethod
+    def load_all(cls, data: bytes) -> List["ReportRecord"]:
+        records = []
+        offset = 0
+        while offset < len(data):
+            (header_len,) = struct.unpack_from(">I", data, offset)
+            offset += 4
+            header = json.loads(data[offset : offset + header_len].decode("utf-8"))
+            offset += header_len
+            (frame_count,) = struct.unpack_from(">I", data, offset)
+            offset += 4
+            frames = []
+            for _ in range(frame_count):
+                (frame_len,) = struct.unpack_from(">H", data, offset)
+                offset += 2
+                frames.append(data[offset : offset + frame_len])
+                offset += frame_len
+            records.append(
+                cls(
+                    header["macAddress"],
+                    header["sessionId"],
+                    header["chatType"],
+                    header["content"],
+                    frames,
+                    header["reportTime"],
+                )
+            )
+        return records
+
+
+class ReportPipeline:
+    """进程级共享的聊天记录批量上报管道"""
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None, sender=None):
+        """
+        Args:
+            options: 见 DEFAULT_OPTIONS
+            sender: async sender(records) 发送一批记录，默认通过 manager-api 上报
+        """
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update({k: v for k, v in (options or {}).items() if v is not None})
+        self._sender = sender or send_to_manager
+
+        self._buffer = deque()
+        self._buffer_bytes = 0
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._spool_dir = self.options["spool_dir"]
+        self._spool_seq = 0
+        self._spool_bytes = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.stats = {
+            "submitted": 0,
+            "sent": 0,
+            "batches": 0,
+            "retries": 0,
+            "spilled": 0,
+            "dropped": 0,
+        }
+
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(self._spool_dir, exist_ok=True)
+        self._spool_bytes = sum(size for _, size in self._spool_files())
+        self._thread = threading.Thread(
+            target=self._run, name="report-pipeline", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        mac_address: str,
+        session_id: str,
+        chat_type: int,
+        content: str,
+        opus_frames: Optional[List[bytes]],
+        report_time: int,
+    ):
+        """加入上报缓冲，线程安全，不阻塞调用方"""
+        if not content or self._closed:
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self.start()
+        record = ReportRecord(
+            mac_address, session_id, chat_type, content, opus_frames, report_time
+        )
+        with self._lock:
+            self.stats["submitted"] += 1
+            if self._buffer_bytes + record.size > self.options["max_memory_bytes"]:
+                # 背压：内存缓冲已满，写入磁盘队列
+                self._spill([record])
+                return
+            self._buffer.append(record)
+            self._buffer_bytes += record.size
+            ready = (
+                len(self._buffer) >= self.options["max_batch_size"]
+                or self._buffer_bytes >= self.options["max_batch_bytes"]
+            )
+        if ready:
+            self._notify()
+
+    def _notify(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass
+
+    def _take_batch(self) -> List[ReportRecord]:
+        batch = []
+        batch_bytes = 0
+        with self._lock:
+            while self._buffer and len(batch) < self.options["max_batch_size"]:
+                record = self._buffer[0]
+                if batch and batch_bytes + record.size > self.options["max_batch_bytes"]:
+                    break
+                self._buffer.popleft()
+                self._buffer_bytes -= record.size
+                batch.append(record)
+                batch_bytes += record.size
+        return batch
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._wakeup = asyncio.Event()
+        self._loop = loop
+        try:
+            loop.run_until_complete(self._flush_loop())
+        finally:
+            self._loop = None
+            loop.close()
+
+    async def _flush_loop(self):
+        while True:
+            # 等待凑满一批或到达刷新间隔
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), self.options["flush_interval"]
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            while True:
+                if not self._buffer and not self._closed:
+                    self._load_spool()
+                batch = self._take_batch()
+                if not batch:
+                    break
+                if not await self._send_with_retry(batch):
+                    # 管理端不可用，剩余数据等下一轮再试
+                    break
+            if self._closed:
+                break
+
+    async def _send_with_retry(self, batch: List[ReportRecord]) -> bool:
+        delay = self.options["retry_base_delay"]
+        for attempt in range(self.options["max_retries"] + 1):
+            try:
+                await self._sender(batch)
+                self.stats["sent"] += len(batch)
+                self.stats["batches"] += 1
+                return True
+            except PartialReportError as e:
+                # 逐条上报部分成功：成功的记录计为已发送，不可重试的丢弃，只重试其余记录
+                retry = [batch[i] for i, error in e.failures if is_retryable(error)]
+                dropped = len(e.failures) - len(retry)
+                self.stats["sent"] += len(batch) - len(e.failures)
+                self.stats["batches"] += 1
+                if dropped:
+                    self.stats["dropped"] += dropped
+                    logger.bind(tag=TAG).error(
+                        f"聊天记录上报失败，已丢弃{dropped}条: {e}"
+                    )
+                if not retry:
+                    return True
+                batch = retry
+                if attempt >= self.options["max_retries"] or self._closed:
+                    break
+                self.stats["retries"] += 1
+                sleep = random.uniform(0, min(self.options["retry_max_delay"], delay))
+                delay *= 2
+                logger.bind(tag=TAG).warning(
+                    f"{len(batch)}条聊天记录上报失败，{sleep:.1f}秒后重试（{attempt + 1}/"
+                    f"{self.options['max_retries']}）: {e}"
+                )
+                await asyncio.sleep(sleep)
+            except Exception as e:
+                if not is_retryable(e):
+                    # 批量接口失败时 sender 已用逐条接口重试过，这里仍失败才丢弃
+                    self.stats["dropped"] += len(batch)
+                    logger.bind(tag=TAG).error(f"聊天记录上报失败，已丢弃{len(batch)}条: {e}")
+                    return True
+                if attempt >= self.options["max_retries"] or self._closed:
+                    break
+                self.stats["retries"] += 1
+                # 指数退避 + 全随机抖动，避免多个服务实例同时重试
+                sleep = random.uniform(0, min(self.options["retry_max_delay"], delay))
+                delay *= 2
+                logger.bind(tag=TAG).warning(
+                    f"聊天记录上报失败，{sleep:.1f}秒后重试（{attempt + 1}/"
+                    f"{self.options['max_retries']}）: {e}"
+                )
+                await asyncio.sleep(sleep)
+
+        with self._lock:
+            self._spill(batch)
+        return False
+
+    def _spool_files(self):
+        try:
+            names = sorted(n for n in os.listdir(self._spool_dir) if n.endswith(".spool"))
+        except FileNotFoundError:
+            return []
+        files = []
+        for name in names:
+            path = os.path.join(self._spool_dir, name)
+            try:
+                files.append((path, os.path.getsize(path)))
+            except OSError:
+                continue
+        return files
+
+    def _spill(self, records: List[ReportRecord]):
+        """写入磁盘队列，调用方需持有 self._lock"""
+        data = b"".join(record.dump() for record in records)
+        if self._spool_bytes + len(data) > self.options["max_spool_bytes"]:
+            self.stats["dropped"] += len(records)
+            logger.bind(tag=TAG).error(
+                f"上报磁盘队列已满，丢弃{len(records)}条聊天记录"
+            )
+            return
+        self._spool_seq += 1
+        path = os.path.join(
+            self._spool_dir, f"{time.time_ns():020d}-{self._spool_seq:06d}.spool"
+        )
+        try:
+            os.makedirs(self._spool_dir, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+            self._spool_bytes += len(data)
+            self.stats["spilled"] += len(records)
+        except OSError as e:
+            self.stats["dropped"] += len(records)
+            logger.bind(tag=TAG).error(f"写入上报磁盘队列失败: {e}")
+
+    def _load_spool(self):
+        """内存缓冲为空时，从磁盘队列读回最早的数据"""
+        for path, size in self._spool_files():
+            with self._lock:
+                if self._buffer_bytes >= self.options["max_memory_bytes"] // 2:
+                    return
+            try:
+                with open(path, "rb") as f:
+                    records = ReportRecord.load_all(f.read())
+                os.remove(path)
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"读取上报磁盘队列失败: {path}, {e}")
+                continue
+            with self._lock:
+                self._spool_bytes -= size
+                for record in records:
+                    self._buffer.append(record)
+                    self._buffer_bytes += record.size
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["buffered"] = len(self._buffer)
+            stats["buffered_bytes"] = self._buffer_bytes
+            stats["spool_bytes"] = self._spool_bytes
+        return stats
+
+    def close(self, timeout: float = 5.0):
+        """尽量发送剩余数据，未发送完的写入磁盘队列，下次启动后继续上报"""
+        if self._closed:
+            return
+        self._closed = True
+        self._notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._lock:
+            if self._buffer:
+                self._spill(list(self._buffer))
+                self._buffer.clear()
+                self._buffer_bytes = 0
+
+
+def is_retryable(exception: Exception) -> bool:
+    from config.manage_api_client import ManageApiClient
+
+    return ManageApiClient._should_retry(exception)
+
+
+async def send_to_manager(records: List[ReportRecord]):
+    """通过 manager-api 批量上报，音频在发送时转换为WAV"""
+    from config.manage_api_client import report_batch
+    from core.handle.reportHandle import opus_to_wav
+
+    reports = []
+    for record in records:
+        item = record.header()
+        item["audio"] = opus_to_wav(record.opus_frames) if record.opus_frames else None
+        reports.append(item)
+    await report_batch(reports)
+
+
+# 全局单例
+_report_pipeline: Optional[ReportPipeline] = None
+_report_pipeline_lock = threading.Lock()
+
+
+def get_report_pipeline() -> ReportPipeline:
+    """获取全局聊天记录上报管道（单例模式）"""
+    global _report_pipeline
+    if _report_pipeline is not None:
+        return _report_pipeline
+
+    with _report_pipeline_lock:
+        if _report_pipeline is None:
+            from config.config_loader import load_config
+
+            _report_pipeline = ReportPipeline(load_config().get("report_pipeline"))
+    return _report_pipeline
@@ -0,0 +1,209 @@
+"""
+LLM输出到TTS的增量断句
+
+旧实现每收到一个token都把全部已输出文本重新拼接，再对未处理部分逐个标点 rfind，
+耗时随回复长度平方增长。这里只保存尚未切出的文本，并记录扫描位置，每个token只扫描新增字符：
+1. 首句使用更宽松的标点（逗号、顿号等），并可在累计一定字数后提前切出，让首个TTS请求尽早发出
+2. 英文句号、逗号结合前后字符判断：小数、千分位、网址、文件名、常见缩写、列表序号不断句
+3. 换行视为断句点（markdown 标题、列表项），代码块和表格整体保留，交给 MarkdownCleaner 处理
+"""
+
+import threading
+from typing import Any, Dict, List, Optional
+
+DEFAULT_OPTIONS = {
+    # 首句断句标点
+    "first_chunk_punctuations": "，,、~。？?！!；;：.\n",
+    # 后续句子断句标点
+    "punctuations": "。？?！!；;：.\n",
+    # 首句累计到该字数仍无标点时提前切出，0 表示不启用
+    "first_chunk_max_chars": 30,
+}
+
+# 需要结合前后字符判断的英文标点
+_ASCII_PUNCTUATIONS = (".", ",")
+# 句号后可以紧跟的收尾字符
+_CLOSING_CHARS = ")]}\"'*_"
+# 以句号结尾但不是句子结束的常见缩写
+ABBREVIATIONS = frozenset(
+    {
+        "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc",
+        "e.g", "i.e", "fig", "inc", "ltd", "jan", "feb", "mar",
+        "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+        "a.m", "p.m", "u.s",
+    }
+)
+_FENCE = "```"
+
+
+class SentenceSegmenter:
+    """增量断句器，每个TTS实例一个，一轮对话开始时 reset"""
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update({k: v for k, v in (options or {}).items() if v is not None})
+        self.first_punctuations = frozenset(self.options["first_chunk_punctuations"])
+        self.punctuations = frozenset(self.options["punctuations"])
+        self.first_chunk_max_chars = int(self.options["first_chunk_max_chars"] or 0)
+        self.reset()
+
+    def reset(self):
+        # 尚未切出的文本及其中下一个待扫描的位置
+        self._pending = ""
+        self._scan_pos = 0
+        # 上一个切出片段的最后一个字符，用于判断行首
+        self._last_char = ""
+        self._in_code = False
+        self._in_table = False
+        self.is_first = True
+
+    def feed(self, text: str) -> List[str]:
+        """追加LLM输出的文本，返回本次新切出的片段（保留原始标点）"""
+        if not text:
+            return []
+        self._pending += text
+        segments = []
+        pending = self._pending
+        i = self._scan_pos
+        while i < len(pending):
+            if pending.startswith(_FENCE, i):
+                self._in_code = not self._in_code
+                i += len(_FENCE)
+                continue
+            if pending[i] == "`" and _FENCE.startswith(pending[i:]):
+                # 可能是未输出完整的代码块标记，等待后续文本
+                break
+            boundary = self._is_boundary(pending, i)
+            if boundary is None:
+                break
+            if boundary:
+                segments.append(self._cut(i + 1))
+                pending = self._pending
+                i = 0
+                continue
+            i += 1
+        self._scan_pos = i
+
+        if (
+            self.is_first
+            and self.first_chunk_max_chars
+            and len(self._pending) >= self.first_chunk_max_chars
+            and not (self._in_code or self._in_table)
+        ):
+            segments.append(self._cut(self._soft_cut_pos(self._pending)))
+        return segments
+
+    def flush(self) -> str:
+        """取出剩余的全部文本，本轮对话结束时调用"""
+        remaining = self._pending
+        self._pending = ""
+        self._scan_pos = 0
+        self._in_code = False
+        self._in_table = False
+        if remaining:
+            self._last_char = remaining[-1]
+        return remaining
+
+    def _cut(self, end: int) -> str:
+        segment = self._pending[:end]
+        self._pending = self._pending[end:]
+        self._scan_pos = max(0, self._scan_pos - end)
+        self._last_char = segment[-1]
+        self.is_first = False
+        return segment
+
+    def _at_line_start(self, text: str, pos: int) -> bool:
+        prev = text[pos - 1] if pos > 0 else self._last_char
+        return prev in ("", "\n")
+
+    def _is_boundary(self, text: str, i: int) -> Optional[bool]:
+        """判断位置 i 是否为断句点，需要后续字符才能判断时返回 None"""
+        if self._in_code:
+            return False
+        char = text[i]
+        if self._in_table:
+            if char != "\n":
+                return False
+            if i + 1 >= len(text):
+                return None
+            if text[i + 1] == "|":
+                return False
+            self._in_table = False
+            return True
+        if char == "|" and self._at_line_start(text, i):
+            self._in_table = True
+            return False
+
+        punctuations = self.first_punctuations if self.is_first else self.punctuations
+        if char not in punctuations:
+            return False
+        if char == "\n":
+            return not text[:i].isspace() and i > 0
+        if char not in _ASCII_PUNCTUATIONS:
+            return True
+
+        if i + 1 >= len(text):
+            return None
+        prev = text[i - 1] if i > 0 else ""
+        nxt = text[i + 1]
+        # 小数、千分位
+        if prev.isdigit() and nxt.isdigit():
+            return False
+        if char == ",":
+            return True
+        # 省略号在最后一个点处判断
+        if nxt == ".":
+            return False
+        # 网址、文件名、e.g 中间的点
+        if nxt.isascii() and not nxt.isspace() and nxt not in _CLOSING_CHARS:
+            return False
+        word = self._word_before(text, i)
+        if word.lower() in ABBREVIATIONS or (len(word) == 1 and word.isupper()):
+            return False
+        # 列表序号 "1. "
+        if word.isdigit() and self._at_line_start(text, i - len(word)):
+            return False
+        return True
+
+    @staticmethod
+    def _word_before(text: str, end: int) -> str:
+        start = end
+        while start > 0 and (
+            text[start - 1].isascii() and (text[start - 1].isalnum() or text[start - 1] == ".")
+        ):
+            start -= 1
+        return text[start:end]
+
+    def _soft_cut_pos(self, text: str) -> int:
+        """首句过长时的切分位置：优先在空白处，不切断英文单词和数字"""
+        limit = self.first_chunk_max_chars
+        space = text.rfind(" ", limit // 2, limit)
+        if space != -1:
+            return space + 1
+        pos = limit
+        while (
+            pos > limit // 2
+            and pos < len(text)
+            and text[pos].isascii()
+            and text[pos].isalnum()
+            and text[pos - 1].isascii()
+            and text[pos - 1].isalnum()
+        ):
+            pos -= 1
+        return pos
+
+
+_options: Optional[Dict[str, Any]] = None
+_options_lock = threading.Lock()
+
+
+def create_segmenter() -> SentenceSegmenter:
+    """按配置文件的 tts_segmenter 配置创建断句器"""
+    global _options
+    if _options is None:
+        with _options_lock:
+            if _options is None:
+                from config.config_loader import load_config
+
+                _options = load_config().get("tts_segmenter") or {}
+    return SentenceSegmenter(_options)
@@ -0,0 +1,130 @@
+"""
+对话上下文的token计数
+
+LLM上下文按token预算截断，计数只在本地进行，不请求服务端：
+- simple：按字符估算，中日韩字符每字1个token，其余字符每4个1个token，无需额外依赖
+- tiktoken：OpenAI 的 BPE 分词（需要安装 tiktoken），encoding 指定编码名称
+- huggingface：本地 tokenizer.json（需要安装 tokenizers），path 指定文件路径，
+  适合 Qwen、GLM 等开源模型
+
+可选依赖缺失或加载失败时退回 simple，只影响计数精度，不影响对话
+"""
+
+import re
+import math
+import threading
+from typing import Callable, Dict, Optional
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 每条消息的格式开销（角色、分隔符等）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_CJK_PATTERN = re.compile(
+    r"[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]"
+)
+
+
+class SimpleTokenizer:
+    """按字符估算token数"""
+
+    name = "simple"
+
+    def __init__(self, options: Optional[Dict] = None):
+        pass
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        cjk = len(_CJK_PATTERN.findall(text))
+        return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+class TiktokenTokenizer:
+    name = "tiktoken"
+
+    def __init__(self, options: Optional[Dict] = None):
+        import tiktoken
+
+        encoding = (options or {}).get("encoding") or "cl100k_base"
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+class HuggingFaceTokenizer:
+    name = "huggingface"
+
+    def __init__(self, options: Optional[Dict] = None):
+        from tokenizers import Tokenizer
+
+        path = (options or {}).get("path")
+        if not path:
+            raise ValueError("huggingface 分词器需要配置 path（tokenizer.json 路径）")
+        self._tokenizer = Tokenizer.from_file(path)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+TOKENIZERS: Dict[str, Callable] = {
+    SimpleTokenizer.name: SimpleTokenizer,
+    TiktokenTokenizer.name: TiktokenTokenizer,
+    HuggingFaceTokenizer.name: HuggingFaceTokenizer,
+}
+
+# 分词器加载较慢，相同配置的连接共用一个实例
+_tokenizers: Dict[tuple, object] = {}
+_tokenizers_lock = threading.Lock()
+
+
+def register_tokenizer(name: str, factory: Callable):
+    """注册自定义分词器，factory 接收配置字典，返回带 count(text) 方法的对象"""
+    TOKENIZERS[name] = factory
+
+
+def get_tokenizer(options: Optional[Dict] = None):
+    """按配置获取分词器，options 为 {"type": ..., 其他参数}"""
+    options = options or {}
+    name = options.get("type") or SimpleTokenizer.name
+    key = (name, tuple(sorted((k, str(v)) for k, v in options.items())))
+    tokenizer = _tokenizers.get(key)
+    if tokenizer is not None:
+        return tokenizer
+
+    with _tokenizers_lock:
+        tokenizer = _tokenizers.get(key)
+        if tokenizer is None:
+            factory = TOKENIZERS.get(name)
+            try:
+                if factory is None:
+                    raise ValueError(f"未知的分词器类型: {name}")
+                tokenizer = factory(options)
+            except Exception as e:
+                logger.bind(tag=TAG).warning(f"加载分词器 {name} 失败，使用字符估算: {e}")
+                tokenizer = SimpleTokenizer()
+            _tokenizers[key] = tokenizer
+    return tokenizer
+
+
+def count_message_tokens(tokenizer, message: Dict) -> int:
+    """估算一条 OpenAI 格式消息的token数"""
+    tokens = MESSAGE_OVERHEAD_TOKENS
+    content = message.get("content")
+    if content:
+        tokens += tokenizer.count(content if isinstance(content, str) else str(content))
+    tool_calls = message.get("tool_calls")
+    if tool_calls:
+        for tool_call in tool_calls:
+            function = tool_call.get("function", {}) if isinstance(tool_call, dict) else {}
+            tokens += tokenizer.count(function.get("name") or "")
+            tokens += tokenizer.count(function.get("arguments") or "")
+    return tokens
@@ -0,0 +1,173 @@
+"""
+非流式TTS的常驻事件循环与共享HTTP客户端
+
+旧实现每合成一句话都 asyncio.run 新建并销毁一个事件循环，提供方内部再用 requests 同步请求，
+句与句之间无法复用TCP/TLS连接。这里改为：
+1. 进程内一个常驻的TTS事件循环线程，合成线程把协程提交过去并等待结果
+2. 每个服务地址（协议+主机+端口）一个共享的 httpx.AsyncClient，保持长连接，
+   按主机限制并发连接数；安装了 h2 时启用 HTTP/2，同一连接上多路复用
+"""
+
+import asyncio
+import threading
+import concurrent.futures
+import importlib.util
+from urllib.parse import urlsplit
+from typing import Any, Dict, Optional
+
+import httpx
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_OPTIONS = {
+    # 每个服务地址的最大并发连接数
+    "max_connections_per_host": 32,
+    # 空闲长连接保留时间（秒），应小于服务端的空闲超时，避免复用已被关闭的连接
+    "keepalive_expiry": 15,
+    # 请求超时时间（秒）
+    "timeout": 60,
+    "connect_timeout": 10,
+    # 服务端支持时使用 HTTP/2（需要安装 h2）
+    "http2": True,
+}
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def legacy_query_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """按 requests 的方式处理查询参数：忽略 None，布尔值转为 True/False"""
+    result = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = str(value)
+        result[key] = value
+    return result
+
+
+class TTSHttpRuntime:
+    """常驻TTS事件循环及其上的共享HTTP客户端"""
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update({k: v for k, v in (options or {}).items() if v is not None})
+        self.http2 = bool(self.options["http2"]) and (
+            importlib.util.find_spec("h2") is not None
+        )
+        self._clients: Dict[tuple, httpx.AsyncClient] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None:
+            return self._loop
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=loop.run_forever, name="tts-loop", daemon=True
+                )
+                self._thread.start()
+                self._loop = loop
+        return self._loop
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """把协程提交到常驻事件循环，不等待结果"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """在常驻事件循环中执行协程并等待结果，供TTS合成线程调用"""
+        self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("不能在TTS事件循环线程中同步等待协程")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """获取服务地址对应的共享客户端
+
+        客户端的连接池绑定事件循环，按事件循环区分；合成时都运行在常驻TTS事件循环上，
+        直接在其他事件循环中调用 text_to_speak（如性能测试）时会单独创建客户端
+        """
+        key = (id(asyncio.get_running_loop()), _host_key(url))
+        client = self._clients.get(key)
+        if client is None:
+            limits = httpx.Limits(
+                max_connections=int(self.options["max_connections_per_host"]),
+                max_keepalive_connections=int(self.options["max_connections_per_host"]),
+                keepalive_expiry=float(self.options["keepalive_expiry"]),
+            )
+            timeout = httpx.Timeout(
+                float(self.options["timeout"]),
+                connect=float(self.options["connect_timeout"]),
+            )
+            client = httpx.AsyncClient(limits=limits, timeout=timeout, http2=self.http2)
+            self._clients[key] = client
+            logger.bind(tag=TAG).debug(
+                f"创建TTS共享HTTP客户端: {key[1]}, http2={self.http2}"
+            )
+        return client
+
+    async def _close_clients(self):
+        loop_id = id(asyncio.get_running_loop())
+        clients = [c for key, c in self._clients.items() if key[0] == loop_id]
+        self._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.bind(tag=TAG).warning(f"关闭TTS HTTP客户端失败: {e}")
+
+    def close(self, timeout: float = 5.0):
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_clients(), loop).result(timeout)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"关闭TTS HTTP客户端超时: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._loop = None
+        self._thread = None
+
+
+# 全局单例
+_runtime: Optional[TTSHttpRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_tts_http_runtime() -> TTSHttpRuntime:
+    """获取全局TTS事件循环与HTTP客户端（单例模式）"""
+    global _runtime
+    if _runtime is not None:
+        return _runtime
+
+    with _runtime_lock:
+        if _runtime is None:
+            from config.config_loader import load_config
+
+            _runtime = TTSHttpRuntime(load_config().get("tts_http"))
+    return _runtime
+
+
+def get_tts_http_client(url: str) -> httpx.AsyncClient:
+    return get_tts_http_runtime().get_client(url)
+
+
+def close_tts_http_runtime():
+    if _runtime is not None:
+        _runtime.close()
@@ -7,11 +7,12 @@ import socket
 import asyncio
 import requests
 import subprocess
-import numpy as np
 import opuslib_next
 from io import BytesIO
 from core.utils import p3
-from pydub import AudioSegment
+from core.utils.audio_stream import decode_audio_stream
+from core.utils.audio_assets import get_audio_asset_bundle
+from core.utils.opus_encoder_utils import OpusEncoderUtils
 from typing import Callable, Any
 
 TAG = __name__
@@ -233,17 +234,17 @@ def audio_to_data_stream(
     file_type = os.path.splitext(audio_file_path)[1]
     if file_type:
         file_type = file_type.lstrip(".")
-    # 读取音频文件，-nostdin 参数：不要从标准输入读取数据，否则FFmpeg会阻塞
-    audio = AudioSegment.from_file(
-        audio_file_path, format=file_type, parameters=["-nostdin"]
-    )
+    # 分块读取并增量解码，wav/mp3 不再整段交给 ffmpeg 处理
+    decode_audio_stream(_read_file_chunks(audio_file_path), file_type, is_opus, callback)
 
-    # 转换为单声道/16kHz采样率/16位小端编码（确保与编码器匹配）
-    audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
 
-    # 获取原始PCM数据（16位小端）
-    raw_data = audio.raw_data
-    pcm_to_data_stream(raw_data, is_opus, callback)
+def _read_file_chunks(file_path, chunk_size=64 * 1024):
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
 
 
 async def audio_to_data(
@@ -259,6 +260,16 @@ async def audio_to_data(
     from core.utils.cache.manager import cache_manager
     from core.utils.cache.config import CacheType
 
+    if is_opus:
+        # 提示音等固定资源直接使用预编码的opus数据包，源文件变化时重新编码
+        bundle = get_audio_asset_bundle()
+        packets = bundle.lookup(audio_file_path)
+        if packets is None and bundle.enabled:
+            loop = asyncio.get_running_loop()
+            packets = await loop.run_in_executor(None, bundle.get, audio_file_path)
+        if packets is not None:
+            return packets
+
     # 生成缓存键，包含文件路径和编码类型
     cache_key = f"{audio_file_path}:{is_opus}"
 
@@ -273,44 +284,12 @@ async def audio_to_data(
         file_type = os.path.splitext(audio_file_path)[1]
         if file_type:
             file_type = file_type.lstrip(".")
-        # 读取音频文件，-nostdin 参数：不要从标准输入读取数据，否则FFmpeg会阻塞
-        audio = AudioSegment.from_file(
-            audio_file_path, format=file_type, parameters=["-nostdin"]
-        )
-
-        # 转换为单声道/16kHz采样率/16位小端编码（确保与编码器匹配）
-        audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
-
-        # 获取原始PCM数据（16位小端）
-        raw_data = audio.raw_data
-
-        # 初始化Opus编码器
-        encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
-
-        # 编码参数
-        frame_duration = 60  # 60ms per frame
-        frame_size = int(16000 * frame_duration / 1000)  # 960 samples/frame
 
         datas = []
-        # 按帧处理所有音频数据（包括最后一帧可能补零）
-        for i in range(0, len(raw_data), frame_size * 2):  # 16bit=2bytes/sample
-            # 获取当前帧的二进制数据
-            chunk = raw_data[i : i + frame_size * 2]
-
-            # 如果最后一帧不足，补零
-            if len(chunk) < frame_size * 2:
-                chunk += b"\x00" * (frame_size * 2 - len(chunk))
-
-            if is_opus:
-                # 转换为numpy数组处理
-                np_frame = np.frombuffer(chunk, dtype=np.int16)
-                # 编码Opus数据
-                frame_data = encoder.encode(np_frame.tobytes(), frame_size)
-            else:
-                frame_data = chunk if isinstance(chunk, bytes) else bytes(chunk)
-
-            datas.append(frame_data)
-
+        # 按60ms分帧，最后一帧不足时补零
+        decode_audio_stream(
+            _read_file_chunks(audio_file_path), file_type, is_opus, datas.append
+        )
         return datas
 
     loop = asyncio.get_running_loop()
@@ -334,23 +313,23 @@ def audio_bytes_to_data_stream(
         # 直接用p3解码
         return p3.decode_opus_from_bytes_stream(audio_bytes, callback)
     else:
-        # 其他格式用pydub
-        audio = AudioSegment.from_file(
-            BytesIO(audio_bytes), format=file_type, parameters=["-nostdin"]
-        )
-        audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
-        raw_data = audio.raw_data
-        pcm_to_data_stream(raw_data, is_opus, callback)
+        # wav/pcm/mp3 在进程内解码，其他格式由解码器回退到pydub
+        decode_audio_stream((audio_bytes,), file_type, is_opus, callback)
 
 
 def pcm_to_data_stream(raw_data, is_opus=True, callback: Callable[[Any], Any] = None):
-    # 初始化Opus编码器
-    encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
-
     # 编码参数
     frame_duration = 60  # 60ms per frame
     frame_size = int(16000 * frame_duration / 1000)  # 960 samples/frame
 
+    if is_opus:
+        # 从编码器池借用编码器，按帧直接编码，最后一帧不足时补零
+        encoder = OpusEncoderUtils(
+            16000, 1, frame_duration, bitrate=None, complexity=None, signal=None
+        )
+        encoder.encode_pcm_to_opus_stream(raw_data, True, callback)
+        return
+
     # 按帧处理所有音频数据（包括最后一帧可能补零）
     for i in range(0, len(raw_data), frame_size * 2):  # 16bit=2bytes/sample
         # 获取当前帧的二进制数据
@@ -360,15 +339,8 @@ def pcm_to_data_stream(raw_data, is_opus=True, callback: Callable[[Any], Any] =
         if len(chunk) < frame_size * 2:
             chunk += b"\x00" * (frame_size * 2 - len(chunk))
 
-        if is_opus:
-            # 转换为numpy数组处理
-            np_frame = np.frombuffer(chunk, dtype=np.int16)
-            # 编码Opus数据
-            frame_data = encoder.encode(np_frame.tobytes(), frame_size)
-            callback(frame_data)
-        else:
-            frame_data = chunk if isinstance(chunk, bytes) else bytes(chunk)
-            callback(frame_data)
+        frame_data = chunk if isinstance(chunk, bytes) else bytes(chunk)
+        callback(frame_data)
 
 
 def opus_datas_to_wav_bytes(opus_datas, sample_rate=16000, channels=1):
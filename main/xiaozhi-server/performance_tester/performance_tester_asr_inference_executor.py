@@ -0,0 +1,171 @@
+import time
+import random
+import asyncio
+import threading
+import numpy as np
+from tabulate import tabulate
+from core.providers.asr.inference_executor import (
+    InferenceExecutor,
+    ASR_INFERENCE_QUEUE_SECONDS,
+)
+
+description = "本地ASR同步推理执行器对事件循环延迟（loop lag）与识别耗时的影响测试"
+
+# 并发设备数及每个设备说话的次数
+DEVICES = 8
+UTTERANCES = 6
+# 每句音频时长范围及两句之间的间隔范围（秒）
+DURATION_RANGE = (1.0, 3.0)
+PAUSE_RANGE = (0.3, 1.5)
+# 模拟引擎的实时率：1秒音频的解码耗时（秒）
+RTF = 0.1
+# 推理执行器的最大并发数
+MAX_CONCURRENCY = 2
+# 事件循环延迟探针的采样间隔（秒），相当于音频发送的节拍
+PROBE_INTERVAL = 0.01
+
+
+class MockRecognizer:
+    """模拟有状态的同步识别器：解码时按实时率占用CPU（矩阵运算会释放GIL，与onnx/kaldi相同）"""
+
+    matrix = np.random.default_rng(0).standard_normal((160, 160)).astype(np.float32)
+    unit_seconds = None
+
+    def __init__(self):
+        self.in_use = threading.Lock()
+        self.conflicts = 0
+
+    @classmethod
+    def calibrate(cls):
+        start = time.perf_counter()
+        for _ in range(200):
+            cls.matrix @ cls.matrix
+        cls.unit_seconds = (time.perf_counter() - start) / 200
+
+    def decode(self, audio_seconds):
+        # 同一识别器被并发使用时记录冲突（vosk 共享一个 KaldiRecognizer 时的问题）
+        if not self.in_use.acquire(blocking=False):
+            self.conflicts += 1
+            self.in_use.acquire()
+        try:
+            for _ in range(int(audio_seconds * RTF / self.unit_seconds)):
+                self.matrix @ self.matrix
+            return "识别结果"
+        finally:
+            self.in_use.release()
+
+
+async def probe_loop_lag(stop_event, lags):
+    """按固定间隔睡眠，记录实际唤醒时间比预期晚了多少"""
+    while not stop_event.is_set():
+        expected = time.perf_counter() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def run_device(recognize, device_index, latencies):
+    rng = random.Random(device_index)
+    for _ in range(UTTERANCES):
+        await asyncio.sleep(rng.uniform(*PAUSE_RANGE))
+        audio_seconds = rng.uniform(*DURATION_RANGE)
+        start = time.perf_counter()
+        await recognize(audio_seconds)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_mode(name, recognize):
+    stop_event = asyncio.Event()
+    lags, latencies = [], []
+    probe = asyncio.create_task(probe_loop_lag(stop_event, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*[run_device(recognize, i, latencies) for i in range(DEVICES)])
+    elapsed = time.perf_counter() - start
+    stop_event.set()
+    await probe
+    lags = np.array(lags) * 1000
+    latencies = np.array(latencies) * 1000
+    return [
+        name,
+        f"{np.percentile(lags, 50):.1f}",
+        f"{np.percentile(lags, 99):.1f}",
+        f"{lags.max():.1f}",
+        f"{np.percentile(latencies, 50):.0f}",
+        f"{np.percentile(latencies, 95):.0f}",
+        f"{elapsed:.1f}",
+    ]
+
+
+async def main():
+    MockRecognizer.calibrate()
+    table = []
+
+    # 改造前：在 async def speech_to_text 中直接同步解码，所有连接共用一个识别器
+    shared = MockRecognizer()
+
+    async def recognize_inline(audio_seconds):
+        return shared.decode(audio_seconds)
+
+    table.append(await run_mode("事件循环内同步解码（改造前）", recognize_inline) + ["-", shared.conflicts])
+    print("事件循环内同步解码 测试完成")
+
+    # 只放到默认线程池：不阻塞事件循环，但并发不受限且共用一个识别器
+    shared = MockRecognizer()
+
+    async def recognize_to_thread(audio_seconds):
+        return await asyncio.to_thread(shared.decode, audio_seconds)
+
+    table.append(await run_mode("默认线程池+共享识别器", recognize_to_thread) + ["-", shared.conflicts])
+    print("默认线程池+共享识别器 测试完成")
+
+    # 推理执行器：独立线程、并发上限、识别器对象池
+    created = []
+
+    def factory():
+        recognizer = MockRecognizer()
+        created.append(recognizer)
+        return recognizer
+
+    executor = InferenceExecutor("performance_tester", MAX_CONCURRENCY, factory)
+
+    async def recognize_executor(audio_seconds):
+        return await executor.run(MockRecognizer.decode, audio_seconds)
+
+    try:
+        row = await run_mode(f"推理执行器（并发{MAX_CONCURRENCY}）", recognize_executor)
+    finally:
+        executor.shutdown()
+    queue_wait = ASR_INFERENCE_QUEUE_SECONDS.labels("performance_tester")
+    with queue_wait._lock:
+        mean_wait = queue_wait.sum / max(1, sum(queue_wait.counts)) * 1000
+    table.append(row + [f"{mean_wait:.0f}", sum(r.conflicts for r in created)])
+    print("推理执行器 测试完成")
+
+    print("\n" + "=" * 50)
+    print("本地ASR推理执行器测试结果")
+    print("=" * 50)
+    headers = [
+        "模式",
+        "循环延迟P50(ms)",
+        "循环延迟P99(ms)",
+        "循环延迟最大(ms)",
+        "识别耗时P50(ms)",
+        "识别耗时P95(ms)",
+        "总耗时(s)",
+        "平均排队(ms)",
+        "识别器并发冲突",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- {DEVICES} 个设备并发，每个设备说话 {UTTERANCES} 次，每句 {DURATION_RANGE[0]}~{DURATION_RANGE[1]} 秒，"
+        f"模拟引擎实时率 {RTF}"
+    )
+    print(
+        f"- 循环延迟探针每 {PROBE_INTERVAL * 1000:.0f}ms 唤醒一次，延迟即音频发送、websocket读取等任务被推迟的时间"
+    )
+    print(f"- 推理执行器中识别器由对象池创建，共 {len(created)} 个，同一识别器不会被并发使用")
+    print("- 识别耗时包含排队等待时间；识别器并发冲突为同一识别器被多个连接同时使用的次数")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
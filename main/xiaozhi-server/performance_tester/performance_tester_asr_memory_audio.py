@@ -0,0 +1,206 @@
+import os
+import sys
+import time
+import wave
+import shutil
+import asyncio
+import tempfile
+import numpy as np
+import requests
+from tabulate import tabulate
+from core.providers.asr.base import ASRProviderBase
+
+description = "非流式ASR内存音频路径（不写临时WAV文件）的单句额外开销与系统调用次数测试"
+
+# 测试的句子数及每句时长范围（秒）
+UTTERANCES = 300
+DURATION_RANGE = (1.0, 4.0)
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 960
+# 临时文件目录，与ASR默认的 output_dir 一样位于工作目录下
+OUTPUT_ROOT = "tmp"
+
+
+class _BenchmarkASR(ASRProviderBase):
+    """只用于调用基类音频处理方法的ASR提供方"""
+
+    def __init__(self, output_dir):
+        super().__init__()
+        self.output_dir = output_dir
+        self.delete_audio_file = True
+
+    async def speech_to_text(self, opus_data, session_id, audio_format="opus"):
+        return "", None
+
+
+class SyscallCounter:
+    """统计读写系统调用（/proc/self/io）以及文件打开、删除次数（审计事件）"""
+
+    def __init__(self):
+        self.active = False
+        self.opens = 0
+        self.removes = 0
+        sys.addaudithook(self._audit)
+
+    def _audit(self, event, args):
+        if not self.active:
+            return
+        if event == "open":
+            self.opens += 1
+        elif event in ("os.remove", "os.unlink"):
+            self.removes += 1
+
+    @staticmethod
+    def _proc_io():
+        try:
+            with open("/proc/self/io") as f:
+                values = dict(line.split(": ") for line in f.read().splitlines())
+            return int(values["syscr"]), int(values["syscw"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def __enter__(self):
+        self.opens = 0
+        self.removes = 0
+        self._start_io = self._proc_io()
+        self.active = True
+        return self
+
+    def __exit__(self, *exc):
+        self.active = False
+        end_io = self._proc_io()
+        if self._start_io is None or end_io is None:
+            self.reads = self.writes = None
+        else:
+            self.reads = end_io[0] - self._start_io[0]
+            self.writes = end_io[1] - self._start_io[1]
+
+
+def make_utterances():
+    rng = np.random.default_rng(0)
+    utterances = []
+    for _ in range(UTTERANCES):
+        samples = int(rng.uniform(*DURATION_RANGE) * SAMPLE_RATE)
+        samples -= samples % FRAME_SAMPLES
+        pcm = (rng.standard_normal(samples) * 3000).astype(np.int16).tobytes()
+        frame_bytes = FRAME_SAMPLES * 2
+        utterances.append(
+            [pcm[i : i + frame_bytes] for i in range(0, len(pcm), frame_bytes)]
+        )
+    return utterances
+
+
+def local_with_file(asr, pcm_data, index):
+    """改造前的本地引擎：写入WAV文件，再读回为float32采样，最后删除文件"""
+    file_path = asr.save_audio_to_file(pcm_data, f"bench-{index}")
+    try:
+        with wave.open(file_path) as f:
+            samples = f.readframes(f.getnframes())
+        return np.frombuffer(samples, dtype=np.int16).astype(np.float32) / 32768
+    finally:
+        os.remove(file_path)
+
+
+def local_in_memory(asr, pcm_data, index):
+    """内存路径：直接把PCM转换为float32采样"""
+    return asr.pcm_to_float32(b"".join(pcm_data))
+
+
+def http_with_file(asr, pcm_data, index):
+    """改造前的HTTP引擎：写入WAV文件，打开文件编码为multipart请求体，最后删除文件"""
+    file_path = asr.save_audio_to_file(pcm_data, f"bench-{index}")
+    try:
+        with open(file_path, "rb") as audio_file:
+            return requests.Request(
+                "POST",
+                "http://127.0.0.1/v1/audio/transcriptions",
+                files={"file": audio_file},
+                data={"model": "mock-asr"},
+            ).prepare()
+    finally:
+        os.remove(file_path)
+
+
+def http_in_memory(asr, pcm_data, index):
+    """内存路径：PCM封装为内存中的WAV，直接编码为multipart请求体"""
+    wav_data = asr._pcm_to_wav(b"".join(pcm_data))
+    return requests.Request(
+        "POST",
+        "http://127.0.0.1/v1/audio/transcriptions",
+        files={"file": ("audio.wav", wav_data, "audio/wav")},
+        data={"model": "mock-asr"},
+    ).prepare()
+
+
+def run_mode(func, asr, utterances, counter):
+    # 预热，排除首次调用的导入和缓存开销
+    func(asr, utterances[0], -1)
+    durations = []
+    with counter:
+        for index, pcm_data in enumerate(utterances):
+            start = time.perf_counter()
+            func(asr, pcm_data, index)
+            durations.append(time.perf_counter() - start)
+    durations = np.array(durations) * 1e6
+
+    def per_utt(value):
+        return "-" if value is None else f"{value / len(utterances):.1f}"
+
+    return [
+        f"{durations.mean():.0f}",
+        f"{np.percentile(durations, 95):.0f}",
+        f"{durations.max():.0f}",
+        per_utt(counter.reads),
+        per_utt(counter.writes),
+        per_utt(counter.opens),
+        per_utt(counter.removes),
+    ]
+
+
+async def main():
+    os.makedirs(OUTPUT_ROOT, exist_ok=True)
+    output_dir = tempfile.mkdtemp(prefix="asr_memory_audio_", dir=OUTPUT_ROOT)
+    asr = _BenchmarkASR(output_dir)
+    utterances = make_utterances()
+    counter = SyscallCounter()
+    modes = [
+        ("本地引擎", "临时WAV文件（改造前）", local_with_file),
+        ("本地引擎", "内存float32", local_in_memory),
+        ("HTTP引擎", "临时WAV文件（改造前）", http_with_file),
+        ("HTTP引擎", "内存multipart", http_in_memory),
+    ]
+    table = []
+    try:
+        for engine, name, func in modes:
+            table.append([engine, name] + run_mode(func, asr, utterances, counter))
+            print(f"{engine} {name} 测试完成")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    print("\n" + "=" * 50)
+    print("ASR内存音频路径测试结果")
+    print("=" * 50)
+    headers = [
+        "引擎类型",
+        "音频传递方式",
+        "单句开销均值(us)",
+        "单句开销P95(us)",
+        "单句开销最大(us)",
+        "read调用/句",
+        "write调用/句",
+        "打开文件/句",
+        "删除文件/句",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- {UTTERANCES} 句 16kHz 16位单声道音频，每句 {DURATION_RANGE[0]}~{DURATION_RANGE[1]} 秒，"
+        f"临时文件写入 {OUTPUT_ROOT}/ 目录"
+    )
+    print("- 单句开销只统计从PCM帧到推理输入（float32采样或multipart请求体）的准备耗时，不含识别本身")
+    print("- read/write调用取自 /proc/self/io，打开、删除文件次数取自Python审计事件")
+    print("- 开启音频保存（delete_audio_file 为 false）时仍会写入WAV文件，与改造前相同")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,255 @@
+import json
+import time
+import logging
+import random
+import socket
+import asyncio
+import threading
+import numpy as np
+import websockets
+from tabulate import tabulate
+from core.utils.asr_session_pool import ASRSessionPool
+
+description = "流式ASR上游会话池（预热websocket连接）对说话开始到首个识别结果延迟的测试"
+
+# 并发设备数及每个设备说话的次数
+DEVICES = 8
+UTTERANCES = 15
+# 两次说话之间的静默时长范围（秒）
+PAUSE_RANGE = (0.2, 2.5)
+# 模拟服务端握手及鉴权耗时（秒），代替公网上的 TCP/TLS 握手和鉴权
+HANDSHAKE_DELAY = 0.15
+# 模拟服务端收到首帧音频到返回首个识别结果的耗时（秒）
+FIRST_PARTIAL_DELAY = 0.02
+# 模拟服务端关闭空闲连接的时间（秒），只有ping没有数据也视为空闲
+SERVER_IDLE_CLOSE = 2.0
+# 每次说话发送的音频帧数（60ms一帧）
+FRAMES_PER_UTTERANCE = 5
+FRAME = b"\x00" * 1920
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MockStreamASRServer:
+    """在独立线程中运行的模拟流式ASR服务：握手时有鉴权耗时，收到首帧音频后返回中间结果"""
+
+    def __init__(self):
+        self.port = _free_port()
+        self.url = f"ws://127.0.0.1:{self.port}/asr"
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.ready = threading.Event()
+        self.server = None
+        self.handshakes = 0
+        self.idle_closed = 0
+
+    async def _process_request(self, connection, request):
+        self.handshakes += 1
+        await asyncio.sleep(HANDSHAKE_DELAY)
+        return None
+
+    async def _handle(self, ws):
+        partial_sent = False
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout=SERVER_IDLE_CLOSE)
+                except asyncio.TimeoutError:
+                    self.idle_closed += 1
+                    await ws.close(1000, "idle timeout")
+                    return
+                if isinstance(message, str):
+                    # 识别任务参数
+                    continue
+                if not partial_sent:
+                    partial_sent = True
+                    await asyncio.sleep(FIRST_PARTIAL_DELAY)
+                    await ws.send(json.dumps({"type": "partial", "text": "你好"}))
+        except websockets.ConnectionClosed:
+            pass
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        logging.getLogger("performance_tester.mock_asr").setLevel(logging.CRITICAL)
+
+        async def serve():
+            return await websockets.serve(
+                self._handle,
+                "127.0.0.1",
+                self.port,
+                process_request=self._process_request,
+                ping_interval=None,
+                # 会话池关闭时会中断正在握手的连接，不输出这类日志
+                logger=logging.getLogger("performance_tester.mock_asr"),
+            )
+
+        self.server = self.loop.run_until_complete(serve())
+        self.ready.set()
+        self.loop.run_forever()
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+
+    def stop(self):
+        async def shutdown():
+            self.server.close()
+            await self.server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+async def run_device(pool, url, device_index, rng):
+    """模拟一个设备多次说话，返回每次说话开始到首个识别结果的耗时，失败时为None"""
+
+    async def connect():
+        return await websockets.connect(
+            url,
+            max_size=1000000000,
+            ping_interval=None,
+            ping_timeout=None,
+            close_timeout=5,
+        )
+
+    key = f"mock-asr-{device_index % 2}"
+    # 与流式ASR的 open_audio_channels 相同，设备连接时开始预热
+    pool.prewarm(key, connect)
+    latencies = []
+    for _ in range(UTTERANCES):
+        await asyncio.sleep(rng.uniform(*PAUSE_RANGE))
+        start = time.perf_counter()
+        ws = None
+        try:
+            ws = await pool.acquire(key, connect)
+            await ws.send(json.dumps({"header": {"action": "run-task"}}))
+            await ws.send(FRAME)
+            first_partial = await asyncio.wait_for(ws.recv(), timeout=5)
+            latencies.append(time.perf_counter() - start)
+            assert json.loads(first_partial)["type"] == "partial"
+            for _ in range(FRAMES_PER_UTTERANCE - 1):
+                await ws.send(FRAME)
+        except Exception:
+            latencies.append(None)
+        finally:
+            # 与流式ASR的 _cleanup 相同，一句话结束后关闭连接
+            if ws is not None:
+                await ws.close()
+    return latencies
+
+
+async def run_mode(server, options):
+    pool = ASRSessionPool(options)
+    handshakes_before = server.handshakes
+    idle_closed_before = server.idle_closed
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(
+            *[
+                run_device(pool, server.url, i, random.Random(i))
+                for i in range(DEVICES)
+            ]
+        )
+    finally:
+        stats = pool.get_stats()
+        await pool.close()
+    elapsed = time.perf_counter() - start
+    latencies = [r for device in results for r in device]
+    ok = np.array([r for r in latencies if r is not None]) * 1000
+    warm = sum(s["warm"] for s in stats.values())
+    cold = sum(s["cold"] for s in stats.values())
+    return {
+        "p50": np.percentile(ok, 50) if len(ok) else 0,
+        "p95": np.percentile(ok, 95) if len(ok) else 0,
+        "max": ok.max() if len(ok) else 0,
+        "failed": sum(r is None for r in latencies),
+        "warm_ratio": warm / (warm + cold) if warm + cold else 0,
+        "handshakes": server.handshakes - handshakes_before,
+        "idle_closed": server.idle_closed - idle_closed_before,
+        "handshake_rate": (server.handshakes - handshakes_before) / elapsed,
+    }
+
+
+async def main():
+    server = MockStreamASRServer()
+    server.start()
+    modes = [
+        ("直接连接（改造前）", {"enabled": False}),
+        (
+            "会话池（无健康检查）",
+            {
+                "enabled": True,
+                "warm_sessions": 2,
+                "idle_timeout": 3600,
+                "health_check_interval": 3600,
+            },
+        ),
+        (
+            "会话池",
+            {
+                "enabled": True,
+                "warm_sessions": 2,
+                "idle_timeout": SERVER_IDLE_CLOSE * 0.75,
+                "health_check_interval": 0.3,
+            },
+        ),
+    ]
+    table = []
+    try:
+        for name, options in modes:
+            result = await run_mode(server, options)
+            table.append(
+                [
+                    name,
+                    f"{result['p50']:.1f}",
+                    f"{result['p95']:.1f}",
+                    f"{result['max']:.1f}",
+                    result["failed"],
+                    f"{result['warm_ratio'] * 100:.0f}%",
+                    result["handshakes"],
+                    f"{result['handshake_rate']:.1f}",
+                    result["idle_closed"],
+                ]
+            )
+            print(f"{name} 测试完成")
+    finally:
+        server.stop()
+
+    print("\n" + "=" * 50)
+    print("流式ASR会话池测试结果")
+    print("=" * 50)
+    headers = [
+        "模式",
+        "首个结果P50(ms)",
+        "首个结果P95(ms)",
+        "首个结果最大(ms)",
+        "失败次数",
+        "预热命中率",
+        "握手次数",
+        "握手/秒",
+        "服务端空闲关闭",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- {DEVICES} 个设备并发，每个设备说话 {UTTERANCES} 次，两次说话间静默 "
+        f"{PAUSE_RANGE[0]}~{PAUSE_RANGE[1]} 秒，每次说话结束后关闭连接"
+    )
+    print(
+        f"- 模拟服务端握手及鉴权耗时 {HANDSHAKE_DELAY * 1000:.0f}ms，收到首帧音频后 "
+        f"{FIRST_PARTIAL_DELAY * 1000:.0f}ms 返回首个识别结果"
+    )
+    print(
+        f"- 模拟服务端 {SERVER_IDLE_CLOSE:.0f} 秒没有收到数据时关闭连接（ping不计入），"
+        "无健康检查时预热连接会被服务端关闭，只能在取用时丢弃后重新预热"
+    )
+    print("- 首个结果耗时为说话开始（获取连接）到收到首个识别结果的时间")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
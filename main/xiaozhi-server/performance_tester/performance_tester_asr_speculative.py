@@ -0,0 +1,179 @@
+import time
+import random
+import asyncio
+import numpy as np
+from tabulate import tabulate
+from core.utils.audio_ingest import AudioIngest
+from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.speculative import SpeculativeASR
+
+description = "推测式提前断句对说话结束到首个音频延迟的改善及被取消的推测识别占比测试"
+
+# 对话回放数据：设备数、每个设备的句数
+DEVICES = 8
+UTTERANCES = 6
+FRAME_SECONDS = 0.06
+FRAME_BYTES = int(16000 * FRAME_SECONDS) * 2
+# 每句由若干语段组成，语段之间是说话中的停顿（犹豫、换气），句间为较长静音
+SEGMENTS_RANGE = (1, 3)
+SEGMENT_RANGE = (0.6, 2.0)
+HESITATION_RANGE = (0.1, 0.5)
+PAUSE_RANGE = (1.0, 2.0)
+# 模拟非流式ASR的耗时：固定开销 + 实时率 × 音频时长（秒）
+ASR_BASE = 0.2
+ASR_RTF = 0.05
+# 说话结束后意图识别、LLM首token、TTS首包的耗时（秒），两种模式相同
+DOWNSTREAM_SECONDS = 0.5
+# 测试的 (VAD min_silence_duration_ms, provisional_silence_ms) 组合
+SETTINGS = [(200, 100), (600, 200)]
+
+
+class ReplayConnection:
+    """回放用的最小连接对象，只包含ASR接收音频需要的属性"""
+
+    def __init__(self, session_id, speculative_options):
+        self.session_id = session_id
+        self.client_listen_mode = "auto"
+        self.audio_format = "pcm"
+        self.client_have_voice = False
+        self.client_voice_stop = False
+        self.last_activity_time = 0.0
+        self.audio_ingest = AudioIngest()
+        self.asr_audio = self.audio_ingest.create_packet_buffer()
+        self.speculative_asr = SpeculativeASR(speculative_options)
+        self.voice_stop_at = 0.0
+
+    def reset_vad_states(self):
+        self.audio_ingest.reset_vad()
+        self.client_have_voice = False
+        self.client_voice_stop = False
+
+
+class ReplayASR(ASRProviderBase):
+    """模拟非流式ASR，识别耗时按音频时长计算，记录每次识别的耗时及是否被取消"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.cancelled_calls = 0
+        self.busy_seconds = 0.0
+        self.wasted_seconds = 0.0
+        self.asr_wait = []
+
+    async def speech_to_text(self, opus_data, session_id, audio_format="opus"):
+        seconds = sum(len(packet) for packet in opus_data) / 32000
+        self.calls += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.sleep(ASR_BASE + seconds * ASR_RTF)
+        except asyncio.CancelledError:
+            self.cancelled_calls += 1
+            self.wasted_seconds += time.perf_counter() - start
+            raise
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+        return "识别结果", None
+
+    async def handle_voice_stop(self, conn, asr_audio_task):
+        # 与 ASRProviderBase.handle_voice_stop 相同，通过 create_asr_task 取得识别任务
+        await self.create_asr_task(conn, asr_audio_task)
+        self.asr_wait.append(time.perf_counter() - conn.voice_stop_at)
+
+
+def make_fixture(rng):
+    """一个设备的对话：逐帧的“是否有声音”列表"""
+    frames = []
+    for _ in range(UTTERANCES):
+        frames += [False] * int(rng.uniform(*PAUSE_RANGE) / FRAME_SECONDS)
+        segments = rng.randint(*SEGMENTS_RANGE)
+        for index in range(segments):
+            if index:
+                frames += [False] * int(rng.uniform(*HESITATION_RANGE) / FRAME_SECONDS)
+            frames += [True] * int(rng.uniform(*SEGMENT_RANGE) / FRAME_SECONDS)
+    return frames + [False] * int(PAUSE_RANGE[1] / FRAME_SECONDS)
+
+
+async def replay_device(asr, device_index, endpoint_ms, speculative_options):
+    conn = ReplayConnection(f"replay-{device_index}", speculative_options)
+    next_frame_at = time.perf_counter()
+    for have_voice in make_fixture(random.Random(device_index)):
+        next_frame_at += FRAME_SECONDS
+        await asyncio.sleep(max(0.0, next_frame_at - time.perf_counter()))
+        # 每帧都是新的对象，与上行音频包相同
+        packet = bytes(FRAME_BYTES)
+        conn.audio_ingest.decode(packet, "pcm")
+
+        # 模拟VAD：与 VADProviderBase._update_voice_state 的断句方式相同
+        now_ms = time.time() * 1000
+        if have_voice:
+            conn.client_have_voice = True
+            conn.last_activity_time = now_ms
+        elif conn.client_have_voice and now_ms - conn.last_activity_time >= endpoint_ms:
+            conn.client_voice_stop = True
+            conn.voice_stop_at = time.perf_counter()
+        await asr.receive_audio(conn, packet, have_voice)
+        # 识别耗时导致的回放落后不计入后续音频
+        next_frame_at = max(next_frame_at, time.perf_counter())
+    return conn.speculative_asr.stats
+
+
+async def run_mode(endpoint_ms, provisional_ms, enabled):
+    asr = ReplayASR()
+    options = {"enabled": enabled, "provisional_silence_ms": provisional_ms}
+    stats = await asyncio.gather(
+        *[replay_device(asr, i, endpoint_ms, options) for i in range(DEVICES)]
+    )
+    asr_wait = np.array(asr.asr_wait) * 1000
+    first_audio = asr_wait + DOWNSTREAM_SECONDS * 1000
+    started = sum(s["started"] for s in stats)
+    cancelled = sum(s["cancelled"] for s in stats)
+    return [
+        f"{endpoint_ms}ms",
+        f"推测 {provisional_ms}ms" if enabled else "关闭（改造前）",
+        len(asr_wait),
+        f"{np.percentile(asr_wait, 50):.0f}",
+        f"{np.percentile(first_audio, 50):.0f}",
+        f"{np.percentile(first_audio, 95):.0f}",
+        asr.calls,
+        f"{cancelled / started * 100:.0f}%" if started else "-",
+        f"{asr.wasted_seconds / asr.busy_seconds * 100:.0f}%" if asr.busy_seconds else "-",
+    ]
+
+
+async def main():
+    table = []
+    for endpoint_ms, provisional_ms in SETTINGS:
+        for enabled in (False, True):
+            table.append(await run_mode(endpoint_ms, provisional_ms, enabled))
+            print(f"静音阈值 {endpoint_ms}ms，推测{'开启' if enabled else '关闭'} 测试完成")
+
+    print("\n" + "=" * 50)
+    print("推测式提前断句测试结果")
+    print("=" * 50)
+    headers = [
+        "VAD静音阈值",
+        "推测识别",
+        "句数",
+        "说话结束到识别结果P50(ms)",
+        "说话结束到首个音频P50(ms)",
+        "说话结束到首个音频P95(ms)",
+        "ASR调用次数",
+        "被取消的推测占比",
+        "浪费的ASR耗时占比",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- {DEVICES} 个设备按实时节奏回放合成的对话数据（固定随机种子），每个设备 {UTTERANCES} 句，"
+        f"句中有 {HESITATION_RANGE[0]}~{HESITATION_RANGE[1]}s 的停顿"
+    )
+    print(
+        f"- 模拟非流式ASR耗时 {ASR_BASE * 1000:.0f}ms + 实时率 {ASR_RTF}；说话结束后意图识别、LLM、TTS "
+        f"到首个音频固定 {DOWNSTREAM_SECONDS * 1000:.0f}ms"
+    )
+    print("- 说话结束时刻为VAD静音达到阈值的那一帧；句中停顿超过推测阈值时会发起推测，用户继续说话时取消")
+    print("- 浪费的ASR耗时占比 = 被取消的推测识别已运行的时间 / 所有识别运行时间")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,218 @@
+import time
+import random
+import asyncio
+import numpy as np
+from tabulate import tabulate
+from core.utils.audio_ingest import AudioIngest
+from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.streaming_local import StreamingLocalDecoder
+from core.providers.asr.inference_executor import (
+    InferenceExecutor,
+    ASR_INFERENCE_RUN_SECONDS,
+)
+
+description = "本地ASR边说边识别（增量解码）与说完再识别的说话结束到最终文本延迟回放测试"
+
+# 并发设备数及每个设备说话的次数
+DEVICES = 8
+UTTERANCES = 4
+# 每句语音时长范围及两句之间的静音范围（秒）
+SPEECH_RANGE = (1.0, 4.0)
+PAUSE_RANGE = (0.3, 1.0)
+# 判定说话结束所需的静音时长（秒），与VAD的 min_silence_duration_ms 对应
+ENDPOINT_SILENCE = 0.7
+FRAME_SECONDS = 0.06
+FRAME_BYTES = int(16000 * FRAME_SECONDS) * 2
+# 模拟引擎耗时：离线模型整句解码 = 固定开销 + 实时率 × 音频时长；在线模型按送入的音频计算
+OFFLINE_BASE = 0.03
+OFFLINE_RTF = 0.08
+ONLINE_CALL_BASE = 0.002
+ONLINE_RTF = 0.05
+# 结束在线识别时补的静音（秒），与 sherpa_onnx_local 相同
+TAIL_PADDING_SECONDS = 0.66
+MAX_CONCURRENCY = 2
+
+
+class MockOnlineStream:
+    def __init__(self):
+        self.seconds = 0.0
+
+
+def mock_online_feed(stream, pcm):
+    seconds = len(pcm) / 32000
+    # sleep 会释放GIL，与原生推理库相同
+    time.sleep(ONLINE_CALL_BASE + seconds * ONLINE_RTF)
+    stream.seconds += seconds
+    return "字" * int(stream.seconds * 4)
+
+
+def mock_online_finish(stream):
+    time.sleep(ONLINE_CALL_BASE + TAIL_PADDING_SECONDS * ONLINE_RTF)
+    return "字" * int(stream.seconds * 4)
+
+
+def mock_offline_decode(pcm):
+    seconds = len(pcm) / 32000
+    time.sleep(OFFLINE_BASE + seconds * OFFLINE_RTF)
+    return "字" * int(seconds * 4)
+
+
+class ReplayConnection:
+    """回放用的最小连接对象，只包含ASR接收音频需要的属性"""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.client_listen_mode = "auto"
+        self.client_have_voice = False
+        self.client_voice_stop = False
+        self.audio_ingest = AudioIngest()
+        self.asr_audio = self.audio_ingest.create_packet_buffer()
+        self.asr_partial_text = ""
+        self.voice_stop_at = 0.0
+        self.partial_updates = 0
+
+    def reset_vad_states(self):
+        self.audio_ingest.reset_vad()
+        self.client_have_voice = False
+        self.client_voice_stop = False
+
+
+class ReplayASR(ASRProviderBase):
+    """与 sherpa_onnx_local 的接入方式相同，推理换成按耗时模型睡眠的模拟引擎"""
+
+    def __init__(self, name, streaming):
+        super().__init__()
+        self.executor = InferenceExecutor(name, MAX_CONCURRENCY)
+        self.streaming_decoder = None
+        if streaming:
+            self.streaming_decoder = StreamingLocalDecoder(
+                self.executor, MockOnlineStream, mock_online_feed, mock_online_finish
+            )
+        self.latencies = []
+        self.texts = []
+
+    async def receive_audio(self, conn, audio, audio_have_voice):
+        if self.streaming_decoder is not None:
+            self.streaming_decoder.update(conn, audio, audio_have_voice)
+        await super().receive_audio(conn, audio, audio_have_voice)
+
+    async def speech_to_text(self, opus_data, session_id, audio_format="opus"):
+        combined_pcm_data = b"".join(opus_data)
+        if self.streaming_decoder is not None:
+            text = await self.streaming_decoder.finish(session_id)
+            if text is None:
+                text = await self.executor.run(mock_offline_decode, combined_pcm_data)
+        else:
+            text = await self.executor.run(mock_offline_decode, combined_pcm_data)
+        return text, None
+
+    async def handle_voice_stop(self, conn, asr_audio_task):
+        text, _ = await self.speech_to_text(asr_audio_task, conn.session_id, "pcm")
+        self.latencies.append(time.perf_counter() - conn.voice_stop_at)
+        self.texts.append(text)
+
+
+def make_fixture(rng):
+    """一个设备的回放数据：每句为逐帧的“是否有声音”列表，句前为静音"""
+    utterances = []
+    for _ in range(UTTERANCES):
+        pause = int(rng.uniform(*PAUSE_RANGE) / FRAME_SECONDS)
+        speech = int(rng.uniform(*SPEECH_RANGE) / FRAME_SECONDS)
+        utterances.append([False] * pause + [True] * speech)
+    return utterances
+
+
+async def replay_device(asr, device_index):
+    rng = random.Random(device_index)
+    conn = ReplayConnection(f"replay-{device_index}")
+    endpoint_frames = int(ENDPOINT_SILENCE / FRAME_SECONDS)
+    next_frame_at = time.perf_counter()
+    last_partial = ""
+    for utterance in make_fixture(rng):
+        silence = 0
+        frames = utterance + [False] * (endpoint_frames + 2)
+        for have_voice in frames:
+            # 按实时节奏送入音频帧
+            next_frame_at += FRAME_SECONDS
+            await asyncio.sleep(max(0.0, next_frame_at - time.perf_counter()))
+            packet = np.random.default_rng().integers(-3000, 3000, FRAME_BYTES // 2, dtype=np.int16).tobytes()
+            conn.audio_ingest.decode(packet, "pcm")
+
+            # 模拟VAD：有声音时更新状态，静音达到阈值时判定说话结束
+            if have_voice:
+                conn.client_have_voice = True
+                silence = 0
+            elif conn.client_have_voice:
+                silence += 1
+                if silence == endpoint_frames:
+                    conn.client_voice_stop = True
+                    conn.voice_stop_at = time.perf_counter()
+            # 中间结果在推理线程完成后异步更新，每帧检查一次
+            if conn.asr_partial_text and conn.asr_partial_text != last_partial:
+                conn.partial_updates += 1
+            last_partial = conn.asr_partial_text
+            await asr.receive_audio(conn, packet, have_voice)
+            if conn.voice_stop_at and not conn.client_voice_stop:
+                break
+        conn.voice_stop_at = 0.0
+        # 识别耗时导致的回放落后不计入下一句
+        next_frame_at = max(next_frame_at, time.perf_counter())
+    return conn.partial_updates
+
+
+async def run_mode(name, streaming):
+    engine = f"replay-{'streaming' if streaming else 'offline'}"
+    asr = ReplayASR(engine, streaming)
+    try:
+        updates = await asyncio.gather(*[replay_device(asr, i) for i in range(DEVICES)])
+    finally:
+        asr.executor.shutdown()
+    latencies = np.array(asr.latencies) * 1000
+    run_seconds = ASR_INFERENCE_RUN_SECONDS.labels(engine)
+    with run_seconds._lock:
+        compute = run_seconds.sum
+    return [
+        name,
+        len(latencies),
+        f"{np.percentile(latencies, 50):.0f}",
+        f"{np.percentile(latencies, 95):.0f}",
+        f"{latencies.max():.0f}",
+        f"{sum(updates) / max(1, len(latencies)):.1f}",
+        f"{compute:.1f}",
+    ]
+
+
+async def main():
+    table = []
+    for name, streaming in [("说完再识别（改造前）", False), ("边说边识别", True)]:
+        table.append(await run_mode(name, streaming))
+        print(f"{name} 测试完成")
+
+    print("\n" + "=" * 50)
+    print("本地ASR边说边识别测试结果")
+    print("=" * 50)
+    headers = [
+        "模式",
+        "识别句数",
+        "说话结束到最终文本P50(ms)",
+        "说话结束到最终文本P95(ms)",
+        "说话结束到最终文本最大(ms)",
+        "每句中间结果更新次数",
+        "推理总耗时(s)",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- {DEVICES} 个设备按实时节奏回放，每个设备 {UTTERANCES} 句，每句 {SPEECH_RANGE[0]}~{SPEECH_RANGE[1]} 秒，"
+        f"静音 {ENDPOINT_SILENCE}s 判定说话结束"
+    )
+    print(
+        f"- 模拟离线模型整句解码 {OFFLINE_BASE * 1000:.0f}ms + 实时率 {OFFLINE_RTF}；在线模型每次调用 "
+        f"{ONLINE_CALL_BASE * 1000:.0f}ms + 实时率 {ONLINE_RTF}，结束时补 {TAIL_PADDING_SECONDS}s 静音"
+    )
+    print(f"- 推理执行器最大并发 {MAX_CONCURRENCY}；说话结束时刻为VAD判定静音足够的那一帧")
+    print("- 推理总耗时为所有推理调用耗时之和，边说边识别在说话期间已完成大部分解码")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
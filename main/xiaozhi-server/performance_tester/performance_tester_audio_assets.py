@@ -0,0 +1,86 @@
+import os
+import time
+import asyncio
+import tempfile
+from tabulate import tabulate
+from core.utils.audio_assets import AudioAssetBundle, encode_asset
+
+description = "预编码opus资源包的启动耗时与单次播放CPU开销测试"
+
+# 单次播放的资源组合
+PLAY_CASES = [
+    ("绑定码播报(提示音+6位数字)", ["config/assets/bind_code.wav"]
+     + [f"config/assets/bind_code/{d}.wav" for d in "382915"]),
+    ("唤醒词回复", ["config/assets/wakeup_words_short.wav"]),
+    ("超长输出提示", ["config/assets/max_output_size.wav"]),
+    ("结束提示音(mp3)", ["config/assets/tts_notify.mp3"]),
+]
+ROUNDS = 20
+
+
+def measure_play(play):
+    """返回单次播放的CPU耗时（毫秒）"""
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        play()
+    return (time.process_time() - start) / ROUNDS * 1000
+
+
+async def main():
+    table_startup = []
+    table_play = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bundle_path = os.path.join(tmp_dir, "audio_assets.bin")
+
+        # 首次启动：没有资源包，全部编码
+        bundle = AudioAssetBundle({"bundle_path": bundle_path})
+        result = bundle.build()
+        table_startup.append(["首次启动(生成资源包)", result["total"], result["encoded"], result["elapsed_ms"]])
+        bundle.close()
+
+        # 再次启动：源文件未变化，直接加载
+        bundle = AudioAssetBundle({"bundle_path": bundle_path})
+        result = bundle.build()
+        table_startup.append(["再次启动(加载资源包)", result["total"], result["encoded"], result["elapsed_ms"]])
+        print(f"资源包大小: {os.path.getsize(bundle_path) / 1024:.1f}KB")
+
+        for name, paths in PLAY_CASES:
+            paths = [path for path in paths if os.path.exists(path)]
+            if not paths:
+                print(f"未找到测试音频，已跳过: {name}")
+                continue
+            frames = sum(len(encode_asset(path)) for path in paths)
+            decode_ms = measure_play(lambda: [encode_asset(path) for path in paths])
+            bundle_ms = measure_play(lambda: [bundle.lookup(path) for path in paths])
+            table_play.append(
+                [
+                    name,
+                    frames,
+                    f"{decode_ms:.2f}",
+                    f"{bundle_ms:.3f}",
+                    f"{decode_ms / max(bundle_ms, 1e-6):.0f}x",
+                ]
+            )
+            print(f"{name} 测试完成")
+        bundle.close()
+
+    print("\n" + "=" * 50)
+    print("音频资源包测试结果")
+    print("=" * 50)
+    print(tabulate(table_startup, headers=["场景", "资源数", "编码资源数", "耗时(ms)"], tablefmt="grid"))
+    print(
+        tabulate(
+            table_play,
+            headers=["播放内容", "opus帧数", "实时解码编码CPU(ms)", "资源包CPU(ms)", "加速比"],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print("- 资源为 audio_assets 配置中的默认文件（config/assets 下的提示音、绑定码数字、唤醒词回复）")
+    print("- 实时解码编码: 原 audio_to_data 在缓存失效（10分钟/100条）或 use_cache=False 时的处理流程")
+    print("- 资源包: 每次播放只检查一次源文件状态并返回已编码的数据包列表")
+    print(f"- CPU耗时为 {ROUNDS} 次播放的平均值")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,139 @@
+import os
+import time
+import asyncio
+from io import BytesIO
+from tabulate import tabulate
+from pydub import AudioSegment
+from core.utils.util import pcm_to_data_stream
+from core.utils.audio_stream import AudioStreamDecoder, av
+
+description = "TTS音频增量解码与整段pydub解码的首帧延迟和CPU开销测试"
+
+FIXTURES = [
+    os.path.join("config", "assets", "wakeup_words.wav"),
+    os.path.join("config", "assets", "bind_code.wav"),
+    os.path.join("config", "assets", "tts_notify.mp3"),
+]
+# 模拟TTS服务按该倍速返回音频（生成1秒音频需要 1/SPEEDUP 秒）
+SPEEDUP = 4
+# 每次收到的数据块大小（字节）
+CHUNK_SIZE = 4096
+ROUNDS = 5
+
+
+def cpu_seconds():
+    """本进程及已结束子进程（ffmpeg）的CPU时间"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def legacy_decode(chunks, file_type, callback):
+    """改造前：收齐全部数据后由 pydub 解码、整段重采样，再逐帧编码"""
+    audio = AudioSegment.from_file(
+        BytesIO(b"".join(chunks)), format=file_type, parameters=["-nostdin"]
+    )
+    audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
+    pcm_to_data_stream(audio.raw_data, True, callback)
+
+
+def simulate(chunks, arrivals, process_chunk, finish):
+    """按模拟的到达时间依次处理数据块，返回首帧延迟（秒）
+
+    虚拟时钟：数据块到达前处理方空闲，处理耗时按实际测量累加
+    """
+    state = {"first": None, "clock": 0.0, "start": 0.0}
+
+    def on_frame(_frame):
+        if state["first"] is None:
+            state["first"] = state["clock"] + time.perf_counter() - state["start"]
+
+    for chunk, arrival in zip(chunks, arrivals):
+        state["clock"] = max(state["clock"], arrival)
+        state["start"] = time.perf_counter()
+        process_chunk(chunk, on_frame)
+        state["clock"] += time.perf_counter() - state["start"]
+    state["start"] = time.perf_counter()
+    finish(on_frame)
+    return state["first"]
+
+
+def run_legacy(chunks, arrivals, file_type):
+    received = []
+
+    def process_chunk(chunk, on_frame):
+        received.append(chunk)
+
+    def finish(on_frame):
+        legacy_decode(received, file_type, on_frame)
+
+    return simulate(chunks, arrivals, process_chunk, finish)
+
+
+def run_stream(chunks, arrivals, file_type):
+    holder = {}
+
+    def process_chunk(chunk, on_frame):
+        if "decoder" not in holder:
+            holder["decoder"] = AudioStreamDecoder(file_type, True, on_frame)
+        holder["decoder"].feed(chunk)
+
+    def finish(on_frame):
+        holder["decoder"].finish()
+
+    return simulate(chunks, arrivals, process_chunk, finish)
+
+
+def measure(name, run, chunks, arrivals, file_type, duration):
+    latencies = []
+    cpu_start = cpu_seconds()
+    for _ in range(ROUNDS):
+        latencies.append(run(chunks, arrivals, file_type))
+    cpu_used = (cpu_seconds() - cpu_start) / ROUNDS
+    latencies.sort()
+    return [
+        name,
+        f"{latencies[len(latencies) // 2] * 1000:.1f}",
+        f"{cpu_used * 1000:.1f}",
+        f"{cpu_used / duration * 1000:.2f}",
+    ]
+
+
+async def main():
+    table = []
+    for path in FIXTURES:
+        if not os.path.exists(path):
+            print(f"未找到测试音频 {path}，已跳过")
+            continue
+        file_type = os.path.splitext(path)[1].lstrip(".")
+        with open(path, "rb") as f:
+            data = f.read()
+        chunks = [data[i : i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+
+        duration = AudioSegment.from_file(path, format=file_type).duration_seconds
+        # 数据块按TTS生成速度均匀到达
+        arrivals = [
+            (i + 1) / len(chunks) * duration / SPEEDUP for i in range(len(chunks))
+        ]
+        name = f"{os.path.basename(path)} ({duration:.1f}s)"
+        for mode, run in (("整段pydub", run_legacy), ("增量解码", run_stream)):
+            table.append([name] + measure(mode, run, chunks, arrivals, file_type, duration))
+        print(f"{name} 测试完成")
+
+    print("\n" + "=" * 50)
+    print("TTS音频解码测试结果")
+    print("=" * 50)
+    headers = ["音频", "模式", "首帧延迟(ms)", "单句CPU(ms)", "每秒音频CPU(ms)"]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- 音频按 {CHUNK_SIZE} 字节分块，模拟TTS服务以 {SPEEDUP} 倍实时速度返回，"
+        "首帧延迟从开始接收计算"
+    )
+    print("- 输出均为16kHz单声道、60ms一帧的opus数据")
+    print("- CPU 包含 ffmpeg 子进程的耗时")
+    if av is None:
+        print("- 未安装 PyAV，mp3 增量解码回退为收齐后解码，安装 av 包后重新测试")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
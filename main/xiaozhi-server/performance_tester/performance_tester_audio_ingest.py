@@ -0,0 +1,215 @@
+import os
+import time
+import asyncio
+import numpy as np
+import opuslib_next
+from tabulate import tabulate
+from core.utils.audio_assets import encode_asset
+from core.utils.audio_ingest import AudioIngest, VAD_FRAME_BYTES
+from core.providers.asr.base import ASRProviderBase
+
+description = "上行音频接收（VAD分帧、ASR预录缓存、识别前解码）的内存拷贝与分配次数测试"
+
+SOURCE_AUDIO = os.path.join("config", "assets", "max_output_size.wav")
+FRAME_MS = 60
+# 模拟的音频时长（秒）
+DURATION_SECONDS = 60
+# 每轮对话：静音时长、说话时长（秒）
+SILENCE_SECONDS = 3
+SPEECH_SECONDS = 4
+ROUNDS = 5
+
+
+def to_model_input(frame):
+    """与 VAD 相同的模型输入转换，两种实现一致，不计入统计"""
+    return np.frombuffer(frame, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def legacy_decode_opus(opus_data, counters):
+    """改造前的 ASRProviderBase.decode_opus：每次识别新建解码器重新解码"""
+    decoder = opuslib_next.Decoder(16000, 1)
+    pcm_data = []
+    counters["allocs"] += 1
+    for opus_packet in opus_data:
+        if not opus_packet:
+            continue
+        pcm_frame = decoder.decode(opus_packet, 960)
+        count_opuslib_decode(pcm_frame, counters)
+        pcm_data.append(pcm_frame)
+    return pcm_data
+
+
+def count_opuslib_decode(pcm_frame, counters):
+    # opuslib_next 解码依次生成 ctypes缓冲区、int列表、array、bytes
+    counters["allocs"] += 4
+    counters["copied"] += len(pcm_frame) * 3
+    counters["decoded"] += 1
+
+
+class LegacyIngest:
+    """改造前的流程：bytearray 切片分帧，asr_audio 列表截断，识别时重新解码"""
+
+    def __init__(self, counters):
+        self.counters = counters
+        self.decoder = opuslib_next.Decoder(16000, 1)
+        self.client_audio_buffer = bytearray()
+        self.asr_audio = []
+
+    def vad(self, packet):
+        pcm_frame = self.decoder.decode(packet, 960)
+        count_opuslib_decode(pcm_frame, self.counters)
+        self.client_audio_buffer.extend(pcm_frame)
+        self.counters["copied"] += len(pcm_frame)
+        while len(self.client_audio_buffer) >= VAD_FRAME_BYTES:
+            chunk = self.client_audio_buffer[:VAD_FRAME_BYTES]
+            self.client_audio_buffer = self.client_audio_buffer[VAD_FRAME_BYTES:]
+            self.counters["allocs"] += 2
+            self.counters["copied"] += VAD_FRAME_BYTES + len(self.client_audio_buffer)
+            to_model_input(chunk)
+
+    def receive(self, packet, have_voice, voice_stop):
+        self.asr_audio.append(packet)
+        if not have_voice:
+            self.asr_audio = self.asr_audio[-10:]
+            self.counters["allocs"] += 1
+            return None
+        if voice_stop:
+            asr_audio_task = self.asr_audio.copy()
+            self.asr_audio.clear()
+            self.counters["allocs"] += 1
+            return asr_audio_task
+        return None
+
+    def decode_opus(self, asr_audio_task):
+        return legacy_decode_opus(asr_audio_task, self.counters)
+
+
+class RingIngest:
+    """改造后的流程：AudioIngest 解码一次并写入环形缓冲区，asr_audio 附带PCM"""
+
+    def __init__(self, counters):
+        self.counters = counters
+        self.ingest = AudioIngest()
+        self.asr_audio = self.ingest.create_packet_buffer()
+        self.scratch = self.ingest.vad_ring._scratch
+
+    def vad(self, packet):
+        self.ingest.feed_vad(packet)
+        pcm_frame = self.ingest.pcm_for(packet)
+        # 解码结果复制为bytes，再写入环形缓冲区
+        self.counters["allocs"] += 1
+        self.counters["copied"] += len(pcm_frame) * 2
+        self.counters["decoded"] += 1
+        for frame in self.ingest.vad_frames():
+            if frame.obj is self.scratch:
+                # 跨越缓冲区末尾的帧拷贝到预分配的拼接区
+                self.counters["copied"] += VAD_FRAME_BYTES
+            else:
+                self.counters["allocs"] += 1
+            to_model_input(frame)
+
+    def receive(self, packet, have_voice, voice_stop):
+        self.asr_audio.append(packet, self.ingest.pcm_for(packet))
+        if not have_voice:
+            self.asr_audio.keep_preroll()
+            return None
+        if voice_stop:
+            self.counters["allocs"] += 2
+            return self.asr_audio.take()
+        return None
+
+    def decode_opus(self, asr_audio_task):
+        pcm_data = ASRProviderBase.decode_opus(asr_audio_task)
+        self.counters["allocs"] += 1
+        return pcm_data
+
+
+def build_schedule(packet_count):
+    """返回每个包的 (是否有声音, 是否为一句话的结束)"""
+    cycle = (SILENCE_SECONDS + SPEECH_SECONDS) * 1000 // FRAME_MS
+    silence = SILENCE_SECONDS * 1000 // FRAME_MS
+    schedule = []
+    for index in range(packet_count):
+        position = index % cycle
+        schedule.append((position >= silence, position == cycle - 1))
+    return schedule
+
+
+def run(ingest_factory, packets, schedule):
+    counters = {"allocs": 0, "copied": 0, "decoded": 0}
+    ingest = ingest_factory(counters)
+    utterances = 0
+    start = time.process_time()
+    for packet, (have_voice, voice_stop) in zip(packets, schedule):
+        ingest.vad(packet)
+        asr_audio_task = ingest.receive(packet, have_voice, voice_stop)
+        if asr_audio_task is None:
+            continue
+        utterances += 1
+        # handle_voice_stop 为声纹识别解码一次，speech_to_text 中的 provider 再解码一次
+        for _ in range(2):
+            pcm_data = ingest.decode_opus(asr_audio_task)
+        combined_pcm_data = b"".join(pcm_data)
+        counters["allocs"] += 1
+        counters["copied"] += len(combined_pcm_data)
+    cpu = time.process_time() - start
+    return counters, utterances, cpu
+
+
+async def main():
+    if not os.path.exists(SOURCE_AUDIO):
+        print(f"未找到测试音频 {SOURCE_AUDIO}")
+        return
+    source = encode_asset(SOURCE_AUDIO)
+    count = DURATION_SECONDS * 1000 // FRAME_MS
+    # 每个包是独立的bytes对象，与websocket收到的数据一致
+    packets = [bytes(bytearray(source[i % len(source)])) for i in range(count)]
+    schedule = build_schedule(count)
+    audio_seconds = count * FRAME_MS / 1000
+
+    table = []
+    for name, factory in (
+        ("bytearray切片 + 列表截断", LegacyIngest),
+        ("环形缓冲区 + 共享PCM", RingIngest),
+    ):
+        cpu_total = 0.0
+        for _ in range(ROUNDS):
+            counters, utterances, cpu = run(factory, packets, schedule)
+            cpu_total += cpu
+        table.append(
+            [
+                name,
+                utterances,
+                f"{counters['decoded'] / audio_seconds:.1f}",
+                f"{counters['copied'] / audio_seconds / 1024:.1f}",
+                f"{counters['allocs'] / audio_seconds:.1f}",
+                f"{cpu_total / ROUNDS / audio_seconds * 1000:.2f}",
+            ]
+        )
+        print(f"{name} 测试完成")
+
+    print("\n" + "=" * 50)
+    print("上行音频接收测试结果")
+    print("=" * 50)
+    headers = [
+        "模式",
+        "识别句数",
+        "每秒音频opus解码次数",
+        "每秒音频拷贝(KB)",
+        "每秒音频分配次数",
+        "每秒音频CPU(ms)",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- {DURATION_SECONDS}秒 16kHz 上行音频按{FRAME_MS}ms一帧编码为opus，"
+        f"每轮静音{SILENCE_SECONDS}秒、说话{SPEECH_SECONDS}秒，说话结束时触发识别"
+    )
+    print("- 每个包先经VAD解码并按512采样点分帧，再进入ASR缓存；静音期间只保留10个预录包")
+    print("- 识别时 handle_voice_stop（声纹）和 provider 的 speech_to_text 各调用一次 decode_opus")
+    print("- 拷贝与分配只统计音频数据的缓冲区（bytes、bytearray、列表、memoryview 等），模型输入转换两者相同，不计入")
+    print(f"- CPU为 {ROUNDS} 次运行的平均值，不含VAD模型推理")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,184 @@
+import time
+import random
+import asyncio
+from collections import deque
+from tabulate import tabulate
+import core.utils.audio_pacing as audio_pacing
+from core.utils.audio_pacing import AudioPacingScheduler
+from core.utils.audioRateController import AudioRateController
+
+description = "全局音频发送调度器与逐连接sleep流控的事件循环占用和帧发送抖动测试"
+
+# 同时播放的连接数
+CONNECTION_COUNTS = [100, 500, 1000, 2000]
+FRAME_DURATION = 60
+# 每个连接播放的音频时长（秒）
+PLAY_SECONDS = 3
+# 事件循环响应探测间隔（秒）
+PROBE_INTERVAL = 0.01
+
+
+class LegacyAudioRateController:
+    """改造前的 AudioRateController：每个连接一个发送任务，每帧 asyncio.sleep 一次"""
+
+    def __init__(self, frame_duration=60):
+        self.frame_duration = frame_duration
+        self.queue = deque()
+        self.play_position = 0
+        self.start_timestamp = None
+        self.queue_has_data_event = asyncio.Event()
+        self.pending_send_task = None
+
+    def add_audio(self, opus_packet):
+        self.queue.append(("audio", opus_packet))
+        self.queue_has_data_event.set()
+
+    async def check_queue(self, send_audio_callback):
+        while self.queue:
+            _, opus_packet = self.queue[0]
+            if self.start_timestamp is None:
+                self.start_timestamp = time.monotonic()
+            while True:
+                elapsed_ms = (time.monotonic() - self.start_timestamp) * 1000
+                if elapsed_ms < self.play_position:
+                    await asyncio.sleep((self.play_position - elapsed_ms) / 1000)
+                else:
+                    break
+            self.queue.popleft()
+            self.play_position += self.frame_duration
+            await send_audio_callback(opus_packet)
+        self.queue_has_data_event.clear()
+
+    def start_sending(self, send_audio_callback):
+        async def _send_loop():
+            try:
+                while True:
+                    await self.queue_has_data_event.wait()
+                    await self.check_queue(send_audio_callback)
+            except asyncio.CancelledError:
+                pass
+
+        self.pending_send_task = asyncio.create_task(_send_loop())
+
+    def stop_sending(self):
+        if self.pending_send_task and not self.pending_send_task.done():
+            self.pending_send_task.cancel()
+
+
+def percentile(values, ratio):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+
+async def probe_loop(stop, delays):
+    """定时探测事件循环的响应延迟"""
+    while not stop.is_set():
+        start = time.monotonic()
+        await asyncio.sleep(PROBE_INTERVAL)
+        delays.append(time.monotonic() - start - PROBE_INTERVAL)
+
+
+async def run_case(create_controller, connection_count):
+    frames_per_connection = PLAY_SECONDS * 1000 // FRAME_DURATION
+    lags = []
+    done = asyncio.Event()
+    remaining = [connection_count]
+    controllers = []
+
+    def make_callback(controller):
+        async def send(frame_index):
+            # 帧的计划发送时间 = 开始时间 + 帧序号 * 帧时长
+            due = controller.start_timestamp + frame_index * FRAME_DURATION / 1000
+            lags.append(time.monotonic() - due)
+            if frame_index == frames_per_connection - 1:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+
+        return send
+
+    rng = random.Random(0)
+    stop_probe = asyncio.Event()
+    probe_delays = []
+    probe_task = asyncio.create_task(probe_loop(stop_probe, probe_delays))
+
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    for _ in range(connection_count):
+        controller = create_controller()
+        controllers.append(controller)
+        controller.start_sending(make_callback(controller))
+    # 各连接在一帧时长内陆续开始播放，TTS一次性返回整句音频
+    for controller in controllers:
+        await asyncio.sleep(rng.random() * FRAME_DURATION / 1000 / connection_count)
+        for frame_index in range(frames_per_connection):
+            controller.add_audio(frame_index)
+    await done.wait()
+    wall = time.monotonic() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    stop_probe.set()
+    await probe_task
+    for controller in controllers:
+        controller.stop_sending()
+    lags.sort()
+    probe_delays.sort()
+    return [
+        f"{cpu / wall * 100:.1f}",
+        f"{percentile(lags, 0.5) * 1000:.2f}",
+        f"{percentile(lags, 0.99) * 1000:.2f}",
+        f"{lags[-1] * 1000:.2f}",
+        f"{percentile(probe_delays, 0.99) * 1000:.2f}",
+    ]
+
+
+async def main():
+    table = []
+    for connection_count in CONNECTION_COUNTS:
+        table.append(
+            [connection_count, "逐连接sleep"]
+            + await run_case(
+                lambda: LegacyAudioRateController(FRAME_DURATION), connection_count
+            )
+        )
+        # 每次测试使用新的调度器，统计互不影响
+        audio_pacing._scheduler = AudioPacingScheduler()
+        table.append(
+            [connection_count, "全局调度器"]
+            + await run_case(
+                lambda: AudioRateController(FRAME_DURATION), connection_count
+            )
+        )
+        audio_pacing._scheduler.close()
+        print(f"{connection_count}个连接 测试完成")
+
+    print("\n" + "=" * 50)
+    print("音频发送调度测试结果")
+    print("=" * 50)
+    headers = [
+        "连接数",
+        "模式",
+        "事件循环CPU占用(%)",
+        "发送延迟P50(ms)",
+        "发送延迟P99(ms)",
+        "发送延迟最大(ms)",
+        "循环响应延迟P99(ms)",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- 每个连接播放{PLAY_SECONDS}秒音频（{FRAME_DURATION}ms一帧），"
+        "所有帧一次性加入流控队列，发送回调不做网络IO"
+    )
+    print("- 发送延迟 = 帧实际发出时间 - 计划播放时间（开始时间 + 帧序号 × 帧时长）")
+    print("- 事件循环CPU占用 = 测试期间进程CPU时间 / 墙钟时间")
+    print(
+        f"- 循环响应延迟: 每 {PROBE_INTERVAL * 1000:.0f}ms 的定时任务实际唤醒时间超出预期的部分，"
+        "反映其他协程（收音、ASR等）被调度的及时程度"
+    )
+    print(f"- 全局调度器节拍为 {audio_pacing.DEFAULT_TICK_MS}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,211 @@
+import io
+import os
+import time
+import wave
+import asyncio
+import threading
+import numpy as np
+import psutil
+from tabulate import tabulate
+from config.config_loader import load_config
+from core.connection import ConnectionHandler
+from core.providers.asr.base import ASRProviderBase
+from core.providers.tts.base import TTSProviderBase
+from core.providers.tts.dto.dto import TTSMessageDTO, SentenceType, ContentType
+
+description = "连接执行模式(thread/async)线程数、内存与CPU占用对比测试"
+
+IDLE_CONNECTIONS = 200
+ACTIVE_CONNECTIONS = 20
+MEASURE_SECONDS = 10
+# 模拟LLM逐字输出的间隔（秒）与TTS接口耗时（秒）
+MOCK_TOKEN_INTERVAL = 0.02
+MOCK_TTS_LATENCY = 0.1
+REPLY_TEXT = "好的，今天天气晴朗，气温二十度左右。适合出门散步，记得带上水哦！"
+
+
+def build_wav(seconds=1.0, sample_rate=16000):
+    """生成一段正弦波WAV，模拟TTS接口返回的音频"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+class NullWebSocket:
+    """丢弃所有下发数据的WebSocket"""
+
+    async def send(self, data):
+        pass
+
+    async def close(self):
+        pass
+
+
+class MockASRProvider(ASRProviderBase):
+    async def speech_to_text(self, opus_data, session_id, audio_format="opus"):
+        return "", None
+
+
+class MockTTSProvider(TTSProviderBase):
+    """本地模拟的非流式TTS提供方"""
+
+    AUDIO = build_wav()
+
+    def __init__(self):
+        super().__init__({"voice": "mock", "format": "wav"}, delete_audio_file=True)
+        self.audio_file_type = "wav"
+        self.tts_cache = None
+
+    async def text_to_speak(self, text, output_file):
+        await asyncio.sleep(MOCK_TTS_LATENCY)
+        return self.AUDIO
+
+
+async def open_connection(config, mode):
+    config = dict(config)
+    config["connection_mode"] = mode
+    conn = ConnectionHandler(config, None, None, None, None, None)
+    conn.loop = asyncio.get_running_loop()
+    conn.websocket = NullWebSocket()
+    conn.headers = {}
+    conn.tts = MockTTSProvider()
+    conn.asr = MockASRProvider()
+    await conn.tts.open_audio_channels(conn)
+    await conn.asr.open_audio_channels(conn)
+    return conn
+
+
+def mock_chat(conn):
+    """模拟一轮LLM流式回复：逐字写入TTS文本队列"""
+    conn.sentence_id = os.urandom(8).hex()
+    conn.tts.tts_text_queue.put(
+        TTSMessageDTO(
+            sentence_id=conn.sentence_id,
+            sentence_type=SentenceType.FIRST,
+            content_type=ContentType.ACTION,
+        )
+    )
+    for char in REPLY_TEXT:
+        time.sleep(MOCK_TOKEN_INTERVAL)
+        conn.tts.tts_text_queue.put(
+            TTSMessageDTO(
+                sentence_id=conn.sentence_id,
+                sentence_type=SentenceType.MIDDLE,
+                content_type=ContentType.TEXT,
+                content_detail=char,
+            )
+        )
+    conn.tts.tts_text_queue.put(
+        TTSMessageDTO(
+            sentence_id=conn.sentence_id,
+            sentence_type=SentenceType.LAST,
+            content_type=ContentType.ACTION,
+        )
+    )
+
+
+async def drive_turns(conn, deadline, counter):
+    """不断发起对话，等上一轮播放结束后再开始下一轮"""
+    while time.monotonic() < deadline:
+        conn.client_is_speaking = True
+        await asyncio.wrap_future(conn.executor.submit(mock_chat, conn))
+        while conn.client_is_speaking and time.monotonic() < deadline + 5:
+            await asyncio.sleep(0.05)
+        counter[0] += 1
+
+
+async def measure(connections, active, process):
+    peak_threads = threading.active_count()
+    counter = [0]
+    cpu_start = process.cpu_times()
+    start = time.monotonic()
+    deadline = start + MEASURE_SECONDS
+    drivers = (
+        [asyncio.create_task(drive_turns(c, deadline, counter)) for c in connections]
+        if active
+        else []
+    )
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.2)
+        peak_threads = max(peak_threads, threading.active_count())
+    if drivers:
+        await asyncio.gather(*drivers)
+    cpu_end = process.cpu_times()
+    elapsed = time.monotonic() - start
+    cpu = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    return peak_threads, cpu / elapsed, counter[0]
+
+
+async def run_case(config, mode, count, active):
+    process = psutil.Process()
+    base_threads = threading.active_count()
+    base_rss = process.memory_info().rss
+
+    connections = [await open_connection(config, mode) for _ in range(count)]
+    await asyncio.sleep(1)
+    peak_threads, cpu_ratio, turns = await measure(connections, active, process)
+    rss = process.memory_info().rss
+
+    for conn in connections:
+        await conn.close()
+    # 等待线程模式下的轮询线程退出
+    await asyncio.sleep(1.5)
+
+    return {
+        "threads": (peak_threads - base_threads) / count,
+        "rss_kb": (rss - base_rss) / 1024 / count,
+        "cpu_ms": cpu_ratio * 1000 / count,
+        "turns": turns,
+    }
+
+
+async def main():
+    config = load_config()
+    table = []
+    for active, count in ((False, IDLE_CONNECTIONS), (True, ACTIVE_CONNECTIONS)):
+        for mode in ("thread", "async"):
+            result = await run_case(config, mode, count, active)
+            table.append(
+                [
+                    "活跃" if active else "空闲",
+                    mode,
+                    count,
+                    f"{result['threads']:.2f}",
+                    f"{result['rss_kb']:.0f}",
+                    f"{result['cpu_ms']:.2f}",
+                    result["turns"] if active else "-",
+                ]
+            )
+            print(f"{mode} 模式 {'活跃' if active else '空闲'}连接 x{count} 完成")
+
+    print("\n" + "=" * 50)
+    print("连接执行模式对比测试结果")
+    print("=" * 50)
+    headers = [
+        "连接状态",
+        "模式",
+        "连接数",
+        "线程数/连接",
+        "RSS增量(KB)/连接",
+        "CPU(ms/秒)/连接",
+        "完成对话轮数",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print("- 使用真实的 ConnectionHandler 与 TTS/ASR 基类流水线，LLM与TTS接口为本地模拟")
+    print(
+        f"- 活跃连接持续对话：每字间隔{MOCK_TOKEN_INTERVAL * 1000:.0f}ms，"
+        f"TTS接口耗时{MOCK_TTS_LATENCY * 1000:.0f}ms，音频按60ms节奏下发"
+    )
+    print("- 线程数为测试期间进程线程数峰值的增量，async 模式包含共享卸载线程池按需创建的线程")
+    print(f"- CPU 为{MEASURE_SECONDS}秒测试窗口内每秒消耗的CPU时间")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
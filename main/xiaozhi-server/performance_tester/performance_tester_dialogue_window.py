@@ -0,0 +1,264 @@
+import json
+import time
+import socket
+import asyncio
+import threading
+import concurrent.futures
+import numpy as np
+from aiohttp import web
+from tabulate import tabulate
+from core.utils.dialogue import Dialogue, Message, SUMMARY_PROMPT
+from core.utils.token_budget import get_tokenizer, count_message_tokens
+from core.providers.llm.openai.openai import LLMProvider
+
+description = "LLM上下文token预算窗口与滚动摘要在长会话中的prompt长度与首token延迟测试"
+
+# 每个会话的对话轮数及并行的会话数
+TURNS = 100
+SESSIONS = 2
+# 每隔多少轮有一次工具调用
+TOOL_CALL_EVERY = 10
+# 模拟LLM的首token耗时：固定开销 + 每个prompt token的预填充耗时（秒）
+PREFILL_BASE = 0.03
+PREFILL_PER_TOKEN = 0.00002
+# 模拟服务端的上下文长度上限，超出时返回400
+CONTEXT_LIMIT = 16000
+# 回复的分块数
+REPLY_CHUNKS = 6
+# 测试使用的上下文预算
+MAX_PROMPT_TOKENS = 3000
+
+SYSTEM_PROMPT = (
+    "你是小智，一个聪明可爱的语音助手，说话简短自然，像朋友一样聊天。"
+    "当前时间：{{current_time}}。用户所在城市：北京。"
+    "<memory>\n</memory>\n"
+    "回答要求：1. 口语化，不使用markdown；2. 每次回答不超过三句话；"
+    "3. 不确定的信息要如实说明；4. 需要查询实时信息时调用工具。" * 6
+)
+USER_TEMPLATES = [
+    "第{turn}轮：今天北京的天气怎么样，适合出去跑步吗？",
+    "第{turn}轮：帮我想一个周末带孩子去玩的地方，最好不要太远。",
+    "第{turn}轮：给我讲一个关于宇航员的小故事，短一点。",
+    "第{turn}轮：我晚饭想吃点清淡的，有什么推荐吗？",
+    "第{turn}轮：提醒我一下明天上午要给妈妈打电话。",
+]
+REPLY_TEXT = (
+    "好的，我来帮你看看。今天北京晴转多云，气温二十到二十八度，空气质量良，"
+    "傍晚比较凉快，适合出去跑步，记得带水，跑完拉伸一下。还有什么需要我帮忙的吗？"
+)
+SUMMARY_TEXT = "用户住在北京，关心天气和运动，有孩子，喜欢清淡饮食，需要提醒给妈妈打电话。" * 3
+TOOL_RESULT = json.dumps(
+    {"city": "北京", "weather": "晴转多云", "temp": "20~28℃", "aqi": 62, "tips": "适合户外运动"}
+    | {f"hour_{i}": f"{20 + i % 8}℃" for i in range(24)},
+    ensure_ascii=False,
+)
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _chunk(content):
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "mock-llm",
+        "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+    }
+
+
+class MockLLMServer:
+    """在独立线程中运行的模拟OpenAI兼容LLM服务，首token耗时随prompt长度线性增长"""
+
+    def __init__(self):
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}/v1"
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.ready = threading.Event()
+        self.runner = None
+        self.tokenizer = get_tokenizer({"type": "simple"})
+        self.summary_requests = 0
+
+    async def _handle(self, request):
+        body = await request.json()
+        messages = body["messages"]
+        prompt_tokens = sum(count_message_tokens(self.tokenizer, m) for m in messages)
+        if prompt_tokens > CONTEXT_LIMIT:
+            return web.json_response(
+                {"error": {"message": "context length exceeded"}}, status=400
+            )
+        is_summary = messages[0]["content"].startswith(SUMMARY_PROMPT[:8])
+        if is_summary:
+            self.summary_requests += 1
+            reply = SUMMARY_TEXT
+        else:
+            reply = REPLY_TEXT
+        await asyncio.sleep(PREFILL_BASE + prompt_tokens * PREFILL_PER_TOKEN)
+
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        step = len(reply) // REPLY_CHUNKS + 1
+        for index in range(0, len(reply), step):
+            payload = json.dumps(_chunk(reply[index : index + step]), ensure_ascii=False)
+            await resp.write(f"data: {payload}\n\n".encode("utf-8"))
+        await resp.write_eof(b"data: [DONE]\n\n")
+        return resp
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", self.port)
+        self.loop.run_until_complete(site.start())
+        self.ready.set()
+        self.loop.run_forever()
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+def run_session(llm, window_options, executor, session_index):
+    """模拟 connection.chat 的一个会话，返回每轮的 (prompt token数, 构建上下文耗时, 首token耗时, 是否失败)"""
+    dialogue = Dialogue(window_options)
+    dialogue.update_system_message(SYSTEM_PROMPT)
+    tokenizer = dialogue.tokenizer
+    results = []
+    for turn in range(1, TURNS + 1):
+        query = USER_TEMPLATES[turn % len(USER_TEMPLATES)].format(turn=turn)
+        dialogue.put(Message(role="user", content=query))
+        if turn % TOOL_CALL_EVERY == 0:
+            tool_call_id = f"call_{session_index}_{turn}"
+            dialogue.put(
+                Message(
+                    role="assistant",
+                    tool_calls=[
+                        {
+                            "id": tool_call_id,
+                            "type": "function",
+                            "function": {
+                                "name": "get_weather",
+                                "arguments": json.dumps({"city": "北京"}, ensure_ascii=False),
+                            },
+                        }
+                    ],
+                )
+            )
+            dialogue.put(Message(role="tool", tool_call_id=tool_call_id, content=TOOL_RESULT))
+
+        start = time.perf_counter()
+        messages = dialogue.get_llm_dialogue_with_memory(None, {})
+        build_time = time.perf_counter() - start
+        prompt_tokens = sum(count_message_tokens(tokenizer, m) for m in messages)
+
+        first_token = None
+        reply = []
+        for content in llm.response(f"session-{session_index}", messages):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            reply.append(content)
+        text = "".join(reply)
+        failed = "异常" in text
+        dialogue.put(Message(role="assistant", content=text))
+        results.append((prompt_tokens, build_time, first_token or 0.0, failed))
+
+        # 与 connection.chat 相同，一轮结束后在线程池中总结移出上下文的对话
+        if dialogue.needs_summary():
+            executor.submit(dialogue.summarize, llm)
+    return results
+
+
+def summarize_results(name, sessions):
+    prompt_tokens = np.array([[r[0] for r in s] for s in sessions])
+    build_ms = np.array([r[1] for s in sessions for r in s]) * 1000
+    ttft_ms = np.array([r[2] for s in sessions for r in s if not r[3]]) * 1000
+    last_ttft_ms = np.array([s[-1][2] for s in sessions if not s[-1][3]]) * 1000
+    failed = sum(r[3] for s in sessions for r in s)
+    return [
+        name,
+        f"{prompt_tokens[:, 9].mean():.0f}",
+        f"{prompt_tokens[:, 49].mean():.0f}",
+        f"{prompt_tokens[:, -1].mean():.0f}",
+        f"{prompt_tokens.sum(axis=1).mean():.0f}",
+        f"{np.percentile(ttft_ms, 50):.1f}" if len(ttft_ms) else "-",
+        f"{np.percentile(ttft_ms, 95):.1f}" if len(ttft_ms) else "-",
+        f"{last_ttft_ms.mean():.1f}" if len(last_ttft_ms) else "-",
+        f"{build_ms.mean():.3f}",
+        failed,
+    ]
+
+
+async def main():
+    server = MockLLMServer()
+    server.start()
+    llm = LLMProvider(
+        {"model_name": "mock-llm", "base_url": server.base_url, "api_key": "sk-performance-tester"}
+    )
+    modes = [
+        ("完整历史（改造前）", {"enabled": False}),
+        (
+            f"token预算{MAX_PROMPT_TOKENS}+滚动摘要",
+            {"enabled": True, "max_prompt_tokens": MAX_PROMPT_TOKENS, "summary": True},
+        ),
+    ]
+    table = []
+    summary_counts = []
+    try:
+        for name, window_options in modes:
+            summary_before = server.summary_requests
+            with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+                futures = [
+                    executor.submit(run_session, llm, window_options, executor, i)
+                    for i in range(SESSIONS)
+                ]
+                sessions = [future.result() for future in futures]
+            table.append(summarize_results(name, sessions))
+            summary_counts.append(server.summary_requests - summary_before)
+            print(f"{name} 测试完成")
+    finally:
+        server.stop()
+
+    print("\n" + "=" * 50)
+    print("LLM上下文窗口测试结果")
+    print("=" * 50)
+    headers = [
+        "模式",
+        "第10轮prompt tokens",
+        "第50轮prompt tokens",
+        "第100轮prompt tokens",
+        "单会话prompt tokens总计",
+        "首token P50(ms)",
+        "首token P95(ms)",
+        "第100轮首token(ms)",
+        "构建上下文(ms)",
+        "请求失败轮数",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- {SESSIONS} 个会话并行，每个会话 {TURNS} 轮，每 {TOOL_CALL_EVERY} 轮有一次工具调用（含较长的工具结果）"
+    )
+    print(
+        f"- 模拟LLM首token耗时 = {PREFILL_BASE * 1000:.0f}ms + 每个prompt token "
+        f"{PREFILL_PER_TOKEN * 1000:.2f}ms，上下文超过 {CONTEXT_LIMIT} tokens 时返回400"
+    )
+    print("- prompt tokens 使用 simple 分词器估算；首token为开始构建上下文到收到第一个token的耗时")
+    print(
+        f"- 滚动摘要在每轮结束后于线程池中生成，不计入首token；共发起摘要请求 "
+        f"{summary_counts[-1]} 次"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
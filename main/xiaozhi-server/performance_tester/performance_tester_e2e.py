@@ -0,0 +1,552 @@
+"""
+端到端压测：模拟多台设备通过真实的websocket协议与服务端对话
+
+- 服务端在子进程中启动，ASR/LLM/TTS全部指向本脚本启动的本地模拟服务，完全离线运行
+  ASR: openai 兼容的 /v1/audio/transcriptions
+  LLM: openai 兼容的流式 /v1/chat/completions
+  TTS: custom 类型，GET /tts 返回WAV
+- 每台模拟设备发送 hello、listen，并按60ms节奏发送由测试音频编码的opus帧
+- 统计连接建立耗时、VAD结束到首个音频帧的延迟、播放卡顿与丢帧，以及服务端CPU、内存、线程数
+"""
+
+import os
+import io
+import sys
+import json
+import math
+import time
+import wave
+import random
+import socket
+import asyncio
+import tempfile
+import subprocess
+import numpy as np
+import psutil
+import opuslib_next
+import websockets
+from aiohttp import web
+from tabulate import tabulate
+
+description = "端到端压测（模拟设备 + 本地模拟ASR/LLM/TTS，离线运行）"
+
+# 每轮压测的设备数量
+DEVICE_COUNTS = [1, 10, 50]
+# 每台设备的对话轮数
+TURNS_PER_DEVICE = 3
+# 对比的连接执行模式
+CONNECTION_MODES = ["thread", "async"]
+# 服务端使用的VAD（需要本地有silero模型）
+VAD_MODULE = "SileroVAD"
+VAD_SILENCE_MS = 200
+TEST_WAV = os.path.join("config", "assets", "wakeup_words_short.wav")
+
+# 模拟服务的耗时分布：(分布类型, 均值ms, 标准差ms)，分布类型为 fixed / normal / lognormal
+MOCK_LATENCY = {
+    "asr": ("lognormal", 150, 50),
+    "llm_first_token": ("lognormal", 400, 150),
+    "llm_token_interval": ("normal", 30, 10),
+    "tts": ("lognormal", 250, 80),
+}
+MOCK_ASR_TEXT = "今天天气怎么样"
+MOCK_LLM_REPLY = "好的，我来帮你看看。今天是个适合出门的好天气，气温比较舒适。记得多喝水哦！"
+# 模拟TTS每个字对应的音频时长（毫秒）
+TTS_MS_PER_CHAR = 180
+
+FRAME_MS = 60
+FRAME_SAMPLES = 960
+# 单轮对话的超时时间（秒）
+TURN_TIMEOUT = 30
+# 设备错峰接入的时间窗口（秒）
+RAMP_UP_SECONDS = 1.0
+
+
+def sample_latency(name):
+    dist, mean, std = MOCK_LATENCY[name]
+    if dist == "fixed" or std <= 0:
+        value = mean
+    elif dist == "lognormal":
+        sigma2 = math.log(1 + (std / mean) ** 2)
+        value = random.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+    else:
+        value = random.gauss(mean, std)
+    return max(0.0, value) / 1000
+
+
+def tts_duration_ms(text):
+    """模拟TTS音频时长，取整到帧长，便于设备端计算应收帧数"""
+    frames = max(1, math.ceil(len(text) * TTS_MS_PER_CHAR / FRAME_MS))
+    return frames * FRAME_MS
+
+
+class MockProviders:
+    """本地模拟的ASR、LLM、TTS服务"""
+
+    def __init__(self):
+        self.port = None
+        self.runner = None
+        self.counts = {"asr": 0, "llm": 0, "tts": 0}
+        self._wav_cache = {}
+
+    async def start(self):
+        app = web.Application(client_max_size=32 * 1024 * 1024)
+        app.router.add_post("/v1/audio/transcriptions", self.handle_asr)
+        app.router.add_post("/v1/chat/completions", self.handle_llm)
+        app.router.add_get("/tts", self.handle_tts)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        self.port = find_free_port()
+        await web.TCPSite(self.runner, "127.0.0.1", self.port).start()
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    async def handle_asr(self, request):
+        await request.read()
+        self.counts["asr"] += 1
+        await asyncio.sleep(sample_latency("asr"))
+        return web.json_response({"text": MOCK_ASR_TEXT})
+
+    async def handle_llm(self, request):
+        body = await request.json()
+        self.counts["llm"] += 1
+        response = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        )
+        await response.prepare(request)
+        chunk_id = f"chatcmpl-{random.getrandbits(32):x}"
+
+        async def send(delta, finish_reason=None):
+            chunk = {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+            }
+            data = json.dumps(chunk, ensure_ascii=False)
+            await response.write(f"data: {data}\n\n".encode("utf-8"))
+
+        await asyncio.sleep(sample_latency("llm_first_token"))
+        await send({"role": "assistant", "content": ""})
+        for i in range(0, len(MOCK_LLM_REPLY), 2):
+            await send({"content": MOCK_LLM_REPLY[i : i + 2]})
+            await asyncio.sleep(sample_latency("llm_token_interval"))
+        await send({}, "stop")
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def handle_tts(self, request):
+        text = request.query.get("text", "")
+        self.counts["tts"] += 1
+        await asyncio.sleep(sample_latency("tts"))
+        return web.Response(body=self._build_wav(tts_duration_ms(text)), content_type="audio/wav")
+
+    def _build_wav(self, duration_ms):
+        if duration_ms not in self._wav_cache:
+            samples = np.arange(16 * duration_ms)
+            tone = (np.sin(2 * np.pi * 440 * samples / 16000) * 3000).astype(np.int16)
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(16000)
+                wf.writeframes(tone.tobytes())
+            self._wav_cache[duration_ms] = buffer.getvalue()
+        return self._wav_cache[duration_ms]
+
+
+def find_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def build_server_config(mock_base_url, port, connection_mode):
+    """覆盖 config.yaml 的压测配置，所有外部服务指向本地模拟服务"""
+    return {
+        "read_config_from_api": False,
+        "server": {
+            "ip": "127.0.0.1",
+            "port": port,
+            "auth_key": "performance-test",
+            "auth": {"enabled": False},
+        },
+        "log": {"log_level": "WARNING", "log_file": "e2e_server.log"},
+        "connection_mode": connection_mode,
+        "delete_audio": True,
+        "close_connection_no_voice_time": 600,
+        "enable_greeting": False,
+        "tts_cache": {"enable": False},
+        "selected_module": {
+            "VAD": VAD_MODULE,
+            "ASR": "E2EMockASR",
+            "LLM": "E2EMockLLM",
+            "TTS": "E2EMockTTS",
+            "Memory": "nomem",
+            "Intent": "nointent",
+        },
+        "VAD": {VAD_MODULE: {"min_silence_duration_ms": VAD_SILENCE_MS}},
+        "ASR": {
+            "E2EMockASR": {
+                "type": "openai",
+                "api_key": "performance-test",
+                "base_url": f"{mock_base_url}/v1/audio/transcriptions",
+                "model_name": "mock",
+                "output_dir": "tmp/",
+            }
+        },
+        "LLM": {
+            "E2EMockLLM": {
+                "type": "openai",
+                "api_key": "performance-test",
+                "base_url": f"{mock_base_url}/v1",
+                "model_name": "mock",
+            }
+        },
+        "TTS": {
+            "E2EMockTTS": {
+                "type": "custom",
+                "url": f"{mock_base_url}/tts",
+                "method": "GET",
+                "params": {"text": "{prompt_text}"},
+                "format": "wav",
+                "output_dir": "tmp/",
+            }
+        },
+    }
+
+
+def serve(config_path):
+    """子进程入口：使用压测配置启动websocket服务"""
+    sys.path.insert(0, os.getcwd())
+    with open(config_path, "r", encoding="utf-8") as f:
+        overrides = json.load(f)
+
+    from config import settings
+    from config.config_loader import read_config, merge_configs, get_project_dir
+    from core.utils.cache.manager import cache_manager, CacheType
+
+    server_config = merge_configs(read_config(get_project_dir() + "config.yaml"), overrides)
+    # 压测配置完全由本脚本生成，不依赖 data/.config.yaml 与管理后台
+    cache_manager.set(CacheType.CONFIG, "main_config", server_config)
+    settings.config_file_valid = True
+    # 预置位置与天气，避免提示词增强访问外网
+    cache_manager.set(CacheType.LOCATION, "127.0.0.1", "本地")
+    cache_manager.set(CacheType.WEATHER, "本地", "晴，25℃")
+
+    from core.websocket_server import WebSocketServer
+
+    async def run():
+        await WebSocketServer(server_config).start()
+
+    asyncio.run(run())
+
+
+async def start_server(mock_base_url, connection_mode):
+    port = find_free_port()
+    config_file = tempfile.NamedTemporaryFile(
+        "w", suffix=".json", delete=False, encoding="utf-8"
+    )
+    with config_file:
+        json.dump(build_server_config(mock_base_url, port, connection_mode), config_file)
+
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", config_file.name],
+        cwd=os.getcwd(),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    # 等待端口可连接（加载VAD模型等需要一些时间）
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("服务端启动失败，请查看 tmp/e2e_server.log")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            break
+        except OSError:
+            await asyncio.sleep(0.2)
+    else:
+        process.kill()
+        raise RuntimeError("服务端启动超时")
+    return process, port, config_file.name
+
+
+def load_speech_frames():
+    """读取16kHz单声道测试音频并编码为60ms的opus帧"""
+    with wave.open(TEST_WAV, "rb") as wf:
+        if wf.getframerate() != 16000 or wf.getnchannels() != 1:
+            raise ValueError(f"{TEST_WAV} 需要是16kHz单声道音频")
+        pcm = wf.readframes(wf.getnframes())
+    encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
+    frame_bytes = FRAME_SAMPLES * 2
+    frames = []
+    for offset in range(0, len(pcm) - frame_bytes + 1, frame_bytes):
+        frames.append(encoder.encode(pcm[offset : offset + frame_bytes], FRAME_SAMPLES))
+    silence = encoder.encode(b"\x00" * frame_bytes, FRAME_SAMPLES)
+    return frames, silence
+
+
+class DeviceStats:
+    def __init__(self):
+        self.setup_times = []
+        self.first_audio_latencies = []
+        self.turns = 0
+        self.failed_turns = 0
+        self.failed_connections = 0
+        self.frames = 0
+        self.late_frames = 0
+        self.dropped_frames = 0
+
+
+class PlaybackMonitor:
+    """按设备播放节奏检查音频帧：帧在播放时刻之后才到达即为卡顿"""
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.playhead = None
+        self.expected = 0
+        self.received = 0
+
+    def on_sentence(self, text):
+        self.finish_sentence()
+        self.playhead = None
+        self.expected = tts_duration_ms(text) // FRAME_MS
+        self.received = 0
+
+    def on_frame(self, now):
+        self.stats.frames += 1
+        self.received += 1
+        if self.playhead is None:
+            self.playhead = now
+            return
+        self.playhead += FRAME_MS / 1000
+        if now > self.playhead:
+            self.stats.late_frames += 1
+            self.playhead = now
+
+    def finish_sentence(self):
+        if self.expected:
+            # 允许编码边界造成的1帧误差
+            self.stats.dropped_frames += max(0, self.expected - self.received - 1)
+        self.expected = 0
+
+
+async def run_device(index, port, speech_frames, silence, stats, start_delay):
+    await asyncio.sleep(start_delay)
+    device_id = f"e2e:00:00:{index // 256:02x}:{index % 256:02x}"
+    url = f"ws://127.0.0.1:{port}/xiaozhi/v1/"
+    headers = {"device-id": device_id, "client-id": f"e2e-{index}", "protocol-version": "1"}
+
+    start = time.perf_counter()
+    try:
+        ws = await websockets.connect(url, additional_headers=headers, max_size=None)
+    except Exception:
+        stats.failed_connections += 1
+        return
+
+    loop = asyncio.get_running_loop()
+    turn_done = asyncio.Event()
+    hello_done = asyncio.Event()
+    monitor = PlaybackMonitor(stats)
+    state = {"vad_end": None, "first_audio": None}
+
+    async def receiver():
+        async for message in ws:
+            now = time.perf_counter()
+            if isinstance(message, bytes):
+                if state["first_audio"] is None and state["vad_end"] is not None:
+                    state["first_audio"] = now
+                monitor.on_frame(now)
+                continue
+            msg = json.loads(message)
+            if msg.get("type") == "hello":
+                hello_done.set()
+            elif msg.get("type") == "tts":
+                if msg.get("state") == "sentence_start":
+                    monitor.on_sentence(msg.get("text", ""))
+                elif msg.get("state") == "stop":
+                    monitor.finish_sentence()
+                    turn_done.set()
+
+    receive_task = asyncio.create_task(receiver())
+    try:
+        await ws.send(
+            json.dumps(
+                {
+                    "type": "hello",
+                    "version": 1,
+                    "transport": "websocket",
+                    "audio_params": {
+                        "format": "opus",
+                        "sample_rate": 16000,
+                        "channels": 1,
+                        "frame_duration": FRAME_MS,
+                    },
+                }
+            )
+        )
+        await asyncio.wait_for(hello_done.wait(), 10)
+        stats.setup_times.append(time.perf_counter() - start)
+        await ws.send(json.dumps({"type": "listen", "state": "start", "mode": "auto"}))
+
+        for _ in range(TURNS_PER_DEVICE):
+            turn_done.clear()
+            state["vad_end"] = state["first_audio"] = None
+            # 按真实时间节奏发送语音帧，之后持续发送静音帧直到本轮播放结束
+            next_send = loop.time()
+            for frame in speech_frames:
+                await ws.send(frame)
+                next_send += FRAME_MS / 1000
+                await asyncio.sleep(max(0, next_send - loop.time()))
+            state["vad_end"] = time.perf_counter() + VAD_SILENCE_MS / 1000
+
+            deadline = loop.time() + TURN_TIMEOUT
+            while not turn_done.is_set() and loop.time() < deadline:
+                await ws.send(silence)
+                next_send += FRAME_MS / 1000
+                await asyncio.sleep(max(0, next_send - loop.time()))
+
+            if not turn_done.is_set():
+                stats.failed_turns += 1
+                continue
+            stats.turns += 1
+            if state["first_audio"] is not None:
+                stats.first_audio_latencies.append(
+                    max(0.0, state["first_audio"] - state["vad_end"])
+                )
+            # 模拟用户听完后停顿一下再说话
+            await asyncio.sleep(0.5)
+    except Exception:
+        stats.failed_turns += 1
+    finally:
+        receive_task.cancel()
+        await ws.close()
+
+
+async def sample_server(process, samples, stop_event):
+    proc = psutil.Process(process.pid)
+    proc.cpu_percent(None)
+    while not stop_event.is_set():
+        await asyncio.sleep(0.5)
+        try:
+            samples.append(
+                (proc.cpu_percent(None), proc.memory_info().rss, proc.num_threads())
+            )
+        except psutil.Error:
+            break
+
+
+def percentile(values, q):
+    return float(np.percentile(np.array(values) * 1000, q)) if values else 0.0
+
+
+async def run_level(port, process, device_count, speech_frames, silence):
+    stats = DeviceStats()
+    samples = []
+    stop_event = asyncio.Event()
+    sampler = asyncio.create_task(sample_server(process, samples, stop_event))
+    await asyncio.gather(
+        *(
+            run_device(
+                i, port, speech_frames, silence, stats, random.uniform(0, RAMP_UP_SECONDS)
+            )
+            for i in range(device_count)
+        )
+    )
+    stop_event.set()
+    await sampler
+    # 等待服务端清理本轮的连接
+    await asyncio.sleep(1)
+    return stats, samples
+
+
+async def main():
+    random.seed(7)
+    speech_frames, silence = load_speech_frames()
+    mock = MockProviders()
+    await mock.start()
+
+    table = []
+    try:
+        for mode in CONNECTION_MODES:
+            process, port, config_path = await start_server(mock.base_url, mode)
+            try:
+                for device_count in DEVICE_COUNTS:
+                    stats, samples = await run_level(
+                        port, process, device_count, speech_frames, silence
+                    )
+                    cpu = [s[0] for s in samples] or [0]
+                    table.append(
+                        [
+                            mode,
+                            device_count,
+                            f"{stats.turns}/{stats.turns + stats.failed_turns}",
+                            f"{percentile(stats.setup_times, 50):.0f}/{percentile(stats.setup_times, 95):.0f}",
+                            f"{percentile(stats.first_audio_latencies, 50):.0f}",
+                            f"{percentile(stats.first_audio_latencies, 95):.0f}",
+                            f"{percentile(stats.first_audio_latencies, 99):.0f}",
+                            f"{stats.late_frames}/{stats.frames}",
+                            stats.dropped_frames,
+                            f"{np.mean(cpu):.0f}/{max(cpu):.0f}",
+                            f"{max((s[1] for s in samples), default=0) / 1024 / 1024:.0f}",
+                            max((s[2] for s in samples), default=0),
+                        ]
+                    )
+                    print(f"{mode} 模式 {device_count} 台设备 完成")
+            finally:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                os.remove(config_path)
+    finally:
+        await mock.stop()
+
+    print("\n" + "=" * 50)
+    print("端到端压测结果")
+    print("=" * 50)
+    headers = [
+        "模式",
+        "设备数",
+        "成功轮数",
+        "连接建立P50/P95(ms)",
+        "首音频P50(ms)",
+        "首音频P95(ms)",
+        "首音频P99(ms)",
+        "卡顿帧/总帧",
+        "丢帧",
+        "CPU均值/峰值(%)",
+        "峰值内存(MB)",
+        "峰值线程数",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(f"- 每台设备对话{TURNS_PER_DEVICE}轮，语音来自 {TEST_WAV}")
+    print(f"- 首音频延迟从最后一帧语音发出后 {VAD_SILENCE_MS}ms（VAD静音阈值）起算")
+    print("- 卡顿帧：按60ms播放节奏，帧到达时已过其播放时刻；丢帧：按模拟TTS时长计算的应收帧数减实收帧数")
+    print(
+        "- 模拟服务耗时: "
+        + ", ".join(f"{k}={v[0]}({v[1]}±{v[2]}ms)" for k, v in MOCK_LATENCY.items())
+    )
+    print(f"- 模拟服务调用次数: {mock.counts}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--serve":
+        serve(sys.argv[2])
+    else:
+        asyncio.run(main())
@@ -0,0 +1,146 @@
+import time
+import uuid
+import random
+import asyncio
+import numpy as np
+from types import SimpleNamespace
+from tabulate import tabulate
+from core.providers.intent.intent_llm.intent_llm import IntentProvider
+from plugins_func.register import all_function_registry
+from plugins_func.loadplugins import auto_import_modules
+
+description = "意图识别本地快速通道命中率与延迟测试"
+
+FUNCTIONS = ["handle_exit_intent", "play_music", "get_weather", "get_news_from_newsnow"]
+# 模拟意图识别大模型的耗时（秒）
+MOCK_LLM_LATENCY = 0.4
+MOCK_LLM_JITTER = 0.1
+CONCURRENT_DEVICES = 20
+TURNS_PER_DEVICE = 20
+
+# 模拟真实对话的句子分布：大部分是闲聊，少量明确指令
+UTTERANCES = [
+    ("你好啊", 6),
+    ("给我讲个故事", 6),
+    ("你觉得人工智能会取代人类吗", 6),
+    ("今天心情不太好", 4),
+    ("现在几点了", 3),
+    ("今天星期几", 2),
+    ("播放音乐", 3),
+    ("来首歌吧", 2),
+    ("有什么新闻", 2),
+    ("今天天气怎么样", 3),
+    ("怎么退出了", 1),
+    ("拜拜", 2),
+]
+
+
+class MockLLM:
+    """模拟同步的意图识别大模型接口"""
+
+    model_name = "mock"
+
+    def response_no_stream(self, system_prompt, user_prompt, **kwargs):
+        time.sleep(max(0.0, random.gauss(MOCK_LLM_LATENCY, MOCK_LLM_JITTER)))
+        return '{"function_call": {"name": "continue_chat"}}'
+
+
+def build_conn():
+    functions = [
+        all_function_registry[name].description
+        for name in FUNCTIONS
+        if name in all_function_registry
+    ]
+    return SimpleNamespace(
+        device_id=str(uuid.uuid4()),
+        config={"plugins": {}},
+        dialogue=SimpleNamespace(dialogue=[]),
+        func_handler=SimpleNamespace(get_functions=lambda: list(functions)),
+    )
+
+
+async def measure_loop_lag(stop_event, lags):
+    """每10ms唤醒一次，记录事件循环被阻塞的时间"""
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+async def run_case(local_fast_path):
+    random.seed(7)
+    provider = IntentProvider(
+        {"local_fast_path": local_fast_path, "llm_timeout": 5}
+    )
+    provider.set_llm(MockLLM())
+    texts = [text for text, _ in UTTERANCES]
+    weights = [weight for _, weight in UTTERANCES]
+    latencies = []
+
+    async def device():
+        for _ in range(TURNS_PER_DEVICE):
+            conn = build_conn()
+            text = random.choices(texts, weights)[0]
+            start = time.perf_counter()
+            await provider.detect_intent(conn, [], text)
+            latencies.append(time.perf_counter() - start)
+
+    stop_event = asyncio.Event()
+    lags = []
+    lag_task = asyncio.create_task(measure_loop_lag(stop_event, lags))
+    await asyncio.gather(*(device() for _ in range(CONCURRENT_DEVICES)))
+    stop_event.set()
+    await lag_task
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "stats": provider.get_stats(),
+        "avg": float(latencies_ms.mean()),
+        "p95": float(np.percentile(latencies_ms, 95)),
+        "max_lag": max(lags) * 1000 if lags else 0,
+    }
+
+
+async def main():
+    auto_import_modules("plugins_func.functions")
+    table = []
+    for local_fast_path in (False, True):
+        result = await run_case(local_fast_path)
+        stats = result["stats"]
+        table.append(
+            [
+                "本地快速通道" if local_fast_path else "仅大模型",
+                stats["turns"],
+                f"{stats['local_ratio']:.1%}",
+                stats["llm_calls"],
+                f"{result['avg']:.1f}",
+                f"{result['p95']:.1f}",
+                f"{stats['saved_time']:.1f}",
+                f"{result['max_lag']:.1f}",
+            ]
+        )
+
+    print("\n" + "=" * 50)
+    print("意图识别测试结果")
+    print("=" * 50)
+    headers = [
+        "模式",
+        "总轮数",
+        "本地识别占比",
+        "大模型调用次数",
+        "平均耗时(ms)",
+        "P95耗时(ms)",
+        "节省大模型耗时(秒)",
+        "事件循环最大阻塞(ms)",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- {CONCURRENT_DEVICES}个设备并发，每个设备{TURNS_PER_DEVICE}轮，"
+        f"模拟大模型耗时{MOCK_LLM_LATENCY * 1000:.0f}±{MOCK_LLM_JITTER * 1000:.0f}ms"
+    )
+    print("- 事件循环最大阻塞反映意图识别是否阻塞了其他设备的处理")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
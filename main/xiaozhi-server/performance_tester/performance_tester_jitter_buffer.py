@@ -0,0 +1,205 @@
+import os
+import time
+import random
+import asyncio
+from tabulate import tabulate
+from core.utils.audio_assets import encode_asset
+from core.utils.jitter_buffer import JitterBuffer
+
+description = "MQTT网关音频抖动缓冲区在网络抖动、乱序、丢包下的CPU开销与ASR输入完整性测试"
+
+SOURCE_AUDIO = os.path.join("config", "assets", "max_output_size.wav")
+FRAME_MS = 60
+# 模拟的音频时长（秒）
+DURATION_SECONDS = 60
+# 定时器检查间隔（秒），模拟事件循环中的定时器
+POLL_INTERVAL = 0.01
+
+# (场景, 抖动标准差ms, 丢包率, 突发丢包时继续丢包的概率, 重复率)
+SCENARIOS = [
+    ("无损网络", 0, 0.0, 0.0, 0.0),
+    ("抖动20ms", 20, 0.0, 0.0, 0.0),
+    ("抖动40ms+丢包2%", 40, 0.02, 0.2, 0.01),
+    ("抖动80ms+突发丢包5%", 80, 0.05, 0.5, 0.02),
+]
+
+
+class LegacyReorder:
+    """改造前 ConnectionHandler._process_websocket_audio 的排序逻辑"""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.audio_timestamp_buffer = {}
+        self.last_processed_timestamp = 0
+        self.max_timestamp_buffer_size = 20
+
+    def push(self, audio_data, timestamp, now=None):
+        if timestamp >= self.last_processed_timestamp:
+            self.sink(audio_data)
+            self.last_processed_timestamp = timestamp
+            processed_any = True
+            while processed_any:
+                processed_any = False
+                for ts in sorted(self.audio_timestamp_buffer.keys()):
+                    if ts > self.last_processed_timestamp:
+                        buffered_audio = self.audio_timestamp_buffer.pop(ts)
+                        self.sink(buffered_audio)
+                        self.last_processed_timestamp = ts
+                        processed_any = True
+                        break
+        else:
+            if len(self.audio_timestamp_buffer) < self.max_timestamp_buffer_size:
+                self.audio_timestamp_buffer[timestamp] = audio_data
+            else:
+                self.sink(audio_data)
+
+    def poll(self, now=None):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+def build_packets():
+    packets = encode_asset(SOURCE_AUDIO)
+    count = DURATION_SECONDS * 1000 // FRAME_MS
+    # 每个包是独立对象，便于按对象识别
+    return [bytes(bytearray(packets[i % len(packets)])) for i in range(count)]
+
+
+def simulate_network(count, jitter_ms, loss, burst, duplicate, seed=0):
+    """返回按到达时间排序的 (到达时间, 帧序号)"""
+    rng = random.Random(seed)
+    arrivals = []
+    lost_previous = False
+    for index in range(count):
+        # Gilbert-Elliott 两状态丢包模型
+        lost = rng.random() < (burst if lost_previous else loss)
+        lost_previous = lost
+        if lost:
+            continue
+        send_time = index * FRAME_MS / 1000
+        delay = 0.03 + abs(rng.gauss(0, jitter_ms / 1000))
+        arrivals.append((send_time + delay, index))
+        if rng.random() < duplicate:
+            arrivals.append((send_time + delay + rng.random() * 0.05, index))
+    arrivals.sort()
+    return arrivals
+
+
+def run(buffer_factory, packets, arrivals):
+    index_of = {id(packet): index for index, packet in enumerate(packets)}
+    arrival_of = {}
+    output = []
+    clock = [0.0]
+
+    def sink(packet):
+        output.append((index_of.get(id(packet)), clock[0]))
+
+    buffer = buffer_factory(sink)
+    next_poll = 0.0
+    start = time.process_time()
+    for arrival, index in arrivals:
+        while next_poll < arrival:
+            # 只有缓冲区中有等待的包时才会设置定时器
+            if len(buffer):
+                clock[0] = next_poll
+                buffer.poll(next_poll)
+            next_poll += POLL_INTERVAL
+        clock[0] = arrival
+        arrival_of.setdefault(index, arrival)
+        buffer.push(packets[index], (index * FRAME_MS) % (1 << 32), now=arrival)
+    for _ in range(100):
+        clock[0] = next_poll
+        buffer.poll(next_poll)
+        next_poll += POLL_INTERVAL
+    cpu = time.process_time() - start
+
+    seen = set()
+    disorder = 0
+    duplicates = 0
+    concealed = 0
+    last_index = -1
+    delays = []
+    for index, released in output:
+        if index is None:
+            concealed += 1
+            continue
+        if index in seen:
+            duplicates += 1
+            continue
+        seen.add(index)
+        if index < last_index:
+            disorder += 1
+        last_index = max(last_index, index)
+        delays.append(released - arrival_of[index])
+    missing = len(packets) - len(seen) - concealed
+    return {
+        "cpu_us": cpu / len(arrivals) * 1e6,
+        "disorder": disorder,
+        "duplicates": duplicates,
+        "concealed": concealed,
+        "missing": missing,
+        "delay_ms": sum(delays) / len(delays) * 1000 if delays else 0.0,
+        "max_delay_ms": max(delays) * 1000 if delays else 0.0,
+    }
+
+
+async def main():
+    if not os.path.exists(SOURCE_AUDIO):
+        print(f"未找到测试音频 {SOURCE_AUDIO}")
+        return
+    packets = build_packets()
+    table = []
+    for name, jitter_ms, loss, burst, duplicate in SCENARIOS:
+        arrivals = simulate_network(len(packets), jitter_ms, loss, burst, duplicate)
+        lost = len(packets) - len({index for _, index in arrivals})
+        for mode, factory in (
+            ("dict+sorted", LegacyReorder),
+            ("抖动缓冲区", lambda sink: JitterBuffer(sink)),
+        ):
+            result = run(factory, packets, arrivals)
+            table.append(
+                [
+                    name,
+                    mode,
+                    lost,
+                    f"{result['cpu_us']:.1f}",
+                    result["disorder"],
+                    result["duplicates"],
+                    result["concealed"],
+                    result["missing"],
+                    f"{result['delay_ms']:.1f} / {result['max_delay_ms']:.0f}",
+                ]
+            )
+        print(f"{name} 测试完成")
+
+    print("\n" + "=" * 50)
+    print("MQTT音频抖动缓冲测试结果")
+    print("=" * 50)
+    headers = [
+        "网络场景",
+        "模式",
+        "网络丢包数",
+        "每包CPU(us)",
+        "乱序输出",
+        "重复输出",
+        "补偿帧",
+        "ASR输入缺失帧",
+        "缓冲延迟 平均/最大(ms)",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- {DURATION_SECONDS}秒语音按{FRAME_MS}ms一帧编码为opus，网络延迟 = 30ms + |高斯抖动|，"
+        "丢包使用两状态突发丢包模型"
+    )
+    print("- 乱序输出/重复输出/ASR输入缺失帧 统计送入ASR队列的音频，越少越好")
+    print("- ASR输入缺失帧 = 总帧数 - 送出的原始帧 - 补偿帧")
+    print("- 缓冲延迟为包到达后在缓冲区中等待的时间")
+    print(f"- 缓冲区中有等待的包时，每 {POLL_INTERVAL * 1000:.0f}ms 调用一次 poll 模拟事件循环定时器")
+    print("- 每包CPU 包含生成补偿帧的开销（opus解码与重新编码，每个补偿帧约0.5ms）")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
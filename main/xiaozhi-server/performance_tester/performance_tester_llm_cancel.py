@@ -0,0 +1,408 @@
+import gc
+import json
+import time
+import socket
+import asyncio
+import threading
+import concurrent.futures
+import numpy as np
+import openai
+from aiohttp import web
+from tabulate import tabulate
+from core.utils.llm_http import LLMHttpRuntime
+
+description = "LLM流式请求在用户打断后的上游浪费token数与单轮请求开销测试"
+
+MODEL_NAME = "mock-llm"
+# 模拟LLM每个token的生成间隔（秒）
+TOKEN_INTERVAL = 0.02
+# 打断测试：完整回复的token数，其中开头的思考token数（<think>内容不输出），以及请求发出多久后用户打断（秒）
+LONG_TOKENS = 200
+THINK_TOKENS = 100
+ABORT_DELAY = 0.5
+ABORT_ROUNDS = 10
+# 单轮开销测试：短回复的token数及生成间隔（秒），并发连接数与每个连接的轮数
+SHORT_TOKENS = 10
+SHORT_TOKEN_INTERVAL = 0.005
+CONCURRENCY_LEVELS = [1, 16]
+TURNS_PER_WORKER = 20
+# 打断后等待上游结束的最长时间（秒）
+DRAIN_TIMEOUT = LONG_TOKENS * TOKEN_INTERVAL + 2
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _token(index, tokens):
+    """长回复以思考内容开头，模拟推理模型"""
+    if tokens <= SHORT_TOKENS or index > THINK_TOKENS:
+        return f"字{index}"
+    if index == 0:
+        return "<think>"
+    if index == THINK_TOKENS:
+        return "</think>"
+    return f"想{index}"
+
+
+def _chunk(content):
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": MODEL_NAME,
+        "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+    }
+
+
+class MockLLMServer:
+    """在独立线程中运行的模拟OpenAI兼容LLM服务，按固定间隔逐个推送token
+
+    记录每个请求实际推送的token数和结束时间，客户端断开后下一次写入失败即停止生成
+    """
+
+    def __init__(self):
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}/v1"
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.ready = threading.Event()
+        self.runner = None
+        self.requests = {}
+        self.connections = set()
+
+    async def _handle(self, request):
+        body = await request.json()
+        request_id = body.get("user") or f"request-{len(self.requests)}"
+        tokens = int(body.get("max_tokens") or LONG_TOKENS)
+        interval = TOKEN_INTERVAL if tokens > SHORT_TOKENS else SHORT_TOKEN_INTERVAL
+        record = {"sent": 0, "end": None, "disconnected": False}
+        self.requests[request_id] = record
+        self.connections.add(request.transport.get_extra_info("peername"))
+
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        try:
+            for index in range(tokens):
+                if interval:
+                    await asyncio.sleep(interval)
+                payload = json.dumps(_chunk(_token(index, tokens)), ensure_ascii=False)
+                await resp.write(f"data: {payload}\n\n".encode("utf-8"))
+                record["sent"] += 1
+            await resp.write(b"data: [DONE]\n\n")
+            await resp.write_eof()
+        except (ConnectionError, asyncio.CancelledError):
+            record["disconnected"] = True
+        finally:
+            record["end"] = time.perf_counter()
+        return resp
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", self.port, backlog=1024)
+        self.loop.run_until_complete(site.start())
+        self.ready.set()
+        self.loop.run_forever()
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+    def wait_finished(self, request_ids, timeout):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if all(
+                self.requests.get(i, {}).get("end") is not None for i in request_ids
+            ):
+                return
+            time.sleep(0.01)
+
+
+def build_request(request_id, tokens):
+    return {
+        "model": MODEL_NAME,
+        "messages": [{"role": "user", "content": "讲一个很长的故事"}],
+        "stream": True,
+        "user": request_id,
+        "max_tokens": tokens,
+    }
+
+
+class ThinkFilter:
+    """与 ollama 提供方相同，过滤 <think></think> 中的内容，思考期间不输出"""
+
+    def __init__(self):
+        self.is_active = True
+
+    def feed(self, chunk):
+        delta = chunk.choices[0].delta if getattr(chunk, "choices", None) else None
+        content = delta.content if hasattr(delta, "content") else ""
+        if content == "<think>":
+            self.is_active = False
+        elif content == "</think>":
+            self.is_active = True
+        elif content and self.is_active:
+            return content
+        return None
+
+
+class LegacyLLM:
+    """改造前的 openai 提供方：每个实例一个同步客户端，在chat线程中逐块读取"""
+
+    def __init__(self, base_url):
+        self.client = openai.OpenAI(api_key="mock", base_url=base_url)
+
+    def response(self, request_id, tokens):
+        responses = self.client.chat.completions.create(**build_request(request_id, tokens))
+        think_filter = ThinkFilter()
+        for chunk in responses:
+            content = think_filter.feed(chunk)
+            if content:
+                yield content
+
+
+class PooledLLM:
+    """改造后的 openai 提供方：异步流运行在常驻LLM事件循环中，使用共享连接池"""
+
+    def __init__(self, runtime, base_url):
+        self.runtime = runtime
+        self.base_url = base_url
+
+    async def aresponse(self, request_id, tokens):
+        client = self.runtime.get_openai_client(self.base_url, "mock")
+        responses = await client.chat.completions.create(**build_request(request_id, tokens))
+        think_filter = ThinkFilter()
+        async with responses:
+            async for chunk in responses:
+                content = think_filter.feed(chunk)
+                if content:
+                    yield content
+
+    def response(self, request_id, tokens):
+        return self.runtime.open_stream(self.aresponse(request_id, tokens))
+
+
+class MockConnection:
+    """模拟 ConnectionHandler 中与打断相关的状态"""
+
+    def __init__(self):
+        self.client_abort = False
+        self.llm_stream = None
+
+    def cancel_llm_stream(self):
+        cancel = getattr(self.llm_stream, "cancel", None)
+        if cancel is not None:
+            cancel()
+
+
+def chat_until_abort(conn, llm, request_id):
+    """模拟 connection.chat 的读取循环，返回收到的token数
+
+    改造前只能等下一个可输出的token到达后检查 client_abort，思考期间一直阻塞；
+    改造后 chat 退出时关闭LLM流
+    """
+    llm_responses = llm.response(request_id, LONG_TOKENS)
+    conn.llm_stream = llm_responses
+    received = 0
+    try:
+        for _ in llm_responses:
+            if conn.client_abort:
+                break
+            received += 1
+    finally:
+        # 改造前的 chat 不关闭生成器，只有 LLMStream 在退出时关闭
+        if hasattr(llm_responses, "cancel"):
+            llm_responses.close()
+        conn.llm_stream = None
+    return received
+
+
+def run_abort_test(server, name, llm, cancel_stream):
+    """请求发出 ABORT_DELAY 秒后在另一个线程中打断，模拟 handleAbortMessage"""
+    abort_times = {}
+    request_ids = [f"{name}-abort-{i}" for i in range(ABORT_ROUNDS)]
+    for request_id in request_ids:
+        conn = MockConnection()
+
+        def abort(request_id=request_id, conn=conn):
+            abort_times[request_id] = time.perf_counter()
+            conn.client_abort = True
+            if cancel_stream:
+                conn.cancel_llm_stream()
+
+        timer = threading.Timer(ABORT_DELAY, abort)
+        timer.start()
+        chat_until_abort(conn, llm, request_id)
+        timer.join()
+        gc.collect()
+    server.wait_finished(request_ids, DRAIN_TIMEOUT)
+
+    wasted, stop_delays, unfinished = [], [], 0
+    for request_id in request_ids:
+        record = server.requests[request_id]
+        aborted_at = abort_times[request_id]
+        # 打断时服务端已推送的token数按生成间隔估算
+        sent_before_abort = min(LONG_TOKENS, int(ABORT_DELAY / TOKEN_INTERVAL))
+        wasted.append(max(0, record["sent"] - sent_before_abort))
+        if record["end"] is None:
+            unfinished += 1
+            continue
+        stop_delays.append((record["end"] - aborted_at) * 1000)
+    return [
+        name,
+        ABORT_ROUNDS,
+        f"{np.mean(wasted):.1f}",
+        f"{np.mean(stop_delays):.1f}" if stop_delays else "-",
+        sum(server.requests[i]["disconnected"] for i in request_ids),
+        unfinished,
+    ]
+
+
+def one_turn(llm, request_id):
+    start = time.perf_counter()
+    first_token = None
+    count = 0
+    for _ in llm.response(request_id, SHORT_TOKENS):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        count += 1
+    assert count == SHORT_TOKENS
+    return first_token, time.perf_counter() - start
+
+
+def run_turn_test(server, name, llm_factory, concurrency):
+    """concurrency 个连接（线程）各自依次进行若干轮短对话"""
+
+    def worker(worker_index):
+        llm = llm_factory()
+        return [
+            one_turn(llm, f"{name}-turn-{concurrency}-{worker_index}-{i}")
+            for i in range(TURNS_PER_WORKER)
+        ]
+
+    connections_before = len(server.connections)
+    cpu_start = time.process_time()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(worker, i) for i in range(concurrency)]
+        results = [item for future in futures for item in future.result()]
+    cpu = time.process_time() - cpu_start
+    ttft_ms = np.array([r[0] for r in results]) * 1000
+    total_ms = np.array([r[1] for r in results]) * 1000
+    return [
+        name,
+        concurrency,
+        f"{np.percentile(ttft_ms, 50):.2f}",
+        f"{np.percentile(ttft_ms, 95):.2f}",
+        f"{np.percentile(total_ms, 50):.2f}",
+        f"{cpu / len(results) * 1000:.2f}",
+        len(server.connections) - connections_before,
+    ]
+
+
+async def main():
+    server = MockLLMServer()
+    server.start()
+    base_url = server.base_url
+    runtime = LLMHttpRuntime()
+    abort_table, turn_table = [], []
+    try:
+        legacy = LegacyLLM(base_url)
+        pooled = PooledLLM(runtime, base_url)
+        # 预热，排除首次导入与建连的影响
+        await asyncio.to_thread(one_turn, legacy, "warmup-legacy")
+        await asyncio.to_thread(one_turn, pooled, "warmup-pooled")
+
+        abort_table.append(
+            await asyncio.to_thread(
+                run_abort_test, server, "同步客户端+client_abort", legacy, False
+            )
+        )
+        abort_table.append(
+            await asyncio.to_thread(
+                run_abort_test, server, "LLMStream+cancel_llm_stream", pooled, True
+            )
+        )
+        print("打断测试完成")
+
+        for concurrency in CONCURRENCY_LEVELS:
+            turn_table.append(
+                await asyncio.to_thread(
+                    run_turn_test,
+                    server,
+                    "每个实例独立的同步客户端",
+                    lambda: LegacyLLM(base_url),
+                    concurrency,
+                )
+            )
+            turn_table.append(
+                await asyncio.to_thread(
+                    run_turn_test,
+                    server,
+                    "共享连接池+LLM事件循环",
+                    lambda: PooledLLM(runtime, base_url),
+                    concurrency,
+                )
+            )
+            print(f"并发 {concurrency} 单轮开销测试完成")
+    finally:
+        await asyncio.to_thread(runtime.close)
+        server.stop()
+
+    print("\n" + "=" * 50)
+    print("LLM流式请求打断测试结果")
+    print("=" * 50)
+    headers = [
+        "模式",
+        "打断次数",
+        "打断后上游继续生成token数",
+        "打断到上游停止(ms)",
+        "检测到断开次数",
+        "超时未停止次数",
+    ]
+    print(tabulate(abort_table, headers=headers, tablefmt="grid"))
+
+    print("\n" + "=" * 50)
+    print("LLM单轮请求开销测试结果")
+    print("=" * 50)
+    headers = [
+        "模式",
+        "并发连接数",
+        "首token P50(ms)",
+        "首token P95(ms)",
+        "单轮总耗时P50(ms)",
+        "单轮CPU(ms)",
+        "新建TCP连接数",
+    ]
+    print(tabulate(turn_table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- 本地模拟OpenAI兼容的流式接口，长回复 {LONG_TOKENS} 个token，"
+        f"每 {TOKEN_INTERVAL * 1000:.0f}ms 推送一个"
+    )
+    print(
+        f"- 长回复开头 {THINK_TOKENS} 个token为思考内容（<think>内不输出），"
+        f"请求发出 {ABORT_DELAY * 1000:.0f}ms 后在另一个线程中打断，此时chat线程阻塞在等待下一个token"
+    )
+    print("- 打断后上游继续生成token数：服务端在打断后继续推送的token数，对应按token计费的浪费")
+    print(
+        f"- 单轮开销测试：短回复 {SHORT_TOKENS} 个token，每 {SHORT_TOKEN_INTERVAL * 1000:.0f}ms 推送一个，"
+        f"每个连接依次进行 {TURNS_PER_WORKER} 轮，每个连接一个LLM实例"
+    )
+    print("- 单轮CPU为进程CPU时间除以轮数，包含模拟服务端的开销（两种模式相同）")
+    print("- 模拟服务与客户端在同一进程内，高并发时所有流共用一个LLM事件循环线程，首token延迟含GIL排队")
+    print("- 本地测试为明文HTTP，实际使用HTTPS时每个新建连接还需要TLS握手，共享连接的收益更大")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import psutil
+from tabulate import tabulate
+from core.providers.tools.server_mcp.mcp_client import ServerMCPClient
+from core.providers.tools.server_mcp.mcp_pool import ServerMCPPool
+
+description = "服务端MCP共享服务池与每连接独立进程对比测试"
+
+CONNECTION_COUNTS = [1, 10, 50]
+CALLS_PER_CONNECTION = 5
+REPLICAS = 2
+ECHO_SERVER = {
+    "command": sys.executable,
+    "args": ["tests/fixtures/echo_mcp_server.py"],
+}
+
+
+def children_usage():
+    """统计当前进程的全部子进程数量与RSS总和"""
+    children = psutil.Process().children(recursive=True)
+    rss = 0
+    for child in children:
+        try:
+            rss += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return len(children), rss
+
+
+async def run_calls(call, connection_count):
+    async def one_connection(index):
+        for i in range(CALLS_PER_CONNECTION):
+            await call("slow_echo", {"text": f"{index}-{i}", "delay_ms": 50})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_connection(i) for i in range(connection_count)))
+    elapsed = time.perf_counter() - start
+    return connection_count * CALLS_PER_CONNECTION / elapsed
+
+
+async def run_per_connection(connection_count):
+    """旧方式：每个连接独立启动MCP服务进程"""
+    clients = []
+    start = time.perf_counter()
+    for _ in range(connection_count):
+        client = ServerMCPClient(ECHO_SERVER)
+        await client.initialize()
+        clients.append(client)
+    setup = (time.perf_counter() - start) / connection_count
+    processes, rss = children_usage()
+
+    async def call(name, arguments):
+        # 每个连接使用自己的客户端，这里按轮转模拟
+        call.index = (call.index + 1) % len(clients)
+        return await clients[call.index].call_tool(name, arguments)
+
+    call.index = 0
+    throughput = await run_calls(call, connection_count)
+    for client in clients:
+        await client.cleanup()
+    return setup, processes, rss, throughput
+
+
+async def run_pool(connection_count):
+    """共享服务池：所有连接复用同一组MCP服务进程"""
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=".json", delete=False, encoding="utf-8"
+    ) as f:
+        json.dump({"mcpServers": {"echo": {**ECHO_SERVER, "replicas": REPLICAS}}}, f)
+        config_path = f.name
+
+    pool = ServerMCPPool(config_path)
+    try:
+        start = time.perf_counter()
+        for _ in range(connection_count):
+            # 每个连接初始化时都会调用 ensure_started，只有第一次真正启动服务
+            await pool.ensure_started()
+            pool.get_all_tools()
+        setup = (time.perf_counter() - start) / connection_count
+        processes, rss = children_usage()
+
+        async def call(name, arguments):
+            return await pool.call_tool("echo", name, arguments)
+
+        throughput = await run_calls(call, connection_count)
+    finally:
+        await pool.close()
+        os.remove(config_path)
+    return setup, processes, rss, throughput
+
+
+async def main():
+    table = []
+    for connection_count in CONNECTION_COUNTS:
+        for name, runner in (("每连接独立", run_per_connection), ("共享池", run_pool)):
+            setup, processes, rss, throughput = await runner(connection_count)
+            table.append(
+                [
+                    connection_count,
+                    name,
+                    f"{setup * 1000:.1f}",
+                    processes,
+                    f"{rss / 1024 / 1024:.1f}",
+                    f"{throughput:.1f}",
+                ]
+            )
+            print(f"连接数 {connection_count} {name} 完成")
+
+    print("\n" + "=" * 50)
+    print("服务端MCP服务池测试结果")
+    print("=" * 50)
+    headers = ["连接数", "模式", "平均连接初始化(ms)", "MCP进程数", "MCP进程内存(MB)", "工具调用吞吐(次/秒)"]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print("- 使用测试用的本地回显MCP服务(tests/fixtures/echo_mcp_server.py)")
+    print(f"- 共享池启动{REPLICAS}个副本，并发请求分配到进行中请求最少的副本")
+    print(f"- 每个连接并发调用 slow_echo(50ms) {CALLS_PER_CONNECTION} 次")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,180 @@
+import time
+import random
+import asyncio
+import tracemalloc
+import numpy as np
+from tabulate import tabulate
+from opuslib_next import Encoder, constants
+from core.utils.opus_encoder_utils import OpusEncoderUtils, OpusEncoderPool
+import core.utils.opus_encoder_utils as opus_encoder_utils
+
+description = "Opus编码器池与环形缓冲区的编码吞吐与内存分配测试"
+
+SAMPLE_RATE = 24000
+FRAME_SIZE_MS = 60
+# 模拟的连接数（每个连接一个TTS实例）
+CONNECTION_COUNT = 50
+# 同时在说话的连接数，其余连接处于空闲（聆听）状态
+ACTIVE_CONNECTIONS = 10
+# 每个连接依次合成的句子数
+SENTENCES_PER_CONNECTION = 4
+# 每句音频时长（秒）
+SENTENCE_SECONDS = 3
+# 流式TTS每次返回的PCM字节数范围
+CHUNK_BYTES = (512, 8192)
+
+
+class LegacyOpusEncoder:
+    """改造前的 OpusEncoderUtils：np.append 追加缓冲区，每个实例独占编码器"""
+
+    def __init__(self, sample_rate, channels, frame_size_ms, counters):
+        self.frame_size = (sample_rate * frame_size_ms) // 1000
+        self.total_frame_size = self.frame_size * channels
+        self.buffer = np.array([], dtype=np.int16)
+        self.counters = counters
+        self.encoder = Encoder(sample_rate, channels, constants.APPLICATION_AUDIO)
+        self.encoder.bitrate = 24000
+        self.encoder.complexity = 10
+        self.encoder.signal = constants.SIGNAL_VOICE
+        counters["encoders"] += 1
+
+    def encode_pcm_to_opus_stream(self, pcm_data, end_of_stream, callback):
+        new_samples = np.frombuffer(pcm_data, dtype=np.int16)
+        self.buffer = np.append(self.buffer, new_samples)
+        self.counters["buffer_allocs"] += 1
+        offset = 0
+        while offset <= len(self.buffer) - self.total_frame_size:
+            frame = self.buffer[offset : offset + self.total_frame_size]
+            callback(self.encoder.encode(frame.tobytes(), self.frame_size))
+            self.counters["buffer_allocs"] += 1
+            offset += self.total_frame_size
+        self.buffer = self.buffer[offset:]
+        if end_of_stream and len(self.buffer) > 0:
+            last_frame = np.zeros(self.total_frame_size, dtype=np.int16)
+            last_frame[: len(self.buffer)] = self.buffer
+            callback(self.encoder.encode(last_frame.tobytes(), self.frame_size))
+            self.counters["buffer_allocs"] += 2
+            self.buffer = np.array([], dtype=np.int16)
+
+
+def build_sentences():
+    """生成测试PCM并按随机大小切块，模拟流式TTS返回的数据"""
+    rng = np.random.default_rng(0)
+    samples = SAMPLE_RATE * SENTENCE_SECONDS
+    t = np.arange(samples) / SAMPLE_RATE
+    pcm = (
+        np.sin(2 * np.pi * 220 * t) * 6000 + rng.normal(0, 800, samples)
+    ).astype(np.int16).tobytes()
+    chunker = random.Random(0)
+    chunks = []
+    offset = 0
+    while offset < len(pcm):
+        size = chunker.randint(*CHUNK_BYTES) // 2 * 2
+        chunks.append(pcm[offset : offset + size])
+        offset += size
+    return chunks
+
+
+def run(encoders, chunks):
+    frames = 0
+
+    def on_frame(_data):
+        nonlocal frames
+        frames += 1
+
+    start = time.perf_counter()
+    for _ in range(SENTENCES_PER_CONNECTION):
+        # 每次 ACTIVE_CONNECTIONS 个连接同时播放，数据块交替到达
+        for group_start in range(0, len(encoders), ACTIVE_CONNECTIONS):
+            group = encoders[group_start : group_start + ACTIVE_CONNECTIONS]
+            for index, chunk in enumerate(chunks):
+                for encoder in group:
+                    encoder.encode_pcm_to_opus_stream(
+                        chunk, index == len(chunks) - 1, on_frame
+                    )
+    return frames, time.perf_counter() - start
+
+
+def measure(name, create_encoders, chunks, counters_func):
+    tracemalloc.start()
+    encoders = create_encoders()
+    tracemalloc.reset_peak()
+    frames, elapsed = run(encoders, chunks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    encoder_count, buffer_allocs = counters_func(encoders)
+    return [
+        name,
+        frames,
+        f"{frames / elapsed:.0f}",
+        encoder_count,
+        buffer_allocs,
+        f"{buffer_allocs / frames:.2f}",
+        f"{peak / 1024:.0f}",
+    ]
+
+
+async def main():
+    chunks = build_sentences()
+    table = []
+
+    counters = {"encoders": 0, "buffer_allocs": 0}
+    table.append(
+        measure(
+            "np.append + 独占编码器",
+            lambda: [
+                LegacyOpusEncoder(SAMPLE_RATE, 1, FRAME_SIZE_MS, counters)
+                for _ in range(CONNECTION_COUNT)
+            ],
+            chunks,
+            lambda _: (counters["encoders"], counters["buffer_allocs"]),
+        )
+    )
+    print("旧实现 测试完成")
+
+    # 使用独立的编码器池，便于统计
+    pool = OpusEncoderPool()
+    opus_encoder_utils._encoder_pool = pool
+    table.append(
+        measure(
+            "环形缓冲区 + 编码器池",
+            lambda: [
+                OpusEncoderUtils(SAMPLE_RATE, 1, FRAME_SIZE_MS)
+                for _ in range(CONNECTION_COUNT)
+            ],
+            chunks,
+            lambda encoders: (
+                pool.get_stats()["created"],
+                sum(encoder.buffer.grow_count for encoder in encoders),
+            ),
+        )
+    )
+    print("新实现 测试完成")
+
+    print("\n" + "=" * 50)
+    print("Opus编码测试结果")
+    print("=" * 50)
+    headers = [
+        "模式",
+        "编码帧数",
+        "每秒编码帧数",
+        "创建编码器数",
+        "PCM缓冲区分配次数",
+        "每帧缓冲区分配",
+        "内存峰值(KB)",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- {CONNECTION_COUNT}个连接各合成{SENTENCES_PER_CONNECTION}句，"
+        f"每句{SENTENCE_SECONDS}秒 {SAMPLE_RATE}Hz 单声道PCM，"
+        f"按 {CHUNK_BYTES[0]}~{CHUNK_BYTES[1]} 字节分块输入"
+    )
+    print(f"- 同一时刻 {ACTIVE_CONNECTIONS} 个连接在播放，数据块交替到达")
+    print("- PCM缓冲区分配次数: 旧实现统计 np.append、tobytes 与补零帧，新实现统计环形缓冲区扩容次数")
+    print("- 新实现中连接只在一句话编码期间借用编码器，句子结束后归还到编码器池")
+    print("- 内存峰值由 tracemalloc 统计，仅包含 Python 层的内存分配；新实现包含每个连接预分配的8帧环形缓冲区")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+import gc
+import time
+import asyncio
+import numpy as np
+import psutil
+from tabulate import tabulate
+from config.logger import setup_logging
+from config.config_loader import read_config, get_project_dir
+from core.utils.modules_initialize import initialize_modules
+from core.utils.provider_pool import ProviderPool
+
+description = "智控台模式下组件实例池对连接初始化耗时与内存的影响"
+
+logger = setup_logging()
+
+# 模拟绑定同一个智能体的连接数
+CONNECTION_COUNT = 50
+# 模拟的智能体数量，连接平均分配到各智能体
+AGENT_COUNT = 2
+
+
+def build_private_config(agent_index):
+    """构造智控台下发的差异化配置，同一智能体的配置相同"""
+    base_config = read_config(get_project_dir() + "config.yaml")
+    return {
+        "delete_audio": True,
+        "selected_module": {
+            "VAD": "SileroVAD",
+            "ASR": "OpenaiASR",
+            "LLM": "BenchLLM",
+            "Memory": "mem_local_short",
+            "Intent": "function_call",
+        },
+        "VAD": {"SileroVAD": base_config["VAD"]["SileroVAD"]},
+        "ASR": {
+            "OpenaiASR": {
+                "type": "openai",
+                "api_key": "performance-test",
+                "base_url": "http://127.0.0.1:1/v1/audio/transcriptions",
+                "model_name": "whisper-1",
+                "output_dir": "tmp/",
+            }
+        },
+        "LLM": {
+            "BenchLLM": {
+                "type": "openai",
+                "api_key": "performance-test",
+                "base_url": "http://127.0.0.1:1/v1",
+                "model_name": f"agent-{agent_index}",
+            }
+        },
+        "Memory": {"mem_local_short": {"type": "mem_local_short", "llm": ""}},
+        "Intent": {
+            "function_call": {
+                "type": "function_call",
+                "functions": ["get_weather", "play_music"],
+            }
+        },
+    }
+
+
+def run(init_func, configs):
+    """依次初始化所有连接的组件，返回每个连接的耗时与持有的实例"""
+    latencies = []
+    connections = []
+    for config in configs:
+        start = time.perf_counter()
+        modules = init_func(
+            logger, config, True, True, True, False, True, True
+        )
+        latencies.append(time.perf_counter() - start)
+        connections.append(modules)
+    return latencies, connections
+
+
+def measure(name, init_func, configs):
+    gc.collect()
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    latencies, connections = run(init_func, configs)
+    gc.collect()
+    rss_after = process.memory_info().rss
+    unique = len({id(m) for modules in connections for m in modules.values()})
+    latencies_ms = np.array(latencies) * 1000
+    return connections, [
+        name,
+        f"{latencies_ms[0]:.1f}",
+        f"{np.percentile(latencies_ms, 50):.2f}",
+        f"{np.percentile(latencies_ms, 95):.2f}",
+        f"{(rss_after - rss_before) / 1024 / 1024:.1f}",
+        unique,
+    ]
+
+
+async def main():
+    configs = [build_private_config(i % AGENT_COUNT) for i in range(CONNECTION_COUNT)]
+    table = []
+
+    connections, row = measure("每个连接新建", initialize_modules, configs)
+    table.append(row)
+    print("每个连接新建 完成")
+    del connections
+
+    pool = ProviderPool()
+    connections, row = measure("实例池复用", pool.initialize_modules, configs)
+    table.append(row)
+    print("实例池复用 完成")
+
+    # 连接关闭后归还，再次接入的连接直接复用
+    for modules in connections:
+        for instance in modules.values():
+            pool.release(instance)
+    _, row = measure("实例池复用(归还后重连)", pool.initialize_modules, configs)
+    table.append(row)
+    stats = pool.get_stats()
+    pool.clear()
+
+    print("\n" + "=" * 50)
+    print("组件实例池测试结果")
+    print("=" * 50)
+    headers = [
+        "模式",
+        "首个连接耗时(ms)",
+        "P50耗时(ms)",
+        "P95耗时(ms)",
+        "内存增长(MB)",
+        "组件实例数",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- {CONNECTION_COUNT}个连接绑定{AGENT_COUNT}个智能体，"
+        "每个连接初始化 VAD、ASR、LLM、记忆、意图识别"
+    )
+    print("- 组件为 SileroVAD、openai ASR、openai LLM、mem_local_short、function_call，不发起网络请求")
+    print(f"- 实例池统计: {stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
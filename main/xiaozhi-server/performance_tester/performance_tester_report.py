@@ -0,0 +1,187 @@
+import time
+import asyncio
+import tempfile
+import numpy as np
+import opuslib_next
+from aiohttp import web
+from tabulate import tabulate
+from config.manage_api_client import ManageApiClient, init_service, report
+from core.handle.reportHandle import opus_to_wav
+from core.utils.report_pipeline import ReportPipeline
+
+description = "聊天记录逐条上报与批量上报管道对比测试（本地模拟智控台）"
+
+STUB_PORT = 18002
+CONNECTION_COUNT = 100
+REPORTS_PER_CONNECTION = 6
+# 每条上报附带的音频时长（秒）
+AUDIO_SECONDS = 3
+# 模拟智控台每个请求的处理耗时（秒）
+STUB_LATENCY = 0.02
+
+
+class StubManager:
+    """模拟智控台的聊天记录上报接口，统计请求数与上传字节数"""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.records = 0
+
+    async def handle_report(self, request):
+        body = await request.read()
+        self.requests += 1
+        self.bytes += len(body)
+        self.records += 1
+        await asyncio.sleep(STUB_LATENCY)
+        return web.json_response({"code": 0, "data": True})
+
+    async def handle_batch(self, request):
+        body = await request.read()
+        self.requests += 1
+        self.bytes += len(body)
+        items = await request.json()
+        self.records += len(items)
+        await asyncio.sleep(STUB_LATENCY)
+        return web.json_response({"code": 0, "data": len(items)})
+
+    def reset(self):
+        self.requests = self.bytes = self.records = 0
+
+
+def build_opus_frames():
+    """编码一段带噪声的音频，模拟一条语音的opus帧"""
+    encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_VOIP)
+    frames = []
+    for _ in range(int(AUDIO_SECONDS / 0.06)):
+        pcm = (np.random.randn(960) * 3000).astype(np.int16).tobytes()
+        frames.append(encoder.encode(pcm, 960))
+    return frames
+
+
+async def run_per_message(stub, frames):
+    """旧方式：每条记录转换为WAV后单独发送一次HTTP请求"""
+
+    async def one_connection(index):
+        for i in range(REPORTS_PER_CONNECTION):
+            await report(
+                mac_address=f"00:00:00:00:00:{index:02x}",
+                session_id=str(index),
+                chat_type=1 + i % 2,
+                content=f"第{i}句话",
+                audio=opus_to_wav(frames),
+                report_time=int(time.time()),
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_connection(i) for i in range(CONNECTION_COUNT)))
+    return time.perf_counter() - start
+
+
+async def run_pipeline(stub, frames, spool_dir):
+    """批量管道：所有连接写入同一个缓冲，合批发送"""
+    pipeline = ReportPipeline({"spool_dir": spool_dir, "flush_interval": 0.2})
+    total = CONNECTION_COUNT * REPORTS_PER_CONNECTION
+    start = time.perf_counter()
+    for i in range(REPORTS_PER_CONNECTION):
+        for index in range(CONNECTION_COUNT):
+            pipeline.submit(
+                f"00:00:00:00:00:{index:02x}",
+                str(index),
+                1 + i % 2,
+                f"第{i}句话",
+                frames,
+                int(time.time()),
+            )
+    while stub.records < total:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    pipeline.close()
+    return elapsed
+
+
+async def main():
+    stub = StubManager()
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/agent/chat-history/report", stub.handle_report)
+    app.router.add_post("/agent/chat-history/report/batch", stub.handle_batch)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", STUB_PORT)
+    await site.start()
+
+    init_service(
+        {
+            "manager-api": {
+                "url": f"http://127.0.0.1:{STUB_PORT}",
+                "secret": "performance-test",
+                "timeout": 30,
+            }
+        }
+    )
+    frames = build_opus_frames()
+    opus_bytes = sum(len(frame) for frame in frames)
+    wav_bytes = len(opus_to_wav(frames))
+    table = []
+    try:
+        elapsed = await run_per_message(stub, frames)
+        table.append(
+            [
+                "逐条上报",
+                stub.records,
+                stub.requests,
+                f"{stub.bytes / 1024 / 1024:.1f}",
+                f"{elapsed:.2f}",
+                f"{stub.records / elapsed:.1f}",
+                CONNECTION_COUNT,
+            ]
+        )
+        print("逐条上报 完成")
+
+        stub.reset()
+        with tempfile.TemporaryDirectory() as spool_dir:
+            elapsed = await run_pipeline(stub, frames, spool_dir)
+        table.append(
+            [
+                "批量管道",
+                stub.records,
+                stub.requests,
+                f"{stub.bytes / 1024 / 1024:.1f}",
+                f"{elapsed:.2f}",
+                f"{stub.records / elapsed:.1f}",
+                1,
+            ]
+        )
+        print("批量管道 完成")
+    finally:
+        ManageApiClient.safe_close()
+        await runner.cleanup()
+
+    print("\n" + "=" * 50)
+    print("聊天记录上报测试结果")
+    print("=" * 50)
+    headers = [
+        "模式",
+        "上报条数",
+        "HTTP请求数",
+        "上传数据(MB)",
+        "总耗时(秒)",
+        "吞吐(条/秒)",
+        "上报线程数",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- {CONNECTION_COUNT}个连接，每个连接上报{REPORTS_PER_CONNECTION}条，"
+        f"每条附带{AUDIO_SECONDS}秒音频"
+    )
+    print(
+        f"- 每条音频在缓冲中为opus {opus_bytes / 1024:.1f}KB，"
+        f"发送时转换为WAV {wav_bytes / 1024:.1f}KB"
+    )
+    print(f"- 模拟智控台每个请求处理耗时{STUB_LATENCY * 1000:.0f}ms")
+    print("- 逐条上报的线程数按旧实现每个连接一个上报线程计算")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,163 @@
+import time
+import random
+import asyncio
+from tabulate import tabulate
+from core.utils.sentence_segmenter import SentenceSegmenter
+
+description = "LLM输出断句的单token耗时与首句切出延迟测试"
+
+# 模拟LLM输出速度：每个token的间隔（毫秒）
+TOKEN_INTERVAL_MS = 25
+# 测试的回复长度（字符数）
+RESPONSE_LENGTHS = [500, 2000, 8000]
+
+CHINESE_TEXT = (
+    "今天的天气非常适合出门走走，气温在二十度左右，微风拂面让人心情舒畅。"
+    "如果你打算去公园散步的话，记得带上一瓶水和一顶帽子；下午三点以后阳光会比较强烈！"
+    "另外，最近公园里的月季花开得正好、颜色也很丰富，很多人都会去拍照留念。"
+)
+ENGLISH_TEXT = (
+    "Sure, here is what I found. The price is 3.99 dollars per item, and Mr. Smith "
+    "said the store at www.example.com opens at 9 a.m. tomorrow. You can also check "
+    "the report.pdf file for details... Let me know if you need anything else! "
+)
+MARKDOWN_TEXT = (
+    "下面是具体步骤：\n1. 打开设置页面\n2. 选择网络选项\n## 注意事项\n"
+    "```python\nprint('你好。世界')\n```\n完成以上步骤后重启设备即可。"
+)
+# 首句较长且没有逗号的回复
+LONG_FIRST_TEXT = (
+    "根据你提供的信息我帮你查询了明天北京市海淀区的天气情况以及出行建议"
+    "明天白天多云转晴。"
+)
+
+
+class LegacySegmenter:
+    """改造前 TTSProviderBase._get_segment_text 的断句逻辑"""
+
+    punctuations = ("。", "？", "?", "！", "!", "；", ";", "：")
+    first_sentence_punctuations = ("，", "~", "、", ",") + punctuations
+
+    def __init__(self):
+        self.tts_text_buff = []
+        self.processed_chars = 0
+        self.is_first_sentence = True
+
+    def feed(self, text):
+        self.tts_text_buff.append(text)
+        full_text = "".join(self.tts_text_buff)
+        current_text = full_text[self.processed_chars :]
+        last_punct_pos = -1
+        punctuations_to_use = (
+            self.first_sentence_punctuations
+            if self.is_first_sentence
+            else self.punctuations
+        )
+        for punct in punctuations_to_use:
+            pos = current_text.rfind(punct)
+            if (pos != -1 and last_punct_pos == -1) or (
+                pos != -1 and pos < last_punct_pos
+            ):
+                last_punct_pos = pos
+        if last_punct_pos != -1:
+            segment_text_raw = current_text[: last_punct_pos + 1]
+            self.processed_chars += len(segment_text_raw)
+            self.is_first_sentence = False
+            return [segment_text_raw]
+        return []
+
+
+def tokenize(text, seed=0):
+    """按1~3个字符切分，模拟LLM流式输出的token"""
+    rng = random.Random(seed)
+    tokens = []
+    i = 0
+    while i < len(text):
+        step = rng.randint(1, 3)
+        tokens.append(text[i : i + step])
+        i += step
+    return tokens
+
+
+def build_text(base, length):
+    return (base * (length // len(base) + 1))[:length]
+
+
+def run_case(segmenter, tokens):
+    """返回 单token平均耗时(us)、单token最大耗时(us)、切出句数、首句在第几个token切出"""
+    first_index = None
+    segment_count = 0
+    costs = []
+    for index, token in enumerate(tokens):
+        start = time.perf_counter()
+        segments = segmenter.feed(token)
+        costs.append(time.perf_counter() - start)
+        if segments:
+            segment_count += len(segments)
+            if first_index is None:
+                first_index = index
+    return (
+        sum(costs) / len(costs) * 1e6,
+        max(costs) * 1e6,
+        segment_count,
+        first_index,
+    )
+
+
+def format_first(first_index):
+    if first_index is None:
+        return "未切出"
+    return f"{first_index + 1} / {(first_index + 1) * TOKEN_INTERVAL_MS}ms"
+
+
+async def main():
+    cases = [
+        (f"中文 {length}字", build_text(CHINESE_TEXT, length))
+        for length in RESPONSE_LENGTHS
+    ]
+    cases.append(("英文(数字/网址/缩写)", build_text(ENGLISH_TEXT, 2000)))
+    cases.append(("markdown", MARKDOWN_TEXT * 10))
+    cases.append(("首句无逗号", LONG_FIRST_TEXT))
+
+    table = []
+    for name, text in cases:
+        tokens = tokenize(text)
+        for mode, segmenter in (
+            ("旧实现", LegacySegmenter()),
+            ("增量断句", SentenceSegmenter()),
+        ):
+            avg_us, max_us, segment_count, first_index = run_case(segmenter, tokens)
+            table.append(
+                [
+                    name,
+                    mode,
+                    len(tokens),
+                    f"{avg_us:.2f}",
+                    f"{max_us:.1f}",
+                    segment_count,
+                    format_first(first_index),
+                ]
+            )
+
+    print("\n" + "=" * 50)
+    print("LLM输出断句测试结果")
+    print("=" * 50)
+    headers = [
+        "回复内容",
+        "模式",
+        "token数",
+        "单token平均耗时(us)",
+        "单token最大耗时(us)",
+        "切出句数",
+        "首句切出(第N个token/模拟延迟)",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print("- token按1~3个字符随机切分，模拟LLM流式输出")
+    print(f"- 模拟延迟按每个token间隔 {TOKEN_INTERVAL_MS}ms 计算")
+    print("- 旧实现每个token重新拼接全部文本并扫描未处理部分，耗时随回复长度增长")
+    print("- 旧实现不处理英文句号和换行，英文回复和markdown列表只能在问号、感叹号等处断句")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+import io
+import time
+import wave
+import random
+import shutil
+import asyncio
+import tempfile
+import numpy as np
+from tabulate import tabulate
+from core.providers.tts.base import TTSProviderBase
+from core.utils.cache.tts_cache import TTSAudioCache
+
+description = "TTS句子缓存命中率与首包延迟测试"
+
+# 固定话术（问候、确认、工具回复等）
+FIXED_PHRASES = [
+    "你好呀，有什么可以帮你的吗",
+    "好的，马上为你处理",
+    "已经帮你打开了",
+    "没问题",
+    "正在为你播放音乐",
+    "抱歉，我没有听清楚",
+    "今天天气不错哦",
+    "再见，下次再聊",
+]
+TURNS = 200
+FIXED_RATIO = 0.4
+# 模拟TTS接口耗时（秒）：均值与抖动
+MOCK_LATENCY = 0.25
+MOCK_JITTER = 0.1
+
+
+def build_wav(seconds=1.5, sample_rate=24000):
+    """生成一段正弦波WAV，模拟TTS接口返回的音频"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+class MockTTSProvider(TTSProviderBase):
+    """本地模拟的非流式TTS提供方"""
+
+    def __init__(self):
+        super().__init__({"voice": "mock", "format": "wav"}, delete_audio_file=True)
+        self.voice = "mock"
+        self.audio_file_type = "wav"
+        self.audio = build_wav()
+        self.calls = 0
+
+    async def text_to_speak(self, text, output_file):
+        self.calls += 1
+        await asyncio.sleep(max(0.0, random.gauss(MOCK_LATENCY, MOCK_JITTER)))
+        return self.audio
+
+
+def build_workload():
+    random.seed(42)
+    sentences = []
+    for i in range(TURNS):
+        if random.random() < FIXED_RATIO:
+            sentences.append(random.choice(FIXED_PHRASES))
+        else:
+            sentences.append(f"这是第{i}句独一无二的回复内容")
+    return sentences
+
+
+def run_pass(tts, sentences):
+    """逐句合成，记录每句从请求到第一帧opus的耗时"""
+    first_audio_latencies = []
+    start_calls = tts.calls
+    for text in sentences:
+        first_frame = []
+        start = time.perf_counter()
+
+        def handler(frame):
+            if not first_frame:
+                first_frame.append(time.perf_counter() - start)
+
+        tts.to_tts_stream(text, opus_handler=handler)
+        if first_frame:
+            first_audio_latencies.append(first_frame[0])
+    # 清空模拟播放队列
+    while not tts.tts_audio_queue.empty():
+        tts.tts_audio_queue.get_nowait()
+    latencies_ms = np.array(first_audio_latencies) * 1000
+    return {
+        "calls": tts.calls - start_calls,
+        "avg": float(latencies_ms.mean()) if len(latencies_ms) else 0,
+        "p95": float(np.percentile(latencies_ms, 95)) if len(latencies_ms) else 0,
+    }
+
+
+def main():
+    sentences = build_workload()
+    disk_dir = tempfile.mkdtemp(prefix="tts_cache_bench_")
+    table = []
+    try:
+        tts = MockTTSProvider()
+        tts.tts_cache = None
+        result = run_pass(tts, sentences)
+        table.append(
+            [
+                "无缓存",
+                result["calls"],
+                f"{result['avg']:.1f}",
+                f"{result['p95']:.1f}",
+                "-",
+                "-",
+            ]
+        )
+
+        cache = TTSAudioCache(64 * 1024 * 1024, disk_dir, 512 * 1024 * 1024)
+        tts = MockTTSProvider()
+        tts.tts_cache = cache
+        result = run_pass(tts, sentences)
+        stats = cache.get_stats()
+        table.append(
+            [
+                "缓存(冷启动)",
+                result["calls"],
+                f"{result['avg']:.1f}",
+                f"{result['p95']:.1f}",
+                f"{stats['hit_ratio']:.1%}",
+                stats["bytes_served"],
+            ]
+        )
+
+        # 模拟重启：内存层清空，磁盘层保留
+        cache = TTSAudioCache(64 * 1024 * 1024, disk_dir, 512 * 1024 * 1024)
+        tts = MockTTSProvider()
+        tts.tts_cache = cache
+        result = run_pass(tts, sentences)
+        stats = cache.get_stats()
+        table.append(
+            [
+                "缓存(重启后)",
+                result["calls"],
+                f"{result['avg']:.1f}",
+                f"{result['p95']:.1f}",
+                f"{stats['hit_ratio']:.1%}",
+                stats["bytes_served"],
+            ]
+        )
+    finally:
+        shutil.rmtree(disk_dir, ignore_errors=True)
+
+    print("\n" + "=" * 50)
+    print("TTS 句子缓存测试结果")
+    print("=" * 50)
+    headers = ["模式", "TTS接口调用次数", "平均首包(ms)", "P95首包(ms)", "命中率", "命中字节数"]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(f"- 共{TURNS}句，其中约{FIXED_RATIO:.0%}为固定话术")
+    print(f"- 模拟TTS接口耗时 {MOCK_LATENCY * 1000:.0f}±{MOCK_JITTER * 1000:.0f}ms")
+    print("- 首包耗时为从请求合成到产出第一帧opus的时间")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import time
+import socket
+import asyncio
+import threading
+import concurrent.futures
+import numpy as np
+import requests
+from aiohttp import web
+from tabulate import tabulate
+from core.utils.tts_http import TTSHttpRuntime
+
+description = "非流式TTS常驻事件循环与共享HTTP连接的单句开销测试"
+
+# 模拟TTS服务的合成耗时（秒）
+SERVER_DELAY = 0.05
+# 模拟返回的音频大小（字节），约1.5秒的16k单声道wav
+AUDIO_SIZE = 48 * 1024
+# 并发合成的句子数（模拟同时说话的连接数）
+CONCURRENCY_LEVELS = [1, 8, 32]
+# 每个并发任务依次合成的句子数
+SENTENCES_PER_WORKER = 20
+
+AUDIO_DATA = b"RIFF" + b"\x00" * (AUDIO_SIZE - 4)
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MockTTSServer:
+    """在独立线程中运行的模拟TTS服务，收到请求后等待固定时间返回wav音频"""
+
+    def __init__(self):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}/v1/audio/speech"
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.ready = threading.Event()
+        self.runner = None
+
+    async def _handle(self, request):
+        await request.read()
+        await asyncio.sleep(SERVER_DELAY)
+        return web.Response(body=AUDIO_DATA, content_type="audio/wav")
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_post("/v1/audio/speech", self._handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", self.port, backlog=1024)
+        self.loop.run_until_complete(site.start())
+        self.ready.set()
+        self.loop.run_forever()
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+def build_payload(index):
+    return {"model": "tts-1", "input": f"性能测试第{index}句", "voice": "alloy"}
+
+
+def legacy_synthesize(url, index):
+    """改造前的方式：每句话 asyncio.run 新建事件循环，内部用 requests 同步请求"""
+
+    async def text_to_speak():
+        start = time.perf_counter()
+        resp = requests.post(url, json=build_payload(index), stream=True)
+        ttfb = time.perf_counter() - start
+        data = resp.content
+        assert len(data) == AUDIO_SIZE
+        return ttfb
+
+    start = time.perf_counter()
+    ttfb = asyncio.run(text_to_speak())
+    return ttfb, time.perf_counter() - start
+
+
+def shared_synthesize(runtime, url, index):
+    """改造后的方式：提交到常驻TTS事件循环，使用服务地址对应的共享客户端"""
+
+    async def text_to_speak():
+        start = time.perf_counter()
+        async with runtime.get_client(url).stream(
+            "POST", url, json=build_payload(index)
+        ) as resp:
+            ttfb = time.perf_counter() - start
+            data = await resp.aread()
+        assert len(data) == AUDIO_SIZE
+        return ttfb
+
+    start = time.perf_counter()
+    ttfb = runtime.run(text_to_speak())
+    return ttfb, time.perf_counter() - start
+
+
+def run_workers(synthesize, concurrency):
+    """concurrency 个合成线程各自依次合成若干句，返回每句的首包耗时与总耗时"""
+
+    def worker(worker_index):
+        results = []
+        for i in range(SENTENCES_PER_WORKER):
+            results.append(synthesize(worker_index * SENTENCES_PER_WORKER + i))
+        return results
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(worker, i) for i in range(concurrency)]
+        results = [item for future in futures for item in future.result()]
+    return results
+
+
+def summarize(name, concurrency, results):
+    ttfb_ms = np.array([r[0] for r in results]) * 1000
+    overhead_ms = (np.array([r[1] for r in results]) - SERVER_DELAY) * 1000
+    return [
+        name,
+        concurrency,
+        f"{np.percentile(ttfb_ms, 50):.2f}",
+        f"{np.percentile(ttfb_ms, 95):.2f}",
+        f"{np.percentile(overhead_ms, 50):.2f}",
+        f"{np.percentile(overhead_ms, 95):.2f}",
+    ]
+
+
+async def main():
+    server = MockTTSServer()
+    server.start()
+    url = server.url
+    table = []
+    try:
+        for concurrency in CONCURRENCY_LEVELS:
+            # 预热，排除首次导入与建连的影响
+            legacy_synthesize(url, 0)
+            results = await asyncio.to_thread(
+                run_workers, lambda i: legacy_synthesize(url, i), concurrency
+            )
+            table.append(summarize("每句新建事件循环+requests", concurrency, results))
+
+            runtime = TTSHttpRuntime()
+            shared_synthesize(runtime, url, 0)
+            results = await asyncio.to_thread(
+                run_workers, lambda i: shared_synthesize(runtime, url, i), concurrency
+            )
+            table.append(summarize("常驻事件循环+共享连接", concurrency, results))
+            await asyncio.to_thread(runtime.close)
+            print(f"并发 {concurrency} 测试完成")
+    finally:
+        server.stop()
+
+    print("\n" + "=" * 50)
+    print("非流式TTS HTTP连接测试结果")
+    print("=" * 50)
+    headers = [
+        "模式",
+        "并发句数",
+        "首包P50(ms)",
+        "首包P95(ms)",
+        "单句额外开销P50(ms)",
+        "单句额外开销P95(ms)",
+    ]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(
+        f"- 本地模拟TTS服务每次合成耗时 {SERVER_DELAY * 1000:.0f}ms，"
+        f"返回 {AUDIO_SIZE // 1024}KB 音频"
+    )
+    print(f"- 每个并发任务依次合成 {SENTENCES_PER_WORKER} 句，模拟同一连接连续的多个句子")
+    print("- 首包: 发出请求到收到响应头的耗时；单句额外开销: 单句总耗时减去服务端合成耗时")
+    print("- 本地测试为明文HTTP，实际使用HTTPS时每次新建连接还需要TLS握手，共享连接的收益更大")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
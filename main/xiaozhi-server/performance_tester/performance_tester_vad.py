@@ -0,0 +1,128 @@
+import os
+import time
+import wave
+import asyncio
+import numpy as np
+from tabulate import tabulate
+from core.providers.vad.silero_batch import (
+    SileroBatchEngine,
+    SileroStreamState,
+    CHUNK_SAMPLES,
+)
+
+description = "VAD批量推理吞吐与延迟测试"
+
+MODEL_PATH = os.path.join(
+    "models", "snakers4_silero-vad", "src", "silero_vad", "data", "silero_vad.onnx"
+)
+TEST_WAV = os.path.join("config", "assets", "wakeup_words_short.wav")
+# 每个分片对应的真实时长（秒）
+CHUNK_DURATION = CHUNK_SAMPLES / 16000
+CONNECTION_COUNTS = [1, 10, 50, 100, 200, 400]
+TEST_SECONDS = 3
+
+
+def load_chunks():
+    """读取16kHz单声道测试音频，切分为512采样点的分片"""
+    if os.path.exists(TEST_WAV):
+        with wave.open(TEST_WAV, "rb") as wf:
+            pcm = wf.readframes(wf.getnframes())
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    else:
+        print(f"未找到测试音频 {TEST_WAV}，使用随机噪声代替")
+        samples = np.random.uniform(-0.1, 0.1, 16000 * 2).astype(np.float32)
+    count = len(samples) // CHUNK_SAMPLES
+    return [samples[i * CHUNK_SAMPLES : (i + 1) * CHUNK_SAMPLES] for i in range(count)]
+
+
+async def simulate_connection(engine, chunks, offset, deadline, latencies):
+    """模拟一个设备：按真实时间节奏每32ms提交一个分片"""
+    stream = SileroStreamState()
+    next_time = time.monotonic() + offset
+    index = 0
+    while True:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        if next_time > now:
+            await asyncio.sleep(next_time - now)
+        start = time.perf_counter()
+        await engine.infer(stream, chunks[index % len(chunks)])
+        latencies.append(time.perf_counter() - start)
+        index += 1
+        next_time += CHUNK_DURATION
+
+
+async def run_case(chunks, connection_count, batched):
+    if batched:
+        engine = SileroBatchEngine(MODEL_PATH, max_batch_size=64, batch_window_ms=4)
+    else:
+        # 批大小为1即退化为逐帧串行推理
+        engine = SileroBatchEngine(MODEL_PATH, max_batch_size=1, batch_window_ms=0)
+
+    latencies = []
+    start = time.monotonic()
+    deadline = start + TEST_SECONDS
+    tasks = [
+        simulate_connection(
+            engine,
+            chunks,
+            CHUNK_DURATION * i / connection_count,
+            deadline,
+            latencies,
+        )
+        for i in range(connection_count)
+    ]
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - start
+    stats = engine.get_stats()
+    engine.close()
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "fps": len(latencies) / elapsed,
+        "expected_fps": connection_count / CHUNK_DURATION,
+        "p50": float(np.percentile(latencies_ms, 50)) if len(latencies_ms) else 0,
+        "p99": float(np.percentile(latencies_ms, 99)) if len(latencies_ms) else 0,
+        "avg_batch": stats["avg_batch"],
+    }
+
+
+async def main():
+    if not os.path.exists(MODEL_PATH):
+        print(f"未找到模型文件 {MODEL_PATH}")
+        return
+
+    chunks = load_chunks()
+    table = []
+    for connection_count in CONNECTION_COUNTS:
+        for batched in (False, True):
+            result = await run_case(chunks, connection_count, batched)
+            table.append(
+                [
+                    connection_count,
+                    "批量" if batched else "逐帧",
+                    f"{result['fps']:.0f}/{result['expected_fps']:.0f}",
+                    f"{result['p50']:.2f}",
+                    f"{result['p99']:.2f}",
+                    f"{result['avg_batch']:.1f}",
+                ]
+            )
+            print(
+                f"连接数 {connection_count} {'批量' if batched else '逐帧'} 完成: "
+                f"{result['fps']:.0f} 帧/秒, p99 {result['p99']:.2f}ms"
+            )
+
+    print("\n" + "=" * 50)
+    print("VAD 批量推理测试结果")
+    print("=" * 50)
+    headers = ["连接数", "模式", "实际/应处理帧率(帧/秒)", "p50延迟(ms)", "p99延迟(ms)", "平均批大小"]
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+    print("\n测试说明:")
+    print(f"- 每个模拟连接按真实节奏每{CHUNK_DURATION * 1000:.0f}ms提交一个512采样点分片")
+    print("- 实际帧率低于应处理帧率说明推理跟不上实时音频")
+    print("- 延迟为单帧从提交到拿到语音概率的耗时，包含合批等待时间")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
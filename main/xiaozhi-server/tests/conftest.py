@@ -0,0 +1,11 @@
+import tempfile
+
+from config import settings
+from config.config_loader import read_config, get_project_dir
+from core.utils.cache.manager import cache_manager, CacheType
+
+# 单元测试只使用默认配置，不需要 data/.config.yaml，日志写到临时目录
+_config = read_config(get_project_dir() + "config.yaml")
+_config["log"]["log_dir"] = tempfile.mkdtemp(prefix="xiaozhi-test-")
+cache_manager.set(CacheType.CONFIG, "main_config", _config, ttl=float("inf"))
+settings.config_file_valid = True
@@ -0,0 +1,34 @@
+"""本地回显MCP服务，用于测试共享MCP服务池
+
+启动方式（在 xiaozhi-server 目录下）：python tests/fixtures/echo_mcp_server.py
+"""
+
+import asyncio
+import os
+
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("echo")
+
+
+@mcp.tool()
+def echo(text: str) -> str:
+    """原样返回输入的文本"""
+    return text
+
+
+@mcp.tool()
+async def slow_echo(text: str, delay_ms: int = 100) -> str:
+    """等待指定毫秒后返回输入的文本，用于模拟耗时工具"""
+    await asyncio.sleep(delay_ms / 1000)
+    return text
+
+
+@mcp.tool()
+def server_pid() -> int:
+    """返回当前MCP服务进程号，用于确认请求落在哪个副本上"""
+    return os.getpid()
+
+
+if __name__ == "__main__":
+    mcp.run()
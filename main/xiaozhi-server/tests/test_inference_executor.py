@@ -0,0 +1,27 @@
+import asyncio
+import threading
+
+from core.providers.asr.inference_executor import InferenceExecutor
+
+
+def test_cancelled_queued_call_does_not_leak_pending():
+    executor = InferenceExecutor("test", max_concurrency=1)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.create_task(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        # 推理线程被占用，第二个请求在队列中等待时被取消
+        queued = asyncio.create_task(executor.run(lambda: None))
+        await asyncio.sleep(0.05)
+        assert (executor.pending, executor.running) == (1, 1)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        release.set()
+        await running
+
+    try:
+        asyncio.run(main())
+        assert (executor.pending, executor.running) == (0, 0)
+    finally:
+        executor.shutdown()
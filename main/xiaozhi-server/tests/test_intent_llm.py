@@ -0,0 +1,29 @@
+from core.providers.intent.intent_llm.intent_llm import IntentProvider
+
+
+def make_function(name, description):
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": {"type": "object", "properties": {}},
+        },
+    }
+
+
+def test_system_prompt_follows_each_connection_functions():
+    # 实例池中同一个意图识别实例被不同插件、MCP工具的智能体共享
+    provider = IntentProvider({})
+    plugins = [make_function("get_weather", "查询天气")]
+    device_tools = [make_function("self.light.set", "打开台灯")]
+
+    first = provider._get_system_prompt(plugins)
+    second = provider._get_system_prompt(device_tools)
+    assert "get_weather" in first and "self.light.set" not in first
+    assert "self.light.set" in second and "get_weather" not in second
+    assert provider._get_system_prompt(list(plugins)) is first
+
+    # 同名函数的描述变化后也不能复用旧提示词
+    renamed = [make_function("self.light.set", "打开卧室灯")]
+    assert "打开卧室灯" in provider._get_system_prompt(renamed)
@@ -0,0 +1,58 @@
+from core.utils.jitter_buffer import JitterBuffer
+
+# PCM 16kHz 16bit 单声道 60ms 的包
+FRAME_MS = 60
+FRAME_BYTES = 16000 * FRAME_MS // 1000 * 2
+
+
+def make_packets(count):
+    return [bytes([i]) * FRAME_BYTES for i in range(count)]
+
+
+def make_buffer(output):
+    return JitterBuffer(output.append, conceal=False)
+
+
+def test_constant_timestamp_passes_through_in_arrival_order():
+    output = []
+    buffer = make_buffer(output)
+    packets = make_packets(20)
+    for index, packet in enumerate(packets):
+        buffer.push(packet, 0, now=index * 0.06)
+    assert output == packets
+    assert buffer.stats["duplicate"] == 0
+    assert len(buffer) == 0
+
+
+def test_repeated_timestamp_passes_through_in_arrival_order():
+    output = []
+    buffer = make_buffer(output)
+    packets = make_packets(20)
+    for index, packet in enumerate(packets):
+        buffer.push(packet, index // 3 * FRAME_MS, now=index * 0.06)
+    assert output == packets
+    assert buffer.stats["duplicate"] == 0
+
+
+def test_increasing_timestamp_is_reordered_and_deduplicated():
+    output = []
+    buffer = make_buffer(output)
+    packets = make_packets(20)
+    order = list(range(10)) + [9, 11, 10] + list(range(12, 20))
+    for step, index in enumerate(order):
+        buffer.push(packets[index], index * FRAME_MS, now=step * 0.06)
+    assert output == packets
+    assert buffer.stats["duplicate"] == 1
+    assert buffer.stats["reordered"] == 1
+
+
+def test_reorders_again_after_timestamps_advance():
+    output = []
+    buffer = make_buffer(output)
+    packets = make_packets(30)
+    for index in range(5):
+        buffer.push(packets[index], 0, now=index * 0.06)
+    order = list(range(5, 25)) + [26, 25] + list(range(27, 30))
+    for step, index in enumerate(order, 5):
+        buffer.push(packets[index], (index - 4) * FRAME_MS, now=step * 0.06)
+    assert output == packets
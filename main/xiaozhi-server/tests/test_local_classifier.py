@@ -0,0 +1,38 @@
+import json
+
+from core.providers.intent.local_classifier import LocalIntentClassifier
+
+FUNCTIONS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "handle_exit_intent",
+            "description": "当用户想结束对话或需要退出系统时调用",
+            "parameters": {
+                "type": "object",
+                "properties": {"say_goodbye": {"type": "string"}},
+                "required": ["say_goodbye"],
+            },
+        },
+    }
+]
+
+
+def intent_name(text):
+    intent, _ = LocalIntentClassifier(FUNCTIONS).classify(text)
+    return json.loads(intent)["function_call"]["name"] if intent else None
+
+
+def test_exit_phrase_hits_keyword_fast_path():
+    assert intent_name("不想聊了") == "handle_exit_intent"
+    assert intent_name("再见吧") == "handle_exit_intent"
+
+
+def test_exit_question_is_left_to_llm():
+    assert intent_name("不想聊了吗") is None
+    assert intent_name("你要说再见了呢") is None
+    assert intent_name("不想聊了？") is None
+
+
+def test_time_question_still_hits_keyword_fast_path():
+    assert intent_name("现在几点了？") == "result_for_context"
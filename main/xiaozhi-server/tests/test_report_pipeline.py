@@ -0,0 +1,52 @@
+import asyncio
+
+import httpx
+
+from config.manage_api_client import ManageApiBusinessException, PartialReportError
+from core.utils.report_pipeline import ReportPipeline, ReportRecord
+
+
+def make_batch(count):
+    return [ReportRecord("mac", "session", 1, f"第{i}句话", None, i) for i in range(count)]
+
+
+def make_pipeline(tmp_path, sender):
+    return ReportPipeline(
+        {"spool_dir": str(tmp_path), "retry_base_delay": 0, "max_retries": 2},
+        sender=sender,
+    )
+
+
+def test_partial_failure_retries_only_failed_records(tmp_path):
+    sent = []
+
+    async def sender(records):
+        sent.append([record.content for record in records])
+        if len(sent) == 1:
+            # 第1条超时可重试，第2条业务错误不可重试，其余已成功
+            raise PartialReportError(
+                [
+                    (1, httpx.ConnectTimeout("timeout")),
+                    (2, ManageApiBusinessException(500, "error")),
+                ],
+                len(records),
+            )
+
+    pipeline = make_pipeline(tmp_path, sender)
+    assert asyncio.run(pipeline._send_with_retry(make_batch(4))) is True
+    assert sent == [["第0句话", "第1句话", "第2句话", "第3句话"], ["第1句话"]]
+    assert pipeline.stats["sent"] == 3
+    assert pipeline.stats["dropped"] == 1
+    assert pipeline.stats["spilled"] == 0
+
+
+def test_partial_failure_spills_only_failed_records(tmp_path):
+    async def sender(records):
+        raise PartialReportError(
+            [(0, httpx.ConnectTimeout("timeout"))], len(records)
+        )
+
+    pipeline = make_pipeline(tmp_path, sender)
+    assert asyncio.run(pipeline._send_with_retry(make_batch(3))) is False
+    assert pipeline.stats["spilled"] == 1
+    assert pipeline.stats["dropped"] == 0
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.dto.dto import InterfaceType
+from core.providers.asr.speculative import SpeculativeASR
+
+
+class FakeASR(ASRProviderBase):
+    """与 xunfei_stream 相同：说话过程中累积识别结果，speech_to_text 取走后清空"""
+
+    def __init__(self, interface_type):
+        super().__init__()
+        self.interface_type = interface_type
+        self.text = ""
+        self.calls = 0
+
+    async def speech_to_text(self, opus_data, session_id, audio_format="opus"):
+        self.calls += 1
+        text, self.text = self.text, ""
+        return text, None
+
+
+class FakeConnection:
+    def __init__(self):
+        self.session_id = "test"
+        self.audio_format = "opus"
+        self.client_listen_mode = "auto"
+        self.asr_audio = [b"\x00"] * 20
+        # 已静音 500ms
+        self.last_activity_time = time.time() * 1000 - 500
+
+
+def start(asr):
+    async def run():
+        speculative = SpeculativeASR({"enabled": True, "provisional_silence_ms": 100})
+        speculative.maybe_start(asr, FakeConnection())
+        task = speculative.commit()
+        if task is not None:
+            await task
+        return task
+
+    return asyncio.run(run())
+
+
+def test_streaming_asr_is_not_speculated():
+    asr = FakeASR(InterfaceType.STREAM)
+    asr.text = "今天天气"
+    assert start(asr) is None
+    # 累积的识别结果没有被提前取走，端点前到达的后续结果仍属于本句
+    assert asr.calls == 0
+    assert asr.text == "今天天气"
+
+
+def test_non_streaming_asr_is_speculated():
+    asr = FakeASR(InterfaceType.NON_STREAM)
+    assert start(asr) is not None
+    assert asr.calls == 1
+
+
+def test_provider_can_opt_out():
+    asr = FakeASR(InterfaceType.LOCAL)
+    asr.speculative_asr_supported = False
+    assert start(asr) is None